@@ -7,7 +7,7 @@ echo ========================================
 echo.
 
 echo [1/6] Instalando dependencias...
-python -m pip install -q Django==5.0.0 djangorestframework==3.14.0 django-cors-headers==4.3.1 python-decouple==3.8 Pillow reportlab==4.0.7 python-dateutil==2.8.2
+python -m pip install -q -r requirements.txt
 echo OK Dependencias instaladas!
 echo.
 
@@ -52,7 +52,9 @@ echo.
 echo El navegador se abrira automaticamente en http://localhost:8000
 echo.
 echo Presiona Ctrl+C para detener el servidor
+echo Los trabajos en segundo plano corren en la ventana "Trabajador de tareas"
 echo.
+start "Trabajador de tareas" python manage.py run_worker
 timeout /t 3
 start http://localhost:8000
 python manage.py runserver
@@ -28,6 +28,9 @@ python -m pip install reportlab==4.0.7
 echo Instalando Python DateUtil...
 python -m pip install python-dateutil==2.8.2
 
+echo Instalando OpenPyXL (importacion de extractos XLSX)...
+python -m pip install openpyxl
+
 echo.
 echo ========================================
 echo  DEPENDENCIAS INSTALADAS!
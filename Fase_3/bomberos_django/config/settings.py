@@ -3,6 +3,7 @@ Django settings for Bomberos project.
 """
 
 from pathlib import Path
+from corsheaders.defaults import default_headers
 import os
 
 # Build paths inside the project
@@ -65,6 +66,12 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Las transacciones toman el bloqueo de escritura al empezar (BEGIN IMMEDIATE)
+            # y esperan hasta 20 s si otro proceso está escribiendo (ventas simultáneas)
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
@@ -85,6 +92,27 @@ DATABASES = {
 }
 """
 
+# Caché - local del proceso por ahora
+# Los registros únicos de configuración (voluntarios/utils_configuracion.py) se
+# invalidan por versión en este caché; con varios workers usar un caché
+# compartido para que un cambio se vea en todos los procesos
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bomberos',
+    }
+}
+
+# Para compartir el caché entre workers, reemplazar lo de arriba por esto:
+"""
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/1',
+    }
+}
+"""
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -134,6 +162,7 @@ REST_FRAMEWORK = {
 # CORS - SIMPLIFICADO para desarrollo local
 CORS_ALLOW_ALL_ORIGINS = True  # Permitir todos los orígenes en desarrollo
 CORS_ALLOW_CREDENTIALS = True  # Permitir cookies
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')  # Reintentos de pagos (utils_idempotencia)
 
 # Login
 LOGIN_URL = 'login'
@@ -6,7 +6,7 @@ from django.urls import path, include
 from django.views.generic import TemplateView
 from django.conf import settings
 from django.conf.urls.static import static
-from voluntarios import cuotas_simple_views, ciclos_cuotas_simple_views, pdf_cuotas_views, configuracion_cuotas_simple_views, estado_cuotas_simple_views, beneficios_simple_views, voluntarios_simple_views
+from voluntarios import cuotas_simple_views, ciclos_cuotas_simple_views, pdf_cuotas_views, configuracion_cuotas_simple_views, estado_cuotas_simple_views, beneficios_simple_views, voluntarios_simple_views, pdf_lote_views
 
 # Helper para servir templates
 def template(name):
@@ -31,6 +31,10 @@ urlpatterns = [
     path('api/voluntarios/pdf-deudores-cuotas/', pdf_cuotas_views.pdf_deudores_cuotas, name='pdf_deudores_cuotas'),
     path('api/voluntarios/pdf-deudores-cuotas/<int:anio>/', pdf_cuotas_views.pdf_deudores_cuotas, name='pdf_deudores_cuotas_anio'),
     
+    # PDFs por lote (cuotas y uniformes de muchos voluntarios)
+    path('api/voluntarios/pdf-lote/', pdf_lote_views.pdf_lote, name='pdf_lote'),
+    path('api/voluntarios/pdf-lote/progreso/<str:seguimiento>/', pdf_lote_views.progreso_pdf_lote, name='progreso_pdf_lote'),
+    
     # Estado de Cuotas SIMPLE - SIN DRF
     path('api/voluntarios/<int:voluntario_id>/estado-cuotas-simple/', estado_cuotas_simple_views.estado_cuotas_simple, name='estado_cuotas_simple_direct'),
     path('api/voluntarios/<int:voluntario_id>/activar-estudiante-simple/', estado_cuotas_simple_views.activar_estudiante_simple, name='activar_estudiante_simple_direct'),
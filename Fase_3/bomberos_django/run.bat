@@ -1,4 +1,6 @@
 @echo off
 echo Iniciando servidor Django...
 call venv\Scripts\activate
+rem Trabajos en segundo plano (PDFs, ranking, asignacion de beneficios)
+start "Trabajador de tareas" python manage.py run_worker
 python manage.py runserver
@@ -38,5 +38,8 @@ echo    python manage.py createsuperuser
 echo.
 echo Luego inicia el servidor con:
 echo    python manage.py runserver
+echo.
+echo Y en otra ventana el trabajador de tareas:
+echo    python manage.py run_worker
 echo ========================================
 pause
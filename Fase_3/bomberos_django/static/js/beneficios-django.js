@@ -239,10 +239,16 @@ class SistemaBeneficiosDjango {
 
             const result = await response.json();
             
-            this.mostrarNotificacion(`✅ ${result.mensaje}<br><strong>Asignaciones creadas: ${result.asignaciones_creadas}</strong>`, 'success');
-            
+            // La asignación de tarjetas corre en segundo plano (202): esperar el trabajo
+            this.mostrarNotificacion(`⏳ ${result.mensaje}`, 'info');
             event.target.reset();
             
+            const trabajo = await this.esperarTrabajo(result.trabajo.url_estado);
+            if (trabajo.estado !== 'completado') {
+                throw new Error(trabajo.error || 'La asignación de tarjetas no terminó');
+            }
+            this.mostrarNotificacion(`✅ Beneficio creado<br><strong>Asignaciones creadas: ${trabajo.resultado.total_asignaciones}</strong>`, 'success');
+            
             await this.cargarDatos();
             this.renderizarEstadisticas();
             this.renderizarBeneficios();
@@ -252,6 +258,18 @@ class SistemaBeneficiosDjango {
         }
     }
 
+    async esperarTrabajo(urlEstado, intervalo = 1000, intentos = 300) {
+        // Consulta /api/trabajos/<id>/ hasta que termine (completado o error)
+        for (let i = 0; i < intentos; i++) {
+            const response = await fetch(urlEstado);
+            if (!response.ok) throw new Error('No se pudo consultar el estado del trabajo');
+            const trabajo = await response.json();
+            if (trabajo.estado === 'completado' || trabajo.estado === 'error') return trabajo;
+            await new Promise(resolve => setTimeout(resolve, intervalo));
+        }
+        throw new Error('El trabajo sigue en cola; revise que run_worker esté en ejecución');
+    }
+
     async verDeudores(beneficioId) {
         // Obtener deudores de este beneficio
         const deudores = this.asignaciones.filter(a => 
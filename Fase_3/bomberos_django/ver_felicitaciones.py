@@ -49,7 +49,7 @@ else:
         if fel.autoridad_otorgante:
             print(f"  Autoridad: {fel.autoridad_otorgante}")
         print(f"  Motivo: {fel.motivo[:100]}{'...' if len(fel.motivo) > 100 else ''}")
-        print(f"  Documento: {'Sí' if fel.documento_felicitacion else 'No'}")
+        print(f"  Documento: {'Sí' if fel.documento_felicitacion_id else 'No'}")
         print(f"  Registrado por: {fel.created_by.username if fel.created_by else 'N/A'}")
         print(f"  Fecha registro: {fel.created_at.strftime('%d/%m/%Y %H:%M')}")
         print()
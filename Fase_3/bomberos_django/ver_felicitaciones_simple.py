@@ -34,7 +34,7 @@ else:
         if f.autoridad_otorgante:
             print(f"    Autoridad: {f.autoridad_otorgante}")
         print(f"    Motivo: {f.motivo[:80]}{'...' if len(f.motivo) > 80 else ''}")
-        print(f"    Doc adjunto: {'SI' if f.documento_felicitacion else 'NO'}")
+        print(f"    Doc adjunto: {'SI' if f.documento_felicitacion_id else 'NO'}")
         print(f"    Registrado por: {f.created_by.username if f.created_by else 'N/A'}")
         print(f"    Fecha registro: {f.created_at.strftime('%d/%m/%Y %H:%M')}")
         print()
@@ -5,13 +5,16 @@ from .models import (
     Uniforme, PiezaUniforme, ContadorUniformes,
     Cuota, PagoCuota, Beneficio, AsignacionBeneficio, PagoBeneficio,
     ConfiguracionCuotas, EstadoCuotasBombero, MovimientoFinanciero,
-    Felicitacion, LogoCompania
+    Felicitacion, LogoCompania, EstadoCuentaCuotas, CierreMensualFinanciero,
+    ResumenTesoreria, EstadisticaBeneficio, SesionPuntoVenta, VentaPuntoVenta,
+    RespuestaIdempotente, ArchivoBlob, Trabajo
 )
+from .utils_tesoreria import sincronizar_estado_cuenta
 
 @admin.register(Voluntario)
 class VoluntarioAdmin(admin.ModelAdmin):
     list_display = ['clave_bombero', 'nombre_completo', 'rut', 'estado_bombero', 'fecha_ingreso', 'compania']
-    list_filter = ['estado_bombero', 'compania', 'es_estudiante', 'cuotas_activas']
+    list_filter = ['estado_bombero', 'categoria', 'compania', 'es_estudiante', 'cuotas_activas']
     search_fields = ['nombre', 'apellido_paterno', 'apellido_materno', 'rut', 'clave_bombero']
     ordering = ['fecha_ingreso']
     
@@ -136,6 +139,15 @@ class PagoCuotaAdmin(admin.ModelAdmin):
     search_fields = ['voluntario__nombre', 'voluntario__clave_bombero', 'numero_comprobante']
     ordering = ['-anio', '-mes', '-fecha_pago']
     date_hierarchy = 'fecha_pago'
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        sincronizar_estado_cuenta(obj.voluntario, obj.anio)
+    
+    def delete_model(self, request, obj):
+        voluntario, anio = obj.voluntario, obj.anio
+        super().delete_model(request, obj)
+        sincronizar_estado_cuenta(voluntario, anio)
 
 @admin.register(Beneficio)
 class BeneficioAdmin(admin.ModelAdmin):
@@ -178,6 +190,15 @@ class EstadoCuotasBomberoAdmin(admin.ModelAdmin):
     list_filter = ['es_estudiante', 'cuotas_desactivadas']
     search_fields = ['voluntario__nombre', 'voluntario__clave_bombero']
     ordering = ['voluntario__clave_bombero']
+    raw_id_fields = ['documento_estudiante']
+
+@admin.register(EstadoCuentaCuotas)
+class EstadoCuentaCuotasAdmin(admin.ModelAdmin):
+    list_display = ['voluntario', 'anio', 'cantidad_meses_pagados', 'total_pagado', 'precio_cuota', 'monto_adeudado', 'exento', 'fecha_ultimo_pago']
+    list_filter = ['anio', 'exento']
+    search_fields = ['voluntario__nombre', 'voluntario__clave_bombero']
+    ordering = ['-anio', 'voluntario__clave_bombero']
+    readonly_fields = ['meses_pagados', 'cantidad_meses_pagados', 'total_pagado', 'precio_cuota', 'exento', 'monto_adeudado', 'fecha_ultimo_pago', 'ultima_actualizacion']
 
 @admin.register(MovimientoFinanciero)
 class MovimientoFinancieroAdmin(admin.ModelAdmin):
@@ -187,6 +208,49 @@ class MovimientoFinancieroAdmin(admin.ModelAdmin):
     ordering = ['-fecha', '-created_at']
     date_hierarchy = 'fecha'
 
+@admin.register(CierreMensualFinanciero)
+class CierreMensualFinancieroAdmin(admin.ModelAdmin):
+    list_display = ['anio', 'mes', 'saldo_inicial', 'ingresos', 'egresos', 'saldo_final', 'cantidad_movimientos']
+    list_filter = ['anio']
+    ordering = ['-anio', '-mes']
+    readonly_fields = ['anio', 'mes', 'saldo_inicial', 'ingresos', 'egresos', 'saldo_final', 'cantidad_movimientos', 'detalle_categorias', 'ingresos_acumulados', 'egresos_acumulados', 'movimientos_acumulados', 'fecha_cierre']
+
+@admin.register(ResumenTesoreria)
+class ResumenTesoreriaAdmin(admin.ModelAdmin):
+    list_display = ['anio', 'mes', 'dimension', 'clave', 'tipo', 'total', 'cantidad']
+    list_filter = ['dimension', 'anio', 'tipo']
+    ordering = ['-anio', '-mes', 'dimension', 'clave']
+
+@admin.register(EstadisticaBeneficio)
+class EstadisticaBeneficioAdmin(admin.ModelAdmin):
+    list_display = ['beneficio', 'total_asignaciones', 'monto_total_esperado', 'monto_recaudado', 'monto_pendiente', 'asignaciones_con_deuda', 'ultima_actualizacion']
+    search_fields = ['beneficio__nombre']
+    ordering = ['-beneficio__fecha_evento']
+    readonly_fields = ['beneficio', 'total_asignaciones', 'total_tarjetas_asignadas', 'total_tarjetas_vendidas', 'total_tarjetas_extras', 'total_tarjetas_liberadas', 'monto_total_esperado', 'monto_recaudado', 'monto_pendiente', 'asignaciones_pendiente', 'asignaciones_parcial', 'asignaciones_completo', 'asignaciones_liberado', 'asignaciones_con_deuda', 'ultima_actualizacion']
+
+@admin.register(SesionPuntoVenta)
+class SesionPuntoVentaAdmin(admin.ModelAdmin):
+    list_display = ['beneficio', 'nombre', 'activa', 'fecha_apertura', 'fecha_cierre', 'abierta_por']
+    list_filter = ['activa', 'beneficio']
+    ordering = ['-fecha_apertura']
+
+@admin.register(VentaPuntoVenta)
+class VentaPuntoVentaAdmin(admin.ModelAdmin):
+    list_display = ['clave_idempotencia', 'sesion', 'asignacion', 'tipo_pago', 'cantidad_tarjetas', 'monto', 'estado', 'fecha_registro', 'fecha_aplicacion']
+    list_filter = ['estado', 'tipo_pago', 'sesion']
+    search_fields = ['clave_idempotencia', 'asignacion__voluntario__clave_bombero']
+    ordering = ['-id']
+    readonly_fields = ['clave_idempotencia', 'pago', 'fecha_registro', 'fecha_aplicacion']
+
+@admin.register(RespuestaIdempotente)
+class RespuestaIdempotenteAdmin(admin.ModelAdmin):
+    list_display = ['clave', 'ruta', 'codigo_estado', 'usuario', 'fecha_creacion', 'expira']
+    list_filter = ['ruta', 'codigo_estado']
+    search_fields = ['clave']
+    ordering = ['-fecha_creacion']
+    readonly_fields = ['clave', 'ruta', 'huella', 'usuario', 'codigo_estado', 'tipo_contenido', 'fecha_creacion', 'expira']
+    exclude = ['contenido']
+
 # ==================== FELICITACIONES ====================
 
 @admin.register(Felicitacion)
@@ -196,6 +260,7 @@ class FelicitacionAdmin(admin.ModelAdmin):
     search_fields = ['voluntario__nombre', 'voluntario__clave_bombero', 'motivo', 'nombre_felicitacion']
     ordering = ['-fecha_felicitacion']
     date_hierarchy = 'fecha_felicitacion'
+    raw_id_fields = ['documento_felicitacion']
 
 
 # ==================== LOGOS ====================
@@ -207,6 +272,7 @@ class LogoCompaniaAdmin(admin.ModelAdmin):
     search_fields = ['nombre', 'descripcion']
     ordering = ['-fecha_carga']
     readonly_fields = ['fecha_carga', 'cargado_por']
+    raw_id_fields = ['imagen']
     
     fieldsets = (
         ('Información del Logo', {
@@ -215,7 +281,7 @@ class LogoCompaniaAdmin(admin.ModelAdmin):
         ('Contextos de Uso', {
             'fields': ('usar_en_pdfs', 'usar_en_asistencias', 'usar_en_sidebar')
         }),
-        ('Imagen (Base64)', {
+        ('Imagen', {
             'fields': ('imagen',),
             'classes': ('collapse',)
         }),
@@ -224,3 +290,23 @@ class LogoCompaniaAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+# ==================== ARCHIVOS ====================
+
+@admin.register(ArchivoBlob)
+class ArchivoBlobAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'tipo_contenido', 'tamano', 'fecha_creacion', 'fecha_ultimo_uso']
+    list_filter = ['tipo_contenido']
+    search_fields = ['sha256']
+    ordering = ['-fecha_creacion']
+    readonly_fields = ['sha256', 'tamano', 'tipo_contenido', 'fecha_creacion', 'fecha_ultimo_uso']
+
+
+@admin.register(Trabajo)
+class TrabajoAdmin(admin.ModelAdmin):
+    list_display = ['id', 'tipo', 'estado', 'hechos', 'total', 'intentos', 'fecha_creacion', 'fecha_fin']
+    list_filter = ['tipo', 'estado']
+    ordering = ['-fecha_creacion']
+    raw_id_fields = ['creado_por']
+    readonly_fields = ['fecha_creacion', 'fecha_inicio', 'fecha_latido', 'fecha_fin', 'trabajador']
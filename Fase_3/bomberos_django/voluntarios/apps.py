@@ -5,3 +5,7 @@ class VoluntariosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'voluntarios'
     verbose_name = 'Gestión de Voluntarios'
+
+    def ready(self):
+        # Registrar señales (ranking de asistencias)
+        from . import signals  # noqa: F401
@@ -0,0 +1,129 @@
+"""
+Descarga de archivos del almacén direccionado por contenido (utils_blobs.py)
+"""
+import os
+import re
+
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+from django.views.decorators.http import require_http_methods
+
+from .models import ArchivoBlob
+from .utils_blobs import TAMANO_TROZO, TIPOS_EN_LINEA, TIPO_PREDETERMINADO, es_sha256, ruta_blob
+
+
+# Un blob nunca cambia: el navegador puede guardarlo indefinidamente
+CACHE_CONTROL_BLOBS = 'private, max-age=31536000, immutable'
+
+_PATRON_RANGO = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _interpretar_rango(cabecera, tamano):
+    """
+    Rango simple 'bytes=a-b', 'bytes=a-' o 'bytes=-n' como (inicio, fin) inclusive
+    Retorna None si no hay rango utilizable (se responde el archivo completo)
+    y False si el rango queda fuera del archivo (416).
+    """
+    coincidencia = _PATRON_RANGO.match(cabecera.strip()) if cabecera else None
+    if not coincidencia or coincidencia.groups() == ('', ''):
+        # Sin Range, malformado o con varios rangos: se ignora
+        return None
+    inicio, fin = coincidencia.groups()
+    if inicio == '':
+        sufijo = int(fin)
+        if sufijo == 0 or tamano == 0:
+            return False
+        return max(tamano - sufijo, 0), tamano - 1
+    inicio = int(inicio)
+    fin = min(int(fin), tamano - 1) if fin else tamano - 1
+    if inicio >= tamano or fin < inicio:
+        return False
+    return inicio, fin
+
+
+def _leer_tramo(ruta, inicio, largo):
+    with open(ruta, 'rb') as origen:
+        origen.seek(inicio)
+        while largo > 0:
+            trozo = origen.read(min(TAMANO_TROZO, largo))
+            if not trozo:
+                break
+            largo -= len(trozo)
+            yield trozo
+
+
+def _coincide_etag(cabecera, etag):
+    if not cabecera:
+        return False
+    etiquetas = [e.strip() for e in cabecera.split(',')]
+    return '*' in etiquetas or any(e.removeprefix('W/') == etag for e in etiquetas)
+
+
+@require_http_methods(["GET", "HEAD"])
+def descargar_archivo(request, sha256):
+    """
+    Descarga por streaming un archivo del almacén
+    GET /api/archivos/<sha256>/?nombre=certificado.pdf&descargar=1
+
+    - Solo con sesión iniciada (certificados y documentos de los voluntarios):
+      conocer el hash no basta.
+    - Solo PDF e imágenes se muestran en línea; cualquier otro tipo (también los
+      guardados antes de detectar el tipo por contenido) se fuerza como adjunto.
+      CSP sandbox impide que el contenido ejecute scripts en este origen.
+    - ETag es el hash: If-None-Match responde 304 sin leer el archivo.
+    - Range: bytes=inicio-fin responde 206 con solo ese tramo (If-Range respetado).
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'No autenticado'}, status=401)
+
+    blob = ArchivoBlob.objects.filter(sha256=sha256).first() if es_sha256(sha256) else None
+    ruta = ruta_blob(sha256) if blob else None
+    if not blob or not os.path.exists(ruta):
+        return JsonResponse({'error': 'Archivo no encontrado'}, status=404)
+
+    etag = f'"{blob.sha256}"'
+    en_linea = blob.tipo_contenido in TIPOS_EN_LINEA
+    tipo_contenido = blob.tipo_contenido if en_linea else TIPO_PREDETERMINADO
+    cabeceras = {
+        'ETag': etag,
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': CACHE_CONTROL_BLOBS,
+        'Content-Security-Policy': 'sandbox',
+        'X-Content-Type-Options': 'nosniff',
+    }
+    nombre = request.GET.get('nombre') or blob.sha256
+    adjunto = not en_linea or request.GET.get('descargar', '').lower() in ('1', 'true')
+    if adjunto or request.GET.get('nombre'):
+        cabeceras['Content-Disposition'] = content_disposition_header(adjunto, nombre)
+
+    if _coincide_etag(request.META.get('HTTP_IF_NONE_MATCH'), etag):
+        respuesta = HttpResponse(status=304)
+        for clave, valor in cabeceras.items():
+            respuesta[clave] = valor
+        return respuesta
+
+    rango = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range or if_range.strip() == etag:
+        rango = _interpretar_rango(request.META.get('HTTP_RANGE'), blob.tamano)
+
+    if rango is False:
+        respuesta = HttpResponse(status=416)
+        respuesta['Content-Range'] = f'bytes */{blob.tamano}'
+    elif request.method == 'HEAD':
+        respuesta = HttpResponse(content_type=tipo_contenido)
+        respuesta['Content-Length'] = str(blob.tamano)
+    elif rango:
+        inicio, fin = rango
+        largo = fin - inicio + 1
+        respuesta = StreamingHttpResponse(
+            _leer_tramo(ruta, inicio, largo), status=206, content_type=tipo_contenido
+        )
+        respuesta['Content-Range'] = f'bytes {inicio}-{fin}/{blob.tamano}'
+        respuesta['Content-Length'] = str(largo)
+    else:
+        respuesta = FileResponse(open(ruta, 'rb'), content_type=tipo_contenido)
+
+    for clave, valor in cabeceras.items():
+        respuesta[clave] = valor
+    return respuesta
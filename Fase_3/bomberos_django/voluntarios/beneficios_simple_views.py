@@ -12,8 +12,15 @@ import json
 from datetime import datetime
 
 from .models import Voluntario, Beneficio, AsignacionBeneficio, PagoBeneficio, MovimientoFinanciero, LogoCompania
-from dateutil.relativedelta import relativedelta
+from .utils_tesoreria import (
+    crear_beneficio, foto_asignacion, ajustar_estadistica_beneficio,
+    vender_tarjetas_asignacion, reintentar_si_bloqueada
+)
 from .serializers import PagoBeneficioSerializer
+from .utils_idempotencia import idempotente
+from .utils_blobs import data_url_blob
+from .utils_trabajos import encolar_trabajo
+from .views_trabajos import respuesta_trabajo_encolado
 
 
 @csrf_exempt
@@ -24,10 +31,10 @@ def obtener_logo_simple(request):
     GET /api/voluntarios/logo-simple/
     """
     try:
-        logo = LogoCompania.objects.filter(usar_en_pdfs=True).first()
+        logo = LogoCompania.objects.select_related('imagen').filter(usar_en_pdfs=True).first()
         if logo and logo.imagen:
             return JsonResponse({
-                'logo': logo.imagen,
+                'logo': data_url_blob(logo.imagen),
                 'tiene_logo': True
             }, status=200)
         else:
@@ -114,6 +121,9 @@ def crear_beneficio_simple(request):
     Crear beneficio CON asignaciones automáticas a todos los voluntarios
     POST /api/voluntarios/crear-beneficio-simple/
     
+    Responde 202: las tarjetas se asignan en segundo plano (trabajo
+    asignar_beneficio); el resumen queda en /api/trabajos/<id>/.
+    
     Body JSON:
     {
         "nombre": "Curanto Junio 2025",
@@ -132,7 +142,7 @@ def crear_beneficio_simple(request):
         nombre = data.get('nombre')
         descripcion = data.get('descripcion', '')
         fecha_evento_str = data.get('fecha_evento')
-        precio_tarjeta = Decimal(data.get('precio_tarjeta', 0))
+        precio_tarjeta = Decimal(str(data.get('precio_tarjeta', 0)))
         
         tarjetas_voluntarios = int(data.get('tarjetas_voluntarios', 8))
         tarjetas_honorarios_cia = int(data.get('tarjetas_honorarios_cia', 5))
@@ -145,66 +155,28 @@ def crear_beneficio_simple(request):
         # Convertir fecha
         fecha_evento = datetime.strptime(fecha_evento_str, '%Y-%m-%d').date()
         
+        # Mismo motor de asignación que la API de tesorería, en segundo plano
+        datos_beneficio = {
+            'nombre': nombre,
+            'descripcion': descripcion,
+            'fecha_evento': fecha_evento,
+            'tarjetas_voluntarios': tarjetas_voluntarios,
+            'tarjetas_honorarios_cia': tarjetas_honorarios_cia,
+            'tarjetas_honorarios_cuerpo': tarjetas_honorarios_cuerpo,
+            'tarjetas_insignes': tarjetas_insignes,
+            'precio_por_tarjeta': precio_tarjeta,
+            'precio_tarjeta_extra': precio_tarjeta,
+        }
         with transaction.atomic():
-            # 1. Crear beneficio
-            beneficio = Beneficio.objects.create(
-                nombre=nombre,
-                descripcion=descripcion,
-                fecha_evento=fecha_evento,
-                tarjetas_voluntarios=tarjetas_voluntarios,
-                tarjetas_honorarios_cia=tarjetas_honorarios_cia,
-                tarjetas_honorarios_cuerpo=tarjetas_honorarios_cuerpo,
-                tarjetas_insignes=tarjetas_insignes,
-                precio_por_tarjeta=precio_tarjeta,
-                precio_tarjeta_extra=precio_tarjeta,
-                estado='activo'
-            )
-            
-            # 2. Obtener TODOS los voluntarios activos
-            voluntarios = Voluntario.objects.filter(
-                estado_bombero='activo'
-            )
-            
-            asignaciones_creadas = 0
-            
-            # 3. Crear asignación para cada voluntario según su categoría
-            for voluntario in voluntarios:
-                # Calcular antigüedad en años
-                hoy = timezone.now().date()
-                antiguedad = relativedelta(hoy, voluntario.fecha_ingreso).years
-                
-                # Determinar tarjetas según antiguedad
-                if antiguedad >= 50:
-                    tarjetas = tarjetas_insignes  # Insigne 50+ años
-                elif antiguedad >= 25:
-                    tarjetas = tarjetas_honorarios_cuerpo  # Honorario Cuerpo 25-49
-                elif antiguedad >= 20:
-                    tarjetas = tarjetas_honorarios_cia  # Honorario Compañía 20-24
-                else:
-                    tarjetas = tarjetas_voluntarios  # Voluntario 0-19
-                
-                # Calcular monto total
-                monto_total = Decimal(tarjetas) * precio_tarjeta
-                
-                # Crear asignación
-                AsignacionBeneficio.objects.create(
-                    beneficio=beneficio,
-                    voluntario=voluntario,
-                    tarjetas_asignadas=tarjetas,
-                    monto_total=monto_total,
-                    monto_pendiente=monto_total,
-                    estado_pago='pendiente'
-                )
-                
-                asignaciones_creadas += 1
+            beneficio = crear_beneficio(datos_beneficio, None)
+            trabajo = encolar_trabajo('asignar_beneficio', {'beneficio_id': beneficio.id})
         
-        return JsonResponse({
-            'mensaje': 'Beneficio creado exitosamente con asignaciones automáticas',
-            'beneficio_id': beneficio.id,
-            'nombre': beneficio.nombre,
-            'asignaciones_creadas': asignaciones_creadas,
-            'voluntarios_asignados': asignaciones_creadas
-        }, status=201)
+        return respuesta_trabajo_encolado(
+            trabajo,
+            mensaje='Beneficio creado; asignando tarjetas en segundo plano',
+            beneficio_id=beneficio.id,
+            nombre=beneficio.nombre,
+        )
         
     except json.JSONDecodeError:
         return JsonResponse({'error': 'JSON inválido'}, status=400)
@@ -256,6 +228,7 @@ def beneficios_asignados_simple(request, voluntario_id):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@idempotente
 def pagar_beneficio_simple(request):
     """
     Registrar pago de beneficio (tarjetas normales)
@@ -292,13 +265,18 @@ def pagar_beneficio_simple(request):
                 'error': f'No hay suficientes tarjetas disponibles. Disponibles: {asignacion.tarjetas_disponibles}'
             }, status=400)
         
-        with transaction.atomic():
-            # Calcular monto
-            monto = Decimal(cantidad_tarjetas) * asignacion.beneficio.precio_por_tarjeta
+        # Calcular monto
+        monto = Decimal(cantidad_tarjetas) * asignacion.beneficio.precio_por_tarjeta
+        
+        @reintentar_si_bloqueada
+        @transaction.atomic
+        def registrar():
+            # Actualizar asignación (UPDATE condicional, seguro ante ventas simultáneas)
+            actualizada = vender_tarjetas_asignacion(asignacion.id, 'normal', cantidad_tarjetas, monto)
             
             # Crear pago
             pago = PagoBeneficio.objects.create(
-                asignacion=asignacion,
+                asignacion=actualizada,
                 tipo_pago='normal',
                 cantidad_tarjetas=cantidad_tarjetas,
                 fecha_pago=fecha_pago or timezone.now().date(),
@@ -307,27 +285,21 @@ def pagar_beneficio_simple(request):
                 observaciones=observaciones
             )
             
-            # Actualizar asignación
-            asignacion.tarjetas_vendidas += cantidad_tarjetas
-            asignacion.monto_pagado += monto
-            asignacion.monto_pendiente = asignacion.monto_total - asignacion.monto_pagado
-            
-            # Actualizar estado
-            if asignacion.monto_pagado >= asignacion.monto_total:
-                asignacion.estado_pago = 'completo'
-            elif asignacion.monto_pagado > 0:
-                asignacion.estado_pago = 'parcial'
-            
-            asignacion.save()
-            
             # Crear movimiento financiero
             MovimientoFinanciero.objects.create(
                 tipo='ingreso',
                 categoria='Pago de Beneficio',
                 monto=monto,
-                descripcion=f"Pago beneficio: {asignacion.beneficio.nombre} - {asignacion.voluntario.nombre} {asignacion.voluntario.apellido_paterno}",
+                descripcion=f"Pago beneficio: {actualizada.beneficio.nombre} - {actualizada.voluntario.nombre} {actualizada.voluntario.apellido_paterno}",
                 fecha=fecha_pago or timezone.now().date()
             )
+            return pago, actualizada
+        
+        try:
+            pago, asignacion = registrar()
+        except ValueError as e:
+            # Otro vendedor tomó las tarjetas entre la validación y el pago
+            return JsonResponse({'error': f'No hay suficientes tarjetas disponibles. {e}'}, status=400)
         
         return JsonResponse({
             'mensaje': 'Pago registrado exitosamente',
@@ -348,6 +320,7 @@ def pagar_beneficio_simple(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@idempotente
 def venta_extra_simple(request):
     """
     Registrar venta extra (más allá de tarjetas asignadas)
@@ -378,13 +351,18 @@ def venta_extra_simple(request):
         except AsignacionBeneficio.DoesNotExist:
             return JsonResponse({'error': 'Asignación no encontrada'}, status=404)
         
-        with transaction.atomic():
-            # Usar precio de tarjeta extra
-            monto = Decimal(cantidad_tarjetas) * asignacion.beneficio.precio_tarjeta_extra
+        # Usar precio de tarjeta extra
+        monto = Decimal(cantidad_tarjetas) * asignacion.beneficio.precio_tarjeta_extra
+        
+        @reintentar_si_bloqueada
+        @transaction.atomic
+        def registrar():
+            # Actualizar asignación (UPDATE condicional, seguro ante ventas simultáneas)
+            actualizada = vender_tarjetas_asignacion(asignacion.id, 'extra', cantidad_tarjetas, monto)
             
             # Crear pago extra
             pago = PagoBeneficio.objects.create(
-                asignacion=asignacion,
+                asignacion=actualizada,
                 tipo_pago='extra',
                 cantidad_tarjetas=cantidad_tarjetas,
                 fecha_pago=fecha_pago or timezone.now().date(),
@@ -393,19 +371,17 @@ def venta_extra_simple(request):
                 observaciones=observaciones
             )
             
-            # Actualizar asignación
-            asignacion.tarjetas_extras_vendidas += cantidad_tarjetas
-            asignacion.monto_pagado += monto
-            asignacion.save()
-            
             # Crear movimiento financiero
             MovimientoFinanciero.objects.create(
                 tipo='ingreso',
                 categoria='Venta Extra Beneficio',
                 monto=monto,
-                descripcion=f"Venta extra: {asignacion.beneficio.nombre} - {asignacion.voluntario.nombre} {asignacion.voluntario.apellido_paterno}",
+                descripcion=f"Venta extra: {actualizada.beneficio.nombre} - {actualizada.voluntario.nombre} {actualizada.voluntario.apellido_paterno}",
                 fecha=fecha_pago or timezone.now().date()
             )
+            return pago, actualizada
+        
+        pago, asignacion = registrar()
         
         return JsonResponse({
             'mensaje': 'Venta extra registrada exitosamente',
@@ -418,6 +394,8 @@ def venta_extra_simple(request):
         
     except json.JSONDecodeError:
         return JsonResponse({'error': 'JSON inválido'}, status=400)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
@@ -453,6 +431,11 @@ def liberar_tarjetas_simple(request):
             return JsonResponse({'error': 'Asignación no encontrada'}, status=404)
         
         with transaction.atomic():
+            # Releer dentro de la transacción: no pisar ventas concurrentes
+            asignacion = AsignacionBeneficio.objects.select_for_update().select_related(
+                'beneficio', 'voluntario'
+            ).get(id=asignacion.id)
+            
             if tipo == 'total':
                 cantidad = asignacion.tarjetas_disponibles
             elif cantidad > asignacion.tarjetas_disponibles:
@@ -461,10 +444,11 @@ def liberar_tarjetas_simple(request):
                 }, status=400)
             
             # Actualizar asignación
+            antes = foto_asignacion(asignacion)
             asignacion.tarjetas_liberadas += cantidad
             monto_liberado = Decimal(cantidad) * asignacion.beneficio.precio_por_tarjeta
             asignacion.monto_total -= monto_liberado
-            asignacion.monto_pendiente = asignacion.monto_total - asignacion.monto_pagado
+            asignacion.monto_pendiente -= monto_liberado
             
             # Actualizar estado
             if asignacion.tarjetas_disponibles == 0:
@@ -485,6 +469,7 @@ def liberar_tarjetas_simple(request):
             asignacion.historial_liberaciones = json_lib.dumps(historial)
             
             asignacion.save()
+            ajustar_estadistica_beneficio(asignacion.beneficio_id, antes, foto_asignacion(asignacion))
         
         return JsonResponse({
             'mensaje': 'Tarjetas liberadas exitosamente',
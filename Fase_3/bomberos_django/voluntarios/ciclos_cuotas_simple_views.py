@@ -8,6 +8,7 @@ from django.views.decorators.http import require_http_methods
 from django.utils import timezone
 import json
 from .models import CicloCuotas, PagoCuota, Voluntario
+from .utils_tesoreria import obtener_configuracion_cuotas
 from django.db.models import Sum
 from decimal import Decimal
 
@@ -79,8 +80,7 @@ def ciclos_cuotas_simple(request):
                 CicloCuotas.objects.filter(activo=True).update(activo=False)
             
             # Obtener precios de la configuración si no se especifican
-            from .models import ConfiguracionCuotas
-            config = ConfiguracionCuotas.objects.first()
+            config = obtener_configuracion_cuotas()
             
             precio_regular = data.get('precio_cuota_regular')
             precio_estudiante = data.get('precio_cuota_estudiante')
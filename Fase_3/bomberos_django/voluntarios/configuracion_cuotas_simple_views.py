@@ -6,6 +6,7 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from .models import ConfiguracionCuotas
+from .utils_tesoreria import actualizar_precios_estado_cuenta, obtener_configuracion_cuotas
 from decimal import Decimal
 import json
 
@@ -19,14 +20,8 @@ def configuracion_cuotas_simple(request):
     """
     if request.method == 'GET':
         try:
-            config = ConfiguracionCuotas.objects.first()
-            
-            if not config:
-                # Crear configuración por defecto si no existe
-                config = ConfiguracionCuotas.objects.create(
-                    precio_regular=Decimal('5000'),
-                    precio_estudiante=Decimal('3000')
-                )
+            # Crea la configuración por defecto si no existe
+            config = obtener_configuracion_cuotas()
             
             return JsonResponse({
                 'precio_regular': str(config.precio_regular),
@@ -64,6 +59,9 @@ def configuracion_cuotas_simple(request):
                 ciclo_activo.precio_cuota_estudiante = precio_estudiante
                 ciclo_activo.save()
             
+            # Reaplicar precios al estado de cuenta del año en curso
+            actualizar_precios_estado_cuenta()
+            
             return JsonResponse({
                 'success': True,
                 'precio_regular': str(config.precio_regular),
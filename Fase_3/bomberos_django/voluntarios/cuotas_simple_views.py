@@ -10,11 +10,14 @@ from django.db import transaction
 from decimal import Decimal
 import json
 from .models import PagoCuota, Voluntario, MovimientoFinanciero
+from .utils_tesoreria import aplicar_pago_estado_cuenta
+from .utils_idempotencia import idempotente
 from django.contrib.auth.models import User
 
 # DESACTIVAR CSRF para desarrollo
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
+@idempotente
 def pagos_cuotas_simple(request):
     """
     Endpoint SIMPLE para pagos de cuotas
@@ -81,6 +84,9 @@ def pagos_cuotas_simple(request):
                     descripcion=f"Cuota social {data['mes']}/{data['anio']} - {voluntario.nombre} {voluntario.apellido_paterno}",
                     pago_cuota=pago
                 )
+                
+                # Actualizar estado de cuenta materializado
+                aplicar_pago_estado_cuenta(pago)
             
             # Retornar el pago creado
             return JsonResponse({
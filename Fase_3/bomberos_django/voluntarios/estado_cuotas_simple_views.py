@@ -10,6 +10,7 @@ from django.utils import timezone
 from django.core.files.storage import default_storage
 import json
 from .models import EstadoCuotasBombero, Voluntario, CicloCuotas
+from .utils_tesoreria import actualizar_condicion_estado_cuenta
 
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
@@ -73,6 +74,7 @@ def estado_cuotas_simple(request, voluntario_id):
                     return JsonResponse({'error': 'Acción inválida. Use "desactivar" o "reactivar"'}, status=400)
                 
                 estado.save()
+                actualizar_condicion_estado_cuenta(voluntario)
             
             return JsonResponse({
                 'mensaje': mensaje,
@@ -135,6 +137,7 @@ def activar_estudiante_simple(request, voluntario_id):
             estado.fecha_activacion_estudiante = timezone.now()
             estado.observaciones_estudiante = f"Ciclo {ciclo.anio} - Desde mes {mes_inicio}. {observaciones}".strip()
             estado.save()
+            actualizar_condicion_estado_cuenta(voluntario, ciclo.anio)
         
         return JsonResponse({
             'mensaje': 'Estudiante activado exitosamente',
@@ -178,6 +181,7 @@ def desactivar_estudiante_simple(request, voluntario_id):
             estado.fecha_activacion_estudiante = None
             estado.observaciones_estudiante = ''
             estado.save()
+            actualizar_condicion_estado_cuenta(voluntario)
         
         return JsonResponse({
             'mensaje': 'Estudiante desactivado exitosamente',
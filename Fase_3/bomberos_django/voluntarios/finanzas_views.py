@@ -1,23 +1,43 @@
 """
 Views SIMPLES para finanzas - Sin complicaciones
 """
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required
+import csv
 import json
 from decimal import Decimal
 from datetime import datetime
 from .models import MovimientoFinanciero
+from .utils_idempotencia import idempotente
+from .utils_tesoreria import (
+    calcular_saldo_compania, filtrar_movimientos, pagina_movimientos,
+    iterar_movimientos_exportacion, CursorInvalido, CAMPOS_EXPORTACION_MOVIMIENTOS,
+    reporte_tesoreria
+)
+
+LIMITE_MAXIMO_MOVIMIENTOS = 500
+
 
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
+@idempotente
 def movimientos_api(request):
     """Endpoint SIMPLE para movimientos financieros - SIN autenticación por ahora"""
     
     if request.method == 'GET':
-        # Listar movimientos
-        movimientos = MovimientoFinanciero.objects.all().order_by('-fecha', '-created_at')[:100]
+        # Listar movimientos: filtros + paginación por llave (?cursor=...&limite=...)
+        try:
+            limite = min(max(int(request.GET.get('limite', 100)), 1), LIMITE_MAXIMO_MOVIMIENTOS)
+            movimientos, siguiente = pagina_movimientos(
+                filtrar_movimientos(request.GET),
+                cursor=request.GET.get('cursor'),
+                limite=limite
+            )
+        except (CursorInvalido, ValueError, ArithmeticError) as e:
+            return JsonResponse({'error': f'Parámetros inválidos: {e}'}, status=400)
         
         data = []
         for m in movimientos:
@@ -33,7 +53,7 @@ def movimientos_api(request):
                 'created_by_nombre': m.created_by.username if m.created_by else 'Sistema'
             })
         
-        return JsonResponse({'results': data, 'count': len(data)})
+        return JsonResponse({'results': data, 'count': len(data), 'siguiente': siguiente})
     
     elif request.method == 'POST':
         # Crear movimiento
@@ -72,19 +92,70 @@ def movimientos_api(request):
 
 @require_http_methods(["GET"])
 def saldo_api(request):
-    """Endpoint SIMPLE para calcular saldo"""
+    """
+    Endpoint SIMPLE para calcular saldo
+    Último cierre mensual + movimientos posteriores; montos Decimal (como texto en JSON)
+    """
     try:
-        movimientos = MovimientoFinanciero.objects.all()
-        
-        ingresos = sum(float(m.monto) for m in movimientos if m.tipo == 'ingreso')
-        egresos = sum(float(m.monto) for m in movimientos if m.tipo == 'egreso')
-        saldo = ingresos - egresos
-        
-        return JsonResponse({
-            'saldo': saldo,
-            'ingresos': ingresos,
-            'egresos': egresos,
-            'total_movimientos': movimientos.count()
-        })
+        return JsonResponse(calcular_saldo_compania())
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
+
+
+@require_http_methods(["GET"])
+def reportes_tesoreria_api(request):
+    """
+    Reportes de tesorería desde el cubo resumido
+    GET /api/finanzas/reportes/?vista=mensual|interanual|beneficios|metodos_pago&anio=2025
+    """
+    try:
+        anio = int(request.GET['anio']) if request.GET.get('anio') else None
+        return JsonResponse(reporte_tesoreria(request.GET.get('vista', 'mensual'), anio))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+class _Eco:
+    """Buffer mínimo para csv.writer: devuelve la línea en vez de guardarla"""
+    def write(self, valor):
+        return valor
+
+
+@require_http_methods(["GET"])
+def exportar_movimientos_api(request):
+    """
+    Exporta movimientos en streaming, sin cargarlos todos en memoria
+    GET /api/movimientos-financieros/exportar/?anio=2025&formato=csv|jsonl
+    Acepta los mismos filtros que el listado
+    """
+    formato = request.GET.get('formato', 'csv')
+    if formato not in ('csv', 'jsonl'):
+        return JsonResponse({'error': 'formato debe ser csv o jsonl'}, status=400)
+    try:
+        queryset = filtrar_movimientos(request.GET)
+    except (ValueError, ArithmeticError) as e:
+        return JsonResponse({'error': f'Parámetros inválidos: {e}'}, status=400)
+    
+    filas = iterar_movimientos_exportacion(queryset)
+    encabezado = [campo.replace('__username', '') for campo in CAMPOS_EXPORTACION_MOVIMIENTOS]
+    nombre = f"movimientos_{request.GET.get('anio', 'todos')}.{formato}"
+    
+    if formato == 'csv':
+        escritor = csv.writer(_Eco())
+        
+        def lineas():
+            yield escritor.writerow(encabezado)
+            for fila in filas:
+                yield escritor.writerow([fila[campo] for campo in CAMPOS_EXPORTACION_MOVIMIENTOS])
+        
+        respuesta = StreamingHttpResponse(lineas(), content_type='text/csv; charset=utf-8')
+    else:
+        def lineas():
+            for fila in filas:
+                registro = dict(zip(encabezado, (fila[campo] for campo in CAMPOS_EXPORTACION_MOVIMIENTOS)))
+                yield json.dumps(registro, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+        
+        respuesta = StreamingHttpResponse(lineas(), content_type='application/x-ndjson; charset=utf-8')
+    
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre}"'
+    return respuesta
@@ -0,0 +1,28 @@
+"""
+Comando para recalcular la antigüedad y categoría persistidas de los voluntarios
+Ejecutar a diario: python manage.py actualizar_categorias_voluntarios
+
+Los aniversarios de ingreso cambian anios_servicio (y a veces la categoría) sin
+que el voluntario se edite. Respeta la antigüedad congelada y reaplica la
+exención de cuotas a quienes cumplen los años de servicio que la dan.
+"""
+from django.core.management.base import BaseCommand
+
+from voluntarios.utils_tesoreria import actualizar_categorias_voluntarios
+
+
+class Command(BaseCommand):
+    help = 'Recalcula anios_servicio y categoria de todos los voluntarios'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help='Tamaño de lote para bulk_update')
+
+    def handle(self, *args, **options):
+        self.stdout.write('🎖️ Actualizando categorías de voluntarios...')
+        resumen = actualizar_categorias_voluntarios(lote=options['lote'])
+        self.stdout.write(f'  ✔ {resumen["revisados"]} voluntarios revisados')
+        self.stdout.write(f'  ✔ {resumen["actualizados"]} con antigüedad actualizada')
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {resumen["cambios_categoria"]} cambios de categoría, '
+            f'{resumen["cambios_exencion"]} cambios de exención de cuotas'
+        ))
@@ -0,0 +1,29 @@
+"""
+Comando para recalcular el ranking anual de asistencias
+Ejecutar: python manage.py actualizar_ranking_asistencias [--anio 2025 2026]
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from voluntarios.utils_asistencias import recalcular_ranking_anio
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el ranking de asistencias (solo eventos con suma_ranking)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--anio', nargs='+', type=int, default=None,
+                            help='Años a recalcular (default: año actual)')
+
+    def handle(self, *args, **options):
+        anios = options['anio'] or [timezone.now().year]
+
+        for anio in anios:
+            resumen = recalcular_ranking_anio(anio)
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ Ranking {anio}: {resumen["participantes"]} participantes'
+            ))
+            self.stdout.write(
+                f'   Creados: {resumen["creados"]} | Actualizados: {resumen["actualizados"]}'
+                f' | Eliminados: {resumen["eliminados"]}'
+            )
@@ -0,0 +1,30 @@
+"""
+Comando para refrescar el cubo de reportes de tesorería
+Ejecutar: python manage.py actualizar_resumen_tesoreria [--reconstruir]
+
+Recalcula solo los meses marcados como pendientes por las señales de
+MovimientoFinanciero, PagoCuota y PagoBeneficio. Con --reconstruir vacía el
+cubo y lo recalcula para todos los meses con datos.
+"""
+from django.core.management.base import BaseCommand
+
+from voluntarios.models import ResumenTesoreria
+from voluntarios.utils_tesoreria import actualizar_resumen_tesoreria, reconstruir_resumen_tesoreria
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los meses pendientes del cubo de reportes de tesorería'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reconstruir', action='store_true',
+                            help='Vacía el cubo y lo recalcula desde las tablas crudas')
+
+    def handle(self, *args, **options):
+        self.stdout.write('📊 Cubo de reportes de tesorería')
+        if options['reconstruir']:
+            meses = reconstruir_resumen_tesoreria()
+        else:
+            meses = actualizar_resumen_tesoreria()
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {meses} meses recalculados ({ResumenTesoreria.objects.count()} filas en el cubo)'
+        ))
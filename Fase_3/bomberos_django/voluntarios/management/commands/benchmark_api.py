@@ -0,0 +1,235 @@
+"""
+Comando para medir consultas, tiempo y memoria de los endpoints GET de la API
+Ejecutar: python manage.py benchmark_api --tamanos 200 2000 20000 [--guardar]
+
+Para cada tamaño siembra voluntarios sintéticos con años de cuotas, beneficios y
+asistencias dentro de una transacción que se revierte al final, recorre todos los
+endpoints del router de voluntarios/urls.py, las vistas simples de voluntarios/urls.py
+y las de config/urls.py, y compara el resultado con la línea base JSON.
+
+Falla (CommandError) si algún endpoint empeora más allá de los umbrales.
+"""
+import json
+import re
+import time
+import tracemalloc
+from datetime import date, datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from voluntarios.models import Voluntario, CicloCuotas
+from voluntarios.utils_carga import generar_datos_carga, formatear_rut
+
+
+BASELINE_POR_DEFECTO = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline_api.json'
+
+# Desplazamiento de RUT/claves para no chocar con datos de generar_datos_carga
+DESPLAZAMIENTO_BENCHMARK = 5_000_000
+
+# Parámetros de ruta que se rellenan con datos sembrados
+_PARAMETRO = re.compile(r'<(?:\w+:)?(\w+)>')
+
+# Rutas que no se miden (cerrarían la sesión del cliente)
+RUTAS_EXCLUIDAS = {'api/auth/logout/'}
+
+# Parámetros GET obligatorios de algunas vistas simples
+QUERY_STRINGS = {
+    'api/voluntarios/pagos-beneficios/': '?voluntario_id={voluntario_id}',
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Mide consultas, tiempo y memoria de los endpoints GET de la API y detecta regresiones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanos', nargs='+', type=int, default=[200, 2000, 20000],
+                            help='Cantidades de voluntarios a sembrar')
+        parser.add_argument('--anios', type=int, default=3,
+                            help='Años de cuotas y asistencias a sembrar (default: 3)')
+        parser.add_argument('--baseline', default=str(BASELINE_POR_DEFECTO),
+                            help='Archivo JSON con la línea base')
+        parser.add_argument('--guardar', action='store_true',
+                            help='Guarda los resultados como nueva línea base en vez de comparar')
+        parser.add_argument('--repeticiones', type=int, default=3,
+                            help='Repeticiones por endpoint; se usa el menor tiempo')
+        parser.add_argument('--umbral-tiempo', type=float, default=0.5,
+                            help='Aumento relativo de tiempo tolerado (default: 0.5 = 50%%)')
+        parser.add_argument('--umbral-memoria', type=float, default=0.5,
+                            help='Aumento relativo de memoria pico tolerado (default: 0.5 = 50%%)')
+        parser.add_argument('--tolerancia-consultas', type=int, default=0,
+                            help='Consultas adicionales toleradas por endpoint (default: 0)')
+        parser.add_argument('--holgura-ms', type=float, default=20.0,
+                            help='Holgura absoluta de tiempo para endpoints muy rápidos')
+        parser.add_argument('--holgura-kb', type=float, default=256.0,
+                            help='Holgura absoluta de memoria para endpoints livianos')
+
+    def handle(self, *args, **options):
+        resultados = {}
+
+        for tamano in options['tamanos']:
+            self.stdout.write(f'\n🌱 Sembrando {tamano} voluntarios...')
+            try:
+                with transaction.atomic():
+                    ids = self._sembrar(tamano, options['anios'])
+                    resultados[str(tamano)] = self._medir_endpoints(ids, options['repeticiones'])
+                    raise _Rollback()
+            except _Rollback:
+                pass
+            self._imprimir(tamano, resultados[str(tamano)])
+
+        ruta = Path(options['baseline'])
+        if options['guardar']:
+            ruta.parent.mkdir(parents=True, exist_ok=True)
+            ruta.write_text(json.dumps({
+                'generado': datetime.now().isoformat(timespec='seconds'),
+                'tamanos': options['tamanos'],
+                'resultados': resultados,
+            }, indent=2, ensure_ascii=False, sort_keys=True))
+            self.stdout.write(self.style.SUCCESS(f'\n✅ Línea base guardada en {ruta}'))
+            return
+
+        if not ruta.exists():
+            self.stdout.write(self.style.WARNING(
+                f'\n⚠️ No existe línea base en {ruta}; ejecute con --guardar para crearla'
+            ))
+            return
+
+        base = json.loads(ruta.read_text())
+        regresiones = self._comparar(base.get('resultados', {}), resultados, options)
+        if regresiones:
+            for regresion in regresiones:
+                self.stdout.write(self.style.ERROR(f'  ❌ {regresion}'))
+            raise CommandError(f'{len(regresiones)} regresiones respecto de {ruta}')
+        self.stdout.write(self.style.SUCCESS('\n✅ Sin regresiones respecto de la línea base'))
+
+    # ==================== ENDPOINTS ====================
+
+    def _endpoints(self, ids):
+        """
+        Retorna pares (clave, url) de todos los endpoints GET a medir
+        La clave es la ruta sin parámetros resueltos, estable entre ejecuciones
+        """
+        from config import urls as config_urls
+        from voluntarios import urls as voluntarios_urls
+
+        rutas = [f'api/{prefijo}/' for prefijo, _, _ in voluntarios_urls.router.registry]
+        rutas += [
+            f'api/{patron.pattern}' for patron in voluntarios_urls.urlpatterns
+            if hasattr(patron, 'name') and str(patron.pattern)
+        ]
+        rutas += [
+            str(patron.pattern) for patron in config_urls.urlpatterns
+            if str(patron.pattern).startswith('api/voluntarios/')
+        ]
+
+        endpoints = []
+        for ruta in dict.fromkeys(rutas):
+            parametros = _PARAMETRO.findall(ruta)
+            if ruta in RUTAS_EXCLUIDAS or any(p not in ids for p in parametros):
+                continue
+            url = '/' + _PARAMETRO.sub(lambda m: str(ids[m.group(1)]), ruta)
+            url += QUERY_STRINGS.get(ruta, '').format(**ids)
+            endpoints.append((ruta, url))
+        return endpoints
+
+    def _medir_endpoints(self, ids, repeticiones):
+        cliente = Client()
+        cliente.force_login(User.objects.create_superuser('benchmark_api', password='x'))
+
+        resultados = {}
+        for clave, url in self._endpoints(ids):
+            # El registro de consultas tiene tope; la siembra masiva lo llena
+            reset_queries()
+            tracemalloc.start()
+            with CaptureQueriesContext(connection) as consultas:
+                respuesta = self._get(cliente, url)
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            if respuesta.status_code == 405:
+                continue  # Endpoint solo POST
+
+            tiempos = []
+            for _ in range(max(repeticiones, 1)):
+                inicio = time.perf_counter()
+                self._get(cliente, url)
+                tiempos.append(time.perf_counter() - inicio)
+
+            resultados[clave] = {
+                'estado': respuesta.status_code,
+                'consultas': len(consultas),
+                'tiempo_ms': round(min(tiempos) * 1000, 2),
+                'memoria_kb': round(pico / 1024, 1),
+            }
+        return resultados
+
+    def _get(self, cliente, url):
+        respuesta = cliente.get(url)
+        # Consumir respuestas en streaming para medir el trabajo completo
+        if getattr(respuesta, 'streaming', False):
+            for _ in respuesta.streaming_content:
+                pass
+        return respuesta
+
+    # ==================== COMPARACIÓN ====================
+
+    def _comparar(self, base, actual, options):
+        regresiones = []
+        for tamano, endpoints in actual.items():
+            previos = base.get(tamano, {})
+            for clave, medida in endpoints.items():
+                previo = previos.get(clave)
+                if not previo:
+                    continue
+                etiqueta = f'[{tamano}] {clave}'
+
+                if previo['estado'] == 200 and medida['estado'] != 200:
+                    regresiones.append(f"{etiqueta}: estado {previo['estado']} → {medida['estado']}")
+                if medida['consultas'] > previo['consultas'] + options['tolerancia_consultas']:
+                    regresiones.append(f"{etiqueta}: consultas {previo['consultas']} → {medida['consultas']}")
+
+                limite_tiempo = previo['tiempo_ms'] * (1 + options['umbral_tiempo']) + options['holgura_ms']
+                if medida['tiempo_ms'] > limite_tiempo:
+                    regresiones.append(f"{etiqueta}: tiempo {previo['tiempo_ms']} → {medida['tiempo_ms']} ms")
+
+                limite_memoria = previo['memoria_kb'] * (1 + options['umbral_memoria']) + options['holgura_kb']
+                if medida['memoria_kb'] > limite_memoria:
+                    regresiones.append(f"{etiqueta}: memoria {previo['memoria_kb']} → {medida['memoria_kb']} KB")
+        return regresiones
+
+    def _imprimir(self, tamano, resultados):
+        self.stdout.write(f'\n📊 Endpoints con {tamano} voluntarios')
+        self.stdout.write(f'{"Endpoint":<64} {"Estado":>6} {"Consultas":>9} {"Tiempo (ms)":>11} {"Memoria (KB)":>12}')
+        for clave, medida in resultados.items():
+            self.stdout.write(
+                f'{clave[:64]:<64} {medida["estado"]:>6} {medida["consultas"]:>9} '
+                f'{medida["tiempo_ms"]:>11.1f} {medida["memoria_kb"]:>12.1f}'
+            )
+
+    # ==================== DATOS SINTÉTICOS ====================
+
+    def _sembrar(self, tamano, anios):
+        """Genera la población con generar_datos_carga y elige los ids de las rutas"""
+        generar_datos_carga(voluntarios=tamano, anios=anios, semilla=tamano,
+                            desplazamiento=DESPLAZAMIENTO_BENCHMARK)
+        primero = Voluntario.objects.get(rut=formatear_rut(30_000_000 + DESPLAZAMIENTO_BENCHMARK))
+        # Preferir un voluntario activo con pagos para que las vistas tengan datos
+        voluntario = Voluntario.objects.filter(
+            estado_bombero='activo', pagos_cuotas__isnull=False, id__gte=primero.id
+        ).order_by('id').first() or primero
+        anio = date.today().year
+        return {
+            'voluntario_id': voluntario.id,
+            'ciclo_id': CicloCuotas.objects.get(anio=anio).id,
+            'anio': anio,
+        }
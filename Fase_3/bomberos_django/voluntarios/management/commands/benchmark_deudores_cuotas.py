@@ -0,0 +1,84 @@
+"""
+Comando para medir el costo de calcular_deudores_cuotas
+Ejecutar: python manage.py benchmark_deudores_cuotas --tamanos 100 1000 10000
+
+Crea voluntarios sintéticos dentro de una transacción que se revierte al final,
+por lo que no deja datos en la base.
+"""
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from voluntarios.models import Voluntario, PagoCuota
+from voluntarios.utils_tesoreria import calcular_deudores_cuotas, reconstruir_estado_cuenta
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Mide consultas y tiempo de calcular_deudores_cuotas para distintos tamaños'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanos', nargs='+', type=int, default=[100, 1000, 10000],
+                            help='Cantidades de voluntarios a medir')
+        parser.add_argument('--anio', type=int, default=None, help='Año a calcular (default: actual)')
+
+    def handle(self, *args, **options):
+        anio = options['anio'] or date.today().year
+        resultados = []
+
+        for tamano in options['tamanos']:
+            try:
+                with transaction.atomic():
+                    self._sembrar(tamano, anio)
+                    with CaptureQueriesContext(connection) as ctx:
+                        inicio = time.perf_counter()
+                        deudores = calcular_deudores_cuotas(anio)
+                        duracion = time.perf_counter() - inicio
+                    resultados.append((tamano, len(ctx.captured_queries), duracion, len(deudores)))
+                    raise _Rollback()
+            except _Rollback:
+                pass
+
+        self.stdout.write(f'\n📊 calcular_deudores_cuotas - año {anio}')
+        self.stdout.write(f'{"Voluntarios":>12} {"Consultas":>10} {"Tiempo (s)":>11} {"Deudores":>9}')
+        for tamano, consultas, duracion, deudores in resultados:
+            self.stdout.write(f'{tamano:>12} {consultas:>10} {duracion:>11.3f} {deudores:>9}')
+
+        consultas = {r[1] for r in resultados}
+        if len(consultas) == 1:
+            self.stdout.write(self.style.SUCCESS('\n✅ Cantidad de consultas constante'))
+        else:
+            self.stdout.write(self.style.WARNING('\n⚠️ La cantidad de consultas varía con el tamaño'))
+
+    def _sembrar(self, tamano, anio):
+        """Crea voluntarios con pagos parciales del año"""
+        hoy = date.today()
+        voluntarios = Voluntario.objects.bulk_create([
+            Voluntario(
+                nombre=f'Bench{i}',
+                apellido_paterno='Deudores',
+                rut=f'BD{i:08d}',
+                clave_bombero=f'BD{i}',
+                fecha_ingreso=hoy - timedelta(days=(i % 8) * 300),
+                estado_bombero='activo' if i % 10 else 'inactivo',
+            )
+            for i in range(tamano)
+        ], batch_size=500)
+
+        pagos = []
+        for i, voluntario in enumerate(voluntarios):
+            for mes in range(1, (i % 12) + 1):
+                pagos.append(PagoCuota(
+                    voluntario=voluntario, mes=mes, anio=anio,
+                    fecha_pago=hoy, monto_pagado=5000
+                ))
+        PagoCuota.objects.bulk_create(pagos, batch_size=1000)
+
+        # bulk_create no pasa por registrar_pago_cuota: poblar el estado de cuenta
+        reconstruir_estado_cuenta([anio])
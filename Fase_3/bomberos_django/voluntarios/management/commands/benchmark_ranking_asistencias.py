@@ -0,0 +1,118 @@
+"""
+Comando para medir el costo de recalcular el ranking de asistencias
+Ejecutar: python manage.py benchmark_ranking_asistencias --eventos 5000
+
+Crea un año sintético de eventos y asistencias dentro de una transacción que
+se revierte al final, por lo que no deja datos en la base.
+"""
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from voluntarios.models import (
+    Voluntario, VoluntarioExterno, EventoAsistencia, DetalleAsistencia
+)
+from voluntarios.utils_asistencias import CONTADORES_POR_TIPO, recalcular_ranking_anio
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Mide consultas y tiempo de recalcular_ranking_anio sobre un año sintético'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--eventos', type=int, default=5000, help='Eventos en el año')
+        parser.add_argument('--voluntarios', type=int, default=300, help='Voluntarios sintéticos')
+        parser.add_argument('--externos', type=int, default=30, help='Externos sintéticos')
+        parser.add_argument('--asistentes', type=int, default=15, help='Asistentes por evento')
+        parser.add_argument('--anio', type=int, default=2000, help='Año sintético a usar')
+        parser.add_argument('--semilla', type=int, default=1, help='Semilla aleatoria')
+
+    def handle(self, *args, **options):
+        anio = options['anio']
+        random.seed(options['semilla'])
+
+        try:
+            with transaction.atomic():
+                inicio = time.perf_counter()
+                detalles = self._sembrar(options, anio)
+                self.stdout.write(
+                    f'🌱 {options["eventos"]} eventos / {detalles} asistencias sembrados '
+                    f'en {time.perf_counter() - inicio:.2f}s'
+                )
+
+                # Primera pasada crea el ranking, la segunda solo compara
+                for etiqueta in ['Ranking vacío', 'Ranking existente']:
+                    with CaptureQueriesContext(connection) as ctx:
+                        inicio = time.perf_counter()
+                        resumen = recalcular_ranking_anio(anio)
+                        duracion = time.perf_counter() - inicio
+                    self.stdout.write(
+                        f'📊 {etiqueta:<18} consultas={len(ctx.captured_queries):<4} '
+                        f'tiempo={duracion:.3f}s participantes={resumen["participantes"]} '
+                        f'creados={resumen["creados"]} actualizados={resumen["actualizados"]}'
+                    )
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        self.stdout.write(self.style.SUCCESS('\n✅ Benchmark terminado (datos revertidos)'))
+
+    def _sembrar(self, options, anio):
+        """Crea voluntarios, externos, eventos y asistencias del año"""
+        voluntarios = Voluntario.objects.bulk_create([
+            Voluntario(
+                nombre=f'Bench{i}',
+                apellido_paterno='Ranking',
+                rut=f'BR{i:08d}',
+                clave_bombero=f'BR{i}',
+                fecha_ingreso=date(anio - 3, 1, 1),
+                estado_bombero='activo',
+            )
+            for i in range(options['voluntarios'])
+        ], batch_size=500)
+        externos = VoluntarioExterno.objects.bulk_create([
+            VoluntarioExterno(
+                codigo=f'BENCH-{i:04d}',
+                nombre_completo=f'Externo {i}',
+                tipo='participante' if i % 2 else 'canje',
+            )
+            for i in range(options['externos'])
+        ], batch_size=500)
+
+        tipos = list(CONTADORES_POR_TIPO) + ['directorio']
+        eventos = EventoAsistencia.objects.bulk_create([
+            EventoAsistencia(
+                id_evento=-(i + 1),  # negativos para no chocar con timestamps reales
+                tipo=tipos[i % len(tipos)],
+                fecha=date(anio, 1, 1) + timedelta(days=i % 365),
+                descripcion='Evento benchmark',
+                suma_ranking=tipos[i % len(tipos)] != 'directorio',
+            )
+            for i in range(options['eventos'])
+        ], batch_size=500)
+
+        detalles = []
+        for evento in eventos:
+            for voluntario in random.sample(voluntarios, min(options['asistentes'], len(voluntarios))):
+                detalles.append(DetalleAsistencia(
+                    evento=evento, voluntario=voluntario,
+                    nombre_completo=voluntario.nombre_completo(),
+                    clave_bombero=voluntario.clave_bombero,
+                ))
+            if externos and random.random() < 0.2:
+                externo = random.choice(externos)
+                detalles.append(DetalleAsistencia(
+                    evento=evento, externo=externo,
+                    nombre_completo=externo.nombre_completo,
+                    clave_bombero=externo.codigo,
+                    es_externo=True, tipo_externo=externo.tipo,
+                ))
+        DetalleAsistencia.objects.bulk_create(detalles, batch_size=1000)
+        return len(detalles)
@@ -0,0 +1,47 @@
+"""
+Comando para cerrar los meses del libro de movimientos financieros
+Ejecutar: python manage.py cerrar_meses_financieros [--reconstruir] [--solo-verificar]
+
+Crea los cierres mensuales faltantes hasta el mes anterior (saldo inicial,
+ingresos y egresos por categoría, saldo final) y verifica que los cierres
+guardados coincidan con los movimientos.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from voluntarios.utils_tesoreria import (
+    cerrar_meses_financieros, reconstruir_cierres_financieros,
+    verificar_cierres_financieros, calcular_saldo_compania
+)
+
+
+class Command(BaseCommand):
+    help = 'Crea y verifica los cierres mensuales de MovimientoFinanciero'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reconstruir', action='store_true',
+                            help='Elimina y recalcula todos los cierres desde los movimientos')
+        parser.add_argument('--solo-verificar', action='store_true',
+                            help='No crea cierres, solo informa diferencias contra los movimientos')
+
+    def handle(self, *args, **options):
+        self.stdout.write('📒 Cierres mensuales financieros')
+
+        if not options['solo_verificar']:
+            if options['reconstruir']:
+                cierres = reconstruir_cierres_financieros()
+            else:
+                cierres = cerrar_meses_financieros()
+            self.stdout.write(self.style.SUCCESS(f'✅ {cierres} meses cerrados'))
+
+        inconsistencias = verificar_cierres_financieros()
+        if inconsistencias:
+            for item in inconsistencias:
+                self.stdout.write(self.style.WARNING(f'⚠️ {item["mes"]:02d}/{item["anio"]}:'))
+                for campo, (guardado, esperado) in item['diferencias'].items():
+                    self.stdout.write(f'     - {campo}: guardado={guardado} esperado={esperado}')
+            raise CommandError(f'{len(inconsistencias)} cierres no coinciden con los movimientos')
+
+        self.stdout.write(self.style.SUCCESS('✅ Cierres coinciden con los movimientos'))
+        if not options['solo_verificar']:
+            saldo = calcular_saldo_compania()
+            self.stdout.write(f'💰 Saldo actual: ${saldo["saldo"]} ({saldo["total_movimientos"]} movimientos)')
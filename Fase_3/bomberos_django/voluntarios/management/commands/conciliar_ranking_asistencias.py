@@ -0,0 +1,51 @@
+"""
+Comando para conciliar el ranking de asistencias mantenido incrementalmente
+Ejecutar: python manage.py conciliar_ranking_asistencias [--anio 2025] [--corregir]
+
+Compara los contadores de RankingAsistencia contra un reconteo completo de
+DetalleAsistencia e informa cualquier deriva.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from voluntarios.models import EventoAsistencia
+from voluntarios.utils_asistencias import verificar_ranking_anio, recalcular_ranking_anio
+
+
+class Command(BaseCommand):
+    help = 'Compara el ranking de asistencias con un reconteo completo e informa la deriva'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--anio', nargs='+', type=int, default=None,
+                            help='Años a conciliar (default: todos los años con eventos)')
+        parser.add_argument('--corregir', action='store_true',
+                            help='Recalcula los años con deriva')
+
+    def handle(self, *args, **options):
+        anios = options['anio'] or sorted(
+            {fecha.year for fecha in EventoAsistencia.objects.dates('fecha', 'year')}
+            | {timezone.now().year}
+        )
+
+        total_derivas = 0
+        for anio in anios:
+            derivas = verificar_ranking_anio(anio)
+            if not derivas:
+                self.stdout.write(self.style.SUCCESS(f'✅ Ranking {anio}: sin deriva'))
+                continue
+
+            total_derivas += len(derivas)
+            self.stdout.write(self.style.WARNING(f'⚠️ Ranking {anio}: {len(derivas)} participantes con deriva'))
+            for deriva in derivas:
+                detalle = ', '.join(
+                    f'{campo} {guardado}→{esperado}'
+                    for campo, (guardado, esperado) in deriva['diferencias'].items()
+                )
+                self.stdout.write(f'   • {deriva["nombre_completo"]}: {detalle}')
+
+            if options['corregir']:
+                recalcular_ranking_anio(anio)
+                self.stdout.write(self.style.SUCCESS(f'   🔧 Ranking {anio} recalculado'))
+
+        if total_derivas and not options['corregir']:
+            raise CommandError(f'{total_derivas} diferencias entre el ranking y el reconteo')
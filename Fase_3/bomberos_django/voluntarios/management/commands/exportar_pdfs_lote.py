@@ -0,0 +1,65 @@
+"""
+Comando para exportar por lote estados de cuotas o tablas de uniformes
+Ejecutar: python manage.py exportar_pdfs_lote --tipo cuotas --anio 2025 --formato zip --salida cuotas_2025.zip
+          [--estado activo,inactivo] [--categoria voluntario] [--ids 1,2,3] [--procesos 4]
+
+'zip' deja un PDF por voluntario; 'pdf' un solo documento con un marcador por voluntario.
+"""
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from voluntarios.utils_exportacion import (
+    FORMATOS_EXPORTACION, TIPOS_EXPORTACION, PROCESOS_EXPORTACION, exportar_pdfs_lote, filtrar_voluntarios
+)
+
+
+def _lista(valor):
+    return [parte.strip() for parte in (valor or '').split(',') if parte.strip()]
+
+
+class Command(BaseCommand):
+    help = 'Exporta en un ZIP o en un PDF unido los PDF de cuotas o uniformes de muchos voluntarios'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tipo', choices=TIPOS_EXPORTACION, default='cuotas')
+        parser.add_argument('--formato', choices=FORMATOS_EXPORTACION, default='zip')
+        parser.add_argument('--anio', type=int, default=datetime.now().year, help='Año de las cuotas')
+        parser.add_argument('--salida', help='Archivo de salida (por defecto <tipo>_<anio>.<formato>)')
+        parser.add_argument('--estado', help='Estados de voluntario separados por coma')
+        parser.add_argument('--categoria', help='Categorías separadas por coma')
+        parser.add_argument('--ids', help='IDs de voluntarios separados por coma')
+        parser.add_argument('--procesos', type=int, default=PROCESOS_EXPORTACION,
+                            help=f'Procesos de renderizado (por defecto {PROCESOS_EXPORTACION})')
+
+    def handle(self, *args, **options):
+        tipo, formato, anio = options['tipo'], options['formato'], options['anio']
+        salida = options['salida'] or f'{tipo}_{anio}.{formato}'
+        try:
+            ids = [int(i) for i in _lista(options['ids'])]
+        except ValueError:
+            raise CommandError('--ids debe ser una lista de números separados por coma')
+
+        voluntarios = filtrar_voluntarios(
+            estados=_lista(options['estado']), categorias=_lista(options['categoria']), ids=ids
+        )
+        self.stdout.write(f'📄 Exportando {tipo} {anio} ({formato}) → {salida}')
+
+        decil = [-1]
+
+        def progreso(hechos, total):
+            actual = hechos * 10 // total if total else 10
+            if actual != decil[0]:
+                decil[0] = actual
+                self.stdout.write(f'   {hechos}/{total} ({actual * 10}%)')
+
+        inicio = time.perf_counter()
+        resumen = exportar_pdfs_lote(
+            salida, tipo, voluntarios, anio=anio, formato=formato,
+            procesos=options['procesos'], progreso=progreso
+        )
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {resumen["total"]} documentos en {segundos:.1f} s'
+        ))
@@ -0,0 +1,63 @@
+"""
+Comando para generar una población sintética para pruebas de carga
+Ejecutar: python manage.py generar_datos_carga --voluntarios 50000 --anios 5 --semilla 42
+
+Crea voluntarios en todos los estados, cargos, sanciones, uniformes con piezas,
+pagos de cuotas de varios años, beneficios con asignaciones y pagos, y eventos de
+asistencia con sus detalles. La misma semilla (en la misma fecha) produce los mismos datos.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from voluntarios.models import Voluntario
+from voluntarios.utils_carga import generar_datos_carga, formatear_rut
+
+
+class Command(BaseCommand):
+    help = 'Genera datos sintéticos reproducibles para pruebas de carga'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--voluntarios', type=int, default=1000, help='Cantidad de voluntarios')
+        parser.add_argument('--anios', type=int, default=3,
+                            help='Años (incluyendo el actual) con cuotas, beneficios y asistencias')
+        parser.add_argument('--beneficios-por-anio', type=int, default=2)
+        parser.add_argument('--eventos-por-anio', type=int, default=None,
+                            help='Eventos de asistencia por año (default: voluntarios / 20)')
+        parser.add_argument('--asistentes-por-evento', type=int, default=20)
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla del generador aleatorio')
+        parser.add_argument('--lote', type=int, default=2000, help='Tamaño de lote para bulk_create')
+        parser.add_argument('--desplazamiento', type=int, default=0,
+                            help='Desplaza RUT y claves para generar otra población sobre datos existentes')
+
+    def handle(self, *args, **options):
+        if options['voluntarios'] < 1 or options['anios'] < 1 or options['lote'] < 1:
+            raise CommandError('--voluntarios, --anios y --lote deben ser mayores que cero')
+
+        desplazamiento = options['desplazamiento']
+        ruts = [formatear_rut(30_000_000 + desplazamiento),
+                formatear_rut(30_000_000 + desplazamiento + options['voluntarios'] - 1)]
+        if Voluntario.objects.filter(rut__in=ruts).exists():
+            raise CommandError(
+                'Ya existen voluntarios generados en ese rango; use --desplazamiento para generar otra población'
+            )
+
+        self.stdout.write(f"\n🌱 Generando {options['voluntarios']} voluntarios (semilla {options['semilla']})...")
+        inicio = time.perf_counter()
+        resumen = generar_datos_carga(
+            voluntarios=options['voluntarios'],
+            anios=options['anios'],
+            beneficios_por_anio=options['beneficios_por_anio'],
+            eventos_por_anio=options['eventos_por_anio'],
+            asistentes_por_evento=options['asistentes_por_evento'],
+            semilla=options['semilla'],
+            lote=options['lote'],
+            desplazamiento=desplazamiento,
+            progreso=lambda mensaje: self.stdout.write(f'  ✔ {mensaje}'),
+        )
+        duracion = time.perf_counter() - inicio
+
+        self.stdout.write('\n📊 Registros creados')
+        for entidad, cantidad in resumen.items():
+            self.stdout.write(f'{entidad:>22}: {cantidad}')
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Datos generados en {duracion:.1f} s'))
@@ -0,0 +1,70 @@
+"""
+Comando para importar pagos de cuotas desde un extracto bancario
+Ejecutar: python manage.py importar_pagos_cuotas extracto.csv [--anio 2025] [--confirmar]
+
+Sin --confirmar solo valida el archivo y muestra el reparto de meses por fila
+(simulación). Con --confirmar escribe todos los pagos y movimientos en una sola
+transacción; si alguna fila tiene errores no se importa nada, salvo que se
+indique --omitir-errores.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from voluntarios.utils_tesoreria import leer_extracto_pagos, importar_pagos_cuotas
+
+
+class Command(BaseCommand):
+    help = 'Importa pagos de cuotas desde un extracto bancario CSV o XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Extracto .csv o .xlsx')
+        parser.add_argument('--anio', type=int, default=None,
+                            help='Año desde el que se reparten los meses (default: año de cada transferencia)')
+        parser.add_argument('--metodo-pago', default='Transferencia')
+        parser.add_argument('--confirmar', action='store_true',
+                            help='Escribe los pagos; sin esta opción solo simula')
+        parser.add_argument('--omitir-errores', action='store_true',
+                            help='Importa las filas válidas aunque otras tengan errores')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                filas = leer_extracto_pagos(archivo, options['archivo'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        resultado = importar_pagos_cuotas(
+            filas,
+            anio=options['anio'],
+            simular=not options['confirmar'],
+            omitir_errores=options['omitir_errores'],
+            metodo_pago=options['metodo_pago'],
+        )
+
+        self.stdout.write(f"\n📄 {resultado['filas']} filas leídas de {options['archivo']}")
+        for item in resultado['detalle']:
+            if item['error']:
+                self.stdout.write(self.style.ERROR(
+                    f"  ❌ Línea {item['linea']} ({item['identificador']}): {item['error']}"
+                ))
+            elif options['verbosity'] > 1:
+                self.stdout.write(
+                    f"  ✔ Línea {item['linea']} {item['voluntario']}: {', '.join(item['meses'])}"
+                )
+
+        self.stdout.write(
+            f"\n📊 {resultado['validas']} filas válidas, {resultado['con_error']} con errores, "
+            f"{resultado['pagos']} meses por ${resultado['monto_total']}"
+        )
+        duracion = time.perf_counter() - inicio
+
+        if resultado['importado']:
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {resultado['pagos']} pagos importados en {duracion:.1f} s"
+            ))
+        elif resultado['simulado']:
+            self.stdout.write(self.style.WARNING('⚠️ Simulación: use --confirmar para importar'))
+        elif resultado['con_error']:
+            raise CommandError('No se importó nada; corrija las filas o use --omitir-errores')
@@ -0,0 +1,40 @@
+"""
+Comando para aplicar la cola de ventas del punto de venta de beneficios
+Ejecutar: python manage.py procesar_ventas_punto_venta [--sesion 3] [--continuo]
+
+Las vistas aplican la cola al recibir ventas; este comando asegura que las
+ventas en cola no queden esperando cuando los dispositivos dejan de enviar.
+Con --continuo se ejecuta en bucle durante el evento.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from voluntarios.utils_punto_venta import INTERVALO_LOTE_PUNTO_VENTA, procesar_ventas_punto_venta
+
+
+class Command(BaseCommand):
+    help = 'Aplica las ventas en cola del punto de venta en micro-lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sesion', type=int, default=None,
+                            help='Solo esta sesión (default: todas)')
+        parser.add_argument('--continuo', action='store_true',
+                            help='Repite cada --intervalo segundos hasta Ctrl+C')
+        parser.add_argument('--intervalo', type=float, default=INTERVALO_LOTE_PUNTO_VENTA)
+
+    def handle(self, *args, **options):
+        while True:
+            resultado = procesar_ventas_punto_venta(options['sesion'])
+            if resultado['lotes'] or not options['continuo']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"✅ {resultado['aplicadas']} ventas aplicadas, {resultado['rechazadas']} rechazadas "
+                    f"en {resultado['lotes']} lotes"
+                ))
+            if not options['continuo']:
+                return
+            try:
+                time.sleep(options['intervalo'])
+            except KeyboardInterrupt:
+                self.stdout.write('⏹️ Detenido')
+                return
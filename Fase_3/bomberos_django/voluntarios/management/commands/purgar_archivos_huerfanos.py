@@ -0,0 +1,40 @@
+"""
+Comando para eliminar los archivos del almacén que ninguna fila referencia
+Ejecutar: python manage.py purgar_archivos_huerfanos [--solo-verificar] [--horas 24]
+
+Un logo o documento reemplazado deja su blob anterior en MEDIA_ROOT/blobs/.
+Solo se eliminan los que llevan más de --horas sin usarse, para no tocar una
+carga que aún no se asigna a su fila.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from voluntarios.utils_blobs import ANTIGUEDAD_PURGA, purgar_archivos_huerfanos
+
+
+class Command(BaseCommand):
+    help = 'Elimina los archivos del almacén sin referencias'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--solo-verificar', action='store_true',
+                            help='No elimina, solo lista los archivos huérfanos')
+        parser.add_argument('--horas', type=int, default=int(ANTIGUEDAD_PURGA.total_seconds() // 3600),
+                            help='Antigüedad mínima sin uso (por defecto 24)')
+
+    def handle(self, *args, **options):
+        self.stdout.write('🗄️ Almacén de archivos')
+
+        hashes = purgar_archivos_huerfanos(
+            antiguedad=timedelta(hours=options['horas']), solo_verificar=options['solo_verificar']
+        )
+        if not hashes:
+            self.stdout.write(self.style.SUCCESS('✅ No hay archivos huérfanos'))
+            return
+
+        for sha256 in hashes:
+            self.stdout.write(f'   - {sha256}')
+        if options['solo_verificar']:
+            self.stdout.write(self.style.WARNING(f'⚠️ {len(hashes)} archivos huérfanos'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ {len(hashes)} archivos eliminados'))
@@ -0,0 +1,39 @@
+"""
+Comando para reconstruir y verificar las estadísticas desnormalizadas de beneficios
+Ejecutar: python manage.py reconstruir_estadisticas_beneficios [--solo-verificar]
+
+Recalcula EstadisticaBeneficio desde las asignaciones (una consulta agrupada)
+y luego verifica que cada fila coincida con ellas.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from voluntarios.utils_tesoreria import (
+    reconstruir_estadisticas_beneficios, verificar_estadisticas_beneficios
+)
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye las estadísticas de beneficios desde las asignaciones y las verifica'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--solo-verificar', action='store_true',
+                            help='No reconstruye, solo informa diferencias contra las asignaciones')
+
+    def handle(self, *args, **options):
+        self.stdout.write('🎟️ Estadísticas de beneficios')
+
+        if not options['solo_verificar']:
+            filas = reconstruir_estadisticas_beneficios()
+            self.stdout.write(self.style.SUCCESS(f'✅ {filas} beneficios reconstruidos'))
+
+        inconsistencias = verificar_estadisticas_beneficios()
+        if not inconsistencias:
+            self.stdout.write(self.style.SUCCESS('✅ Estadísticas coinciden con las asignaciones'))
+            return
+
+        for item in inconsistencias:
+            self.stdout.write(self.style.WARNING(f'⚠️ Beneficio {item["beneficio_id"]}:'))
+            for campo, (guardado, esperado) in item['diferencias'].items():
+                self.stdout.write(f'     - {campo}: guardado={guardado} esperado={esperado}')
+
+        raise CommandError(f'{len(inconsistencias)} beneficios no coinciden con las asignaciones')
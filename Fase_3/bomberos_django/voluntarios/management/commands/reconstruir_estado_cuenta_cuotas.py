@@ -0,0 +1,44 @@
+"""
+Comando para reconstruir y verificar el estado de cuenta materializado de cuotas
+Ejecutar: python manage.py reconstruir_estado_cuenta_cuotas [--anio 2025] [--solo-verificar]
+
+Reconstruye EstadoCuentaCuotas desde los pagos crudos (PagoCuota) y luego
+verifica que cada fila coincida con ellos.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from voluntarios.utils_tesoreria import (
+    anios_estado_cuenta, reconstruir_estado_cuenta, verificar_estado_cuenta
+)
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el estado de cuenta de cuotas desde PagoCuota y lo verifica'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--anio', nargs='+', type=int, default=None,
+                            help='Años a procesar (default: todos los años con pagos y el actual)')
+        parser.add_argument('--solo-verificar', action='store_true',
+                            help='No reconstruye, solo informa diferencias contra los pagos')
+
+    def handle(self, *args, **options):
+        anios = options['anio'] or anios_estado_cuenta()
+        self.stdout.write(f'📒 Estado de cuenta de cuotas - años: {", ".join(map(str, anios))}')
+
+        if not options['solo_verificar']:
+            filas = reconstruir_estado_cuenta(anios)
+            self.stdout.write(self.style.SUCCESS(f'✅ {filas} filas reconstruidas'))
+
+        inconsistencias = verificar_estado_cuenta(anios)
+        if not inconsistencias:
+            self.stdout.write(self.style.SUCCESS('✅ Estado de cuenta coincide con los pagos'))
+            return
+
+        for item in inconsistencias:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ Voluntario {item["voluntario_id"]} - {item["anio"]}:'
+            ))
+            for campo, (guardado, esperado) in item['diferencias'].items():
+                self.stdout.write(f'     - {campo}: guardado={guardado} esperado={esperado}')
+
+        raise CommandError(f'{len(inconsistencias)} filas no coinciden con los pagos')
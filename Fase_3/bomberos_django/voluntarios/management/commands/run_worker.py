@@ -0,0 +1,106 @@
+"""
+Comando que ejecuta los trabajos en segundo plano (ver utils_trabajos.py)
+Ejecutar: python manage.py run_worker [--concurrencia 2] [--intervalo 1] [--una-vez]
+
+Cada hilo toma un trabajo pendiente, lo ejecuta y vuelve a consultar la cola;
+sin trabajos espera --intervalo segundos. Para tareas de CPU (PDF) conviene
+levantar varios procesos run_worker: la toma de trabajos es segura entre procesos.
+Con --una-vez termina cuando la cola queda vacía (útil desde cron).
+"""
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+from voluntarios.utils_trabajos import (
+    nombre_trabajador, procesar_siguiente_trabajo, purgar_trabajos_antiguos, recuperar_trabajos_abandonados
+)
+
+
+# Cada cuánto (segundos) se recuperan trabajos abandonados y se purgan los antiguos
+INTERVALO_MANTENCION = 300
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta los trabajos en segundo plano encolados por la API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrencia', type=int, default=1, help='Trabajos simultáneos (hilos)')
+        parser.add_argument('--intervalo', type=float, default=1.0,
+                            help='Segundos de espera cuando la cola está vacía')
+        parser.add_argument('--una-vez', action='store_true', help='Termina cuando la cola queda vacía')
+
+    def handle(self, *args, **options):
+        concurrencia = options['concurrencia']
+        if concurrencia < 1:
+            raise CommandError('--concurrencia debe ser al menos 1')
+
+        self.intervalo = options['intervalo']
+        self.una_vez = options['una_vez']
+        self.detener = threading.Event()
+        self.candado_salida = threading.Lock()
+
+        self.stdout.write(f'⚙️ Trabajador iniciado ({concurrencia} en paralelo)')
+        self._mantencion()
+
+        hilos = []
+        try:
+            if concurrencia == 1:
+                self._ciclo()
+            else:
+                hilos = [threading.Thread(target=self._ciclo, daemon=True) for _ in range(concurrencia)]
+                for hilo in hilos:
+                    hilo.start()
+                while any(hilo.is_alive() for hilo in hilos):
+                    for hilo in hilos:
+                        hilo.join(timeout=0.5)
+        except KeyboardInterrupt:
+            # Los hilos terminan el trabajo en curso y no toman otro; con un solo
+            # hilo el trabajo interrumpido vuelve a la cola al vencer su latido
+            self.detener.set()
+            self.stdout.write(self.style.WARNING('⚠️ Deteniendo: se termina el trabajo en curso'))
+            for hilo in hilos:
+                hilo.join()
+
+        self.stdout.write(self.style.SUCCESS('✅ Trabajador detenido'))
+
+    def _escribir(self, texto, estilo=None):
+        with self.candado_salida:
+            self.stdout.write(estilo(texto) if estilo else texto)
+
+    def _mantencion(self):
+        recuperados = recuperar_trabajos_abandonados()
+        if recuperados:
+            self._escribir(f'♻️ {recuperados} trabajos abandonados vuelven a la cola', self.style.WARNING)
+        purgados = purgar_trabajos_antiguos()
+        if purgados:
+            self._escribir(f'🧹 {purgados} trabajos antiguos eliminados')
+
+    def _ciclo(self):
+        trabajador = nombre_trabajador()
+        ultima_mantencion = time.monotonic()
+        try:
+            while not self.detener.is_set():
+                # Conexión fresca entre trabajos (no dentro de una transacción abierta)
+                if not connection.in_atomic_block:
+                    close_old_connections()
+                inicio = time.monotonic()
+                trabajo = procesar_siguiente_trabajo(trabajador)
+                if trabajo is None:
+                    if self.una_vez:
+                        break
+                    if time.monotonic() - ultima_mantencion > INTERVALO_MANTENCION:
+                        ultima_mantencion = time.monotonic()
+                        self._mantencion()
+                    self.detener.wait(self.intervalo)
+                    continue
+
+                segundos = time.monotonic() - inicio
+                if trabajo.estado == 'completado':
+                    self._escribir(f'✅ #{trabajo.id} {trabajo.tipo} en {segundos:.1f} s', self.style.SUCCESS)
+                else:
+                    self._escribir(f'❌ #{trabajo.id} {trabajo.tipo}: {trabajo.error}', self.style.ERROR)
+        finally:
+            if threading.current_thread() is not threading.main_thread():
+                connection.close()
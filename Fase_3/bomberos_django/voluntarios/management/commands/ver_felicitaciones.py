@@ -34,7 +34,7 @@ class Command(BaseCommand):
                     self.stdout.write(f"    Autoridad: {f.autoridad_otorgante}")
                 motivo_corto = f.motivo[:70] + '...' if len(f.motivo) > 70 else f.motivo
                 self.stdout.write(f"    Motivo: {motivo_corto}")
-                self.stdout.write(f"    Documento: {'SI' if f.documento_felicitacion else 'NO'}")
+                self.stdout.write(f"    Documento: {'SI' if f.documento_felicitacion_id else 'NO'}")
                 self.stdout.write(f"    Registrado por: {f.created_by.username if f.created_by else 'N/A'}")
                 self.stdout.write(f"    Fecha registro: {f.created_at.strftime('%d/%m/%Y %H:%M')}")
 
@@ -0,0 +1,104 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:12
+
+import django.db.models.deletion
+from datetime import date, timedelta
+from decimal import Decimal
+from django.db import migrations, models
+
+
+ESTADOS_SIN_CUOTAS = ['renunciado', 'separado', 'expulsado', 'fallecido', 'martir']
+
+
+def poblar_estado_cuenta(apps, schema_editor):
+    """
+    Carga inicial del estado de cuenta desde los pagos existentes
+    (mismas reglas que utils_tesoreria al momento de esta migración)
+    """
+    Voluntario = apps.get_model('voluntarios', 'Voluntario')
+    ConfiguracionCuotas = apps.get_model('voluntarios', 'ConfiguracionCuotas')
+    EstadoCuotasBombero = apps.get_model('voluntarios', 'EstadoCuotasBombero')
+    PagoCuota = apps.get_model('voluntarios', 'PagoCuota')
+    EstadoCuentaCuotas = apps.get_model('voluntarios', 'EstadoCuentaCuotas')
+    
+    config = ConfiguracionCuotas.objects.first()
+    precio_regular = config.precio_regular if config else Decimal('5000')
+    precio_estudiante = config.precio_estudiante if config else Decimal('3000')
+    
+    estados = {
+        e.voluntario_id: e for e in EstadoCuotasBombero.objects.all()
+    }
+    voluntarios = {
+        v.id: v for v in Voluntario.objects.only('id', 'estado_bombero', 'fecha_ingreso')
+    }
+    corte_exencion = date.today() - timedelta(days=1827)
+    
+    filas = {}
+    for voluntario_id, anio, mes, monto, fecha_pago in PagoCuota.objects.values_list(
+        'voluntario_id', 'anio', 'mes', 'monto_pagado', 'fecha_pago'
+    ):
+        if not 1 <= mes <= 12:
+            continue
+        fila = filas.setdefault((voluntario_id, anio), {
+            'meses_pagados': 0, 'cantidad_meses_pagados': 0,
+            'total_pagado': Decimal('0'), 'fecha_ultimo_pago': None
+        })
+        fila['meses_pagados'] |= 1 << (mes - 1)
+        fila['cantidad_meses_pagados'] += 1
+        fila['total_pagado'] += monto
+        if fila['fecha_ultimo_pago'] is None or fecha_pago > fila['fecha_ultimo_pago']:
+            fila['fecha_ultimo_pago'] = fecha_pago
+    
+    nuevos = []
+    for (voluntario_id, anio), fila in filas.items():
+        voluntario = voluntarios[voluntario_id]
+        estado = estados.get(voluntario_id)
+        precio = precio_estudiante if estado and estado.es_estudiante else precio_regular
+        exento = (
+            (estado is not None and estado.cuotas_desactivadas)
+            or voluntario.estado_bombero in ESTADOS_SIN_CUOTAS
+            or (voluntario.fecha_ingreso is not None and voluntario.fecha_ingreso <= corte_exencion)
+        )
+        nuevos.append(EstadoCuentaCuotas(
+            voluntario_id=voluntario_id,
+            anio=anio,
+            precio_cuota=precio,
+            exento=exento,
+            monto_adeudado=Decimal('0') if exento else precio * (12 - fila['cantidad_meses_pagados']),
+            **fila
+        ))
+    
+    EstadoCuentaCuotas.objects.bulk_create(nuevos, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voluntarios', '0014_ciclos_cuotas_y_documento_estudiante'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadoCuentaCuotas',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anio', models.IntegerField()),
+                ('meses_pagados', models.IntegerField(default=0, help_text='Mapa de bits de los 12 meses pagados')),
+                ('cantidad_meses_pagados', models.IntegerField(default=0)),
+                ('total_pagado', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('precio_cuota', models.DecimalField(decimal_places=2, help_text='Precio aplicado a los meses pendientes (regular o estudiante)', max_digits=10)),
+                ('exento', models.BooleanField(default=False, help_text='No paga cuotas (exento, estado bloqueado o cuotas desactivadas)')),
+                ('monto_adeudado', models.DecimalField(decimal_places=2, default=0, help_text='Saldo pendiente del año completo (12 meses)', max_digits=10)),
+                ('fecha_ultimo_pago', models.DateField(blank=True, null=True)),
+                ('ultima_actualizacion', models.DateTimeField(auto_now=True)),
+                ('voluntario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estados_cuenta_cuotas', to='voluntarios.voluntario')),
+            ],
+            options={
+                'verbose_name': 'Estado de Cuenta de Cuotas',
+                'verbose_name_plural': 'Estados de Cuenta de Cuotas',
+                'ordering': ['-anio', 'voluntario'],
+                'indexes': [models.Index(fields=['anio', 'monto_adeudado'], name='voluntarios_anio_9cac9d_idx')],
+                'unique_together': {('voluntario', 'anio')},
+            },
+        ),
+        migrations.RunPython(poblar_estado_cuenta, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:31
+
+from datetime import date
+from decimal import Decimal
+from django.db import migrations, models
+
+
+ESTADOS_SIN_CUOTAS = ['renunciado', 'separado', 'expulsado', 'fallecido', 'martir']
+
+LIMITES_CATEGORIA = [
+    (50, 'insigne'),
+    (25, 'honorario_cuerpo'),
+    (20, 'honorario_compania'),
+    (0, 'voluntario'),
+]
+
+# Años de servicio desde los que no se pagan cuotas (Voluntario.ANIOS_EXENCION_CUOTAS)
+ANIOS_EXENCION_CUOTAS = 5
+
+
+def poblar_categorias(apps, schema_editor):
+    """
+    Calcula anios_servicio y categoria de los voluntarios existentes y reaplica
+    la exención del estado de cuenta (5 años de servicio o más, como antes)
+    """
+    Voluntario = apps.get_model('voluntarios', 'Voluntario')
+    EstadoCuotasBombero = apps.get_model('voluntarios', 'EstadoCuotasBombero')
+    EstadoCuentaCuotas = apps.get_model('voluntarios', 'EstadoCuentaCuotas')
+
+    hoy = date.today()
+    voluntarios = list(Voluntario.objects.only(
+        'id', 'estado_bombero', 'fecha_ingreso', 'antiguedad_congelada', 'fecha_congelamiento'
+    ))
+    for voluntario in voluntarios:
+        anios = 0
+        if voluntario.fecha_ingreso:
+            hasta = hoy
+            if voluntario.antiguedad_congelada and voluntario.fecha_congelamiento:
+                hasta = voluntario.fecha_congelamiento
+            desde = voluntario.fecha_ingreso
+            anios = max(hasta.year - desde.year - ((hasta.month, hasta.day) < (desde.month, desde.day)), 0)
+        voluntario.anios_servicio = anios
+        voluntario.categoria = next(c for minimo, c in LIMITES_CATEGORIA if anios >= minimo)
+    Voluntario.objects.bulk_update(voluntarios, ['anios_servicio', 'categoria'], batch_size=500)
+
+    desactivados = set(
+        EstadoCuotasBombero.objects.filter(cuotas_desactivadas=True).values_list('voluntario_id', flat=True)
+    )
+    por_id = {v.id: v for v in voluntarios}
+    filas = list(EstadoCuentaCuotas.objects.all())
+    for fila in filas:
+        voluntario = por_id[fila.voluntario_id]
+        fila.exento = (
+            fila.voluntario_id in desactivados
+            or voluntario.estado_bombero in ESTADOS_SIN_CUOTAS
+            or voluntario.anios_servicio >= ANIOS_EXENCION_CUOTAS
+        )
+        fila.monto_adeudado = (
+            Decimal('0') if fila.exento else fila.precio_cuota * (12 - fila.cantidad_meses_pagados)
+        )
+    EstadoCuentaCuotas.objects.bulk_update(filas, ['exento', 'monto_adeudado'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voluntarios', '0015_estado_cuenta_cuotas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='voluntario',
+            name='anios_servicio',
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='voluntario',
+            name='categoria',
+            field=models.CharField(choices=[('voluntario', 'Voluntario'), ('honorario_compania', 'Voluntario Honorario de Compañía'), ('honorario_cuerpo', 'Voluntario Honorario del Cuerpo'), ('insigne', 'Voluntario Insigne de Chile')], db_index=True, default='voluntario', max_length=20),
+        ),
+        migrations.RunPython(poblar_categorias, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voluntarios', '0016_categoria_voluntario'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CierreMensualFinanciero',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anio', models.IntegerField()),
+                ('mes', models.IntegerField()),
+                ('saldo_inicial', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('ingresos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('egresos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('saldo_final', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cantidad_movimientos', models.IntegerField(default=0)),
+                ('detalle_categorias', models.JSONField(blank=True, default=dict)),
+                ('ingresos_acumulados', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('egresos_acumulados', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('movimientos_acumulados', models.IntegerField(default=0)),
+                ('fecha_cierre', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Cierre Mensual Financiero',
+                'verbose_name_plural': 'Cierres Mensuales Financieros',
+                'ordering': ['-anio', '-mes'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='movimientofinanciero',
+            index=models.Index(fields=['fecha', 'tipo'], name='voluntarios_fecha_a11daa_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='cierremensualfinanciero',
+            unique_together={('anio', 'mes')},
+        ),
+    ]
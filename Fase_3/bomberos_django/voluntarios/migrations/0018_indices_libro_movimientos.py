@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voluntarios', '0017_cierres_mensuales_financieros'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='movimientofinanciero',
+            name='voluntarios_fecha_a11daa_idx',
+        ),
+        migrations.AddIndex(
+            model_name='movimientofinanciero',
+            index=models.Index(fields=['fecha', 'created_at', 'id'], name='voluntarios_fecha_a17abb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientofinanciero',
+            index=models.Index(fields=['tipo', 'fecha', 'created_at', 'id'], name='voluntarios_tipo_094dd8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientofinanciero',
+            index=models.Index(fields=['categoria', 'fecha', 'created_at', 'id'], name='voluntarios_categor_c98ac2_idx'),
+        ),
+    ]
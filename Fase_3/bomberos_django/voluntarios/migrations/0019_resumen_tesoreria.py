@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:39
+
+from django.db import migrations, models
+
+
+def marcar_meses_existentes(apps, schema_editor):
+    """Deja pendientes todos los meses con datos; el cubo se llena en la primera consulta"""
+    MesPendiente = apps.get_model('voluntarios', 'MesPendienteResumenTesoreria')
+    meses = set()
+    for modelo, campo in [('MovimientoFinanciero', 'fecha'), ('PagoCuota', 'fecha_pago'),
+                          ('PagoBeneficio', 'fecha_pago')]:
+        for fecha in apps.get_model('voluntarios', modelo).objects.dates(campo, 'month'):
+            meses.add((fecha.year, fecha.month))
+    MesPendiente.objects.bulk_create(
+        [MesPendiente(anio=anio, mes=mes) for anio, mes in sorted(meses)],
+        ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voluntarios', '0018_indices_libro_movimientos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MesPendienteResumenTesoreria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anio', models.IntegerField()),
+                ('mes', models.IntegerField()),
+            ],
+            options={
+                'verbose_name': 'Mes Pendiente de Resumen',
+                'verbose_name_plural': 'Meses Pendientes de Resumen',
+                'unique_together': {('anio', 'mes')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenTesoreria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anio', models.IntegerField()),
+                ('mes', models.IntegerField()),
+                ('dimension', models.CharField(choices=[('categoria', 'Categoría'), ('beneficio', 'Beneficio'), ('metodo_pago', 'Método de pago')], max_length=20)),
+                ('clave', models.CharField(max_length=100)),
+                ('tipo', models.CharField(choices=[('ingreso', 'Ingreso'), ('egreso', 'Egreso')], default='ingreso', max_length=10)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cantidad', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Resumen de Tesorería',
+                'verbose_name_plural': 'Resúmenes de Tesorería',
+                'ordering': ['anio', 'mes', 'dimension', 'clave'],
+                'indexes': [models.Index(fields=['dimension', 'anio', 'mes'], name='voluntarios_dimensi_b67c9f_idx')],
+                'unique_together': {('anio', 'mes', 'dimension', 'clave', 'tipo')},
+            },
+        ),
+        migrations.RunPython(marcar_meses_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def poblar_estadisticas(apps, schema_editor):
+    """Crea la fila de estadísticas de cada beneficio existente (una consulta agrupada)"""
+    Beneficio = apps.get_model('voluntarios', 'Beneficio')
+    AsignacionBeneficio = apps.get_model('voluntarios', 'AsignacionBeneficio')
+    EstadisticaBeneficio = apps.get_model('voluntarios', 'EstadisticaBeneficio')
+
+    filas = {
+        fila.pop('beneficio_id'): fila
+        for fila in AsignacionBeneficio.objects.order_by().values('beneficio_id').annotate(
+            # Conteos primero: el filtro debe ver la columna monto_pendiente, no la suma
+            total_asignaciones=Count('id'),
+            asignaciones_pendiente=Count('id', filter=Q(estado_pago='pendiente')),
+            asignaciones_parcial=Count('id', filter=Q(estado_pago='parcial')),
+            asignaciones_completo=Count('id', filter=Q(estado_pago='completo')),
+            asignaciones_liberado=Count('id', filter=Q(estado_pago='liberado')),
+            asignaciones_con_deuda=Count('id', filter=Q(monto_pendiente__gt=0)),
+            total_tarjetas_asignadas=Sum('tarjetas_asignadas'),
+            total_tarjetas_vendidas=Sum('tarjetas_vendidas'),
+            total_tarjetas_extras=Sum('tarjetas_extras_vendidas'),
+            total_tarjetas_liberadas=Sum('tarjetas_liberadas'),
+            monto_total_esperado=Sum('monto_total'),
+            monto_recaudado=Sum('monto_pagado'),
+            monto_pendiente=Sum('monto_pendiente'),
+        )
+    }
+    EstadisticaBeneficio.objects.bulk_create(
+        [
+            EstadisticaBeneficio(beneficio_id=beneficio_id, **filas.get(beneficio_id, {}))
+            for beneficio_id in Beneficio.objects.values_list('id', flat=True)
+        ],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voluntarios', '0019_resumen_tesoreria'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaBeneficio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_asignaciones', models.IntegerField(default=0)),
+                ('total_tarjetas_asignadas', models.IntegerField(default=0)),
+                ('total_tarjetas_vendidas', models.IntegerField(default=0)),
+                ('total_tarjetas_extras', models.IntegerField(default=0)),
+                ('total_tarjetas_liberadas', models.IntegerField(default=0)),
+                ('monto_total_esperado', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('monto_recaudado', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('monto_pendiente', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('asignaciones_pendiente', models.IntegerField(default=0)),
+                ('asignaciones_parcial', models.IntegerField(default=0)),
+                ('asignaciones_completo', models.IntegerField(default=0)),
+                ('asignaciones_liberado', models.IntegerField(default=0)),
+                ('asignaciones_con_deuda', models.IntegerField(default=0)),
+                ('ultima_actualizacion', models.DateTimeField(auto_now=True)),
+                ('beneficio', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='estadistica', to='voluntarios.beneficio')),
+            ],
+            options={
+                'verbose_name': 'Estadística de Beneficio',
+                'verbose_name_plural': 'Estadísticas de Beneficios',
+            },
+        ),
+        migrations.RunPython(poblar_estadisticas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voluntarios', '0020_estadistica_beneficio'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SesionPuntoVenta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(blank=True, default='', max_length=100)),
+                ('activa', models.BooleanField(default=True)),
+                ('fecha_apertura', models.DateTimeField(auto_now_add=True)),
+                ('fecha_cierre', models.DateTimeField(blank=True, null=True)),
+                ('abierta_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('beneficio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sesiones_punto_venta', to='voluntarios.beneficio')),
+            ],
+            options={
+                'verbose_name': 'Sesión de Punto de Venta',
+                'verbose_name_plural': 'Sesiones de Punto de Venta',
+                'ordering': ['-fecha_apertura'],
+            },
+        ),
+        migrations.CreateModel(
+            name='VentaPuntoVenta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave_idempotencia', models.CharField(max_length=64, unique=True)),
+                ('tipo_pago', models.CharField(choices=[('normal', 'Pago Normal'), ('extra', 'Venta Extra')], default='normal', max_length=10)),
+                ('cantidad_tarjetas', models.IntegerField()),
+                ('monto', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('metodo_pago', models.CharField(blank=True, max_length=50, null=True)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('aplicada', 'Aplicada'), ('rechazada', 'Rechazada')], default='pendiente', max_length=10)),
+                ('error', models.CharField(blank=True, max_length=255, null=True)),
+                ('fecha_registro', models.DateTimeField(auto_now_add=True)),
+                ('fecha_aplicacion', models.DateTimeField(blank=True, null=True)),
+                ('asignacion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventas_punto_venta', to='voluntarios.asignacionbeneficio')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('pago', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='venta_punto_venta', to='voluntarios.pagobeneficio')),
+                ('sesion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventas', to='voluntarios.sesionpuntoventa')),
+            ],
+            options={
+                'verbose_name': 'Venta de Punto de Venta',
+                'verbose_name_plural': 'Ventas de Punto de Venta',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['estado', 'sesion', 'id'], name='voluntarios_estado_cf5e6f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,211 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:10
+
+import base64
+import hashlib
+import os
+import re
+import tempfile
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# (modelo, campo base64 original, FK temporal)
+CAMPOS = [
+    ('LogoCompania', 'imagen', 'imagen_archivo'),
+    ('Felicitacion', 'documento_felicitacion', 'documento_felicitacion_archivo'),
+    ('EstadoCuotasBombero', 'documento_estudiante', 'documento_estudiante_archivo'),
+]
+
+
+# Copia de lo necesario de voluntarios/utils_blobs.py al crear esta migración:
+# la migración no debe cambiar si el módulo cambia. La ruta de los blobs debe
+# seguir siendo la que usa la aplicación (MEDIA_ROOT/blobs/ab/cd/<sha256>).
+
+TAMANO_TROZO = 64 * 1024
+
+CARACTERES_TROZO_BASE64 = TAMANO_TROZO // 3 * 4
+
+_FIRMAS = [
+    (b'%PDF', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF8', 'image/gif'),
+    (b'PK\x03\x04', 'application/zip'),
+]
+
+_ESPACIOS = re.compile(r'\s+')
+
+
+def ruta_blob(sha256):
+    return os.path.join(settings.MEDIA_ROOT, 'blobs', sha256[:2], sha256[2:4], sha256)
+
+
+def detectar_tipo(cabecera):
+    for firma, tipo in _FIRMAS:
+        if cabecera.startswith(firma):
+            return tipo
+    if cabecera[:4] == b'RIFF' and cabecera[8:12] == b'WEBP':
+        return 'image/webp'
+    return 'application/octet-stream'
+
+
+def separar_data_url(texto):
+    if texto.startswith('data:') and ',' in texto:
+        cabecera, datos = texto.split(',', 1)
+        return cabecera[5:].split(';', 1)[0] or None, datos
+    return None, texto
+
+
+def trozos_base64(datos):
+    if _ESPACIOS.search(datos):
+        datos = _ESPACIOS.sub('', datos)
+    for inicio in range(0, len(datos), CARACTERES_TROZO_BASE64):
+        trozo = datos[inicio:inicio + CARACTERES_TROZO_BASE64]
+        yield base64.b64decode(trozo + '=' * (-len(trozo) % 4), validate=True)
+
+
+def escribir_blob(trozos):
+    """Escribe los trozos a un temporal calculando el SHA-256 y lo mueve a su ruta; retorna (sha256, tamano, cabecera)"""
+    directorio = os.path.join(settings.MEDIA_ROOT, 'blobs')
+    os.makedirs(directorio, exist_ok=True)
+    resumen = hashlib.sha256()
+    tamano = 0
+    cabecera = b''
+
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, prefix='.carga-')
+    try:
+        with os.fdopen(descriptor, 'wb') as destino:
+            for trozo in trozos:
+                if len(cabecera) < 16:
+                    cabecera += trozo[:16 - len(cabecera)]
+                resumen.update(trozo)
+                destino.write(trozo)
+                tamano += len(trozo)
+
+        sha256 = resumen.hexdigest()
+        ruta = ruta_blob(sha256)
+        if os.path.exists(ruta) and os.path.getsize(ruta) == tamano:
+            os.remove(temporal)
+        else:
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            os.chmod(temporal, 0o644)
+            os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    return sha256, tamano, cabecera
+
+
+def mover_a_almacen(apps, schema_editor):
+    """Escribe cada base64 como blob en MEDIA_ROOT y deja en la fila solo el hash"""
+    ArchivoBlob = apps.get_model('voluntarios', 'ArchivoBlob')
+    for nombre_modelo, origen, destino in CAMPOS:
+        Modelo = apps.get_model('voluntarios', nombre_modelo)
+        ids = list(
+            Modelo.objects.exclude(**{f'{origen}__isnull': True}).exclude(**{origen: ''})
+            .values_list('id', flat=True)
+        )
+        # Fila por fila: nunca se cargan todos los base64 a la vez
+        for fila_id in ids:
+            texto = Modelo.objects.filter(id=fila_id).values_list(origen, flat=True).get()
+            _, datos = separar_data_url(texto)
+            try:
+                sha256, tamano, cabecera = escribir_blob(trozos_base64(datos))
+            except ValueError:
+                # No era base64: se conserva el texto tal cual
+                sha256, tamano, cabecera = escribir_blob([texto.encode()])
+            # El tipo declarado en la data URL no se usa (ver utils_blobs.guardar_blob)
+            ArchivoBlob.objects.get_or_create(sha256=sha256, defaults={
+                'tamano': tamano, 'tipo_contenido': detectar_tipo(cabecera),
+            })
+            Modelo.objects.filter(id=fila_id).update(**{f'{destino}_id': sha256})
+
+
+def devolver_a_base64(apps, schema_editor):
+    ArchivoBlob = apps.get_model('voluntarios', 'ArchivoBlob')
+    tipos = dict(ArchivoBlob.objects.values_list('sha256', 'tipo_contenido'))
+    for nombre_modelo, origen, destino in CAMPOS:
+        Modelo = apps.get_model('voluntarios', nombre_modelo)
+        filas = Modelo.objects.exclude(**{f'{destino}__isnull': True}).values_list('id', f'{destino}_id')
+        for fila_id, sha256 in list(filas):
+            with open(ruta_blob(sha256), 'rb') as archivo:
+                contenido = base64.b64encode(archivo.read()).decode()
+            Modelo.objects.filter(id=fila_id).update(**{origen: f'data:{tipos[sha256]};base64,{contenido}'})
+    # LogoCompania.imagen era obligatorio
+    apps.get_model('voluntarios', 'LogoCompania').objects.filter(imagen__isnull=True).update(imagen='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voluntarios', '0022_respuestas_idempotentes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivoBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('tamano', models.PositiveBigIntegerField(help_text='Bytes')),
+                ('tipo_contenido', models.CharField(default='application/octet-stream', max_length=100)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_ultimo_uso', models.DateTimeField(auto_now=True, help_text='Última carga que reutilizó el blob')),
+            ],
+            options={
+                'verbose_name': 'Archivo',
+                'verbose_name_plural': 'Archivos',
+            },
+        ),
+        migrations.AddField(
+            model_name='logocompania',
+            name='imagen_archivo',
+            field=models.ForeignKey(blank=True, help_text='Imagen en el almacén de archivos', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='voluntarios.archivoblob'),
+        ),
+        migrations.AddField(
+            model_name='felicitacion',
+            name='documento_felicitacion_archivo',
+            field=models.ForeignKey(blank=True, help_text='Documento adjunto (almacén de archivos)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='voluntarios.archivoblob'),
+        ),
+        migrations.AddField(
+            model_name='estadocuotasbombero',
+            name='documento_estudiante_archivo',
+            field=models.ForeignKey(blank=True, help_text='Certificado de alumno regular (almacén de archivos)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='voluntarios.archivoblob'),
+        ),
+        # Nullable antes de quitarlo, para que la migración se pueda revertir
+        migrations.AlterField(
+            model_name='logocompania',
+            name='imagen',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.RunPython(mover_a_almacen, devolver_a_base64),
+        migrations.RemoveField(
+            model_name='logocompania',
+            name='imagen',
+        ),
+        migrations.RemoveField(
+            model_name='felicitacion',
+            name='documento_felicitacion',
+        ),
+        migrations.RemoveField(
+            model_name='estadocuotasbombero',
+            name='documento_estudiante',
+        ),
+        migrations.RenameField(
+            model_name='logocompania',
+            old_name='imagen_archivo',
+            new_name='imagen',
+        ),
+        migrations.RenameField(
+            model_name='felicitacion',
+            old_name='documento_felicitacion_archivo',
+            new_name='documento_felicitacion',
+        ),
+        migrations.RenameField(
+            model_name='estadocuotasbombero',
+            old_name='documento_estudiante_archivo',
+            new_name='documento_estudiante',
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:22
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voluntarios', '0023_almacen_archivos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Trabajo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('actualizar_ranking', 'Actualizar ranking de asistencias'), ('pdf_deudores_cuotas', 'PDF de deudores de cuotas'), ('asignar_beneficio', 'Asignación de tarjetas de beneficio'), ('pdf_lote', 'Exportación de PDFs por lote')], max_length=30)),
+                ('parametros', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('completado', 'Completado'), ('error', 'Error')], default='pendiente', max_length=12)),
+                ('hechos', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('mensaje', models.CharField(blank=True, default='', max_length=255)),
+                ('resultado', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('archivo', models.CharField(blank=True, default='', help_text='Ruta relativa a MEDIA_ROOT', max_length=255)),
+                ('error', models.TextField(blank=True, default='')),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('trabajador', models.CharField(blank=True, default='', help_text='Proceso que lo ejecuta', max_length=100)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True)),
+                ('fecha_latido', models.DateTimeField(blank=True, help_text='Última señal de vida del trabajador', null=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+                ('creado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Trabajo',
+                'verbose_name_plural': 'Trabajos',
+                'ordering': ['-fecha_creacion', '-id'],
+                'indexes': [models.Index(fields=['estado', 'fecha_creacion'], name='voluntarios_estado_058ae4_idx')],
+            },
+        ),
+    ]
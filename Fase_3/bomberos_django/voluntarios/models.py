@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinLengthValidator
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 import json
 
@@ -21,6 +22,26 @@ class Voluntario(models.Model):
         ('fallecido', 'Fallecido'),
     ]
     
+    # Categorías por años de servicio (Utils.calcularCategoriaBombero del P6P)
+    CATEGORIA_CHOICES = [
+        ('voluntario', 'Voluntario'),
+        ('honorario_compania', 'Voluntario Honorario de Compañía'),
+        ('honorario_cuerpo', 'Voluntario Honorario del Cuerpo'),
+        ('insigne', 'Voluntario Insigne de Chile'),
+    ]
+    
+    # Años mínimos de servicio de cada categoría, de mayor a menor
+    LIMITES_CATEGORIA = [
+        (50, 'insigne'),
+        (25, 'honorario_cuerpo'),
+        (20, 'honorario_compania'),
+        (0, 'voluntario'),
+    ]
+    
+    # Desde estos años de servicio no se pagan cuotas (regla de tesorería,
+    # independiente de las categorías)
+    ANIOS_EXENCION_CUOTAS = 5
+    
     # Información básica
     nombre = models.CharField(max_length=100, blank=True, null=True)
     apellido_paterno = models.CharField(max_length=100, blank=True, null=True)
@@ -113,6 +134,10 @@ class Voluntario(models.Model):
     # Posición por antigüedad (calculado)
     posicion_por_antiguedad = models.IntegerField(blank=True, null=True)
     
+    # Antigüedad y categoría (calculados; ver refrescar_categoria)
+    anios_servicio = models.IntegerField(default=0, db_index=True)
+    categoria = models.CharField(max_length=20, choices=CATEGORIA_CHOICES, default='voluntario', db_index=True)
+    
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -126,6 +151,70 @@ class Voluntario(models.Model):
     def __str__(self):
         return f"{self.clave_bombero} - {self.nombre} {self.apellido_paterno}"
     
+    def save(self, *args, **kwargs):
+        """Mantiene anios_servicio y categoria al día con fecha_ingreso y el congelamiento"""
+        exento_antes = self.exento_por_antiguedad
+        self._categoria_cambiada = self.refrescar_categoria()
+        self._exencion_cambiada = self.exento_por_antiguedad != exento_antes
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self._categoria_cambiada:
+            kwargs['update_fields'] = set(update_fields) | {'anios_servicio', 'categoria'}
+        super().save(*args, **kwargs)
+    
+    @property
+    def exento_por_antiguedad(self):
+        """No paga cuotas por años de servicio (respeta la antigüedad congelada)"""
+        return self.anios_servicio >= self.ANIOS_EXENCION_CUOTAS
+    
+    @classmethod
+    def categoria_por_anios(cls, anios):
+        """Código de categoría que corresponde a una cantidad de años de servicio"""
+        for minimo, categoria in cls.LIMITES_CATEGORIA:
+            if anios >= minimo:
+                return categoria
+        return 'voluntario'
+    
+    def calcular_anios_servicio(self, hoy=None):
+        """
+        Años completos de servicio
+        Si la antigüedad está congelada se cuenta solo hasta la fecha de congelamiento
+        """
+        from datetime import date
+        
+        fecha_desde = self.fecha_ingreso
+        if not fecha_desde:
+            return 0
+        
+        if self.antiguedad_congelada and self.fecha_congelamiento:
+            fecha_hasta = self.fecha_congelamiento
+        else:
+            fecha_hasta = hoy or date.today()
+        
+        # Los formularios pueden asignar las fechas como texto 'YYYY-MM-DD'
+        if isinstance(fecha_desde, str):
+            fecha_desde = date.fromisoformat(fecha_desde[:10])
+        if isinstance(fecha_hasta, str):
+            fecha_hasta = date.fromisoformat(fecha_hasta[:10])
+        
+        anios = fecha_hasta.year - fecha_desde.year - (
+            (fecha_hasta.month, fecha_hasta.day) < (fecha_desde.month, fecha_desde.day)
+        )
+        return max(anios, 0)
+    
+    def refrescar_categoria(self, hoy=None):
+        """
+        Recalcula anios_servicio y categoria sin guardar
+        
+        Returns:
+            bool: True si alguno de los dos cambió
+        """
+        anios = self.calcular_anios_servicio(hoy)
+        categoria = self.categoria_por_anios(anios)
+        cambio = (anios, categoria) != (self.anios_servicio, self.categoria)
+        self.anios_servicio = anios
+        self.categoria = categoria
+        return cambio
+    
     def nombre_completo(self):
         """Retorna el nombre completo"""
         if self.apellido_materno:
@@ -712,6 +801,107 @@ class PagoBeneficio(models.Model):
         return f"{self.asignacion.voluntario.clave_bombero} - {tipo} - ${self.monto} ({self.fecha_pago})"
 
 
+class EstadisticaBeneficio(models.Model):
+    """
+    Estadísticas desnormalizadas de un beneficio: una fila por beneficio
+    Se crea al asignar el beneficio y se ajusta por diferencia en cada pago o
+    liberación de tarjetas, para que el dashboard no agregue todas las asignaciones.
+    Reconstruible con: python manage.py reconstruir_estadisticas_beneficios
+    """
+    beneficio = models.OneToOneField(Beneficio, on_delete=models.CASCADE, related_name='estadistica')
+
+    total_asignaciones = models.IntegerField(default=0)
+    total_tarjetas_asignadas = models.IntegerField(default=0)
+    total_tarjetas_vendidas = models.IntegerField(default=0)
+    total_tarjetas_extras = models.IntegerField(default=0)
+    total_tarjetas_liberadas = models.IntegerField(default=0)
+
+    monto_total_esperado = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    monto_recaudado = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    monto_pendiente = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    # Asignaciones por estado_pago y con monto pendiente (deudores)
+    asignaciones_pendiente = models.IntegerField(default=0)
+    asignaciones_parcial = models.IntegerField(default=0)
+    asignaciones_completo = models.IntegerField(default=0)
+    asignaciones_liberado = models.IntegerField(default=0)
+    asignaciones_con_deuda = models.IntegerField(default=0)
+
+    ultima_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Estadística de Beneficio'
+        verbose_name_plural = 'Estadísticas de Beneficios'
+
+    def __str__(self):
+        return f"{self.beneficio.nombre} - ${self.monto_recaudado} de ${self.monto_total_esperado}"
+
+
+class SesionPuntoVenta(models.Model):
+    """
+    Sesión de punto de venta de un beneficio (día del evento)
+    Los vendedores registran ventas en cola (VentaPuntoVenta) que se aplican en
+    micro-lotes a PagoBeneficio y MovimientoFinanciero (ver utils_punto_venta.py).
+    """
+    beneficio = models.ForeignKey(Beneficio, on_delete=models.CASCADE, related_name='sesiones_punto_venta')
+    nombre = models.CharField(max_length=100, blank=True, default='')
+    activa = models.BooleanField(default=True)
+    fecha_apertura = models.DateTimeField(auto_now_add=True)
+    fecha_cierre = models.DateTimeField(null=True, blank=True)
+    abierta_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    class Meta:
+        ordering = ['-fecha_apertura']
+        verbose_name = 'Sesión de Punto de Venta'
+        verbose_name_plural = 'Sesiones de Punto de Venta'
+
+    def __str__(self):
+        return f"{self.beneficio.nombre} - {self.nombre or self.fecha_apertura:%d/%m/%Y %H:%M}"
+
+
+class VentaPuntoVenta(models.Model):
+    """
+    Venta en cola de una sesión de punto de venta
+    La clave de idempotencia la genera el dispositivo del vendedor: un reintento
+    con la misma clave retorna la venta ya registrada y nunca cobra dos veces.
+    Al aplicarse queda enlazada a su PagoBeneficio.
+    """
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('aplicada', 'Aplicada'),
+        ('rechazada', 'Rechazada'),
+    ]
+
+    sesion = models.ForeignKey(SesionPuntoVenta, on_delete=models.CASCADE, related_name='ventas')
+    clave_idempotencia = models.CharField(max_length=64, unique=True)
+    asignacion = models.ForeignKey(AsignacionBeneficio, on_delete=models.CASCADE, related_name='ventas_punto_venta')
+    tipo_pago = models.CharField(max_length=10, choices=PagoBeneficio.TIPO_PAGO_CHOICES, default='normal')
+    cantidad_tarjetas = models.IntegerField()
+    monto = models.DecimalField(max_digits=10, decimal_places=2)
+    metodo_pago = models.CharField(max_length=50, blank=True, null=True)
+
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default='pendiente')
+    error = models.CharField(max_length=255, blank=True, null=True)
+    pago = models.OneToOneField(PagoBeneficio, on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='venta_punto_venta')
+
+    fecha_registro = models.DateTimeField(auto_now_add=True)
+    fecha_aplicacion = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Venta de Punto de Venta'
+        verbose_name_plural = 'Ventas de Punto de Venta'
+        indexes = [
+            # Cola de pendientes por sesión, en orden de llegada
+            models.Index(fields=['estado', 'sesion', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.clave_idempotencia} - {self.cantidad_tarjetas} {self.tipo_pago} ({self.estado})"
+
+
 # ==================== FELICITACIONES ====================
 
 class Felicitacion(models.Model):
@@ -734,7 +924,10 @@ class Felicitacion(models.Model):
     oficio_numero = models.CharField(max_length=100, default='S/N')
     fecha_oficio = models.DateField(blank=True, null=True)
     motivo = models.TextField(default='Sin especificar')
-    documento_felicitacion = models.TextField(blank=True, null=True, help_text='Documento en base64')
+    documento_felicitacion = models.ForeignKey(
+        'ArchivoBlob', on_delete=models.PROTECT, null=True, blank=True, related_name='+',
+        help_text='Documento adjunto (almacén de archivos)'
+    )
     documento_nombre_original = models.CharField(max_length=255, blank=True, null=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
@@ -952,7 +1145,10 @@ class CicloAsistencia(models.Model):
 class LogoCompania(models.Model):
     """Logos de la compañía para usar en diferentes contextos del sistema"""
     nombre = models.CharField(max_length=100, help_text="Nombre descriptivo del logo (ej: Logo Oficial, Logo Aniversario)")
-    imagen = models.TextField(help_text="Imagen en formato Base64")
+    imagen = models.ForeignKey(
+        'ArchivoBlob', on_delete=models.PROTECT, null=True, blank=True, related_name='+',
+        help_text="Imagen en el almacén de archivos"
+    )
     descripcion = models.TextField(blank=True, null=True, help_text="Descripción u ocasión de uso")
     
     # Contextos de uso (un logo puede estar en múltiples lugares)
@@ -1060,10 +1256,9 @@ class EstadoCuotasBombero(models.Model):
         help_text="Si está activo, cobra precio estudiante"
     )
     fecha_activacion_estudiante = models.DateField(blank=True, null=True)
-    documento_estudiante = models.TextField(
-        blank=True, 
-        null=True,
-        help_text="Certificado de alumno regular en Base64"
+    documento_estudiante = models.ForeignKey(
+        'ArchivoBlob', on_delete=models.PROTECT, null=True, blank=True, related_name='+',
+        help_text="Certificado de alumno regular (almacén de archivos)"
     )
     observaciones_estudiante = models.TextField(blank=True, null=True)
     
@@ -1149,6 +1344,12 @@ class MovimientoFinanciero(models.Model):
         ordering = ['-fecha', '-created_at']
         verbose_name = 'Movimiento Financiero'
         verbose_name_plural = 'Movimientos Financieros'
+        indexes = [
+            # Llave de la paginación por llave del libro (ver pagina_movimientos)
+            models.Index(fields=['fecha', 'created_at', 'id']),
+            models.Index(fields=['tipo', 'fecha', 'created_at', 'id']),
+            models.Index(fields=['categoria', 'fecha', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         signo = "+" if self.tipo == 'ingreso' else "-"
@@ -1194,3 +1395,260 @@ class CicloCuotas(models.Model):
         elif self.activo and self.pk:
             CicloCuotas.objects.exclude(pk=self.pk).filter(activo=True).update(activo=False)
         super().save(*args, **kwargs)
+
+
+class EstadoCuentaCuotas(models.Model):
+    """
+    Estado de cuenta materializado de cuotas: una fila por voluntario y año
+    Se actualiza en cada pago y en cada cambio de condición (estudiante/desactivación)
+    para que las pantallas de deuda no recalculen desde PagoCuota.
+    Reconstruible con: python manage.py reconstruir_estado_cuenta_cuotas
+    """
+    voluntario = models.ForeignKey(
+        Voluntario,
+        on_delete=models.CASCADE,
+        related_name='estados_cuenta_cuotas'
+    )
+    anio = models.IntegerField()
+    
+    # Meses pagados como mapa de bits: bit 0 = Enero ... bit 11 = Diciembre
+    meses_pagados = models.IntegerField(default=0, help_text="Mapa de bits de los 12 meses pagados")
+    cantidad_meses_pagados = models.IntegerField(default=0)
+    total_pagado = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    
+    # Condición aplicada
+    precio_cuota = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        help_text="Precio aplicado a los meses pendientes (regular o estudiante)"
+    )
+    exento = models.BooleanField(
+        default=False,
+        help_text="No paga cuotas (exento, estado bloqueado o cuotas desactivadas)"
+    )
+    monto_adeudado = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        help_text="Saldo pendiente del año completo (12 meses)"
+    )
+    fecha_ultimo_pago = models.DateField(blank=True, null=True)
+    
+    ultima_actualizacion = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-anio', 'voluntario']
+        verbose_name = 'Estado de Cuenta de Cuotas'
+        verbose_name_plural = 'Estados de Cuenta de Cuotas'
+        unique_together = ['voluntario', 'anio']
+        indexes = [
+            models.Index(fields=['anio', 'monto_adeudado']),
+        ]
+    
+    def __str__(self):
+        return f"{self.voluntario.clave_bombero} - {self.anio} - {self.cantidad_meses_pagados}/12 - Debe ${self.monto_adeudado}"
+    
+    def mes_pagado(self, mes):
+        """Indica si el mes (1-12) está pagado según el mapa de bits"""
+        return bool(self.meses_pagados & (1 << (mes - 1)))
+    
+    def meses_pendientes(self, hasta_mes=12):
+        """Meses impagos entre enero y hasta_mes"""
+        return [mes for mes in range(1, hasta_mes + 1) if not self.mes_pagado(mes)]
+
+
+class CierreMensualFinanciero(models.Model):
+    """
+    Cierre mensual del libro de movimientos financieros: una fila por mes cerrado
+    El saldo actual es el saldo final del último cierre más los movimientos
+    posteriores, sin recorrer toda la historia. Un movimiento con fecha en un mes
+    ya cerrado invalida ese cierre y los siguientes, que se recalculan al consultar.
+    Reconstruible con: python manage.py cerrar_meses_financieros --reconstruir
+    """
+    anio = models.IntegerField()
+    mes = models.IntegerField()
+    
+    saldo_inicial = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    ingresos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    egresos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    saldo_final = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cantidad_movimientos = models.IntegerField(default=0)
+    
+    # Totales por categoría del mes: {'ingreso': {'cuota': '5000.00'}, 'egreso': {...}}
+    detalle_categorias = models.JSONField(default=dict, blank=True)
+    
+    # Acumulados desde el primer movimiento hasta el fin del mes
+    ingresos_acumulados = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    egresos_acumulados = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    movimientos_acumulados = models.IntegerField(default=0)
+    
+    fecha_cierre = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-anio', '-mes']
+        verbose_name = 'Cierre Mensual Financiero'
+        verbose_name_plural = 'Cierres Mensuales Financieros'
+        unique_together = ['anio', 'mes']
+    
+    def __str__(self):
+        return f"{self.mes:02d}/{self.anio} - Saldo ${self.saldo_final}"
+
+
+class ResumenTesoreria(models.Model):
+    """
+    Cubo de reportes de tesorería: totales por mes y por dimensión
+    - categoria: MovimientoFinanciero por tipo y categoría
+    - beneficio: PagoBeneficio por beneficio (clave = id del beneficio)
+    - metodo_pago: PagoCuota y PagoBeneficio por método de pago
+    Se refresca por mes desde MesPendienteResumenTesoreria (ver actualizar_resumen_tesoreria)
+    """
+    DIMENSION_CHOICES = [
+        ('categoria', 'Categoría'),
+        ('beneficio', 'Beneficio'),
+        ('metodo_pago', 'Método de pago'),
+    ]
+    
+    anio = models.IntegerField()
+    mes = models.IntegerField()
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    clave = models.CharField(max_length=100)
+    tipo = models.CharField(max_length=10, choices=MovimientoFinanciero.TIPO_CHOICES, default='ingreso')
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cantidad = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['anio', 'mes', 'dimension', 'clave']
+        verbose_name = 'Resumen de Tesorería'
+        verbose_name_plural = 'Resúmenes de Tesorería'
+        unique_together = ['anio', 'mes', 'dimension', 'clave', 'tipo']
+        indexes = [
+            models.Index(fields=['dimension', 'anio', 'mes']),
+        ]
+    
+    def __str__(self):
+        return f"{self.mes:02d}/{self.anio} {self.dimension}={self.clave} ({self.tipo}): ${self.total}"
+
+
+class MesPendienteResumenTesoreria(models.Model):
+    """Meses con movimientos o pagos nuevos/modificados que el cubo debe recalcular"""
+    anio = models.IntegerField()
+    mes = models.IntegerField()
+    
+    class Meta:
+        verbose_name = 'Mes Pendiente de Resumen'
+        verbose_name_plural = 'Meses Pendientes de Resumen'
+        unique_together = ['anio', 'mes']
+    
+    def __str__(self):
+        return f"{self.mes:02d}/{self.anio}"
+
+
+class RespuestaIdempotente(models.Model):
+    """
+    Respuesta guardada de un POST enviado con la cabecera Idempotency-Key
+    Un reintento con la misma clave recibe la respuesta original sin volver a
+    ejecutar la vista (ver utils_idempotencia.py). codigo_estado vacío indica
+    que la primera solicitud aún está en proceso.
+    """
+    clave = models.CharField(max_length=100, unique=True)
+    ruta = models.CharField(max_length=255)
+    huella = models.CharField(max_length=64, help_text='SHA-256 del cuerpo de la solicitud')
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    
+    codigo_estado = models.PositiveSmallIntegerField(null=True, blank=True)
+    tipo_contenido = models.CharField(max_length=100, blank=True, default='')
+    contenido = models.BinaryField(blank=True, default=b'')
+    
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    expira = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        verbose_name = 'Respuesta Idempotente'
+        verbose_name_plural = 'Respuestas Idempotentes'
+    
+    def __str__(self):
+        return f"{self.clave} {self.ruta} ({self.codigo_estado or 'en proceso'})"
+
+
+class ArchivoBlob(models.Model):
+    """
+    Archivo del almacén direccionado por contenido (ver utils_blobs.py)
+    Los bytes viven en MEDIA_ROOT/blobs/ab/cd/<sha256>; las filas que adjuntan
+    archivos guardan solo el hash. Dos cargas del mismo archivo comparten blob.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    tamano = models.PositiveBigIntegerField(help_text='Bytes')
+    tipo_contenido = models.CharField(max_length=100, default='application/octet-stream')
+    
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_ultimo_uso = models.DateTimeField(auto_now=True, help_text='Última carga que reutilizó el blob')
+    
+    class Meta:
+        verbose_name = 'Archivo'
+        verbose_name_plural = 'Archivos'
+    
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.tipo_contenido}, {self.tamano} bytes)"
+
+
+class Trabajo(models.Model):
+    """
+    Trabajo en segundo plano (ver utils_trabajos.py)
+    Las operaciones pesadas (ranking, PDF de deudores, asignación de beneficios,
+    exportación por lote) se encolan aquí y la vista responde 202 de inmediato.
+    python manage.py run_worker los ejecuta; el avance y el resultado se
+    consultan en /api/trabajos/<id>/ y el archivo generado queda en
+    MEDIA_ROOT/trabajos/<id>/.
+    """
+    TIPO_CHOICES = [
+        ('actualizar_ranking', 'Actualizar ranking de asistencias'),
+        ('pdf_deudores_cuotas', 'PDF de deudores de cuotas'),
+        ('asignar_beneficio', 'Asignación de tarjetas de beneficio'),
+        ('pdf_lote', 'Exportación de PDFs por lote'),
+    ]
+    
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('en_proceso', 'En proceso'),
+        ('completado', 'Completado'),
+        ('error', 'Error'),
+    ]
+    
+    tipo = models.CharField(max_length=30, choices=TIPO_CHOICES)
+    parametros = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    estado = models.CharField(max_length=12, choices=ESTADO_CHOICES, default='pendiente')
+    
+    # Avance informado por la tarea
+    hechos = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    mensaje = models.CharField(max_length=255, blank=True, default='')
+    
+    resultado = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    archivo = models.CharField(max_length=255, blank=True, default='', help_text='Ruta relativa a MEDIA_ROOT')
+    error = models.TextField(blank=True, default='')
+    
+    intentos = models.PositiveSmallIntegerField(default=0)
+    trabajador = models.CharField(max_length=100, blank=True, default='', help_text='Proceso que lo ejecuta')
+    creado_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_latido = models.DateTimeField(null=True, blank=True, help_text='Última señal de vida del trabajador')
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-fecha_creacion', '-id']
+        verbose_name = 'Trabajo'
+        verbose_name_plural = 'Trabajos'
+        indexes = [
+            models.Index(fields=['estado', 'fecha_creacion']),
+        ]
+    
+    def __str__(self):
+        return f"#{self.id} {self.tipo} ({self.estado})"
+    
+    @property
+    def porcentaje(self):
+        if self.estado == 'completado':
+            return 100.0
+        return round(100 * self.hechos / self.total, 1) if self.total else 0.0
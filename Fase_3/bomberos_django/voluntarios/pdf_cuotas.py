@@ -11,7 +11,7 @@ from datetime import datetime
 from decimal import Decimal
 
 
-def generar_pdf_cuotas(voluntario, anio, pagos_dict, deuda_total, logo_base64=None):
+def generar_pdf_cuotas(voluntario, anio, pagos_dict, deuda_total, logo=None):
     """
     Genera PDF con estado de cuotas del voluntario para un año específico
     
@@ -20,13 +20,26 @@ def generar_pdf_cuotas(voluntario, anio, pagos_dict, deuda_total, logo_base64=No
         anio: Año de las cuotas (int)
         pagos_dict: Diccionario {mes: pago} con los pagos realizados
         deuda_total: Decimal con la deuda total pendiente
-        logo_base64: String base64 del logo (opcional)
+        logo: LogoPDF de utils_logos.obtener_logo_pdf() (opcional)
     
     Returns:
         BytesIO con el PDF generado
     """
     buffer = BytesIO()
     c = canvas.Canvas(buffer, pagesize=A4)
+    dibujar_pdf_cuotas(c, voluntario, anio, pagos_dict, deuda_total, logo=logo)
+    c.save()
+    
+    buffer.seek(0)
+    return buffer
+
+
+def dibujar_pdf_cuotas(c, voluntario, anio, pagos_dict, deuda_total, logo=None, precio_cuota=None):
+    """
+    Dibuja la página de estado de cuotas en un canvas ya abierto (termina con showPage)
+    La exportación por lote dibuja varias en un mismo documento y pasa el
+    precio ya calculado para no consultar desde los procesos de renderizado.
+    """
     width, height = A4
     
     # Margen
@@ -38,13 +51,9 @@ def generar_pdf_cuotas(voluntario, anio, pagos_dict, deuda_total, logo_base64=No
     # ==================== HEADER ====================
     
     # Logo (si existe)
-    if logo_base64:
+    if logo:
         try:
-            from reportlab.lib.utils import ImageReader
-            import base64
-            logo_data = base64.b64decode(logo_base64.split(',')[1] if ',' in logo_base64 else logo_base64)
-            logo_img = ImageReader(BytesIO(logo_data))
-            c.drawImage(logo_img, margin_x, y_position - 30*mm, width=25*mm, height=25*mm, preserveAspectRatio=True)
+            c.drawImage(logo.lector, margin_x, y_position - 30*mm, width=25*mm, height=25*mm, preserveAspectRatio=True)
         except:
             pass
     
@@ -96,9 +105,10 @@ def generar_pdf_cuotas(voluntario, anio, pagos_dict, deuda_total, logo_base64=No
     y_info -= 5*mm
     
     # Precio de cuota
-    from .utils_tesoreria import obtener_precio_cuota
-    
-    precio_cuota = obtener_precio_cuota(voluntario)
+    if precio_cuota is None:
+        from .utils_tesoreria import obtener_precio_cuota
+        
+        precio_cuota = obtener_precio_cuota(voluntario)
     
     c.drawString(margin_x + 5*mm, y_info, f"Valor Cuota: ${int(precio_cuota):,}")
     
@@ -269,22 +279,18 @@ def generar_pdf_cuotas(voluntario, anio, pagos_dict, deuda_total, logo_base64=No
     c.drawString(margin_x, 9*mm, f"🚒 Sistema de Gestión Bomberil - {datetime.now().year}")
     c.drawString(width - margin_x - 25*mm, 9*mm, f"Página 1 de 1")
     
-    # Finalizar PDF
+    # Finalizar página
     c.showPage()
-    c.save()
-    
-    buffer.seek(0)
-    return buffer
 
 
-def generar_pdf_deudores(deudores_data, anio, logo_base64=None):
+def generar_pdf_deudores(deudores_data, anio, logo=None):
     """
     Genera PDF con listado de deudores de cuotas
     
     Args:
         deudores_data: Lista de diccionarios con info de deudores
         anio: Año de referencia
-        logo_base64: String base64 del logo (opcional)
+        logo: LogoPDF de utils_logos.obtener_logo_pdf() (opcional)
     
     Returns:
         BytesIO con el PDF generado
@@ -1,12 +1,16 @@
 """
 Vistas para generación de PDFs de cuotas
 """
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from .models import Voluntario, PagoCuota, LogoCompania
+from .models import Voluntario, PagoCuota
 from .pdf_cuotas import generar_pdf_cuotas, generar_pdf_deudores
-from .utils_tesoreria import calcular_deuda_cuotas, calcular_deudores_cuotas
+from .utils_logos import obtener_logo_pdf
+from .utils_cache_pdf import respuesta_pdf_cacheada, version_pdf_cuotas
+from .utils_tesoreria import calcular_deuda_cuotas, filas_pdf_deudores
+from .utils_trabajos import encolar_trabajo
+from .views_trabajos import respuesta_trabajo_encolado
 from datetime import datetime
 
 
@@ -26,45 +30,36 @@ def pdf_cuotas_voluntario(request, voluntario_id, anio=None):
         else:
             anio = int(anio)
         
-        # Obtener pagos del año
-        pagos = PagoCuota.objects.filter(
-            voluntario=voluntario,
-            anio=anio
-        )
-        
-        # Crear diccionario de pagos por mes
-        pagos_dict = {}
-        for pago in pagos:
-            pagos_dict[pago.mes] = {
-                'monto_pagado': pago.monto_pagado,
-                'fecha_pago': pago.fecha_pago,
-                'metodo_pago': pago.metodo_pago
-            }
-        
-        # Calcular deuda total
-        deuda = calcular_deuda_cuotas(voluntario, anio)
-        deuda_total = deuda['monto']
-        
-        # Obtener logo (si existe)
-        logo_base64 = None
-        try:
-            logo = LogoCompania.objects.filter(usar_en_pdfs=True).first()
-            if logo:
-                logo_base64 = logo.imagen
-        except:
-            pass
-        
-        # Generar PDF
-        pdf_buffer = generar_pdf_cuotas(
-            voluntario=voluntario,
-            anio=anio,
-            pagos_dict=pagos_dict,
-            deuda_total=deuda_total,
-            logo_base64=logo_base64
-        )
-        
-        # Crear respuesta HTTP
-        response = HttpResponse(pdf_buffer.getvalue(), content_type='application/pdf')
+        def generar():
+            # Obtener pagos del año
+            pagos = PagoCuota.objects.filter(
+                voluntario=voluntario,
+                anio=anio
+            )
+            
+            # Crear diccionario de pagos por mes
+            pagos_dict = {}
+            for pago in pagos:
+                pagos_dict[pago.mes] = {
+                    'monto_pagado': pago.monto_pagado,
+                    'fecha_pago': pago.fecha_pago,
+                    'metodo_pago': pago.metodo_pago
+                }
+            
+            # Calcular deuda total
+            deuda = calcular_deuda_cuotas(voluntario, anio)
+            
+            # Generar PDF con el logo (si existe) desde el caché de logos
+            return generar_pdf_cuotas(
+                voluntario=voluntario,
+                anio=anio,
+                pagos_dict=pagos_dict,
+                deuda_total=deuda['monto'],
+                logo=obtener_logo_pdf()
+            )
+        
+        # Solo se dibuja si hubo pagos nuevos o cambió el precio, el voluntario o el logo
+        response = respuesta_pdf_cacheada(request, version_pdf_cuotas(voluntario, anio), generar)
         filename = f"cuotas_{voluntario.clave_bombero}_{anio}.pdf"
         response['Content-Disposition'] = f'inline; filename="{filename}"'
         
@@ -77,11 +72,16 @@ def pdf_cuotas_voluntario(request, voluntario_id, anio=None):
 
 
 @csrf_exempt
-@require_http_methods(["GET"])
+@require_http_methods(["GET", "POST"])
 def pdf_deudores_cuotas(request, anio=None):
     """
-    Genera PDF con listado de deudores de cuotas
-    GET /api/voluntarios/pdf-deudores-cuotas/{anio}/
+    PDF con listado de deudores de cuotas
+    GET  /api/voluntarios/pdf-deudores-cuotas/{anio}/  descarga directa
+    POST /api/voluntarios/pdf-deudores-cuotas/{anio}/  encola el PDF (202)
+    
+    Con POST el PDF se descarga desde la url_resultado del trabajo
+    (/api/trabajos/<id>/resultado/) cuando run_worker lo termina. El GET no
+    escribe nada, así que enlaces y rastreadores no llenan la cola.
     """
     try:
         # Si no se especifica año, usar el actual
@@ -90,42 +90,21 @@ def pdf_deudores_cuotas(request, anio=None):
         else:
             anio = int(anio)
         
-        # Obtener deudores
-        deudores = calcular_deudores_cuotas(anio)
-        
-        # Preparar datos para PDF
-        deudores_data = []
-        for deudor in deudores:
-            voluntario = deudor['voluntario']
-            deudores_data.append({
-                'clave': voluntario.clave_bombero,
-                'nombre': f"{voluntario.nombre} {voluntario.apellido_paterno}",
-                'compania': voluntario.compania,
-                'meses_pendientes': len(deudor['meses_pendientes']),
-                'deuda_total': deudor['monto']
-            })
-        
-        # Obtener logo (si existe)
-        logo_base64 = None
-        try:
-            logo = LogoCompania.objects.filter(usar_en_pdfs=True).first()
-            if logo:
-                logo_base64 = logo.imagen
-        except:
-            pass
+        if request.method == 'POST':
+            if not request.user.is_authenticated:
+                return JsonResponse({'error': 'No autenticado'}, status=401)
+            trabajo = encolar_trabajo('pdf_deudores_cuotas', {'anio': anio}, request.user)
+            return respuesta_trabajo_encolado(trabajo, mensaje=f'PDF de deudores {anio} en cola')
         
         # Generar PDF
         pdf_buffer = generar_pdf_deudores(
-            deudores_data=deudores_data,
+            deudores_data=filas_pdf_deudores(anio),
             anio=anio,
-            logo_base64=logo_base64
+            logo=obtener_logo_pdf()
         )
         
-        # Crear respuesta HTTP
         response = HttpResponse(pdf_buffer.getvalue(), content_type='application/pdf')
-        filename = f"deudores_cuotas_{anio}.pdf"
-        response['Content-Disposition'] = f'inline; filename="{filename}"'
-        
+        response['Content-Disposition'] = f'inline; filename="deudores_cuotas_{anio}.pdf"'
         return response
         
     except Exception as e:
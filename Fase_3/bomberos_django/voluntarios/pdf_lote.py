@@ -0,0 +1,66 @@
+"""
+Renderizado de PDFs para la exportación por lote (ver utils_exportacion.py)
+Las funciones de este módulo corren dentro de los procesos del pool.
+
+No importa modelos al cargarse: con el método 'spawn' (Windows) el proceso
+hijo importa este módulo antes de que Django esté configurado. Las tareas
+llegan como datos planos y el renderizado nunca consulta la base de datos.
+"""
+import os
+from io import BytesIO
+
+# Logo decodificado una vez por proceso (iniciar_proceso)
+_logo = None
+
+
+def iniciar_proceso(logo_id=None, logo_contenido=None):
+    """Inicializador de cada proceso del pool: configura Django si hace falta y prepara el logo"""
+    global _logo
+    from django.apps import apps
+
+    if not apps.ready:
+        import django
+
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+        django.setup()
+
+    from .utils_logos import LogoPDF
+
+    _logo = LogoPDF(logo_id, logo_contenido) if logo_contenido else None
+
+
+def tamano_pagina(tipo):
+    from reportlab.lib.pagesizes import A4, landscape
+
+    return landscape(A4) if tipo == 'uniformes' else A4
+
+
+def dibujar_tarea(c, tarea, logo):
+    """Dibuja la página (o páginas) de una tarea en un canvas abierto"""
+    if tarea['tipo'] == 'cuotas':
+        from .pdf_cuotas import dibujar_pdf_cuotas
+
+        dibujar_pdf_cuotas(
+            c, tarea['voluntario'], tarea['anio'], tarea['pagos'], tarea['deuda_total'],
+            logo=logo, precio_cuota=tarea['precio_cuota']
+        )
+    else:
+        from .pdf_uniformes import dibujar_tabla_uniformes
+
+        dibujar_tabla_uniformes(c, tarea['voluntario'], tarea['filas'])
+
+
+def renderizar_tarea(tarea, logo):
+    """PDF individual de una tarea: retorna (nombre_archivo, bytes)"""
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=tamano_pagina(tarea['tipo']))
+    dibujar_tarea(c, tarea, logo)
+    c.save()
+    return tarea['nombre_archivo'], buffer.getvalue()
+
+
+def renderizar(tarea):
+    """Punto de entrada del pool (usa el logo del proceso)"""
+    return renderizar_tarea(tarea, _logo)
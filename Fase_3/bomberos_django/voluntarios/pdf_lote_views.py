@@ -0,0 +1,96 @@
+"""
+Vistas para la exportación por lote de PDFs (estados de cuotas y tablas de uniformes)
+"""
+import tempfile
+from datetime import datetime
+
+from django.http import FileResponse, HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from .utils_exportacion import (
+    FORMATOS_EXPORTACION, TIPOS_EXPORTACION, exportar_pdfs_lote, filtrar_voluntarios, obtener_progreso, seguidor_progreso
+)
+from .utils_trabajos import encolar_trabajo
+from .views_trabajos import respuesta_trabajo_encolado
+
+
+def _lista(valor):
+    return [parte.strip() for parte in (valor or '').split(',') if parte.strip()]
+
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+def pdf_lote(request):
+    """
+    Exporta en un solo archivo los PDF de un grupo de voluntarios
+    GET /api/voluntarios/pdf-lote/?tipo=cuotas&anio=2025&formato=zip
+    POST /api/voluntarios/pdf-lote/ (mismos parámetros) encola la exportación
+        y responde 202; el archivo queda en el resultado del trabajo
+
+    Parámetros:
+        tipo: cuotas | uniformes
+        formato: zip (un PDF por voluntario) | pdf (un documento con marcadores)
+        anio: año de las cuotas (por defecto el actual)
+        estado, categoria, ids: filtros de voluntarios separados por coma
+        seguimiento: id elegido por el cliente para consultar el avance en
+            /api/voluntarios/pdf-lote/progreso/<seguimiento>/ (solo GET)
+    """
+    try:
+        datos = request.POST or request.GET
+        tipo = datos.get('tipo', 'cuotas')
+        formato = datos.get('formato', 'zip')
+        anio = int(datos.get('anio') or datetime.now().year)
+        estados = _lista(datos.get('estado'))
+        categorias = _lista(datos.get('categoria'))
+        ids = [int(i) for i in _lista(datos.get('ids'))]
+
+        if request.method == 'POST':
+            if tipo not in TIPOS_EXPORTACION or formato not in FORMATOS_EXPORTACION:
+                raise ValueError(f'tipo o formato inválido: {tipo}, {formato}')
+            trabajo = encolar_trabajo('pdf_lote', {
+                'tipo': tipo, 'formato': formato, 'anio': anio,
+                'estados': estados, 'categorias': categorias, 'ids': ids,
+            }, request.user)
+            return respuesta_trabajo_encolado(trabajo)
+
+        voluntarios = filtrar_voluntarios(estados=estados, categorias=categorias, ids=ids)
+        seguimiento = request.GET.get('seguimiento')
+
+        # El lote se escribe a disco y se entrega por streaming desde ahí
+        archivo = tempfile.TemporaryFile()
+        resumen = exportar_pdfs_lote(
+            archivo, tipo, voluntarios, anio=anio, formato=formato,
+            progreso=seguidor_progreso(seguimiento) if seguimiento else None
+        )
+        archivo.seek(0)
+
+        nombre = f"{tipo}_{anio}.{formato}" if tipo == 'cuotas' else f"{tipo}.{formato}"
+        response = FileResponse(
+            archivo, as_attachment=True, filename=nombre,
+            content_type='application/zip' if formato == 'zip' else 'application/pdf'
+        )
+        response['X-Total-Documentos'] = str(resumen['total'])
+        return response
+
+    except ValueError as e:
+        return HttpResponse(f'Parámetros inválidos: {str(e)}', status=400)
+    except Exception as e:
+        return HttpResponse(f'Error al generar PDFs: {str(e)}', status=500)
+
+
+@require_http_methods(["GET"])
+def progreso_pdf_lote(request, seguimiento):
+    """
+    Avance de una exportación por lote
+    GET /api/voluntarios/pdf-lote/progreso/<seguimiento>/
+    """
+    progreso = obtener_progreso(seguimiento)
+    if progreso is None:
+        return JsonResponse({'error': 'Exportación no encontrada'}, status=404)
+    total = progreso['total']
+    return JsonResponse({
+        'seguimiento': seguimiento,
+        **progreso,
+        'porcentaje': round(100 * progreso['hechos'] / total, 1) if total else 100.0,
+    })
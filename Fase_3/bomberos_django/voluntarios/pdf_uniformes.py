@@ -10,6 +10,8 @@ from reportlab.lib.colors import Color, black, white
 from datetime import datetime
 import os
 
+from .utils_logos import obtener_logo_pdf
+
 
 # Colores por tipo de uniforme (RGB normalizado 0-1)
 COLORES_PDF = {
@@ -86,28 +88,14 @@ def generar_pdf_uniforme(uniforme):
     y = height - 20*mm
     
     # ==================== LOGO ====================
-    # Intentar cargar logo de la base de datos
+    # Logo activo desde el caché (sin consultas ni decodificación por PDF)
     try:
-        from .models import LogoCompania
-        import base64
-        from reportlab.lib.utils import ImageReader
-        
-        logo_activo = LogoCompania.objects.filter(usar_en_pdfs=True).first()
-        if logo_activo and logo_activo.imagen:
-            # Decodificar base64
-            if ',' in logo_activo.imagen:
-                logo_data = logo_activo.imagen.split(',')[1]
-            else:
-                logo_data = logo_activo.imagen
-            
-            logo_bytes = base64.b64decode(logo_data)
-            logo_buffer = BytesIO(logo_bytes)
-            logo_img = ImageReader(logo_buffer)
-            
+        logo = obtener_logo_pdf()
+        if logo:
             # Dibujar logo (esquina superior izquierda)
             logo_width = 25*mm
             logo_height = 25*mm
-            p.drawImage(logo_img, 15*mm, y - logo_height, width=logo_width, height=logo_height, mask='auto')
+            p.drawImage(logo.lector, 15*mm, y - logo_height, width=logo_width, height=logo_height, mask='auto')
     except Exception as e:
         print(f"[PDF] No se pudo cargar el logo: {e}")
     
@@ -398,24 +386,11 @@ def generar_pdf_devolucion(uniforme, pieza):
     
     # ==================== LOGO ====================
     try:
-        from .models import LogoCompania
-        import base64
-        from reportlab.lib.utils import ImageReader
-        
-        logo_activo = LogoCompania.objects.filter(usar_en_pdfs=True).first()
-        if logo_activo and logo_activo.imagen:
-            if ',' in logo_activo.imagen:
-                logo_data = logo_activo.imagen.split(',')[1]
-            else:
-                logo_data = logo_activo.imagen
-            
-            logo_bytes = base64.b64decode(logo_data)
-            logo_buffer = BytesIO(logo_bytes)
-            logo_img = ImageReader(logo_buffer)
-            
+        logo = obtener_logo_pdf()
+        if logo:
             logo_width = 25*mm
             logo_height = 25*mm
-            p.drawImage(logo_img, 15*mm, y - logo_height, width=logo_width, height=logo_height, mask='auto')
+            p.drawImage(logo.lector, 15*mm, y - logo_height, width=logo_width, height=logo_height, mask='auto')
     except Exception as e:
         print(f"[PDF DEVOLUCION] No se pudo cargar el logo: {e}")
     
@@ -693,13 +668,33 @@ def generar_pdf_tabla_uniformes(voluntario, uniformes):
     
     Args:
         voluntario: Instancia del modelo Voluntario
-        uniformes: QuerySet de Uniformes activos
+        uniformes: QuerySet de Uniformes activos (con prefetch_related('piezas'))
         
     Returns:
         BytesIO: Buffer con el PDF generado
     """
+    filas = [
+        (uniforme, [pieza for pieza in uniforme.piezas.all() if pieza.estado_pieza == 'activo'])
+        for uniforme in uniformes
+    ]
+    
     buffer = BytesIO()
     p = canvas.Canvas(buffer, pagesize=landscape(A4))
+    dibujar_tabla_uniformes(p, voluntario, filas)
+    p.save()
+    
+    buffer.seek(0)
+    return buffer
+
+
+def dibujar_tabla_uniformes(p, voluntario, filas):
+    """
+    Dibuja la tabla de uniformes en un canvas ya abierto (termina con showPage)
+    
+    Args:
+        voluntario: Voluntario (o un objeto con sus mismos atributos)
+        filas: lista de (uniforme, piezas activas), ya leídas de la base de datos
+    """
     width, height = landscape(A4)
     
     # Color naranja para el tema
@@ -723,7 +718,7 @@ def generar_pdf_tabla_uniformes(voluntario, uniformes):
     p.setFillColor(black)
     p.drawString(15*mm, y, f'Clave: {voluntario.clave_bombero or "N/A"}')
     p.drawString(60*mm, y, f'RUN: {voluntario.rut or "N/A"}')
-    p.drawString(120*mm, y, f'Total de uniformes: {uniformes.count()}')
+    p.drawString(120*mm, y, f'Total de uniformes: {len(filas)}')
     
     y -= 8*mm
     
@@ -735,9 +730,7 @@ def generar_pdf_tabla_uniformes(voluntario, uniformes):
     
     # ==================== PROCESAR CADA UNIFORME ====================
     
-    for uniforme in uniformes:
-        piezas_activas = uniforme.piezas.filter(estado_pieza='activo')
-        
+    for uniforme, piezas_activas in filas:
         if not piezas_activas:
             continue
         
@@ -873,9 +866,5 @@ def generar_pdf_tabla_uniformes(voluntario, uniformes):
     p.setFont('Helvetica', 6)
     p.drawCentredString(width/2, y, 'Sistema de Registro de Uniformes - Proyecto SEIS - Sexta Compañía de Bomberos de Puerto Montt')
     
-    # Finalizar
+    # Finalizar página
     p.showPage()
-    p.save()
-    
-    buffer.seek(0)
-    return buffer
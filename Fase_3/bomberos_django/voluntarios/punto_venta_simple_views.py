@@ -0,0 +1,172 @@
+"""
+Vistas SIMPLES para el punto de venta de beneficios (sin DRF, sin autenticación)
+Venta de tarjetas el día del evento desde varios dispositivos a la vez
+"""
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+import json
+
+from .models import Beneficio, SesionPuntoVenta
+from .utils_punto_venta import (
+    abrir_sesion_punto_venta, cerrar_sesion_punto_venta, resumen_sesion_punto_venta,
+    obtener_indice_vendedores, registrar_ventas_punto_venta, procesar_ventas_punto_venta,
+    cola_vencida
+)
+
+
+def _resumen_json(sesion, procesado=None):
+    resumen = resumen_sesion_punto_venta(sesion)
+    data = {
+        'sesion_id': resumen['sesion_id'],
+        'beneficio_id': resumen['beneficio_id'],
+        'activa': resumen['activa'],
+        'fecha_apertura': resumen['fecha_apertura'].isoformat(),
+        'fecha_cierre': resumen['fecha_cierre'].isoformat() if resumen['fecha_cierre'] else None,
+        'ventas': {
+            estado: {'ventas': fila['ventas'], 'tarjetas': fila['tarjetas'], 'monto': float(fila['monto'])}
+            for estado, fila in resumen['ventas'].items()
+        },
+    }
+    if procesado is not None:
+        data['procesado'] = procesado
+    return data
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def abrir_sesion_punto_venta_simple(request):
+    """
+    Abrir sesión de punto de venta
+    POST /api/punto-venta/sesiones/
+
+    Body JSON:
+    {
+        "beneficio_id": 1,
+        "nombre": "Caja entrada"
+    }
+    """
+    try:
+        data = json.loads(request.body)
+        if not data.get('beneficio_id'):
+            return JsonResponse({'error': 'Datos incompletos'}, status=400)
+
+        usuario = request.user if request.user.is_authenticated else None
+        sesion = abrir_sesion_punto_venta(data['beneficio_id'], data.get('nombre', ''), usuario)
+        return JsonResponse(_resumen_json(sesion), status=201)
+
+    except Beneficio.DoesNotExist:
+        return JsonResponse({'error': 'Beneficio no encontrado'}, status=404)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'JSON inválido'}, status=400)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@require_http_methods(["GET"])
+def sesion_punto_venta_simple(request, sesion_id):
+    """
+    Resumen de la sesión (aplica la cola si ya corresponde)
+    GET /api/punto-venta/sesiones/<id>/
+    """
+    try:
+        sesion = SesionPuntoVenta.objects.get(id=sesion_id)
+        procesado = procesar_ventas_punto_venta(sesion.id) if cola_vencida(sesion.id) else None
+        return JsonResponse(_resumen_json(sesion, procesado))
+    except SesionPuntoVenta.DoesNotExist:
+        return JsonResponse({'error': 'Sesión no encontrada'}, status=404)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@require_http_methods(["GET"])
+def vendedores_punto_venta_simple(request, sesion_id):
+    """
+    Vendedores del beneficio con sus tarjetas vendibles (desde el índice en memoria)
+    GET /api/punto-venta/sesiones/<id>/vendedores/?recargar=1
+    """
+    try:
+        sesion = SesionPuntoVenta.objects.get(id=sesion_id)
+        recargar = request.GET.get('recargar', '').lower() in ('1', 'true')
+        indice = obtener_indice_vendedores(sesion.beneficio_id, recargar=recargar)
+        vendedores = sorted(indice['vendedores'].values(), key=lambda v: v['clave_bombero'])
+        return JsonResponse({
+            'beneficio_id': indice['beneficio_id'],
+            'beneficio_nombre': indice['nombre'],
+            'precio_tarjeta': float(indice['precio_por_tarjeta']),
+            'precio_tarjeta_extra': float(indice['precio_tarjeta_extra']),
+            'vendedores': [dict(v) for v in vendedores],
+        })
+    except SesionPuntoVenta.DoesNotExist:
+        return JsonResponse({'error': 'Sesión no encontrada'}, status=404)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def ventas_punto_venta_simple(request, sesion_id):
+    """
+    Registrar ventas en cola (una o varias)
+    POST /api/punto-venta/sesiones/<id>/ventas/
+
+    Body JSON:
+    {
+        "ventas": [
+            {
+                "clave_idempotencia": "b7f3...",   (generada por el dispositivo, se repite en reintentos)
+                "clave_bombero": "123",            (o voluntario_id / asignacion_id)
+                "tipo_pago": "normal",             (o "extra")
+                "cantidad_tarjetas": 2,
+                "metodo_pago": "Efectivo"
+            }
+        ]
+    }
+
+    Responde 202: las ventas quedan pendientes hasta que se aplica el lote.
+    """
+    try:
+        data = json.loads(request.body)
+        ventas = data.get('ventas', [data] if 'clave_idempotencia' in data else [])
+        if not ventas:
+            return JsonResponse({'error': 'Datos incompletos'}, status=400)
+
+        sesion = SesionPuntoVenta.objects.get(id=sesion_id)
+        usuario = request.user if request.user.is_authenticated else None
+        resultados = registrar_ventas_punto_venta(sesion, ventas, usuario)
+
+        # Un reintento puro (todas las claves ya registradas) no toca la cola
+        procesado = None
+        nuevas = any(r['estado'] == 'pendiente' and not r['repetida'] for r in resultados)
+        if nuevas and cola_vencida(sesion.id):
+            procesado = procesar_ventas_punto_venta(sesion.id)
+
+        return JsonResponse({'resultados': resultados, 'procesado': procesado}, status=202)
+
+    except SesionPuntoVenta.DoesNotExist:
+        return JsonResponse({'error': 'Sesión no encontrada'}, status=404)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'JSON inválido'}, status=400)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def cerrar_sesion_punto_venta_simple(request, sesion_id):
+    """
+    Aplicar toda la cola y cerrar la sesión
+    POST /api/punto-venta/sesiones/<id>/cerrar/
+    """
+    try:
+        sesion = SesionPuntoVenta.objects.get(id=sesion_id)
+        procesado = cerrar_sesion_punto_venta(sesion)
+        return JsonResponse(_resumen_json(sesion, procesado))
+    except SesionPuntoVenta.DoesNotExist:
+        return JsonResponse({'error': 'Sesión no encontrada'}, status=404)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.utils import timezone
 from datetime import datetime
 from .models import (
     Voluntario, Cargo, Sancion, TipoAsistencia, Asistencia, 
@@ -7,8 +8,53 @@ from .models import (
     Beneficio, AsignacionBeneficio, PagoBeneficio, Felicitacion, Reintegro,
     EventoAsistencia, DetalleAsistencia, VoluntarioExterno, RankingAsistencia, CicloAsistencia,
     ConfiguracionCuotas, EstadoCuotasBombero, MovimientoFinanciero, CicloCuotas,
-    LogoCompania
+    LogoCompania, ArchivoBlob, Trabajo
 )
+from .utils_blobs import data_url_blob, guardar_blob_base64, guardar_blob_subido, url_blob, sha256_de_url
+from .utils_trabajos import url_estado_trabajo, url_resultado_trabajo
+
+
+class CampoArchivo(serializers.Field):
+    """
+    Archivo del almacén (utils_blobs.py) referenciado por una FK a ArchivoBlob
+    Recibe base64/data URL o un archivo multipart y responde la URL de descarga
+    leyendo solo la columna del hash (sin consultar ArchivoBlob). Con
+    context['incrustar_archivos'] responde el contenido como data URL.
+    """
+    default_error_messages = {
+        'invalid': 'El archivo debe enviarse como base64, data URL o archivo adjunto.',
+    }
+
+    def get_attribute(self, instance):
+        if self.context.get('incrustar_archivos'):
+            return getattr(instance, self.source)
+        return getattr(instance, f'{self.source}_id')
+
+    def to_representation(self, value):
+        if self.context.get('incrustar_archivos'):
+            try:
+                return data_url_blob(value)
+            except OSError:
+                return None
+        return url_blob(value)
+
+    def to_internal_value(self, data):
+        if hasattr(data, 'chunks'):
+            return guardar_blob_subido(data)
+        if not isinstance(data, str):
+            self.fail('invalid')
+        # Un PUT que devuelve la URL recibida en el GET conserva el mismo archivo
+        sha256 = sha256_de_url(data)
+        if sha256:
+            blob = ArchivoBlob.objects.filter(sha256=sha256).first()
+            if blob:
+                return blob
+            self.fail('invalid')
+        try:
+            return guardar_blob_base64(data)
+        except ValueError:
+            self.fail('invalid')
+
 
 class VoluntarioSerializer(serializers.ModelSerializer):
     nombre_completo = serializers.SerializerMethodField()
@@ -41,7 +87,8 @@ class VoluntarioSerializer(serializers.ModelSerializer):
     class Meta:
         model = Voluntario
         fields = '__all__'
-        read_only_fields = ['created_at', 'updated_at', 'created_by', 'posicion_por_antiguedad']
+        read_only_fields = ['created_at', 'updated_at', 'created_by', 'posicion_por_antiguedad',
+                            'anios_servicio', 'categoria']
         extra_kwargs = {
             'grupo_sanguineo': {'required': False},
             'nro_registro': {'required': False},
@@ -455,6 +502,9 @@ class VoluntarioSerializer(serializers.ModelSerializer):
             'nombreCompleto': instance.nombre_completo(),
             'edad': instance.edad() if instance.fecha_nacimiento else 0,
             'antiguedad': instance.antiguedad_detallada() if instance.fecha_ingreso else {'años': 0, 'meses': 0, 'dias': 0},
+            'aniosServicio': instance.anios_servicio,
+            'categoria': instance.categoria,
+            'categoriaNombre': instance.get_categoria_display(),
         }
         
         return ret
@@ -687,6 +737,7 @@ class PagoBeneficioSerializer(serializers.ModelSerializer):
 
 class FelicitacionSerializer(serializers.ModelSerializer):
     voluntario_nombre = serializers.SerializerMethodField()
+    documento_felicitacion = CampoArchivo(required=False, allow_null=True)
 
     class Meta:
         model = Felicitacion
@@ -764,6 +815,39 @@ class EventoAsistenciaListSerializer(serializers.ModelSerializer):
         return obj.registrado_por.username if obj.registrado_por else None
 
 
+class PlanillaAsistenteSerializer(serializers.Serializer):
+    """Un asistente de la planilla: voluntario, externo con ficha o externo por nombre"""
+    voluntario = serializers.IntegerField(required=False, allow_null=True)
+    externo = serializers.IntegerField(required=False, allow_null=True)
+    nombre_completo = serializers.CharField(required=False, allow_blank=True, max_length=200)
+    tipo_externo = serializers.ChoiceField(choices=VoluntarioExterno.TIPO_CHOICES, required=False, allow_null=True)
+
+    def validate(self, data):
+        if not (data.get('voluntario') or data.get('externo') or data.get('nombre_completo')):
+            raise serializers.ValidationError('Indique voluntario, externo o nombre_completo')
+        return data
+
+
+class RegistrarPlanillaAsistenciaSerializer(serializers.Serializer):
+    """Evento de asistencia con su planilla completa de asistentes"""
+    evento = serializers.DictField()
+    asistentes = PlanillaAsistenteSerializer(many=True, allow_empty=False)
+
+    # Las estadísticas se calculan en el servidor
+    CAMPOS_CALCULADOS = [
+        'total_asistentes', 'oficiales_comandancia', 'oficiales_compania', 'total_oficiales',
+        'cargos_confianza', 'voluntarios', 'participantes', 'canjes', 'porcentaje_asistencia',
+    ]
+
+    def validate_evento(self, value):
+        datos = {k: v for k, v in value.items() if k not in self.CAMPOS_CALCULADOS}
+        if not datos.get('id_evento'):
+            datos['id_evento'] = int(timezone.now().timestamp() * 1000)
+        serializer = EventoAsistenciaSerializer(data=datos)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+
 class RankingAsistenciaSerializer(serializers.ModelSerializer):
     class Meta:
         model = RankingAsistencia
@@ -782,6 +866,7 @@ class CicloAsistenciaSerializer(serializers.ModelSerializer):
 
 class LogoCompaniaSerializer(serializers.ModelSerializer):
     cargado_por_nombre = serializers.SerializerMethodField()
+    imagen = CampoArchivo()
     
     class Meta:
         model = LogoCompania
@@ -817,12 +902,13 @@ class ConfiguracionCuotasSerializer(serializers.ModelSerializer):
 class EstadoCuotasBomberoSerializer(serializers.ModelSerializer):
     voluntario_nombre = serializers.CharField(source='voluntario.nombre_completo', read_only=True)
     voluntario_clave = serializers.CharField(source='voluntario.clave_bombero', read_only=True)
+    documento_estudiante = CampoArchivo(read_only=True)
     
     class Meta:
         model = EstadoCuotasBombero
         fields = [
             'id', 'voluntario', 'voluntario_nombre', 'voluntario_clave',
-            'es_estudiante', 'fecha_activacion_estudiante', 'observaciones_estudiante',
+            'es_estudiante', 'fecha_activacion_estudiante', 'documento_estudiante', 'observaciones_estudiante',
             'cuotas_desactivadas', 'motivo_desactivacion', 'fecha_desactivacion', 'desactivado_por',
             'fecha_creacion', 'ultima_actualizacion'
         ]
@@ -867,6 +953,35 @@ class CrearPagoCuotaSerializer(serializers.Serializer):
     observaciones = serializers.CharField(required=False, allow_blank=True)
 
 
+class CrearPagosCuotasLoteSerializer(serializers.Serializer):
+    """Serializer para pagar varios meses de un año: lista 'meses' o rango mes_desde/mes_hasta"""
+    voluntario_id = serializers.IntegerField()
+    anio = serializers.IntegerField(min_value=2000)
+    meses = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=12), required=False, allow_empty=False
+    )
+    mes_desde = serializers.IntegerField(min_value=1, max_value=12, required=False)
+    mes_hasta = serializers.IntegerField(min_value=1, max_value=12, required=False)
+    monto_por_mes = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    consolidar = serializers.BooleanField(default=True)
+    fecha_pago = serializers.DateField(required=False)
+    metodo_pago = serializers.CharField(max_length=50, required=False, allow_blank=True)
+    numero_comprobante = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    observaciones = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate(self, data):
+        if 'meses' in data:
+            if len(set(data['meses'])) != len(data['meses']):
+                raise serializers.ValidationError({'meses': 'Hay meses repetidos'})
+        elif 'mes_desde' in data and 'mes_hasta' in data:
+            if data['mes_desde'] > data['mes_hasta']:
+                raise serializers.ValidationError({'mes_hasta': 'Debe ser mayor o igual a mes_desde'})
+            data['meses'] = list(range(data['mes_desde'], data['mes_hasta'] + 1))
+        else:
+            raise serializers.ValidationError('Indique meses o el rango mes_desde/mes_hasta')
+        return data
+
+
 class BeneficioSerializer(serializers.ModelSerializer):
     created_by_nombre = serializers.SerializerMethodField()
     total_asignaciones = serializers.SerializerMethodField()
@@ -888,9 +1003,15 @@ class BeneficioSerializer(serializers.ModelSerializer):
         return obj.created_by.username if obj.created_by else None
     
     def get_total_asignaciones(self, obj):
-        return obj.asignaciones.count()
+        # El ViewSet anota el conteo; sin anotación se consulta por fila
+        total = getattr(obj, 'num_asignaciones', None)
+        if total is None:
+            total = obj.asignaciones.count()
+        return total
     
     def get_total_recaudado(self, obj):
+        if hasattr(obj, 'suma_recaudado'):
+            return obj.suma_recaudado or 0
         from django.db.models import Sum
         total = obj.asignaciones.aggregate(Sum('monto_pagado'))['monto_pagado__sum']
         return total or 0
@@ -939,7 +1060,7 @@ class PagoBeneficioSerializer(serializers.ModelSerializer):
     
     def get_asignacion_info(self, obj):
         return {
-            'voluntario_nombre': obj.asignacion.voluntario.nombre_completo,
+            'voluntario_nombre': obj.asignacion.voluntario.nombre_completo(),
             'voluntario_clave': obj.asignacion.voluntario.clave_bombero,
             'beneficio_nombre': obj.asignacion.beneficio.nombre
         }
@@ -1019,21 +1140,56 @@ class CicloCuotasSerializer(serializers.ModelSerializer):
     
     def get_total_pagos(self, obj):
         """Contar pagos del año"""
+        if hasattr(obj, 'num_pagos'):
+            return obj.num_pagos or 0
         from .models import PagoCuota
         return PagoCuota.objects.filter(anio=obj.anio).count()
     
     def get_total_recaudado(self, obj):
         """Suma de pagos del año"""
-        from .models import PagoCuota
-        from django.db.models import Sum
-        total = PagoCuota.objects.filter(anio=obj.anio).aggregate(
-            total=Sum('monto_pagado')
-        )['total']
+        if hasattr(obj, 'suma_recaudado'):
+            total = obj.suma_recaudado
+        else:
+            from .models import PagoCuota
+            from django.db.models import Sum
+            total = PagoCuota.objects.filter(anio=obj.anio).aggregate(
+                total=Sum('monto_pagado')
+            )['total']
         return float(total) if total else 0.0
 
 
 class SubirDocumentoEstudianteSerializer(serializers.Serializer):
-    """Serializer para subir documento de estudiante"""
+    """Serializer para subir documento de estudiante (base64 o archivo multipart)"""
     voluntario_id = serializers.IntegerField()
-    documento_base64 = serializers.CharField()
+    documento_base64 = CampoArchivo(required=False)
+    documento = CampoArchivo(required=False)
     observaciones = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate(self, data):
+        if not (data.get('documento') or data.get('documento_base64')):
+            raise serializers.ValidationError('Debe adjuntar el documento')
+        return data
+
+
+# ==================== TRABAJOS ====================
+
+class TrabajoSerializer(serializers.ModelSerializer):
+    """Estado y avance de un trabajo en segundo plano (ver utils_trabajos.py)"""
+    porcentaje = serializers.FloatField(read_only=True)
+    url_estado = serializers.SerializerMethodField()
+    url_resultado = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Trabajo
+        fields = [
+            'id', 'tipo', 'estado', 'parametros', 'hechos', 'total', 'porcentaje', 'mensaje',
+            'resultado', 'error', 'intentos', 'url_estado', 'url_resultado',
+            'fecha_creacion', 'fecha_inicio', 'fecha_fin'
+        ]
+        read_only_fields = fields
+    
+    def get_url_estado(self, obj):
+        return url_estado_trabajo(obj)
+    
+    def get_url_resultado(self, obj):
+        return url_resultado_trabajo(obj) if obj.estado == 'completado' else None
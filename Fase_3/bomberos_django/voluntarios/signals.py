@@ -0,0 +1,218 @@
+"""
+Señales del módulo de voluntarios
+Mantienen al día el ranking de asistencias en cada escritura, la exención de
+cuotas cuando cambia la categoría de un voluntario, los cierres mensuales
+financieros cuando se toca un movimiento de un mes ya cerrado, los meses
+pendientes del cubo de reportes de tesorería, el caché de configuración y el
+logo de los PDF
+"""
+import threading
+
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import (
+    Voluntario, EventoAsistencia, DetalleAsistencia, MovimientoFinanciero, PagoCuota, PagoBeneficio,
+    ConfiguracionCuotas, CicloCuotas, CicloAsistencia, LogoCompania
+)
+from .utils_asistencias import registrar_asistencia_ranking, mover_evento_ranking
+from .utils_configuracion import invalidar_singletons_modelo
+from .utils_logos import descartar_logo_pdf
+from .utils_tesoreria import (
+    actualizar_condicion_estado_cuenta, invalidar_cierres_financieros, marcar_meses_resumen
+)
+
+
+# Eventos que se están borrando: sus detalles se descuentan en bloque
+_borrado = threading.local()
+
+
+def _eventos_en_borrado():
+    if not hasattr(_borrado, 'ids'):
+        _borrado.ids = set()
+    return _borrado.ids
+
+
+# ==================== RANKING DE ASISTENCIAS ====================
+
+@receiver(pre_save, sender=EventoAsistencia)
+def guardar_estado_anterior_evento(sender, instance, raw=False, **kwargs):
+    """Recuerda tipo/fecha/suma_ranking previos para trasladar el ranking"""
+    if raw or not instance.pk:
+        instance._ranking_anterior = None
+        return
+    instance._ranking_anterior = EventoAsistencia.objects.filter(pk=instance.pk).values(
+        'tipo', 'fecha', 'suma_ranking'
+    ).first()
+
+
+@receiver(post_save, sender=EventoAsistencia)
+def actualizar_ranking_evento(sender, instance, created, raw=False, **kwargs):
+    anterior = getattr(instance, '_ranking_anterior', None)
+    if raw or created or anterior is None:
+        return
+    mover_evento_ranking(
+        anterior,
+        instance,
+        instance.asistentes.values_list('voluntario_id', 'externo_id')
+    )
+
+
+@receiver(pre_delete, sender=EventoAsistencia)
+def descontar_ranking_evento(sender, instance, **kwargs):
+    """Descuenta de una vez todas las asistencias del evento borrado"""
+    _eventos_en_borrado().add(instance.pk)
+    registrar_asistencia_ranking(
+        instance,
+        instance.asistentes.values_list('voluntario_id', 'externo_id'),
+        signo=-1
+    )
+
+
+@receiver(post_delete, sender=EventoAsistencia)
+def terminar_borrado_evento(sender, instance, **kwargs):
+    _eventos_en_borrado().discard(instance.pk)
+
+
+@receiver(pre_save, sender=DetalleAsistencia)
+def guardar_participante_anterior(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        instance._ranking_anterior = None
+        return
+    instance._ranking_anterior = DetalleAsistencia.objects.filter(pk=instance.pk).values(
+        'evento_id', 'voluntario_id', 'externo_id'
+    ).first()
+
+
+@receiver(post_save, sender=DetalleAsistencia)
+def sumar_asistencia_ranking(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    participante = (instance.voluntario_id, instance.externo_id)
+    if created:
+        registrar_asistencia_ranking(instance.evento, [participante])
+        return
+
+    anterior = getattr(instance, '_ranking_anterior', None)
+    if anterior and (anterior['evento_id'], anterior['voluntario_id'], anterior['externo_id']) != (
+        instance.evento_id, *participante
+    ):
+        evento_anterior = EventoAsistencia.objects.get(pk=anterior['evento_id'])
+        registrar_asistencia_ranking(
+            evento_anterior, [(anterior['voluntario_id'], anterior['externo_id'])], signo=-1
+        )
+        registrar_asistencia_ranking(instance.evento, [participante])
+
+
+@receiver(post_delete, sender=DetalleAsistencia)
+def restar_asistencia_ranking(sender, instance, **kwargs):
+    if instance.evento_id in _eventos_en_borrado():
+        return
+    evento = EventoAsistencia.objects.filter(pk=instance.evento_id).first()
+    if evento:
+        registrar_asistencia_ranking(
+            evento, [(instance.voluntario_id, instance.externo_id)], signo=-1
+        )
+
+
+# ==================== CATEGORÍA DE VOLUNTARIOS ====================
+
+@receiver(pre_save, sender=Voluntario)
+def guardar_estado_anterior_voluntario(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        instance._estado_anterior = None
+        return
+    instance._estado_anterior = Voluntario.objects.filter(
+        pk=instance.pk
+    ).values_list('estado_bombero', flat=True).first()
+
+
+@receiver(post_save, sender=Voluntario)
+def actualizar_exencion_categoria(sender, instance, created, raw=False, **kwargs):
+    """
+    Reaplica la exención del año en curso cuando cambia lo que la decide:
+    la antigüedad (desde Voluntario.ANIOS_EXENCION_CUOTAS no se pagan cuotas)
+    o el estado (renuncia, fallecimiento, reintegro)
+    """
+    if raw or created:
+        return
+    estado_cambiado = getattr(instance, '_estado_anterior', None) not in (None, instance.estado_bombero)
+    if not (getattr(instance, '_exencion_cambiada', False) or estado_cambiado):
+        return
+    if instance.estados_cuenta_cuotas.filter(anio=timezone.now().year).exists():
+        actualizar_condicion_estado_cuenta(instance)
+
+
+# ==================== CIERRES MENSUALES FINANCIEROS ====================
+
+@receiver(pre_save, sender=MovimientoFinanciero)
+def guardar_fecha_anterior_movimiento(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        instance._fecha_anterior = None
+        return
+    instance._fecha_anterior = MovimientoFinanciero.objects.filter(
+        pk=instance.pk
+    ).values_list('fecha', flat=True).first()
+
+
+@receiver(post_save, sender=MovimientoFinanciero)
+def invalidar_cierre_movimiento_guardado(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    fecha_anterior = getattr(instance, '_fecha_anterior', None)
+    invalidar_cierres_financieros(instance.fecha, fecha_anterior)
+    marcar_meses_resumen(instance.fecha, fecha_anterior)
+
+
+@receiver(post_delete, sender=MovimientoFinanciero)
+def invalidar_cierre_movimiento_eliminado(sender, instance, **kwargs):
+    invalidar_cierres_financieros(instance.fecha)
+    marcar_meses_resumen(instance.fecha)
+
+
+# ==================== CUBO DE REPORTES DE TESORERÍA ====================
+
+@receiver(pre_save, sender=PagoCuota)
+@receiver(pre_save, sender=PagoBeneficio)
+def guardar_fecha_anterior_pago(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        instance._fecha_pago_anterior = None
+        return
+    instance._fecha_pago_anterior = sender.objects.filter(
+        pk=instance.pk
+    ).values_list('fecha_pago', flat=True).first()
+
+
+@receiver(post_save, sender=PagoCuota)
+@receiver(post_save, sender=PagoBeneficio)
+def marcar_mes_pago_guardado(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    marcar_meses_resumen(instance.fecha_pago, getattr(instance, '_fecha_pago_anterior', None))
+
+
+@receiver(post_delete, sender=PagoCuota)
+@receiver(post_delete, sender=PagoBeneficio)
+def marcar_mes_pago_eliminado(sender, instance, **kwargs):
+    marcar_meses_resumen(instance.fecha_pago)
+
+
+# ==================== CACHÉ DE CONFIGURACIÓN ====================
+
+@receiver(post_save, sender=ConfiguracionCuotas)
+@receiver(post_save, sender=CicloCuotas)
+@receiver(post_save, sender=CicloAsistencia)
+@receiver(post_delete, sender=ConfiguracionCuotas)
+@receiver(post_delete, sender=CicloCuotas)
+@receiver(post_delete, sender=CicloAsistencia)
+def invalidar_cache_configuracion(sender, **kwargs):
+    invalidar_singletons_modelo(sender)
+
+
+@receiver(post_save, sender=LogoCompania)
+@receiver(post_delete, sender=LogoCompania)
+def invalidar_cache_logo(sender, instance, **kwargs):
+    invalidar_singletons_modelo(sender)
+    descartar_logo_pdf(instance.pk)
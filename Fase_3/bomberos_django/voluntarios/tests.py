@@ -1,7 +1,19 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.contrib.auth.models import User
 from .models import Voluntario, Cargo, Sancion
 from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+import atexit
+import importlib.util
+import json
+import shutil
+import tempfile
+import unittest
+
+# Los blobs de las pruebas no tocan el MEDIA_ROOT real
+MEDIA_PRUEBAS = tempfile.mkdtemp(prefix='media-pruebas-')
+atexit.register(shutil.rmtree, MEDIA_PRUEBAS, ignore_errors=True)
 
 class VoluntarioModelTest(TestCase):
     
@@ -116,3 +128,1842 @@ class SancionModelTest(TestCase):
         """Test creación de sanción"""
         self.assertEqual(self.sancion.tipo_sancion, 'suspension')
         self.assertEqual(self.sancion.dias_sancion, 15)
+
+
+class DeudoresCuotasTest(TestCase):
+    """calcular_deudores_cuotas debe coincidir con el cálculo por voluntario"""
+    
+    def setUp(self):
+        from .models import ConfiguracionCuotas, EstadoCuotasBombero, PagoCuota
+        
+        ConfiguracionCuotas.objects.create(precio_regular=5000, precio_estudiante=3000)
+        hoy = date.today()
+        self.anio = hoy.year
+        
+        self.regular = self._crear('100', hoy - timedelta(days=365))
+        self.estudiante = self._crear('101', hoy - timedelta(days=400))
+        self.desactivado = self._crear('102', hoy - timedelta(days=500))
+        self.honorario = self._crear('103', date(2000, 1, 1))
+        self.inactivo = self._crear('104', None, estado='inactivo')
+        self.renunciado = self._crear('105', hoy - timedelta(days=100), estado='renunciado')
+        
+        EstadoCuotasBombero.objects.create(voluntario=self.estudiante, es_estudiante=True)
+        EstadoCuotasBombero.objects.create(voluntario=self.desactivado, cuotas_desactivadas=True)
+        from .utils_tesoreria import aplicar_pago_estado_cuenta
+        
+        pago = PagoCuota.objects.create(voluntario=self.regular, mes=1, anio=self.anio, monto_pagado=5000)
+        aplicar_pago_estado_cuenta(pago)
+    
+    def _crear(self, clave, fecha_ingreso, estado='activo'):
+        return Voluntario.objects.create(
+            nombre='Test', apellido_paterno=clave, rut=f'{clave}00000-0',
+            clave_bombero=clave, fecha_ingreso=fecha_ingreso, estado_bombero=estado
+        )
+    
+    def _calculo_por_voluntario(self, anio):
+        from .utils_tesoreria import puede_pagar_cuotas, calcular_deuda_cuotas, obtener_precio_cuota
+        
+        resultado = []
+        for v in Voluntario.objects.filter(estado_bombero__in=['activo', 'inactivo']):
+            if not puede_pagar_cuotas(v)['puede']:
+                continue
+            deuda = calcular_deuda_cuotas(v, anio)
+            if deuda['monto'] > 0:
+                resultado.append((v.id, deuda['monto'], deuda['meses_pendientes'], obtener_precio_cuota(v)))
+        return resultado
+    
+    def test_coincide_con_calculo_por_voluntario(self):
+        from .utils_tesoreria import calcular_deudores_cuotas
+        
+        for anio in [self.anio, self.anio - 1]:
+            deudores = calcular_deudores_cuotas(anio)
+            obtenido = [(d['voluntario'].id, d['monto'], d['meses_pendientes'], d['precio_cuota']) for d in deudores]
+            self.assertEqual(obtenido, self._calculo_por_voluntario(anio))
+        
+        ids = [d['voluntario'].id for d in calcular_deudores_cuotas(self.anio)]
+        self.assertNotIn(self.desactivado.id, ids)
+        self.assertNotIn(self.honorario.id, ids)
+        self.assertNotIn(self.renunciado.id, ids)
+    
+    def test_consultas_constantes(self):
+        from .utils_tesoreria import calcular_deudores_cuotas
+        
+        # La configuración de precios sale del caché de utils_configuracion
+        with self.assertNumQueries(1):
+            calcular_deudores_cuotas(self.anio - 1)
+        
+        for i in range(20):
+            self._crear(f'2{i:02d}', date.today() - timedelta(days=30))
+        
+        with self.assertNumQueries(1):
+            calcular_deudores_cuotas(self.anio - 1)
+
+
+class EstadoCuentaCuotasTest(TestCase):
+    """El estado de cuenta materializado debe seguir a los pagos y cambios de condición"""
+    
+    def setUp(self):
+        from .models import ConfiguracionCuotas
+        
+        ConfiguracionCuotas.objects.create(precio_regular=5000, precio_estudiante=3000)
+        self.anio = date.today().year
+        self.voluntario = Voluntario.objects.create(
+            nombre='Test', apellido_paterno='Cuenta', rut='30000000-0',
+            clave_bombero='300', fecha_ingreso=date.today() - timedelta(days=365),
+            estado_bombero='activo'
+        )
+    
+    def test_pagos_y_condicion_actualizan_estado_cuenta(self):
+        from .models import EstadoCuentaCuotas
+        from .utils_tesoreria import (
+            registrar_pago_cuota, activar_estudiante, desactivar_cuotas_voluntario,
+            verificar_estado_cuenta
+        )
+        
+        registrar_pago_cuota(self.voluntario.id, 1, self.anio, 5000, {'fecha_pago': date(self.anio, 1, 5)}, None)
+        registrar_pago_cuota(self.voluntario.id, 3, self.anio, 5000, {'fecha_pago': date(self.anio, 3, 2)}, None)
+        
+        estado_cuenta = EstadoCuentaCuotas.objects.get(voluntario=self.voluntario, anio=self.anio)
+        self.assertEqual(estado_cuenta.meses_pagados, 0b101)
+        self.assertEqual(estado_cuenta.cantidad_meses_pagados, 2)
+        self.assertEqual(estado_cuenta.total_pagado, 10000)
+        self.assertEqual(estado_cuenta.monto_adeudado, 50000)
+        self.assertEqual(estado_cuenta.fecha_ultimo_pago, date(self.anio, 3, 2))
+        self.assertEqual(estado_cuenta.meses_pendientes(4), [2, 4])
+        
+        activar_estudiante(self.voluntario.id, {}, None)
+        estado_cuenta.refresh_from_db()
+        self.assertEqual(estado_cuenta.precio_cuota, 3000)
+        self.assertEqual(estado_cuenta.monto_adeudado, 30000)
+        
+        desactivar_cuotas_voluntario(self.voluntario.id, 'Prueba', None)
+        estado_cuenta.refresh_from_db()
+        self.assertTrue(estado_cuenta.exento)
+        self.assertEqual(estado_cuenta.monto_adeudado, 0)
+        
+        self.assertEqual(verificar_estado_cuenta([self.anio]), [])
+    
+    def test_reconstruccion_corrige_diferencias(self):
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        from .models import PagoCuota
+        from .utils_tesoreria import registrar_pago_cuota
+        
+        registrar_pago_cuota(self.voluntario.id, 2, self.anio, 5000, {}, None)
+        
+        # Borrado directo: el estado de cuenta queda desalineado
+        PagoCuota.objects.filter(voluntario=self.voluntario).delete()
+        with self.assertRaises(CommandError):
+            call_command('reconstruir_estado_cuenta_cuotas', '--solo-verificar', stdout=StringIO())
+        
+        call_command('reconstruir_estado_cuenta_cuotas', stdout=StringIO())
+        estado_cuenta = self.voluntario.estados_cuenta_cuotas.get(anio=self.anio)
+        self.assertEqual(estado_cuenta.cantidad_meses_pagados, 0)
+        self.assertEqual(estado_cuenta.monto_adeudado, 60000)
+
+
+class CategoriaVoluntarioTest(TestCase):
+    """La categoría persistida sigue a la antigüedad (congelada o no) y a la exención de cuotas"""
+
+    def setUp(self):
+        from .models import ConfiguracionCuotas
+
+        ConfiguracionCuotas.objects.create(precio_regular=5000, precio_estudiante=3000)
+        self.hoy = date.today()
+        self.anio = self.hoy.year
+
+    def _crear(self, clave, anios, **extra):
+        ingreso = date(self.hoy.year - anios, 1, 1)
+        return Voluntario.objects.create(
+            nombre='Test', apellido_paterno=clave, rut=f'{clave}00000-0',
+            clave_bombero=clave, fecha_ingreso=ingreso, estado_bombero='activo', **extra
+        )
+
+    def test_categoria_por_antiguedad_y_congelamiento(self):
+        casos = [('500', 5, 'voluntario'), ('501', 20, 'honorario_compania'),
+                 ('502', 30, 'honorario_cuerpo'), ('503', 55, 'insigne')]
+        for clave, anios, categoria in casos:
+            voluntario = self._crear(clave, anios)
+            self.assertEqual((voluntario.anios_servicio, voluntario.categoria), (anios, categoria))
+
+        # Congelada a los 19 años: sigue siendo Voluntario aunque ingresó hace 25
+        congelado = self._crear('504', 25, antiguedad_congelada=True,
+                                fecha_congelamiento=date(self.hoy.year - 6, 6, 1))
+        self.assertEqual((congelado.anios_servicio, congelado.categoria), (19, 'voluntario'))
+
+        self.assertEqual(
+            set(Voluntario.objects.filter(categoria='voluntario').values_list('clave_bombero', flat=True)),
+            {'500', '504'}
+        )
+
+    def test_antiguedad_actualiza_exencion(self):
+        from .models import EstadoCuentaCuotas
+        from .utils_tesoreria import registrar_pago_cuota, calcular_deudores_cuotas, puede_pagar_cuotas
+
+        voluntario = self._crear('510', 4)
+        registrar_pago_cuota(voluntario.id, 1, self.anio, 5000, {}, None)
+        self.assertIn(voluntario.id, [d['voluntario'].id for d in calcular_deudores_cuotas(self.anio)])
+
+        # Desde 5 años de servicio no paga cuotas, aunque siga en la categoría Voluntario
+        voluntario.fecha_ingreso = date(self.anio - 6, 1, 1)
+        voluntario.save(update_fields=['fecha_ingreso'])
+        voluntario.refresh_from_db()
+        self.assertEqual((voluntario.anios_servicio, voluntario.categoria), (6, 'voluntario'))
+        self.assertEqual(puede_pagar_cuotas(voluntario)['mensaje'], 'Exento: Honorario de Compañía')
+
+        estado_cuenta = EstadoCuentaCuotas.objects.get(voluntario=voluntario, anio=self.anio)
+        self.assertTrue(estado_cuenta.exento)
+        self.assertEqual(estado_cuenta.monto_adeudado, 0)
+        self.assertNotIn(voluntario.id, [d['voluntario'].id for d in calcular_deudores_cuotas(self.anio)])
+
+    def test_cambio_de_estado_actualiza_exencion(self):
+        from .models import EstadoCuentaCuotas
+        from .utils_tesoreria import registrar_pago_cuota
+
+        voluntario = self._crear('515', 2)
+        registrar_pago_cuota(voluntario.id, 1, self.anio, 5000, {}, None)
+
+        exenciones = []
+        for estado in ('renunciado', 'activo'):
+            voluntario.estado_bombero = estado
+            voluntario.save()
+            exenciones.append(EstadoCuentaCuotas.objects.get(voluntario=voluntario, anio=self.anio).exento)
+        self.assertEqual(exenciones, [True, False])
+
+    def test_comando_diario_corrige_categorias_vencidas(self):
+        from django.core.management import call_command
+        from .models import EstadoCuentaCuotas
+        from .utils_tesoreria import registrar_pago_cuota
+
+        voluntario = self._crear('520', 30)
+        nuevo = self._crear('521', 4)
+        registrar_pago_cuota(nuevo.id, 1, self.anio, 5000, {}, None)
+        # Simula aniversarios no procesados (update no pasa por save)
+        Voluntario.objects.filter(pk=voluntario.pk).update(anios_servicio=24, categoria='honorario_compania')
+        Voluntario.objects.filter(pk=nuevo.pk).update(fecha_ingreso=date(self.anio - 5, 1, 1))
+
+        salida = StringIO()
+        call_command('actualizar_categorias_voluntarios', stdout=salida)
+        voluntario.refresh_from_db()
+        self.assertEqual((voluntario.anios_servicio, voluntario.categoria), (30, 'honorario_cuerpo'))
+        self.assertIn('1 cambios de categoría, 1 cambios de exención', salida.getvalue())
+        self.assertTrue(EstadoCuentaCuotas.objects.get(voluntario=nuevo, anio=self.anio).exento)
+
+
+class AsignacionBeneficioTest(TestCase):
+    """El motor de asignación crea todas las asignaciones en lote según la categoría"""
+
+    def _crear(self, clave, anios, estado='activo'):
+        return Voluntario.objects.create(
+            nombre='Test', apellido_paterno=clave, rut=f'{clave}00000-0', clave_bombero=clave,
+            fecha_ingreso=date(date.today().year - anios, 1, 1), estado_bombero=estado
+        )
+
+    def _crear_beneficio(self, nombre, lote=1000):
+        from .models import Beneficio
+        from .utils_tesoreria import asignar_beneficio
+
+        beneficio = Beneficio.objects.create(
+            nombre=nombre, descripcion='', fecha_evento=date.today(),
+            tarjetas_voluntarios=8, tarjetas_honorarios_cia=5, tarjetas_honorarios_cuerpo=3,
+            tarjetas_insignes=2, precio_por_tarjeta=Decimal('2500.50'), precio_tarjeta_extra=3000
+        )
+        return beneficio, asignar_beneficio(beneficio, lote=lote)
+
+    def test_tarjetas_y_resumen_por_categoria(self):
+        self._crear('600', 3)
+        self._crear('601', 21, estado='inactivo')
+        self._crear('602', 30)
+        self._crear('603', 52)
+        self._crear('604', 3, estado='renunciado')
+
+        beneficio, resumen = self._crear_beneficio('Curanto', lote=2)
+
+        asignadas = dict(beneficio.asignaciones.values_list('voluntario__clave_bombero', 'tarjetas_asignadas'))
+        self.assertEqual(asignadas, {'600': 8, '601': 5, '602': 3, '603': 2})
+        self.assertEqual(resumen['total_asignaciones'], 4)
+        self.assertEqual(resumen['total_tarjetas'], 18)
+        self.assertEqual(resumen['monto_total'], Decimal('2500.50') * 18)
+        self.assertEqual(resumen['por_categoria']['honorario_compania']['voluntarios'], 1)
+        asignacion = beneficio.asignaciones.get(voluntario__clave_bombero='600')
+        self.assertEqual(asignacion.monto_pendiente, Decimal('20004.00'))
+
+    def test_consultas_no_dependen_de_voluntarios(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        for i in range(3):
+            self._crear(f'61{i}', i)
+        with CaptureQueriesContext(connection) as pocos:
+            self._crear_beneficio('Pocos')
+
+        for i in range(30):
+            self._crear(f'7{i:02d}', i)
+        with CaptureQueriesContext(connection) as muchos:
+            _, resumen = self._crear_beneficio('Muchos')
+
+        self.assertEqual(resumen['total_asignaciones'], 33)
+        self.assertEqual(len(muchos), len(pocos))
+
+
+class EstadisticasBeneficioTest(TestCase):
+    """La fila desnormalizada de estadísticas sigue a pagos y liberaciones"""
+
+    def setUp(self):
+        from .utils_tesoreria import crear_beneficio_con_asignaciones
+
+        self.usuario = User.objects.create_user(username='tesorero', password='x')
+        for i in range(3):
+            Voluntario.objects.create(
+                nombre='Test', apellido_paterno=f'E{i}', rut=f'80{i}00000-0', clave_bombero=f'80{i}',
+                fecha_ingreso=date(date.today().year - 2, 1, 1), estado_bombero='activo'
+            )
+        self.beneficio, _ = crear_beneficio_con_asignaciones({
+            'nombre': 'Rifa', 'fecha_evento': date.today(), 'tarjetas_voluntarios': 4,
+            'precio_por_tarjeta': Decimal('1000'), 'precio_tarjeta_extra': Decimal('1500'),
+        }, self.usuario)
+        self.asignaciones = list(self.beneficio.asignaciones.order_by('id'))
+
+    def test_pagos_y_liberaciones_mantienen_estadisticas(self):
+        from .models import EstadisticaBeneficio
+        from .utils_tesoreria import (
+            registrar_pago_beneficio, liberar_tarjetas, calcular_estadistica_beneficio,
+            verificar_estadisticas_beneficios, obtener_estadisticas_beneficio
+        )
+
+        a, b, c = self.asignaciones
+        registrar_pago_beneficio(a.id, 'normal', 4, Decimal('4000'), {}, self.usuario)
+        registrar_pago_beneficio(a.id, 'extra', 2, Decimal('3000'), {}, self.usuario)
+        registrar_pago_beneficio(b.id, 'normal', 1, Decimal('1000'), {}, self.usuario)
+        liberar_tarjetas(c.id, 4, 'Viaje', self.usuario)
+
+        guardada = EstadisticaBeneficio.objects.filter(beneficio=self.beneficio).values(
+            *calcular_estadistica_beneficio(self.beneficio.id)
+        ).get()
+        self.assertEqual(guardada, calcular_estadistica_beneficio(self.beneficio.id))
+        self.assertEqual(guardada['asignaciones_completo'], 2)
+        self.assertEqual(guardada['asignaciones_parcial'], 1)
+        self.assertEqual(guardada['monto_recaudado'], Decimal('8000.00'))
+        self.assertEqual(guardada['asignaciones_con_deuda'], 1)
+        self.assertEqual(verificar_estadisticas_beneficios(), [])
+
+        with self.assertNumQueries(2):
+            stats = obtener_estadisticas_beneficio(self.beneficio.id)
+        self.assertFalse(stats['puede_cerrar'])
+
+        registrar_pago_beneficio(b.id, 'normal', 3, Decimal('3000'), {}, self.usuario)
+        self.assertTrue(obtener_estadisticas_beneficio(self.beneficio.id)['puede_cerrar'])
+        self.assertEqual(verificar_estadisticas_beneficios(), [])
+
+    def test_reconstruir_corrige_desvios(self):
+        from .models import EstadisticaBeneficio
+        from .utils_tesoreria import reconstruir_estadisticas_beneficios, verificar_estadisticas_beneficios
+
+        EstadisticaBeneficio.objects.update(monto_recaudado=Decimal('1'))
+        self.assertEqual(len(verificar_estadisticas_beneficios()), 1)
+        reconstruir_estadisticas_beneficios()
+        self.assertEqual(verificar_estadisticas_beneficios(), [])
+
+
+class VentaConcurrenteTarjetasTest(TransactionTestCase):
+    """50 vendedores simultáneos sobre la misma asignación no descuadran los contadores"""
+
+    VENDEDORES = 50
+
+    def test_contadores_exactos_con_vendedores_concurrentes(self):
+        import threading
+        from django.db import connection
+        from .models import AsignacionBeneficio, PagoBeneficio, MovimientoFinanciero
+        from .utils_tesoreria import (
+            crear_beneficio_con_asignaciones, registrar_pago_beneficio, verificar_estadisticas_beneficios
+        )
+
+        usuario = User.objects.create_user(username='vendedor', password='x')
+        Voluntario.objects.create(
+            nombre='Test', apellido_paterno='Venta', rut='90000000-0', clave_bombero='900',
+            fecha_ingreso=date(date.today().year - 2, 1, 1), estado_bombero='activo'
+        )
+        beneficio, _ = crear_beneficio_con_asignaciones({
+            'nombre': 'Bingo', 'fecha_evento': date.today(), 'tarjetas_voluntarios': 40,
+            'precio_por_tarjeta': Decimal('1000'), 'precio_tarjeta_extra': Decimal('1500'),
+        }, usuario)
+        asignacion = beneficio.asignaciones.get()
+
+        barrera = threading.Barrier(self.VENDEDORES)
+        rechazos, errores = [], []
+
+        def vender():
+            try:
+                barrera.wait()
+                try:
+                    registrar_pago_beneficio(asignacion.id, 'normal', 1, Decimal('1000'), {}, usuario)
+                except ValueError:
+                    rechazos.append(1)
+                registrar_pago_beneficio(asignacion.id, 'extra', 1, Decimal('1500'), {}, usuario)
+            except Exception as e:
+                errores.append(e)
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=vender) for _ in range(self.VENDEDORES)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(errores, [])
+        self.assertEqual(len(rechazos), 10)
+        asignacion.refresh_from_db()
+        self.assertEqual(asignacion.tarjetas_vendidas, 40)
+        self.assertEqual(asignacion.tarjetas_extras_vendidas, 50)
+        self.assertEqual(asignacion.monto_pagado, Decimal('115000'))
+        self.assertEqual(asignacion.monto_pendiente, Decimal('0'))
+        self.assertEqual(asignacion.estado_pago, 'completo')
+        self.assertEqual(PagoBeneficio.objects.filter(asignacion=asignacion).count(), 90)
+        self.assertEqual(MovimientoFinanciero.objects.filter(pago_beneficio__asignacion=asignacion).count(), 90)
+        self.assertEqual(verificar_estadisticas_beneficios(), [])
+
+
+class PuntoVentaBeneficiosTest(TestCase):
+    """Ventas en cola con clave de idempotencia, aplicadas en micro-lotes"""
+
+    def setUp(self):
+        from .utils_tesoreria import crear_beneficio_con_asignaciones
+
+        self.usuario = User.objects.create_user(username='caja', password='x')
+        for clave in ('801', '802'):
+            Voluntario.objects.create(
+                nombre='Test', apellido_paterno=clave, rut=f'{clave}00000-0', clave_bombero=clave,
+                fecha_ingreso=date(date.today().year - 2, 1, 1), estado_bombero='activo'
+            )
+        self.beneficio, _ = crear_beneficio_con_asignaciones({
+            'nombre': 'Curanto', 'fecha_evento': date.today(), 'tarjetas_voluntarios': 4,
+            'precio_por_tarjeta': Decimal('1000'), 'precio_tarjeta_extra': Decimal('1500'),
+        }, self.usuario)
+
+    def _post(self, url, data):
+        return self.client.post(url, json.dumps(data), content_type='application/json')
+
+    def test_reintentos_no_cobran_dos_veces(self):
+        from .models import AsignacionBeneficio, PagoBeneficio, MovimientoFinanciero
+        from .utils_tesoreria import verificar_estadisticas_beneficios
+
+        respuesta = self._post('/api/punto-venta/sesiones/', {'beneficio_id': self.beneficio.id})
+        self.assertEqual(respuesta.status_code, 201)
+        url = f"/api/punto-venta/sesiones/{respuesta.json()['sesion_id']}"
+
+        ventas = {'ventas': [
+            {'clave_idempotencia': 'k1', 'clave_bombero': '801', 'cantidad_tarjetas': 3},
+            {'clave_idempotencia': 'k2', 'clave_bombero': '801', 'cantidad_tarjetas': 2},
+            {'clave_idempotencia': 'k3', 'clave_bombero': '802', 'tipo_pago': 'extra', 'cantidad_tarjetas': 1},
+            {'clave_idempotencia': 'k1', 'clave_bombero': '801', 'cantidad_tarjetas': 3},
+        ]}
+        respuesta = self._post(f'{url}/ventas/', ventas)
+        self.assertEqual(respuesta.status_code, 202)
+        estados = [(r['estado'], r['repetida']) for r in respuesta.json()['resultados']]
+        self.assertEqual(estados, [('pendiente', False), ('rechazada', False), ('pendiente', False), ('pendiente', True)])
+        self.assertEqual(PagoBeneficio.objects.count(), 0)
+
+        cierre = self._post(f'{url}/cerrar/', {}).json()
+        self.assertEqual(cierre['procesado']['aplicadas'], 2)
+        self.assertFalse(cierre['activa'])
+
+        # Reintento tras un corte de red: se responde lo registrado, sin escribir
+        with self.assertNumQueries(2):
+            respuesta = self._post(f'{url}/ventas/', ventas)
+        self.assertEqual([r['estado'] for r in respuesta.json()['resultados']],
+                         ['aplicada', 'rechazada', 'aplicada', 'aplicada'])
+        self.assertEqual(PagoBeneficio.objects.count(), 2)
+        self.assertEqual(MovimientoFinanciero.objects.filter(pago_beneficio__isnull=False).count(), 2)
+        self.assertEqual(
+            MovimientoFinanciero.objects.get(pago_beneficio__asignacion__voluntario__clave_bombero='801').descripcion,
+            'Beneficio Curanto - Test 801 (Normal, 3 tarjetas)'
+        )
+        asignacion = AsignacionBeneficio.objects.get(voluntario__clave_bombero='801')
+        self.assertEqual((asignacion.tarjetas_vendidas, asignacion.monto_pagado), (3, Decimal('3000')))
+        # La extra se cobra pero no descuenta la deuda de las tarjetas asignadas
+        extra = AsignacionBeneficio.objects.get(voluntario__clave_bombero='802')
+        self.assertEqual((extra.monto_pagado, extra.monto_pendiente), (Decimal('1500'), Decimal('4000')))
+        self.assertEqual(verificar_estadisticas_beneficios(), [])
+
+    def test_lote_rechaza_ventas_sin_tarjetas(self):
+        from .models import AsignacionBeneficio, VentaPuntoVenta
+        from .utils_punto_venta import (
+            abrir_sesion_punto_venta, registrar_ventas_punto_venta, procesar_ventas_punto_venta
+        )
+        from .utils_tesoreria import registrar_pago_beneficio
+
+        sesion = abrir_sesion_punto_venta(self.beneficio.id)
+        registrar_ventas_punto_venta(sesion, [
+            {'clave_idempotencia': f'v{i}', 'clave_bombero': '802', 'cantidad_tarjetas': 1} for i in range(4)
+        ])
+        # Otra caja (fuera del índice de este proceso) vende dos tarjetas antes del lote
+        asignacion = AsignacionBeneficio.objects.get(voluntario__clave_bombero='802')
+        registrar_pago_beneficio(asignacion.id, 'normal', 2, Decimal('2000'), {}, self.usuario)
+
+        resultado = procesar_ventas_punto_venta(sesion.id)
+        self.assertEqual((resultado['aplicadas'], resultado['rechazadas']), (2, 2))
+        self.assertEqual(list(VentaPuntoVenta.objects.values_list('estado', flat=True)),
+                         ['aplicada', 'aplicada', 'rechazada', 'rechazada'])
+        asignacion.refresh_from_db()
+        self.assertEqual((asignacion.tarjetas_vendidas, asignacion.estado_pago), (4, 'completo'))
+
+    def test_venta_extra_en_conflicto_responde_400(self):
+        from unittest import mock
+        from .models import PagoBeneficio
+
+        asignacion = self.beneficio.asignaciones.first()
+        with mock.patch('voluntarios.beneficios_simple_views.vender_tarjetas_asignacion',
+                        side_effect=ValueError('La asignación está siendo modificada por otro pago')):
+            respuesta = self._post('/api/voluntarios/venta-extra-simple/',
+                                   {'asignacion_id': asignacion.id, 'cantidad_tarjetas': 1})
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('modificada', respuesta.json()['error'])
+        self.assertEqual(PagoBeneficio.objects.count(), 0)
+
+
+class IdempotenciaPagosTest(TestCase):
+    """Los reintentos con Idempotency-Key reciben la respuesta original sin escribir de nuevo"""
+
+    def _post(self, url, data, clave):
+        return self.client.post(url, json.dumps(data), content_type='application/json',
+                                HTTP_IDEMPOTENCY_KEY=clave)
+
+    def test_reintento_reproduce_respuesta(self):
+        from .models import MovimientoFinanciero
+
+        datos = {'tipo': 'egreso', 'categoria': 'Materiales', 'monto': 12000}
+        original = self._post('/api/movimientos-financieros/', datos, 'mov-1')
+        self.assertEqual(original.status_code, 201)
+
+        with self.assertNumQueries(1):
+            reintento = self._post('/api/movimientos-financieros/', datos, 'mov-1')
+        self.assertEqual(reintento.status_code, 201)
+        self.assertEqual(reintento.json(), original.json())
+        self.assertEqual(reintento['Idempotent-Replayed'], 'true')
+        self.assertEqual(MovimientoFinanciero.objects.count(), 1)
+
+        otro_cuerpo = self._post('/api/movimientos-financieros/', dict(datos, monto=1), 'mov-1')
+        self.assertEqual(otro_cuerpo.status_code, 422)
+
+    def test_pago_beneficio_no_se_duplica(self):
+        from .models import PagoBeneficio, MovimientoFinanciero, RespuestaIdempotente
+        from .utils_tesoreria import crear_beneficio_con_asignaciones
+
+        usuario = User.objects.create_user(username='tesorero', password='x')
+        Voluntario.objects.create(
+            nombre='Test', apellido_paterno='Idem', rut='95000000-0', clave_bombero='950',
+            fecha_ingreso=date(date.today().year - 2, 1, 1), estado_bombero='activo'
+        )
+        beneficio, _ = crear_beneficio_con_asignaciones({
+            'nombre': 'Rifa', 'fecha_evento': date.today(), 'tarjetas_voluntarios': 4,
+            'precio_por_tarjeta': Decimal('1000'), 'precio_tarjeta_extra': Decimal('1500'),
+        }, usuario)
+        datos = {'asignacion_id': beneficio.asignaciones.get().id, 'cantidad_tarjetas': 2}
+
+        respuestas = [self._post('/api/voluntarios/pagar-beneficio-simple/', datos, 'pago-1') for _ in range(3)]
+        self.assertEqual({r.status_code for r in respuestas}, {201})
+        self.assertEqual({r.json()['pago_id'] for r in respuestas}, {respuestas[0].json()['pago_id']})
+        self.assertEqual(PagoBeneficio.objects.count(), 1)
+        self.assertEqual(MovimientoFinanciero.objects.count(), 1)
+
+        # Vencida, la clave se libera para una operación nueva
+        from django.utils import timezone
+        RespuestaIdempotente.objects.update(expira=timezone.now())
+        self._post('/api/voluntarios/pagar-beneficio-simple/', datos, 'pago-1')
+        self.assertEqual(PagoBeneficio.objects.count(), 2)
+
+    def test_viewsets_de_pagos_reproducen_respuesta(self):
+        from .models import PagoBeneficio, PagoCuota
+        from .utils_tesoreria import crear_beneficio_con_asignaciones
+
+        usuario = User.objects.create_user(username='tesorero', password='x')
+        self.client.force_login(usuario)
+        voluntario = Voluntario.objects.create(
+            nombre='Test', apellido_paterno='Drf', rut='95100000-0', clave_bombero='951',
+            fecha_ingreso=date(date.today().year - 2, 1, 1), estado_bombero='activo'
+        )
+        beneficio, _ = crear_beneficio_con_asignaciones({
+            'nombre': 'Rifa', 'fecha_evento': date.today(), 'tarjetas_voluntarios': 4,
+            'precio_por_tarjeta': Decimal('1000'), 'precio_tarjeta_extra': Decimal('1500'),
+        }, usuario)
+
+        pago = {'asignacion_id': beneficio.asignaciones.get().id, 'tipo_pago': 'normal',
+                'cantidad_tarjetas': 2, 'monto': '2000', 'fecha_pago': str(date.today())}
+        original, reintento = [self._post('/api/pagos-beneficios/', pago, 'drf-1') for _ in range(2)]
+        self.assertEqual((original.status_code, reintento.status_code), (201, 201))
+        self.assertEqual(reintento.json(), original.json())
+        self.assertEqual(reintento['Idempotent-Replayed'], 'true')
+        self.assertEqual(PagoBeneficio.objects.count(), 1)
+
+        comun = {'voluntario_id': voluntario.id, 'anio': date.today().year, 'fecha_pago': str(date.today())}
+        cuotas = [
+            ('/api/pagos-cuotas/', dict(comun, mes=1, monto='5000')),
+            ('/api/pagos-cuotas/lote/', dict(comun, meses=[2, 3])),
+        ]
+        for url, datos in cuotas:
+            original, reintento = [self._post(url, datos, f'drf-{url}') for _ in range(2)]
+            self.assertEqual((original.status_code, reintento.status_code), (201, 201))
+            self.assertEqual(reintento.content, original.content)
+            self.assertEqual(reintento['Idempotent-Replayed'], 'true')
+        self.assertEqual(PagoCuota.objects.count(), 3)
+
+
+class CierresFinancierosTest(TestCase):
+    """El saldo sale del último cierre mensual más los movimientos posteriores, en Decimal exacto"""
+
+    def setUp(self):
+        self.inicio_mes = date.today().replace(day=1)
+
+    def _mes_atras(self, meses, dia=10):
+        anio, mes = self.inicio_mes.year, self.inicio_mes.month - meses
+        while mes < 1:
+            anio, mes = anio - 1, mes + 12
+        return date(anio, mes, dia)
+
+    def _movimiento(self, tipo, categoria, monto, fecha):
+        from .models import MovimientoFinanciero
+        return MovimientoFinanciero.objects.create(
+            tipo=tipo, categoria=categoria, monto=Decimal(monto), descripcion='Prueba', fecha=fecha
+        )
+
+    def test_saldo_y_cierres_por_categoria(self):
+        from .models import CierreMensualFinanciero
+        from .utils_tesoreria import calcular_saldo_compania, verificar_cierres_financieros
+
+        self._movimiento('ingreso', 'cuota', '0.10', self._mes_atras(2))
+        self._movimiento('ingreso', 'donacion', '0.20', self._mes_atras(2))
+        self._movimiento('egreso', 'gasto_operacional', '1000.05', self._mes_atras(1))
+        self._movimiento('ingreso', 'beneficio', '2500.50', self.inicio_mes)
+
+        saldo = calcular_saldo_compania()
+        self.assertEqual(saldo['saldo'], Decimal('1500.75'))
+        self.assertEqual(saldo['ingresos'], Decimal('2500.80'))
+        self.assertEqual(saldo['total_movimientos'], 4)
+
+        cierres = list(CierreMensualFinanciero.objects.order_by('anio', 'mes'))
+        self.assertEqual(len(cierres), 2)
+        self.assertEqual(cierres[0].saldo_final, Decimal('0.30'))
+        self.assertEqual(cierres[0].detalle_categorias['ingreso'], {'cuota': '0.10', 'donacion': '0.20'})
+        self.assertEqual(cierres[1].saldo_inicial, Decimal('0.30'))
+        self.assertEqual(cierres[1].saldo_final, Decimal('-999.75'))
+
+        # Movimiento con fecha en un mes cerrado: invalida y se recalcula
+        self._movimiento('egreso', 'otro_egreso', '0.30', self._mes_atras(2, dia=20))
+        self.assertEqual(CierreMensualFinanciero.objects.count(), 0)
+        self.assertEqual(calcular_saldo_compania()['saldo'], Decimal('1500.45'))
+        self.assertEqual(verificar_cierres_financieros(), [])
+
+    def test_consultas_no_dependen_de_la_historia(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .utils_tesoreria import calcular_saldo_compania
+
+        self._movimiento('ingreso', 'cuota', '5000', self._mes_atras(1))
+        calcular_saldo_compania()
+        with CaptureQueriesContext(connection) as corta:
+            calcular_saldo_compania()
+
+        for meses in range(2, 60):
+            self._movimiento('ingreso', 'cuota', '5000', self._mes_atras(meses))
+        calcular_saldo_compania()
+        with CaptureQueriesContext(connection) as larga:
+            saldo = calcular_saldo_compania()
+
+        self.assertEqual(saldo['saldo'], Decimal('5000') * 59)
+        self.assertEqual(len(larga), len(corta))
+
+        respuesta = self.client.get('/api/finanzas/saldo-compania/')
+        self.assertEqual(respuesta.json()['saldo'], '295000.00')
+
+    def test_cierre_simultaneo_no_falla(self):
+        import copy
+        from unittest import mock
+        from .models import CierreMensualFinanciero
+        from .utils_tesoreria import calcular_saldo_compania, verificar_cierres_financieros
+
+        self._movimiento('ingreso', 'cuota', '700', self._mes_atras(2))
+        self._movimiento('egreso', 'otro_egreso', '200', self._mes_atras(1))
+        insertar = CierreMensualFinanciero.objects.bulk_create
+
+        def otra_solicitud_primero(cierres, **kwargs):
+            # Otra consulta de saldo inserta el primer mes entre la lectura y la inserción
+            insertar([copy.copy(cierres[0])])
+            return insertar(cierres, **kwargs)
+
+        with mock.patch.object(CierreMensualFinanciero.objects, 'bulk_create', side_effect=otra_solicitud_primero):
+            respuesta = self.client.get('/api/finanzas/saldo-compania/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['saldo'], '500.00')
+        self.assertEqual(CierreMensualFinanciero.objects.count(), 2)
+        self.assertEqual(calcular_saldo_compania()['saldo'], Decimal('500'))
+        self.assertEqual(verificar_cierres_financieros(), [])
+
+
+class LibroMovimientosTest(TestCase):
+    """Listado del libro con filtros, paginación por llave y exportación en streaming"""
+
+    def setUp(self):
+        from .models import MovimientoFinanciero
+
+        self.anio = date.today().year - 1
+        MovimientoFinanciero.objects.bulk_create([
+            MovimientoFinanciero(
+                tipo='ingreso' if i % 3 else 'egreso',
+                categoria='cuota' if i % 3 else 'gasto_operacional',
+                monto=Decimal(1000 + i), descripcion=f'Movimiento {i}',
+                fecha=date(self.anio, 1 + i % 12, 1 + i % 5)  # fechas repetidas
+            )
+            for i in range(25)
+        ])
+        self.esperados = list(MovimientoFinanciero.objects.order_by('-fecha', '-created_at', '-id')
+                              .values_list('id', flat=True))
+
+    def _pagina(self, **params):
+        return self.client.get('/api/movimientos-financieros/', params).json()
+
+    def test_recorre_todas_las_paginas_sin_repetir(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        ids, cursor, consultas = [], None, []
+        while True:
+            params = {'limite': 7, **({'cursor': cursor} if cursor else {})}
+            with CaptureQueriesContext(connection) as capturadas:
+                pagina = self._pagina(**params)
+            consultas.append(len(capturadas))
+            ids += [m['id'] for m in pagina['results']]
+            cursor = pagina['siguiente']
+            if not cursor:
+                break
+
+        self.assertEqual(ids, self.esperados)
+        self.assertEqual(len(set(consultas)), 1)
+        self.assertEqual(self.client.get('/api/movimientos-financieros/', {'cursor': 'xx'}).status_code, 400)
+
+    def test_filtros_y_exportacion(self):
+        pagina = self._pagina(tipo='egreso', monto_min='1003', monto_max='1015')
+        self.assertEqual(sorted(m['monto'] for m in pagina['results']), [1003.0, 1006.0, 1009.0, 1012.0, 1015.0])
+        self.assertEqual({m['tipo'] for m in pagina['results']}, {'egreso'})
+
+        respuesta = self.client.get('/api/movimientos-financieros/exportar/', {'anio': self.anio})
+        lineas = b''.join(respuesta.streaming_content).decode().splitlines()
+        self.assertEqual(lineas[0].split(',')[:5], ['id', 'fecha', 'tipo', 'categoria', 'monto'])
+        self.assertEqual(len(lineas), 26)
+
+        respuesta = self.client.get('/api/movimientos-financieros/exportar/',
+                                    {'anio': self.anio, 'formato': 'jsonl', 'categoria': 'cuota'})
+        registros = [json.loads(l) for l in b''.join(respuesta.streaming_content).decode().splitlines()]
+        self.assertEqual(len(registros), 16)
+        self.assertEqual({r['categoria'] for r in registros}, {'cuota'})
+
+    def test_fechas_invalidas_responden_400(self):
+        pagina = self._pagina(fecha_desde=f'{self.anio}-12-01', fecha_hasta=f'{self.anio}-12-31')
+        self.assertEqual(len(pagina['results']), 2)
+
+        for params in ({'fecha_desde': '2024-13-40'}, {'fecha_hasta': 'ayer'}):
+            self.assertEqual(self.client.get('/api/movimientos-financieros/', params).status_code, 400)
+            respuesta = self.client.get('/api/movimientos-financieros/exportar/', params)
+            self.assertEqual(respuesta.status_code, 400)
+            self.assertFalse(respuesta.streaming)
+
+
+class ReportesTesoreriaTest(TestCase):
+    """El cubo de tesorería se refresca solo en los meses tocados y responde los reportes"""
+
+    def setUp(self):
+        from .models import Beneficio, AsignacionBeneficio, PagoCuota, PagoBeneficio, MovimientoFinanciero
+
+        self.anio = date.today().year - 1
+        voluntario = Voluntario.objects.create(
+            nombre='Test', apellido_paterno='Cubo', rut='70000000-0', clave_bombero='700',
+            fecha_ingreso=date(2015, 1, 1), estado_bombero='activo'
+        )
+        self.beneficio = Beneficio.objects.create(
+            nombre='Rifa', descripcion='', fecha_evento=date(self.anio, 3, 1),
+            precio_por_tarjeta=5000, precio_tarjeta_extra=6000
+        )
+        asignacion = AsignacionBeneficio.objects.create(
+            beneficio=self.beneficio, voluntario=voluntario, tarjetas_asignadas=5, monto_total=25000
+        )
+        PagoCuota.objects.create(voluntario=voluntario, mes=1, anio=self.anio, monto_pagado=5000,
+                                 fecha_pago=date(self.anio, 1, 5), metodo_pago='Transferencia')
+        PagoBeneficio.objects.create(asignacion=asignacion, cantidad_tarjetas=2, monto=10000,
+                                     fecha_pago=date(self.anio, 3, 2), metodo_pago='Efectivo')
+        for fecha, tipo, categoria, monto in [
+            (date(self.anio, 1, 5), 'ingreso', 'cuota', '5000'),
+            (date(self.anio, 3, 2), 'ingreso', 'beneficio', '10000'),
+            (date(self.anio, 3, 9), 'egreso', 'gasto_operacional', '1500.50'),
+            (date(self.anio - 1, 3, 9), 'ingreso', 'donacion', '8000'),
+        ]:
+            MovimientoFinanciero.objects.create(tipo=tipo, categoria=categoria, monto=Decimal(monto),
+                                                descripcion='Prueba', fecha=fecha)
+
+    def _reporte(self, vista):
+        return self.client.get('/api/finanzas/reportes/', {'vista': vista, 'anio': self.anio}).json()
+
+    def test_reportes_desde_el_cubo(self):
+        mensual = self._reporte('mensual')['filas']
+        self.assertIn({'mes': 3, 'tipo': 'egreso', 'categoria': 'gasto_operacional',
+                       'total': '1500.50', 'cantidad': 1}, mensual)
+
+        marzo = self._reporte('interanual')['meses'][2]
+        self.assertEqual((marzo['ingresos'], marzo['ingresos_anio_anterior']), ('10000.00', '8000.00'))
+        self.assertEqual(marzo['variacion_ingresos'], '25.00')
+
+        self.assertEqual(self._reporte('beneficios')['beneficios'],
+                         [{'beneficio_id': self.beneficio.id, 'nombre': 'Rifa', 'total': '10000.00', 'pagos': 1}])
+        self.assertEqual({m['metodo_pago']: m['total'] for m in self._reporte('metodos_pago')['metodos_pago']},
+                         {'Efectivo': '10000.00', 'Transferencia': '5000.00'})
+        self.assertEqual(self.client.get('/api/finanzas/reportes/', {'vista': 'x'}).status_code, 400)
+
+    def test_refresco_incremental_por_mes(self):
+        from .models import MovimientoFinanciero, ResumenTesoreria
+        from .utils_tesoreria import actualizar_resumen_tesoreria, reconstruir_resumen_tesoreria
+
+        self.assertEqual(actualizar_resumen_tesoreria(), 3)
+        self.assertEqual(actualizar_resumen_tesoreria(), 0)
+
+        MovimientoFinanciero.objects.create(tipo='ingreso', categoria='multa', monto=Decimal('700'),
+                                            descripcion='Prueba', fecha=date(self.anio, 7, 1))
+        self.assertEqual(actualizar_resumen_tesoreria(), 1)
+
+        campos = ('anio', 'mes', 'dimension', 'clave', 'tipo', 'total', 'cantidad')
+        incremental = sorted(ResumenTesoreria.objects.values_list(*campos))
+        reconstruir_resumen_tesoreria()
+        self.assertEqual(sorted(ResumenTesoreria.objects.values_list(*campos)), incremental)
+
+
+class CacheConfiguracionTest(TestCase):
+    """Configuración de cuotas y ciclos activos se leen sin consultas y se invalidan al guardar"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from .models import ConfiguracionCuotas
+
+        cache.clear()
+        self.config = ConfiguracionCuotas.objects.create(precio_regular=5000, precio_estudiante=3000)
+
+    def test_configuracion_sin_consultas_e_invalidada(self):
+        from .utils_tesoreria import obtener_configuracion_cuotas
+
+        obtener_configuracion_cuotas()
+        with self.assertNumQueries(0):
+            config = obtener_configuracion_cuotas()
+        self.assertEqual(config.precio_regular, 5000)
+
+        # Las copias entregadas no alteran el caché
+        config.precio_regular = 1
+        self.assertEqual(obtener_configuracion_cuotas().precio_regular, 5000)
+
+        self.config.precio_regular = 7000
+        self.config.save()
+        self.assertEqual(obtener_configuracion_cuotas().precio_regular, 7000)
+
+    def test_ciclos_activos(self):
+        from .models import CicloCuotas, CicloAsistencia
+        from .utils_configuracion import obtener_ciclo_cuotas_activo, obtener_ciclo_asistencia_activo
+
+        self.assertIsNone(obtener_ciclo_asistencia_activo())
+        with self.assertNumQueries(0):
+            self.assertIsNone(obtener_ciclo_asistencia_activo())
+
+        anterior = CicloCuotas.objects.create(anio=2024, fecha_inicio=date(2024, 1, 1), fecha_fin=date(2024, 12, 31))
+        self.assertEqual(obtener_ciclo_cuotas_activo().anio, 2024)
+        CicloCuotas.objects.create(anio=2025, fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 12, 31))
+        self.assertEqual(obtener_ciclo_cuotas_activo().anio, 2025)
+        anterior.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(obtener_ciclo_cuotas_activo().anio, 2024)
+
+        CicloAsistencia.objects.create(anio=2025, fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 12, 31))
+        self.assertEqual(obtener_ciclo_asistencia_activo().anio, 2025)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_PRUEBAS)
+class CacheLogoPDFTest(TestCase):
+    """El logo de los PDF se decodifica una vez por versión y luego no consulta"""
+
+    def _imagen(self, color, tamano=(600, 400)):
+        from PIL import Image
+        from .utils_blobs import guardar_blob
+
+        salida = BytesIO()
+        Image.new('RGB', tamano, color).save(salida, format='PNG')
+        return guardar_blob([salida.getvalue()])
+
+    def test_cache_y_reemplazo_del_logo(self):
+        from .models import LogoCompania
+        from .pdf_cuotas import generar_pdf_cuotas
+        from .utils_logos import obtener_logo_pdf, LADO_MAXIMO_LOGO
+
+        logo = LogoCompania.objects.create(nombre='Oficial', imagen=self._imagen('red'), usar_en_pdfs=True)
+        primero = obtener_logo_pdf()
+        self.assertEqual((primero.ancho, primero.alto), (LADO_MAXIMO_LOGO, 200))
+
+        voluntario = Voluntario.objects.create(
+            nombre='Test', apellido_paterno='Logo', rut='96000000-0', clave_bombero='960',
+            fecha_ingreso=date(2020, 1, 1)
+        )
+        with self.assertNumQueries(0):
+            self.assertIs(obtener_logo_pdf(), primero)
+        pdf = generar_pdf_cuotas(voluntario, 2025, {}, Decimal('0'), logo=primero)
+        self.assertTrue(pdf.getvalue().startswith(b'%PDF'))
+
+        logo.imagen = self._imagen('blue', (100, 100))
+        logo.save()
+        segundo = obtener_logo_pdf()
+        self.assertIsNot(segundo, primero)
+        self.assertEqual((segundo.ancho, segundo.alto), (100, 100))
+
+        logo.usar_en_pdfs = False
+        logo.save()
+        self.assertIsNone(obtener_logo_pdf())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_PRUEBAS)
+class AlmacenArchivosTest(TestCase):
+    """Los archivos se guardan una vez por contenido y se descargan con ETag y Range"""
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+
+        usuario = User.objects.create_user('archivos', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(usuario)
+        # La descarga es una vista Django simple: usa la sesión
+        self.client.force_login(usuario)
+        self.voluntario = Voluntario.objects.create(
+            nombre='Test', apellido_paterno='Archivo', rut='95000000-0', clave_bombero='950',
+            fecha_ingreso=date(2020, 1, 1)
+        )
+
+    def test_carga_deduplicada_y_descarga(self):
+        import base64
+        import os
+        from .models import ArchivoBlob, Felicitacion
+        from .utils_blobs import ruta_blob
+
+        contenido = b'%PDF-1.4 ' + bytes(range(256)) * 1000
+        documento = 'data:application/pdf;base64,' + base64.b64encode(contenido).decode()
+        for _ in range(2):
+            respuesta = self.client.post('/api/felicitaciones/', {
+                'voluntario': self.voluntario.id, 'fecha_felicitacion': '2024-05-01', 'documento_felicitacion': documento,
+                'documento_nombre_original': 'oficio.pdf',
+            }, format='json')
+            self.assertEqual(respuesta.status_code, 201, respuesta.content)
+
+        url = respuesta.json()['documento_felicitacion']
+        blob = ArchivoBlob.objects.get()
+        self.assertEqual((blob.tamano, blob.tipo_contenido), (len(contenido), 'application/pdf'))
+        self.assertTrue(url.endswith(f'/archivos/{blob.sha256}/'))
+        self.assertEqual(Felicitacion.objects.filter(documento_felicitacion=blob).count(), 2)
+        with open(ruta_blob(blob.sha256), 'rb') as archivo:
+            self.assertEqual(archivo.read(), contenido)
+
+        # Un PUT que devuelve la URL conserva el archivo
+        felicitacion = Felicitacion.objects.latest('id')
+        respuesta = self.client.patch(f'/api/felicitaciones/{felicitacion.id}/', {
+            'documento_felicitacion': url, 'motivo': 'Editado'
+        }, format='json')
+        self.assertEqual(respuesta.json()['documento_felicitacion'], url)
+
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(b''.join(respuesta.streaming_content), contenido)
+        etag = respuesta['ETag']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        respuesta = self.client.get(url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(respuesta.status_code, 206)
+        self.assertEqual(respuesta['Content-Range'], f'bytes 100-199/{len(contenido)}')
+        self.assertEqual(b''.join(respuesta.streaming_content), contenido[100:200])
+
+        respuesta = self.client.get(url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(respuesta.streaming_content), contenido[-10:])
+        self.assertEqual(self.client.get(url, HTTP_RANGE=f'bytes={len(contenido)}-').status_code, 416)
+        self.assertEqual(self.client.get('/api/archivos/' + 'f' * 64 + '/').status_code, 404)
+
+        # Sin sesión, conocer el hash no basta
+        from django.test import Client
+        self.assertEqual(Client().get(url).status_code, 401)
+        self.assertEqual(Client().head(url).status_code, 401)
+
+        # Sin referencias el blob se purga junto con su archivo
+        Felicitacion.objects.all().delete()
+        salida = StringIO()
+        from django.core.management import call_command
+        call_command('purgar_archivos_huerfanos', '--horas', '0', stdout=salida)
+        self.assertFalse(ArchivoBlob.objects.exists())
+        self.assertFalse(os.path.exists(ruta_blob(blob.sha256)))
+
+    def test_documento_estudiante_multipart_y_base64_invalido(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from .models import EstadoCuotasBombero
+
+        archivo = SimpleUploadedFile('certificado.pdf', b'%PDF-1.4 certificado', content_type='application/pdf')
+        respuesta = self.client.post('/api/estado-cuotas/subir-documento-estudiante/', {
+            'voluntario_id': self.voluntario.id, 'documento': archivo,
+        }, format='multipart')
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        estado = EstadoCuotasBombero.objects.select_related('documento_estudiante').get(voluntario=self.voluntario)
+        self.assertEqual(estado.documento_estudiante.tamano, len(b'%PDF-1.4 certificado'))
+        self.assertIn(estado.documento_estudiante_id, respuesta.json()['estado']['documento_estudiante'])
+
+        respuesta = self.client.post('/api/estado-cuotas/subir-documento-estudiante/', {
+            'voluntario_id': self.voluntario.id, 'documento_base64': 'no es base64!',
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+
+    def test_html_subido_no_se_muestra_en_linea(self):
+        import base64
+        from .models import ArchivoBlob
+
+        html = b'<html><script>alert(document.cookie)</script></html>'
+        respuesta = self.client.post('/api/felicitaciones/', {
+            'voluntario': self.voluntario.id, 'fecha_felicitacion': '2024-05-01',
+            'documento_felicitacion': 'data:text/html;base64,' + base64.b64encode(html).decode(),
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        self.assertEqual(ArchivoBlob.objects.get().tipo_contenido, 'application/octet-stream')
+
+        respuesta = self.client.get(respuesta.json()['documento_felicitacion'])
+        self.assertEqual(respuesta['Content-Type'], 'application/octet-stream')
+        self.assertTrue(respuesta['Content-Disposition'].startswith('attachment'))
+        self.assertEqual(respuesta['Content-Security-Policy'], 'sandbox')
+
+        # Un blob antiguo con el tipo declarado por el cliente también se fuerza como adjunto
+        ArchivoBlob.objects.update(tipo_contenido='text/html')
+        respuesta = self.client.get(respuesta.wsgi_request.path, {'nombre': 'oficio.html'})
+        self.assertNotIn('text/html', respuesta['Content-Type'])
+        self.assertTrue(respuesta['Content-Disposition'].startswith('attachment'))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_PRUEBAS)
+class CachePdfRenderizadosTest(TestCase):
+    """Los PDF se dibujan solo cuando cambia la versión de sus datos"""
+
+    def setUp(self):
+        import os
+        from rest_framework.test import APIClient
+        from .models import ConfiguracionCuotas, Uniforme, PiezaUniforme
+        from .utils_cache_pdf import DIRECTORIO_CACHE_PDF
+
+        shutil.rmtree(os.path.join(MEDIA_PRUEBAS, DIRECTORIO_CACHE_PDF), ignore_errors=True)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('pdfs', password='x'))
+        ConfiguracionCuotas.objects.create(precio_regular=5000, precio_estudiante=3000)
+        self.voluntario = Voluntario.objects.create(
+            nombre='Test', apellido_paterno='Cache', rut='96000000-0', clave_bombero='960',
+            fecha_ingreso=date(2020, 1, 1), estado_bombero='activo'
+        )
+        self.uniforme = Uniforme.objects.create(
+            id='CACHE-001', bombero=self.voluntario, tipo_uniforme='parada', registrado_por='x'
+        )
+        self.pieza = PiezaUniforme.objects.create(
+            uniforme=self.uniforme, componente='casco', condicion='nuevo', estado_fisico='bueno',
+            fecha_entrega=date(2024, 1, 1)
+        )
+
+    def test_comprobante_uniforme(self):
+        from unittest import mock
+        from . import pdf_uniformes
+
+        url = f'/api/uniformes/{self.uniforme.id}/generar_pdf/'
+        with mock.patch.object(
+            pdf_uniformes, 'generar_pdf_uniforme', wraps=pdf_uniformes.generar_pdf_uniforme
+        ) as generar:
+            respuesta = self.client.get(url)
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertTrue(respuesta.content.startswith(b'%PDF'))
+            etag = respuesta['ETag']
+
+            # Desde disco y con 304, sin volver a dibujar
+            self.assertEqual(self.client.get(url).content, respuesta.content)
+            respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(respuesta.status_code, 304)
+            self.assertEqual(generar.call_count, 1)
+
+            # Un cambio en la pieza cambia la versión
+            self.client.patch(f'/api/uniformes/{self.uniforme.id}/actualizar_pieza/', {
+                'pieza_id': self.pieza.id, 'campo': 'estado_fisico', 'valor': 'regular'
+            }, format='json')
+            respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertNotEqual(respuesta['ETag'], etag)
+            self.assertEqual(generar.call_count, 2)
+
+        self.client.post(f'/api/uniformes/{self.uniforme.id}/devolver_pieza/', {
+            'pieza_id': self.pieza.id, 'estado_devolucion': 'bueno', 'condicion_devolucion': 'usado'
+        }, format='json')
+        url = f'/api/uniformes/{self.uniforme.id}/generar_pdf_devolucion/?pieza_id={self.pieza.id}'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_version_cubre_campos_dibujados(self):
+        from .utils_cache_pdf import version_pdf_devolucion, version_pdf_uniforme
+
+        versiones = {version_pdf_uniforme(self.uniforme), version_pdf_devolucion(self.uniforme, self.pieza)}
+        # Ediciones directas, sin pasar por historial_cambios
+        for campo, valor in (('marca', 'MSA'), ('serie', 'S-1'), ('talla', 'L'), ('nombre_personalizado', 'Casco F1')):
+            setattr(self.pieza, campo, valor)
+            self.pieza.save()
+            versiones |= {version_pdf_uniforme(self.uniforme), version_pdf_devolucion(self.uniforme, self.pieza)}
+        self.uniforme.observaciones = 'Entregado en cuartel'
+        self.uniforme.save()
+        versiones |= {version_pdf_uniforme(self.uniforme), version_pdf_devolucion(self.uniforme, self.pieza)}
+        self.assertEqual(len(versiones), 12)
+
+    def test_estado_cuotas(self):
+        from .models import PagoCuota
+
+        anio = date.today().year
+        url = f'/api/voluntarios/{self.voluntario.id}/pdf-cuotas/{anio}/'
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        etag = respuesta['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        PagoCuota.objects.create(voluntario=self.voluntario, mes=1, anio=anio, monto_pagado=Decimal('5000'))
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+
+    def test_desalojo_por_tamano(self):
+        import os
+        from .utils_cache_pdf import desalojar_pdf_cache, guardar_pdf_cache, leer_pdf_cache, ruta_pdf_cache
+
+        versiones = [str(i) * 64 for i in range(3)]
+        for antiguedad, version in zip((300, 200, 100), versiones):
+            guardar_pdf_cache(version, b'%PDF' + b'x' * 996)
+            os.utime(ruta_pdf_cache(version), (1e9 - antiguedad, 1e9 - antiguedad))
+
+        # Leer marca el uso: el primero pasa a ser el más reciente
+        self.assertIsNotNone(leer_pdf_cache(versiones[0]))
+        self.assertEqual(desalojar_pdf_cache(tamano_maximo=2000), 1)
+        self.assertEqual([os.path.exists(ruta_pdf_cache(v)) for v in versiones], [True, False, True])
+
+
+class ImportacionPagosCuotasTest(TestCase):
+    """El extracto se valida completo, reparte meses desde el más antiguo e importa en lote"""
+
+    def setUp(self):
+        from .models import ConfiguracionCuotas, PagoCuota
+
+        ConfiguracionCuotas.objects.create(precio_regular=5000, precio_estudiante=3000)
+        self.anio = date.today().year
+        self.voluntario = Voluntario.objects.create(
+            nombre='Test', apellido_paterno='Extracto', rut='12.345.678-5', clave_bombero='810',
+            fecha_ingreso=date(date.today().year - 2, 1, 1), estado_bombero='activo'
+        )
+        self.otro = Voluntario.objects.create(
+            nombre='Test', apellido_paterno='Clave', rut='11.111.111-1', clave_bombero='811',
+            fecha_ingreso=date(date.today().year - 2, 1, 1), estado_bombero='activo'
+        )
+        PagoCuota.objects.create(voluntario=self.voluntario, mes=2, anio=self.anio, monto_pagado=5000)
+        self.csv = (
+            'RUT;Clave;Monto;Fecha;N° Comprobante\n'
+            f'12345678-5;;$ 15.000;05/01/{self.anio};A1\n'
+            f';811;5000;{self.anio}-01-06;A2\n'
+            f'99999999-9;;5000;06-01-{self.anio};A3\n'
+        ).encode('utf-8')
+
+    def _importar(self, **opciones):
+        from .utils_tesoreria import leer_extracto_pagos, importar_pagos_cuotas
+        return importar_pagos_cuotas(leer_extracto_pagos(BytesIO(self.csv), 'extracto.csv'), **opciones)
+
+    def test_simulacion_y_reparto(self):
+        from .models import PagoCuota
+
+        resultado = self._importar()
+        self.assertEqual((resultado['validas'], resultado['con_error'], resultado['pagos']), (2, 1, 4))
+        self.assertEqual(resultado['detalle'][0]['meses'], [f'{self.anio}-01', f'{self.anio}-03', f'{self.anio}-04'])
+        self.assertIn('no encontrado', resultado['detalle'][2]['error'])
+        self.assertFalse(resultado['importado'])
+
+        # Con errores y sin omitirlos no se escribe nada
+        self.assertFalse(self._importar(simular=False)['importado'])
+        self.assertEqual(PagoCuota.objects.count(), 1)
+
+    def test_importacion_en_lote(self):
+        from .models import EstadoCuentaCuotas, MovimientoFinanciero, MesPendienteResumenTesoreria
+        from .utils_tesoreria import verificar_estado_cuenta
+
+        resultado = self._importar(simular=False, omitir_errores=True)
+        self.assertTrue(resultado['importado'])
+        self.assertEqual(self.voluntario.pagos_cuotas.count(), 4)
+        self.assertEqual(MovimientoFinanciero.objects.filter(pago_cuota__voluntario=self.otro).count(), 1)
+        self.assertEqual(
+            EstadoCuentaCuotas.objects.get(voluntario=self.voluntario, anio=self.anio).meses_pagados, 0b1111
+        )
+        self.assertEqual(verificar_estado_cuenta([self.anio]), [])
+        self.assertTrue(MesPendienteResumenTesoreria.objects.filter(anio=self.anio, mes=1).exists())
+
+        # Reimportar el mismo extracto: los comprobantes ya están registrados
+        self.assertEqual(self._importar()['validas'], 0)
+
+    @unittest.skipUnless(importlib.util.find_spec('openpyxl'), 'openpyxl no está instalado')
+    def test_extracto_xlsx(self):
+        from datetime import datetime
+        import openpyxl
+        from .utils_tesoreria import leer_extracto_pagos, importar_pagos_cuotas
+
+        libro = openpyxl.Workbook()
+        hoja = libro.active
+        hoja.append(['RUT Origen', 'Clave', 'Abono', 'Fecha Pago', 'N° Operación', 'Glosa'])
+        hoja.append(['12.345.678-5', None, 15000, datetime(self.anio, 1, 5, 10, 30), 'X1', 'Cuotas'])
+        hoja.append([None] * 6)
+        hoja.append([None, 811, 5000.0, f'06/01/{self.anio}', 7001, None])
+        archivo = BytesIO()
+        libro.save(archivo)
+        archivo.seek(0)
+
+        filas = leer_extracto_pagos(archivo, 'Extracto.XLSX')
+        self.assertEqual([fila['linea'] for fila in filas], [2, 4])
+        self.assertEqual((filas[0]['rut'], filas[0]['comprobante'], filas[0]['observaciones']),
+                         ('12.345.678-5', 'X1', 'Cuotas'))
+        self.assertEqual((filas[1]['clave_bombero'], filas[1]['monto']), (811, 5000.0))
+
+        # Celdas numéricas y de fecha de Excel se convierten igual que el texto del CSV
+        resultado = importar_pagos_cuotas(filas, simular=False)
+        self.assertEqual([item['error'] for item in resultado['detalle']], ['', ''])
+        self.assertEqual([item['monto'] for item in resultado['detalle']], [Decimal('15000'), Decimal('5000')])
+        self.assertEqual(resultado['detalle'][1]['voluntario_id'], self.otro.id)
+        self.assertEqual(
+            set(self.voluntario.pagos_cuotas.exclude(mes=2).values_list('fecha_pago', 'numero_comprobante')),
+            {(date(self.anio, 1, 5), 'X1')}
+        )
+        self.assertEqual(list(self.otro.pagos_cuotas.values_list('fecha_pago', 'numero_comprobante')),
+                         [(date(self.anio, 1, 6), '7001')])
+
+
+class PagosCuotasLoteTest(TestCase):
+    """Varios meses se pagan en una transacción con consultas constantes"""
+
+    def setUp(self):
+        from .models import ConfiguracionCuotas
+
+        ConfiguracionCuotas.objects.create(precio_regular=5000, precio_estudiante=3000)
+        self.anio = date.today().year
+        self.voluntario = Voluntario.objects.create(
+            nombre='Test', apellido_paterno='Lote', rut='82000000-0', clave_bombero='820',
+            fecha_ingreso=date(date.today().year - 2, 1, 1), estado_bombero='activo'
+        )
+
+    def test_endpoint_lote(self):
+        from .models import EstadoCuentaCuotas, MovimientoFinanciero, PagoCuota
+
+        url = '/api/pagos-cuotas/lote/'
+        respuesta = self.client.post(url, {
+            'voluntario_id': self.voluntario.id, 'anio': self.anio, 'mes_desde': 1, 'mes_hasta': 3
+        }, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual([p['mes'] for p in respuesta.json()], [1, 2, 3])
+        movimiento = MovimientoFinanciero.objects.get()
+        self.assertEqual(movimiento.monto, 15000)
+        self.assertEqual(
+            EstadoCuentaCuotas.objects.get(voluntario=self.voluntario, anio=self.anio).meses_pagados, 0b111
+        )
+
+        # Un mes ya pagado invalida todo el lote
+        respuesta = self.client.post(url, {
+            'voluntario_id': self.voluntario.id, 'anio': self.anio, 'meses': [3, 4]
+        }, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(PagoCuota.objects.count(), 3)
+
+        self.client.post(url, {
+            'voluntario_id': self.voluntario.id, 'anio': self.anio, 'meses': [4, 5], 'consolidar': False
+        }, content_type='application/json')
+        self.assertEqual(MovimientoFinanciero.objects.count(), 3)
+
+    def test_consultas_constantes(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .utils_tesoreria import registrar_pagos_cuotas_lote
+
+        # El primer pago del año crea la fila de estado de cuenta
+        registrar_pagos_cuotas_lote(self.voluntario.id, self.anio, [1], {}, None)
+        conteos = []
+        for meses in ([2], list(range(3, 13))):
+            with CaptureQueriesContext(connection) as consultas:
+                registrar_pagos_cuotas_lote(self.voluntario.id, self.anio, meses, {}, None)
+            conteos.append(len(consultas))
+        self.assertEqual(conteos[0], conteos[1])
+
+
+class ExportacionPdfLoteTest(TestCase):
+    """Exportación por lote de estados de cuotas y tablas de uniformes"""
+    
+    def setUp(self):
+        from .models import ConfiguracionCuotas, PagoCuota, Uniforme, PiezaUniforme
+        
+        ConfiguracionCuotas.objects.create(precio_regular=5000, precio_estudiante=3000)
+        self.anio = date.today().year
+        self.voluntarios = []
+        for i in range(3):
+            voluntario = Voluntario.objects.create(
+                nombre='Lote', apellido_paterno=str(i), rut=f'83{i:06d}-0', clave_bombero=f'83{i}',
+                fecha_ingreso=date(2020, 1, 1), estado_bombero='activo'
+            )
+            PagoCuota.objects.create(voluntario=voluntario, mes=1, anio=self.anio, monto_pagado=Decimal('5000'))
+            self.voluntarios.append(voluntario)
+        uniforme = Uniforme.objects.create(
+            id='LOTE-001', bombero=self.voluntarios[0], tipo_uniforme='parada', registrado_por='x'
+        )
+        PiezaUniforme.objects.create(
+            uniforme=uniforme, componente='casco', condicion='nuevo', estado_fisico='bueno',
+            fecha_entrega=date(2024, 1, 1)
+        )
+    
+    def test_zip_en_procesos(self):
+        import zipfile
+        from unittest import mock
+        from .utils_exportacion import exportar_pdfs_lote, filtrar_voluntarios
+        
+        avance = []
+        destino = BytesIO()
+        # Forzar el pool aunque el lote sea chico
+        with mock.patch('voluntarios.utils_exportacion.MINIMO_PARA_PROCESOS', 0):
+            resumen = exportar_pdfs_lote(
+                destino, 'cuotas', filtrar_voluntarios(estados=['activo']), anio=self.anio,
+                procesos=2, progreso=lambda hechos, total: avance.append((hechos, total))
+            )
+        
+        self.assertEqual(resumen['total'], 3)
+        self.assertEqual(avance, [(0, 3), (1, 3), (2, 3), (3, 3)])
+        with zipfile.ZipFile(destino) as archivo_zip:
+            self.assertEqual(
+                archivo_zip.namelist(), [f'cuotas_83{i}_{self.anio}.pdf' for i in range(3)]
+            )
+            for nombre in archivo_zip.namelist():
+                self.assertTrue(archivo_zip.read(nombre).startswith(b'%PDF'))
+    
+    def test_consultas_no_crecen_con_el_lote(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .utils_exportacion import exportar_pdfs_lote, filtrar_voluntarios
+        
+        conteos = []
+        for ids in ([self.voluntarios[0].id], [v.id for v in self.voluntarios]):
+            # Primera pasada: crea los estados de cuenta que falten
+            exportar_pdfs_lote(BytesIO(), 'cuotas', filtrar_voluntarios(ids=ids), anio=self.anio)
+            with CaptureQueriesContext(connection) as consultas:
+                exportar_pdfs_lote(BytesIO(), 'cuotas', filtrar_voluntarios(ids=ids), anio=self.anio)
+            conteos.append(len(consultas))
+        self.assertEqual(conteos[0], conteos[1])
+    
+    def test_pdf_unido_con_marcadores(self):
+        from .utils_exportacion import exportar_pdfs_lote, filtrar_voluntarios
+        
+        destino = BytesIO()
+        resumen = exportar_pdfs_lote(destino, 'cuotas', filtrar_voluntarios(), anio=self.anio, formato='pdf')
+        contenido = destino.getvalue()
+        
+        self.assertEqual(resumen['total'], 3)
+        self.assertTrue(contenido.startswith(b'%PDF'))
+        self.assertIn(b'/Outlines', contenido)
+        self.assertIn(b'/Count 3', contenido)
+        
+        with self.assertRaises(ValueError):
+            exportar_pdfs_lote(BytesIO(), 'cuotas', filtrar_voluntarios(), anio=self.anio, formato='docx')
+    
+    def test_endpoint_y_progreso(self):
+        import zipfile
+        
+        respuesta = self.client.get('/api/voluntarios/pdf-lote/?tipo=uniformes&seguimiento=prueba')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['X-Total-Documentos'], '1')
+        with zipfile.ZipFile(BytesIO(b''.join(respuesta.streaming_content))) as archivo_zip:
+            self.assertEqual(archivo_zip.namelist(), ['tabla_uniformes_830.pdf'])
+        
+        progreso = self.client.get('/api/voluntarios/pdf-lote/progreso/prueba/').json()
+        self.assertEqual((progreso['hechos'], progreso['terminado'], progreso['porcentaje']), (1, True, 100.0))
+        self.assertEqual(self.client.get('/api/voluntarios/pdf-lote/progreso/otra/').status_code, 404)
+        self.assertEqual(self.client.get('/api/voluntarios/pdf-lote/?tipo=otro').status_code, 400)
+
+
+class RankingAsistenciaTest(TestCase):
+    """El ranking cuenta por tipo, respeta suma_ranking y se mantiene en cada escritura"""
+    
+    def setUp(self):
+        from .models import VoluntarioExterno
+        
+        self.voluntario = Voluntario.objects.create(
+            nombre='Ana', apellido_paterno='Rojas', rut='40000000-0',
+            clave_bombero='400', fecha_ingreso=date(2020, 1, 1), estado_bombero='activo'
+        )
+        self.externo = VoluntarioExterno.objects.create(
+            codigo='EXT-C-001', nombre_completo='Canje Uno', tipo='canje'
+        )
+        self.anio = 2024
+    
+    def _evento(self, id_evento, tipo, suma_ranking=True, anio=None):
+        from .models import EventoAsistencia
+        
+        return EventoAsistencia.objects.create(
+            id_evento=id_evento, tipo=tipo, fecha=date(anio or self.anio, 3, 1),
+            descripcion='Prueba', suma_ranking=suma_ranking
+        )
+    
+    def _asistir(self, evento, voluntario=None, externo=None):
+        from .models import DetalleAsistencia
+        
+        return DetalleAsistencia.objects.create(
+            evento=evento, voluntario=voluntario, externo=externo,
+            nombre_completo='X', es_externo=externo is not None
+        )
+    
+    def test_conteo_por_tipo(self):
+        from .models import RankingAsistencia
+        from .utils_asistencias import recalcular_ranking_anio
+        
+        emergencia = self._evento(1, 'emergencia')
+        asamblea = self._evento(2, 'asamblea')
+        directorio = self._evento(3, 'directorio', suma_ranking=False)
+        otro_anio = self._evento(4, 'emergencia', anio=self.anio - 1)
+        for evento in [emergencia, asamblea, directorio, otro_anio]:
+            self._asistir(evento, voluntario=self.voluntario)
+        self._asistir(emergencia, externo=self.externo)
+        
+        # Partir sin el ranking mantenido por señales
+        RankingAsistencia.objects.all().delete()
+        resumen = recalcular_ranking_anio(self.anio)
+        self.assertEqual(resumen['creados'], 2)
+        
+        ranking = RankingAsistencia.objects.get(anio=self.anio, voluntario=self.voluntario)
+        self.assertEqual(ranking.nombre_completo, 'Ana Rojas')
+        self.assertEqual((ranking.total, ranking.emergencias, ranking.asambleas), (2, 1, 1))
+        
+        ranking_externo = RankingAsistencia.objects.get(anio=self.anio, externo=self.externo)
+        self.assertTrue(ranking_externo.es_externo)
+        self.assertEqual(ranking_externo.tipo_externo, 'canje')
+        self.assertEqual(ranking_externo.emergencias, 1)
+        
+        # Segunda pasada: sin cambios; luego el externo deja de tener asistencias
+        self.assertEqual(recalcular_ranking_anio(self.anio)['actualizados'], 0)
+        RankingAsistencia.objects.filter(anio=self.anio, voluntario=self.voluntario).update(total=99)
+        self.assertEqual(recalcular_ranking_anio(self.anio)['actualizados'], 1)
+        
+        RankingAsistencia.objects.create(anio=self.anio, voluntario=Voluntario.objects.create(
+            nombre='Sin', apellido_paterno='Asistencias', rut='40000001-0', clave_bombero='401'
+        ), nombre_completo='Sin Asistencias', total=3)
+        self.assertEqual(recalcular_ranking_anio(self.anio)['eliminados'], 1)
+    
+    def test_mantencion_incremental(self):
+        from .models import RankingAsistencia
+        from .utils_asistencias import verificar_ranking_anio
+        
+        def ranking():
+            return RankingAsistencia.objects.get(anio=self.anio, voluntario=self.voluntario)
+        
+        emergencia = self._evento(1, 'emergencia')
+        asamblea = self._evento(2, 'asamblea')
+        self._asistir(emergencia, voluntario=self.voluntario)
+        self._asistir(emergencia, externo=self.externo)
+        detalle = self._asistir(asamblea, voluntario=self.voluntario)
+        self.assertEqual((ranking().total, ranking().emergencias, ranking().asambleas), (2, 1, 1))
+        
+        # Cambio de tipo
+        emergencia.tipo = 'ejercicios'
+        emergencia.save()
+        self.assertEqual((ranking().emergencias, ranking().ejercicios), (0, 1))
+        
+        # Deja de sumar al ranking y luego vuelve a sumar
+        emergencia.suma_ranking = False
+        emergencia.save()
+        self.assertEqual(ranking().total, 1)
+        self.assertFalse(RankingAsistencia.objects.filter(externo=self.externo).exists())
+        emergencia.suma_ranking = True
+        emergencia.save()
+        
+        # Cambio de año
+        emergencia.fecha = date(self.anio - 1, 12, 31)
+        emergencia.save()
+        self.assertEqual(ranking().total, 1)
+        self.assertEqual(
+            RankingAsistencia.objects.get(anio=self.anio - 1, voluntario=self.voluntario).ejercicios, 1
+        )
+        
+        detalle.delete()
+        self.assertFalse(RankingAsistencia.objects.filter(anio=self.anio).exists())
+        emergencia.delete()
+        self.assertFalse(RankingAsistencia.objects.exists())
+        
+        for anio in [self.anio, self.anio - 1]:
+            self.assertEqual(verificar_ranking_anio(anio), [])
+    
+    def test_conciliacion_informa_deriva(self):
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        from .models import RankingAsistencia
+        
+        self._asistir(self._evento(1, 'emergencia'), voluntario=self.voluntario)
+        call_command('conciliar_ranking_asistencias', '--anio', str(self.anio), stdout=StringIO())
+        
+        RankingAsistencia.objects.update(emergencias=5)
+        with self.assertRaises(CommandError):
+            call_command('conciliar_ranking_asistencias', '--anio', str(self.anio), stdout=StringIO())
+        
+        call_command('conciliar_ranking_asistencias', '--anio', str(self.anio), '--corregir', stdout=StringIO())
+        self.assertEqual(RankingAsistencia.objects.get().emergencias, 1)
+
+
+class PlanillaAsistenciaTest(TestCase):
+    """registrar-planilla crea evento y detalles con un número fijo de consultas"""
+    
+    def setUp(self):
+        from rest_framework.test import APIClient
+        from .models import Cargo
+        
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('planilla', password='x'))
+        self.voluntarios = [
+            Voluntario.objects.create(
+                nombre='Vol', apellido_paterno=str(i), rut=f'5{i:07d}-0', clave_bombero=f'5{i:02d}',
+                fecha_ingreso=date(2015, 1, 1), estado_bombero='activo'
+            )
+            for i in range(60)
+        ]
+        Cargo.objects.create(voluntario=self.voluntarios[0], tipo_cargo='compania', nombre_cargo='Capitán', anio=2024)
+        Cargo.objects.create(voluntario=self.voluntarios[1], tipo_cargo='comandancia', nombre_cargo='Comandante 1', anio=2024)
+        Cargo.objects.create(
+            voluntario=self.voluntarios[2], tipo_cargo='tecnico', nombre_cargo='Maquinista 1°', anio=2020,
+            fecha_fin=date(2021, 1, 1)
+        )
+    
+    def _registrar(self, id_evento, voluntarios):
+        asistentes = [{'voluntario': v.id} for v in voluntarios]
+        asistentes.append({'nombre_completo': 'Canje Externo', 'tipo_externo': 'canje'})
+        return self.client.post('/api/eventos-asistencia/registrar-planilla/', {
+            'evento': {
+                'id_evento': id_evento, 'tipo': 'emergencia', 'fecha': '2024-05-01',
+                'descripcion': 'Incendio', 'total_asistentes': 999
+            },
+            'asistentes': asistentes
+        }, format='json')
+    
+    def test_registra_planilla_con_estadisticas(self):
+        from .models import EventoAsistencia, RankingAsistencia
+        
+        respuesta = self._registrar(1, self.voluntarios)
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        
+        evento = EventoAsistencia.objects.get(id_evento=1)
+        self.assertEqual(evento.total_asistentes, 61)
+        self.assertEqual((evento.oficiales_compania, evento.oficiales_comandancia, evento.cargos_confianza), (1, 1, 0))
+        self.assertEqual((evento.total_oficiales, evento.voluntarios, evento.canjes), (2, 58, 1))
+        self.assertEqual(evento.porcentaje_asistencia, 100)
+        
+        capitan = evento.asistentes.get(voluntario=self.voluntarios[0])
+        self.assertEqual((capitan.categoria, capitan.cargo, capitan.anio_cargo), ('Oficial Compañía', 'Capitán', 2024))
+        self.assertEqual(evento.asistentes.get(voluntario=self.voluntarios[2]).cargo, None)
+        self.assertEqual(RankingAsistencia.objects.filter(anio=2024).count(), 60)
+        self.assertEqual(len(respuesta.json()['asistentes']), 61)
+    
+    def test_consultas_no_dependen_de_asistentes(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as pocos:
+            self.assertEqual(self._registrar(1, self.voluntarios[:5]).status_code, 201)
+        with CaptureQueriesContext(connection) as muchos:
+            self.assertEqual(self._registrar(2, self.voluntarios).status_code, 201)
+        self.assertEqual(len(pocos), len(muchos))
+    
+    def test_voluntario_inexistente_no_deja_datos(self):
+        from .models import EventoAsistencia
+        
+        respuesta = self.client.post('/api/eventos-asistencia/registrar-planilla/', {
+            'evento': {'id_evento': 3, 'tipo': 'asamblea', 'fecha': '2024-05-01', 'descripcion': 'X'},
+            'asistentes': [{'voluntario': 999999}]
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertFalse(EventoAsistencia.objects.exists())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_PRUEBAS)
+class TrabajosSegundoPlanoTest(TestCase):
+    """Las operaciones pesadas responden 202 y run_worker las ejecuta"""
+    
+    def setUp(self):
+        from rest_framework.test import APIClient
+        from .models import ConfiguracionCuotas
+        
+        ConfiguracionCuotas.objects.create(precio_regular=5000, precio_estudiante=3000)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('trabajos', password='x'))
+        for i in range(3):
+            Voluntario.objects.create(
+                nombre='Cola', apellido_paterno=str(i), rut=f'97{i:06d}-0', clave_bombero=f'97{i}',
+                fecha_ingreso=date(date.today().year - 2, 1, 1), estado_bombero='activo'
+            )
+    
+    def test_ranking_encolado_y_ejecutado_por_run_worker(self):
+        from django.core.management import call_command
+        
+        respuesta = self.client.post('/api/ranking-asistencias/actualizar_ranking/', {'anio': 2024}, format='json')
+        self.assertEqual(respuesta.status_code, 202)
+        trabajo = respuesta.json()['trabajo']
+        self.assertEqual((trabajo['tipo'], trabajo['estado']), ('actualizar_ranking', 'pendiente'))
+        self.assertEqual(respuesta['Location'], trabajo['url_estado'])
+        
+        salida = StringIO()
+        call_command('run_worker', '--una-vez', stdout=salida)
+        self.assertIn(f"#{trabajo['id']} actualizar_ranking", salida.getvalue())
+        
+        estado = self.client.get(trabajo['url_estado']).json()
+        self.assertEqual((estado['estado'], estado['porcentaje']), ('completado', 100.0))
+        self.assertEqual(estado['resultado']['anio'], 2024)
+    
+    def test_ranking_con_anio_invalido_responde_400(self):
+        from .models import Trabajo
+        
+        respuesta = self.client.post('/api/ranking-asistencias/actualizar_ranking/', {'anio': 'abc'}, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertFalse(Trabajo.objects.exists())
+    
+    def test_pdf_deudores_get_descarga_sin_encolar(self):
+        from rest_framework.test import APIClient
+        from .models import Trabajo
+        
+        url = f'/api/voluntarios/pdf-deudores-cuotas/{date.today().year}/'
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.content.startswith(b'%PDF'))
+        self.assertFalse(Trabajo.objects.exists())
+        
+        # Encolar exige sesión
+        self.assertEqual(APIClient().post(url).status_code, 401)
+        self.assertFalse(Trabajo.objects.exists())
+    
+    def test_pdf_deudores_como_archivo_de_resultado(self):
+        from .utils_trabajos import procesar_siguiente_trabajo
+        
+        self.client.force_login(User.objects.get(username='trabajos'))
+        respuesta = self.client.post(f'/api/voluntarios/pdf-deudores-cuotas/{date.today().year}/')
+        self.assertEqual(respuesta.status_code, 202)
+        trabajo = respuesta.json()['trabajo']
+        url_resultado = f"{trabajo['url_estado']}resultado/"
+        self.assertEqual(self.client.get(url_resultado).status_code, 409)
+        
+        procesar_siguiente_trabajo()
+        estado = self.client.get(trabajo['url_estado']).json()
+        self.assertEqual(estado['url_resultado'], url_resultado)
+        self.assertEqual(estado['resultado']['deudores'], 3)
+        respuesta = self.client.get(url_resultado)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(b''.join(respuesta.streaming_content).startswith(b'%PDF'))
+    
+    def test_asignacion_de_beneficio_en_segundo_plano(self):
+        from unittest import mock
+        from .models import AsignacionBeneficio, Trabajo
+        from .utils_trabajos import encolar_trabajo, procesar_siguiente_trabajo
+        
+        respuesta = self.client.post('/api/voluntarios/crear-beneficio-simple/', {
+            'nombre': 'Curanto', 'fecha_evento': '2025-06-15', 'precio_tarjeta': 5000,
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 202)
+        beneficio_id = respuesta.json()['beneficio_id']
+        self.assertFalse(AsignacionBeneficio.objects.exists())
+        
+        trabajo = procesar_siguiente_trabajo()
+        self.assertEqual(trabajo.estado, 'completado', trabajo.error)
+        self.assertEqual(trabajo.resultado['total_asignaciones'], 3)
+        self.assertEqual(AsignacionBeneficio.objects.filter(beneficio_id=beneficio_id).count(), 3)
+        
+        # Repetir la asignación falla sin duplicar
+        encolar_trabajo('asignar_beneficio', {'beneficio_id': beneficio_id})
+        with mock.patch('voluntarios.utils_trabajos.traceback.print_exc'):
+            self.assertEqual(procesar_siguiente_trabajo().estado, 'error')
+        self.assertEqual(AsignacionBeneficio.objects.count(), 3)
+        self.assertEqual(Trabajo.objects.filter(estado='pendiente').count(), 0)
+    
+    def test_toma_unica_y_recuperacion_de_abandonados(self):
+        from django.utils import timezone
+        from .models import Trabajo
+        from .utils_trabajos import (
+            INTENTOS_MAXIMOS, LATIDO_MAXIMO, encolar_trabajo, recuperar_trabajos_abandonados, tomar_trabajo
+        )
+        
+        primero = encolar_trabajo('actualizar_ranking', {'anio': 2024})
+        segundo = encolar_trabajo('actualizar_ranking', {'anio': 2025})
+        self.assertEqual([tomar_trabajo('a').id, tomar_trabajo('b').id], [primero.id, segundo.id])
+        self.assertIsNone(tomar_trabajo('c'))
+        
+        # Un trabajador caído: sin latido vuelve a la cola, sin intentos queda con error
+        antiguo = timezone.now() - LATIDO_MAXIMO * 2
+        Trabajo.objects.filter(id=primero.id).update(fecha_latido=antiguo)
+        Trabajo.objects.filter(id=segundo.id).update(fecha_latido=antiguo, intentos=INTENTOS_MAXIMOS)
+        self.assertEqual(recuperar_trabajos_abandonados(), 1)
+        self.assertEqual(
+            dict(Trabajo.objects.values_list('id', 'estado')), {primero.id: 'pendiente', segundo.id: 'error'}
+        )
+
+
+class ConsultasListadosTest(TestCase):
+    """Los listados de la API no hacen consultas por fila (sin N+1)"""
+    
+    ENDPOINTS = [
+        'voluntarios', 'cargos', 'sanciones', 'reintegros', 'felicitaciones', 'uniformes',
+        'cuotas', 'estado-cuotas', 'pagos-cuotas', 'ciclos-cuotas',
+        'beneficios', 'asignaciones-beneficios', 'pagos-beneficios',
+        'eventos-asistencia', 'eventos-asistencia/por_tipo/?tipo=emergencia',
+        'detalles-asistencia', 'externos', 'ranking-asistencias', 'ciclos-asistencia', 'logos',
+    ]
+    
+    def setUp(self):
+        from rest_framework.test import APIClient
+        
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('listados', password='x'))
+        self.sembrados = 0
+    
+    def _sembrar(self, cantidad):
+        from decimal import Decimal
+        from .models import (
+            Reintegro, Felicitacion, Uniforme, PiezaUniforme, Cuota, EstadoCuotasBombero, PagoCuota,
+            CicloCuotas, Beneficio, AsignacionBeneficio, PagoBeneficio, EventoAsistencia,
+            DetalleAsistencia, VoluntarioExterno, RankingAsistencia, CicloAsistencia, LogoCompania,
+            ArchivoBlob
+        )
+        
+        # Los listados solo leen el hash: el archivo no necesita existir
+        blob = ArchivoBlob.objects.get_or_create(sha256='a' * 64, defaults={'tamano': 1})[0]
+        for _ in range(cantidad):
+            i = self.sembrados = self.sembrados + 1
+            usuario = User.objects.create_user(f'u{i}', password='x')
+            voluntario = Voluntario.objects.create(
+                nombre='Vol', apellido_paterno=str(i), rut=f'7{i:07d}-0', clave_bombero=str(i),
+                fecha_ingreso=date(2015, 1, 1), estado_bombero='activo', created_by=usuario
+            )
+            Cargo.objects.create(voluntario=voluntario, tipo_cargo='compania', nombre_cargo='Ayudante', anio=2024)
+            Sancion.objects.create(
+                voluntario=voluntario, tipo_sancion='suspension', fecha_desde=date(2024, 1, 1),
+                oficio_numero=str(i), fecha_oficio=date(2024, 1, 1), motivo='X', created_by=usuario
+            )
+            Reintegro.objects.create(
+                voluntario=voluntario, estado_anterior='renunciado', fecha_reintegro=date(2024, 1, 1),
+                motivo_reintegro='X', oficio_numero=str(i), fecha_oficio=date(2024, 1, 1), created_by=usuario
+            )
+            Felicitacion.objects.create(voluntario=voluntario, documento_felicitacion=blob, created_by=usuario)
+            uniforme = Uniforme.objects.create(
+                id=f'PAR-{i:03d}', bombero=voluntario, tipo_uniforme='parada', registrado_por='x'
+            )
+            PiezaUniforme.objects.create(
+                uniforme=uniforme, componente='casco', condicion='nuevo', estado_fisico='bueno',
+                fecha_entrega=date(2024, 1, 1)
+            )
+            Cuota.objects.create(mes=1, anio=1900 + i, monto=Decimal('1000'))
+            EstadoCuotasBombero.objects.create(voluntario=voluntario, documento_estudiante=blob)
+            PagoCuota.objects.create(
+                voluntario=voluntario, mes=1, anio=1900 + i, monto_pagado=Decimal('5000'), created_by=usuario
+            )
+            CicloCuotas.objects.create(
+                anio=1900 + i, fecha_inicio=date(2024, 1, 1), fecha_fin=date(2024, 12, 31), created_by=usuario
+            )
+            beneficio = Beneficio.objects.create(
+                nombre=f'B{i}', descripcion='X', fecha_evento=date(2024, 1, 1),
+                precio_por_tarjeta=Decimal('5000'), precio_tarjeta_extra=Decimal('5000'), created_by=usuario
+            )
+            asignacion = AsignacionBeneficio.objects.create(
+                beneficio=beneficio, voluntario=voluntario, tarjetas_asignadas=2, created_by=usuario
+            )
+            PagoBeneficio.objects.create(asignacion=asignacion, monto=Decimal('5000'), created_by=usuario)
+            evento = EventoAsistencia.objects.create(
+                id_evento=i, tipo='emergencia', fecha=date(2024, 1, 1), descripcion='X', registrado_por=usuario
+            )
+            DetalleAsistencia.objects.create(evento=evento, voluntario=voluntario, nombre_completo='X')
+            VoluntarioExterno.objects.create(codigo=f'EXT-P-{i:03d}', nombre_completo='X', tipo='participante')
+            RankingAsistencia.objects.create(anio=1900 + i, nombre_completo='X')
+            CicloAsistencia.objects.create(
+                anio=1900 + i, fecha_inicio=date(2024, 1, 1), fecha_fin=date(2024, 12, 31), created_by=usuario
+            )
+            LogoCompania.objects.create(nombre=f'L{i}', imagen=blob, cargado_por=usuario)
+    
+    def _contar_consultas(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        conteos = {}
+        for endpoint in self.ENDPOINTS:
+            url = f'/api/{endpoint}' if '?' in endpoint else f'/api/{endpoint}/'
+            with CaptureQueriesContext(connection) as consultas:
+                respuesta = self.client.get(url)
+            self.assertEqual(respuesta.status_code, 200, f'{endpoint}: {respuesta.content[:300]}')
+            conteos[endpoint] = len(consultas)
+        return conteos
+    
+    def test_consultas_no_crecen_con_el_tamano_de_pagina(self):
+        self._sembrar(2)
+        pocos = self._contar_consultas()
+        self._sembrar(4)
+        muchos = self._contar_consultas()
+        
+        crecen = {e: (pocos[e], muchos[e]) for e in self.ENDPOINTS if muchos[e] != pocos[e]}
+        self.assertEqual(crecen, {})
+
+
+@override_settings(MEDIA_ROOT=MEDIA_PRUEBAS)
+class BenchmarkApiTest(TestCase):
+    """benchmark_api guarda la línea base y falla ante regresiones"""
+    
+    def test_detecta_regresion_de_consultas(self):
+        import json
+        import tempfile
+        from pathlib import Path
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = Path(directorio) / 'baseline.json'
+            opciones = {'tamanos': [10], 'repeticiones': 1, 'baseline': str(ruta), 'stdout': StringIO()}
+            
+            call_command('benchmark_api', guardar=True, **opciones)
+            base = json.loads(ruta.read_text())
+            medidas = base['resultados']['10']
+            self.assertIn('api/voluntarios/', medidas)
+            self.assertIn('api/voluntarios/lista-activos-simple/', medidas)
+            self.assertNotIn('api/voluntarios/crear-beneficio-simple/', medidas)
+            
+            # Una línea base con menos consultas hace fallar la comparación
+            medidas['api/cargos/']['consultas'] -= 1
+            ruta.write_text(json.dumps(base))
+            with self.assertRaisesMessage(CommandError, 'regresiones'):
+                call_command('benchmark_api', umbral_tiempo=100, umbral_memoria=100, **opciones)
+
+
+class GenerarDatosCargaTest(TestCase):
+    """generar_datos_carga cubre todas las entidades y es reproducible"""
+    
+    def test_genera_todas_las_entidades(self):
+        from django.core.management import call_command
+        from .models import (
+            Uniforme, PiezaUniforme, ContadorUniformes, PagoCuota, EstadoCuentaCuotas,
+            AsignacionBeneficio, PagoBeneficio, DetalleAsistencia, RankingAsistencia
+        )
+        
+        call_command('generar_datos_carga', voluntarios=120, anios=2, stdout=StringIO())
+        
+        estados = set(Voluntario.objects.values_list('estado_bombero', flat=True))
+        self.assertEqual(estados, {codigo for codigo, _ in Voluntario.ESTADO_CHOICES})
+        for modelo in (Cargo, Sancion, Uniforme, PiezaUniforme, PagoCuota, EstadoCuentaCuotas,
+                       AsignacionBeneficio, PagoBeneficio, DetalleAsistencia, RankingAsistencia):
+            self.assertTrue(modelo.objects.exists(), modelo.__name__)
+        self.assertEqual(PagoCuota.objects.values('anio').distinct().count(), 2)
+        
+        # Los IDs de uniformes quedan reservados en el contador
+        contador = ContadorUniformes.objects.get(pk=1)
+        self.assertFalse(Uniforme.objects.filter(id=f'PAR-{str(contador.id_parada).zfill(3)}').exists())
+    
+    def test_misma_semilla_mismos_datos(self):
+        from .utils_carga import generar_datos_carga
+        
+        primero = generar_datos_carga(voluntarios=60, anios=1, semilla=7)
+        segundo = generar_datos_carga(voluntarios=60, anios=1, semilla=7, desplazamiento=1000)
+        self.assertEqual(primero, segundo)
+        self.assertEqual(
+            list(Voluntario.objects.order_by('id').values_list('estado_bombero', flat=True)[:60]),
+            list(Voluntario.objects.order_by('id').values_list('estado_bombero', flat=True)[60:])
+        )
@@ -12,7 +12,7 @@ from .views import (
 )
 from .sancion_views import SancionViewSet, ReintegroViewSet
 from .views_tesoreria import (
-    ConfiguracionCuotasViewSet, EstadoCuotasBomberoViewSet,
+    ConfiguracionCuotasViewSet, EstadoCuotasBomberoViewSetExtended,
     PagoCuotaViewSet, BeneficioViewSet, AsignacionBeneficioViewSet,
     PagoBeneficioViewSet, MovimientoFinancieroViewSet, FinanzasViewSet,
     CicloCuotasViewSet
@@ -22,6 +22,9 @@ from . import finanzas_views
 from . import cuotas_simple_views
 from . import estado_cuotas_simple_views
 from . import beneficios_simple_views
+from . import punto_venta_simple_views
+from . import archivos_views
+from .views_trabajos import TrabajoViewSet
 
 router = DefaultRouter()
 # Voluntarios y relacionados
@@ -41,7 +44,7 @@ router.register(r'uniformes', UniformeViewSet, basename='uniforme')
 # Cuotas y Tesorería
 router.register(r'cuotas', CuotaViewSet, basename='cuota')  # Modelo antiguo (mantener compatibilidad)
 router.register(r'configuracion-cuotas', ConfiguracionCuotasViewSet, basename='configuracion-cuota')  # NUEVO
-router.register(r'estado-cuotas', EstadoCuotasBomberoViewSet, basename='estado-cuota')  # NUEVO
+router.register(r'estado-cuotas', EstadoCuotasBomberoViewSetExtended, basename='estado-cuota')  # NUEVO (con subir-documento-estudiante)
 router.register(r'pagos-cuotas', PagoCuotaViewSet, basename='pago-cuota')  # Actualizado con nuevos endpoints
 router.register(r'ciclos-cuotas', CicloCuotasViewSet, basename='ciclo-cuota')  # NUEVO - Gestión de periodos anuales
 # Finanzas ahora usa endpoints directos en lugar de ViewSets (ver urlpatterns abajo)
@@ -63,6 +66,9 @@ router.register(r'ciclos-asistencia', CicloAsistenciaViewSet, basename='ciclo-as
 # Logos
 router.register(r'logos', LogoCompaniaViewSet, basename='logo')
 
+# Trabajos en segundo plano (estado y resultado de las operaciones que responden 202)
+router.register(r'trabajos', TrabajoViewSet, basename='trabajo')
+
 urlpatterns = [
     path('', include(router.urls)),
     
@@ -75,7 +81,9 @@ urlpatterns = [
     
     # Finanzas - Endpoints SIMPLES
     path('movimientos-financieros/', finanzas_views.movimientos_api, name='movimientos_financieros'),
+    path('movimientos-financieros/exportar/', finanzas_views.exportar_movimientos_api, name='exportar_movimientos_financieros'),
     path('finanzas/saldo-compania/', finanzas_views.saldo_api, name='saldo_compania'),
+    path('finanzas/reportes/', finanzas_views.reportes_tesoreria_api, name='reportes_tesoreria'),
     
     # Cuotas SIMPLE - SIN DRF
     path('pagos-cuotas-simple/', cuotas_simple_views.pagos_cuotas_simple, name='pagos_cuotas_simple'),
@@ -93,4 +101,14 @@ urlpatterns = [
     path('pagar-beneficio-simple/', beneficios_simple_views.pagar_beneficio_simple, name='pagar_beneficio_simple'),
     path('venta-extra-simple/', beneficios_simple_views.venta_extra_simple, name='venta_extra_simple'),
     path('liberar-tarjetas-simple/', beneficios_simple_views.liberar_tarjetas_simple, name='liberar_tarjetas_simple'),
+    
+    # Punto de venta de beneficios SIMPLE - SIN DRF
+    path('punto-venta/sesiones/', punto_venta_simple_views.abrir_sesion_punto_venta_simple, name='abrir_sesion_punto_venta'),
+    path('punto-venta/sesiones/<int:sesion_id>/', punto_venta_simple_views.sesion_punto_venta_simple, name='sesion_punto_venta'),
+    path('punto-venta/sesiones/<int:sesion_id>/vendedores/', punto_venta_simple_views.vendedores_punto_venta_simple, name='vendedores_punto_venta'),
+    path('punto-venta/sesiones/<int:sesion_id>/ventas/', punto_venta_simple_views.ventas_punto_venta_simple, name='ventas_punto_venta'),
+    path('punto-venta/sesiones/<int:sesion_id>/cerrar/', punto_venta_simple_views.cerrar_sesion_punto_venta_simple, name='cerrar_sesion_punto_venta'),
+    
+    # Almacén de archivos (logos y documentos adjuntos)
+    path('archivos/<str:sha256>/', archivos_views.descargar_archivo, name='descargar_archivo'),
 ]
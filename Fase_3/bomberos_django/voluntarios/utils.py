@@ -153,6 +153,14 @@ class VoluntarioUtils:
             'dias': delta.days
         }
     
+    # Presentación de cada categoría (códigos de Voluntario.CATEGORIA_CHOICES)
+    ESTILO_CATEGORIA = {
+        'voluntario': {'color': '#1976d2', 'icono': '🔰'},
+        'honorario_compania': {'color': '#388e3c', 'icono': '🏅'},
+        'honorario_cuerpo': {'color': '#f57c00', 'icono': '🎖️'},
+        'insigne': {'color': '#d32f2f', 'icono': '🏆'},
+    }
+    
     @staticmethod
     def calcular_categoria_bombero(fecha_ingreso):
         """
@@ -162,34 +170,28 @@ class VoluntarioUtils:
         - 20-24 años: Voluntario Honorario de Compañía
         - 25-49 años: Voluntario Honorario del Cuerpo (Insigne 25 años)
         - 50+ años: Voluntario Insigne de Chile
+        
+        Los límites son los de Voluntario.LIMITES_CATEGORIA; para un voluntario
+        guardado usar categoria_voluntario, que respeta la antigüedad congelada.
         """
-        antiguedad = VoluntarioUtils.calcular_antiguedad_detallada(fecha_ingreso)
-        años = antiguedad['años']
+        from .models import Voluntario
         
-        if años < 20:
-            return {
-                'categoria': 'Voluntario',
-                'color': '#1976d2',
-                'icono': '🔰'
-            }
-        elif 20 <= años <= 24:
-            return {
-                'categoria': 'Voluntario Honorario de Compañía',
-                'color': '#388e3c',
-                'icono': '🏅'
-            }
-        elif 25 <= años <= 49:
-            return {
-                'categoria': 'Voluntario Honorario del Cuerpo',
-                'color': '#f57c00',
-                'icono': '🎖️'
-            }
-        else:
-            return {
-                'categoria': 'Voluntario Insigne de Chile',
-                'color': '#d32f2f',
-                'icono': '🏆'
-            }
+        años = VoluntarioUtils.calcular_antiguedad_detallada(fecha_ingreso)['años']
+        return VoluntarioUtils._categoria_con_estilo(Voluntario.categoria_por_anios(años))
+    
+    @staticmethod
+    def categoria_voluntario(voluntario):
+        """Categoría persistida del voluntario con su color e ícono"""
+        return VoluntarioUtils._categoria_con_estilo(voluntario.categoria)
+    
+    @staticmethod
+    def _categoria_con_estilo(codigo):
+        from .models import Voluntario
+        
+        return {
+            'categoria': dict(Voluntario.CATEGORIA_CHOICES)[codigo],
+            **VoluntarioUtils.ESTILO_CATEGORIA[codigo]
+        }
     
     # ==================== PERMISOS Y VALIDACIONES DE ESTADO ====================
     
@@ -216,11 +218,10 @@ class VoluntarioUtils:
             }
         
         # Verificar antigüedad (Honorarios e Insignes no pagan)
-        categoria = VoluntarioUtils.calcular_categoria_bombero(voluntario.fecha_ingreso)
-        if categoria['categoria'] != 'Voluntario':
+        if voluntario.categoria != 'voluntario':
             return {
                 'puede': False,
-                'mensaje': f'{categoria["categoria"]} no paga cuotas mensuales'
+                'mensaje': f'{voluntario.get_categoria_display()} no paga cuotas mensuales'
             }
         
         return {
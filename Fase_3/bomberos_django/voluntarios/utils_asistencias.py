@@ -0,0 +1,500 @@
+"""
+Utilidades y lógica de negocio para el sistema de asistencias (P6P)
+Cálculo y mantención incremental del ranking anual de asistencias
+"""
+
+from collections import Counter
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import (
+    Cargo, EventoAsistencia, DetalleAsistencia, RankingAsistencia,
+    Voluntario, VoluntarioExterno
+)
+
+
+# Tipo de evento → contador del ranking (directorio solo suma al total)
+CONTADORES_POR_TIPO = {
+    'emergencia': 'emergencias',
+    'asamblea': 'asambleas',
+    'ejercicios': 'ejercicios',
+    'citaciones': 'citaciones',
+    'otras': 'otras',
+}
+
+CAMPOS_CONTADORES = ['total'] + list(CONTADORES_POR_TIPO.values())
+
+
+def _detalles_ranking(anio):
+    """Asistencias que cuentan para el ranking del año (eventos con suma_ranking)"""
+    return DetalleAsistencia.objects.filter(
+        evento__fecha__gte=date(anio, 1, 1),
+        evento__fecha__lte=date(anio, 12, 31),
+        evento__suma_ranking=True
+    ).filter(
+        Q(voluntario__isnull=False) | Q(externo__isnull=False)
+    )
+
+
+def contar_asistencias_ranking(anio):
+    """
+    Cuenta las asistencias del año por participante y tipo de evento
+    en una sola consulta agrupada (agregación condicional)
+
+    Returns:
+        dict: {
+            (voluntario_id, externo_id): {
+                'nombre_completo': str,
+                'clave_bombero': str,
+                'es_externo': bool,
+                'tipo_externo': str|None,
+                'total': int, 'emergencias': int, ...
+            }
+        }
+    """
+    contadores = {'total': Count('id')}
+    for tipo, campo in CONTADORES_POR_TIPO.items():
+        contadores[campo] = Count('id', filter=Q(evento__tipo=tipo))
+
+    filas = _detalles_ranking(anio).values(
+        'voluntario_id', 'externo_id',
+        'voluntario__nombre', 'voluntario__apellido_paterno', 'voluntario__apellido_materno',
+        'voluntario__clave_bombero',
+        'externo__nombre_completo', 'externo__codigo', 'externo__tipo'
+    ).annotate(**contadores).order_by()
+
+    resultado = {}
+    for fila in filas:
+        if fila['voluntario_id']:
+            # Mismo formato que Voluntario.nombre_completo()
+            partes = [fila['voluntario__nombre'], fila['voluntario__apellido_paterno']]
+            if fila['voluntario__apellido_materno']:
+                partes.append(fila['voluntario__apellido_materno'])
+            datos = {
+                'nombre_completo': ' '.join(partes),
+                'clave_bombero': fila['voluntario__clave_bombero'],
+                'es_externo': False,
+                'tipo_externo': None,
+            }
+            clave = (fila['voluntario_id'], None)
+        else:
+            datos = {
+                'nombre_completo': fila['externo__nombre_completo'],
+                'clave_bombero': fila['externo__codigo'],
+                'es_externo': True,
+                'tipo_externo': fila['externo__tipo'],
+            }
+            clave = (None, fila['externo_id'])
+
+        for campo in CAMPOS_CONTADORES:
+            datos[campo] = fila[campo]
+        resultado[clave] = datos
+
+    return resultado
+
+
+@transaction.atomic
+def recalcular_ranking_anio(anio):
+    """
+    Recalcula el ranking de asistencias de un año completo
+
+    Una consulta agrupada para los conteos, una para el ranking existente y
+    escritura masiva (bulk_create/bulk_update) dentro de una transacción.
+    Solo considera eventos con suma_ranking=True.
+
+    Returns:
+        dict: {'anio', 'participantes', 'creados', 'actualizados', 'eliminados'}
+    """
+    conteos = contar_asistencias_ranking(anio)
+    campos = ['nombre_completo', 'clave_bombero', 'es_externo', 'tipo_externo'] + CAMPOS_CONTADORES
+
+    existentes = {
+        (ranking.voluntario_id, ranking.externo_id): ranking
+        for ranking in RankingAsistencia.objects.filter(anio=anio)
+    }
+
+    nuevos = []
+    modificados = []
+    for clave, datos in conteos.items():
+        ranking = existentes.pop(clave, None)
+        if ranking is None:
+            nuevos.append(RankingAsistencia(
+                anio=anio, voluntario_id=clave[0], externo_id=clave[1], **datos
+            ))
+        elif any(getattr(ranking, campo) != datos[campo] for campo in campos):
+            for campo in campos:
+                setattr(ranking, campo, datos[campo])
+            modificados.append(ranking)
+
+    # Participantes que ya no tienen asistencias que sumen en el año
+    eliminados = 0
+    if existentes:
+        eliminados, _ = RankingAsistencia.objects.filter(
+            id__in=[ranking.id for ranking in existentes.values()]
+        ).delete()
+
+    RankingAsistencia.objects.bulk_create(nuevos, batch_size=500)
+    if modificados:
+        # bulk_update no aplica auto_now
+        ahora = timezone.now()
+        for ranking in modificados:
+            ranking.updated_at = ahora
+        RankingAsistencia.objects.bulk_update(modificados, campos + ['updated_at'], batch_size=500)
+
+    return {
+        'anio': anio,
+        'participantes': len(conteos),
+        'creados': len(nuevos),
+        'actualizados': len(modificados),
+        'eliminados': eliminados,
+    }
+
+
+def verificar_ranking_anio(anio):
+    """
+    Compara los contadores mantenidos del ranking contra un reconteo completo
+
+    Returns:
+        list: [
+            {
+                'voluntario_id': int|None,
+                'externo_id': int|None,
+                'nombre_completo': str,
+                'diferencias': {campo: (guardado, esperado)}
+            }
+        ]
+    """
+    conteos = contar_asistencias_ranking(anio)
+    guardados = {
+        (fila['voluntario_id'], fila['externo_id']): fila
+        for fila in RankingAsistencia.objects.filter(anio=anio).values(
+            'voluntario_id', 'externo_id', 'nombre_completo', *CAMPOS_CONTADORES
+        )
+    }
+
+    derivas = []
+    for clave in sorted(set(conteos) | set(guardados), key=lambda c: (c[0] or 0, c[1] or 0)):
+        esperado = conteos.get(clave)
+        guardado = guardados.get(clave)
+        diferencias = {
+            campo: (guardado[campo] if guardado else 0, esperado[campo] if esperado else 0)
+            for campo in CAMPOS_CONTADORES
+            if (guardado[campo] if guardado else 0) != (esperado[campo] if esperado else 0)
+        }
+        if diferencias:
+            derivas.append({
+                'voluntario_id': clave[0],
+                'externo_id': clave[1],
+                'nombre_completo': (esperado or guardado)['nombre_completo'],
+                'diferencias': diferencias,
+            })
+
+    return derivas
+
+
+# ==================== MANTENCIÓN INCREMENTAL ====================
+
+def _asegurar_filas_ranking(anio, voluntario_ids, externo_ids):
+    """Crea (en lote) las filas de ranking que falten para los participantes"""
+    existentes = RankingAsistencia.objects.filter(anio=anio).filter(
+        Q(voluntario_id__in=voluntario_ids) | Q(externo_id__in=externo_ids)
+    ).values_list('voluntario_id', 'externo_id')
+    voluntarios_con_fila = {v for v, e in existentes if v}
+    externos_con_fila = {e for v, e in existentes if e}
+
+    nuevos = []
+    faltantes = set(voluntario_ids) - voluntarios_con_fila
+    if faltantes:
+        for voluntario in Voluntario.objects.filter(id__in=faltantes).only(
+            'id', 'nombre', 'apellido_paterno', 'apellido_materno', 'clave_bombero'
+        ):
+            nuevos.append(RankingAsistencia(
+                anio=anio, voluntario=voluntario,
+                nombre_completo=voluntario.nombre_completo(),
+                clave_bombero=voluntario.clave_bombero,
+                es_externo=False
+            ))
+
+    faltantes = set(externo_ids) - externos_con_fila
+    if faltantes:
+        for externo in VoluntarioExterno.objects.filter(id__in=faltantes):
+            nuevos.append(RankingAsistencia(
+                anio=anio, externo=externo,
+                nombre_completo=externo.nombre_completo,
+                clave_bombero=externo.codigo,
+                es_externo=True,
+                tipo_externo=externo.tipo
+            ))
+
+    if nuevos:
+        # ignore_conflicts: otra escritura concurrente pudo crear la fila
+        RankingAsistencia.objects.bulk_create(nuevos, ignore_conflicts=True)
+
+
+def aplicar_delta_ranking(anio, tipo, participantes, signo):
+    """
+    Suma (signo=1) o resta (signo=-1) asistencias de un tipo al ranking del año
+    con actualizaciones atómicas F(), sin recontar
+
+    Args:
+        participantes: iterable de (voluntario_id, externo_id); un participante
+            repetido cuenta tantas veces como aparezca
+    """
+    repeticiones = Counter(
+        (voluntario_id, externo_id) for voluntario_id, externo_id in participantes
+        if voluntario_id or externo_id
+    )
+    if not repeticiones:
+        return
+
+    if signo > 0:
+        _asegurar_filas_ranking(
+            anio,
+            [v for v, e in repeticiones if v],
+            [e for v, e in repeticiones if e and not v]
+        )
+
+    # Un UPDATE por cada multiplicidad distinta (normalmente una sola)
+    por_cantidad = {}
+    for (voluntario_id, externo_id), cantidad in repeticiones.items():
+        ids = por_cantidad.setdefault(cantidad, ([], []))
+        if voluntario_id:
+            ids[0].append(voluntario_id)
+        else:
+            ids[1].append(externo_id)
+
+    campo_tipo = CONTADORES_POR_TIPO.get(tipo)
+    filas = RankingAsistencia.objects.filter(anio=anio)
+    for cantidad, (voluntario_ids, externo_ids) in por_cantidad.items():
+        delta = signo * cantidad
+        cambios = {'total': F('total') + delta, 'updated_at': timezone.now()}
+        if campo_tipo:
+            cambios[campo_tipo] = F(campo_tipo) + delta
+        filas.filter(
+            Q(voluntario_id__in=voluntario_ids) | Q(externo_id__in=externo_ids)
+        ).update(**cambios)
+
+    # Igual que el reconteo: sin asistencias que sumen no hay fila
+    if signo < 0:
+        filas.filter(total__lte=0).delete()
+
+
+def registrar_asistencia_ranking(evento, participantes, signo=1):
+    """Aplica al ranking altas (signo=1) o bajas (signo=-1) de asistencias de un evento"""
+    if evento.suma_ranking:
+        aplicar_delta_ranking(_anio_evento(evento.fecha), evento.tipo, participantes, signo)
+
+
+def mover_evento_ranking(anterior, evento, participantes):
+    """
+    Traslada las asistencias de un evento cuyo tipo, año o suma_ranking cambió
+
+    Args:
+        anterior: dict con 'tipo', 'fecha' y 'suma_ranking' previos
+    """
+    antes = (anterior['tipo'], _anio_evento(anterior['fecha']), anterior['suma_ranking'])
+    ahora = (evento.tipo, _anio_evento(evento.fecha), evento.suma_ranking)
+    if antes == ahora:
+        return
+
+    participantes = list(participantes)
+    if antes[2]:
+        aplicar_delta_ranking(antes[1], antes[0], participantes, -1)
+    if ahora[2]:
+        aplicar_delta_ranking(ahora[1], ahora[0], participantes, 1)
+
+
+def _anio_evento(fecha):
+    """Año de la fecha del evento (acepta date o 'YYYY-MM-DD')"""
+    if isinstance(fecha, str):
+        return int(fecha[:4])
+    return fecha.year
+
+
+# ==================== PLANILLA DE ASISTENCIA ====================
+
+# Mismas listas que el registro de asistencias en el frontend
+CARGOS_COMANDANCIA = [
+    'Superintendente', 'Comandante 1', 'Comandante 2', 'Comandante 3',
+    'Intendente General', 'Tesorero General', 'Secretario General', 'Ayudante General',
+]
+CARGOS_OFICIALES_COMPANIA = [
+    'Capitán', 'Director', 'Secretario', 'Tesorero', 'Capellán', 'Intendente',
+    'Teniente Primero', 'Teniente Segundo', 'Teniente Tercero', 'Teniente Cuarto',
+]
+CARGOS_CONFIANZA = [
+    'Jefe de Máquinas', 'Maquinista 1°', 'Maquinista 2°', 'Maquinista 3°',
+    'Ayudante', 'Ayudante 1°', 'Ayudante 2°', 'Ayudante 3°',
+]
+
+
+def _grupo_cargo(nombre_cargo):
+    """Clasifica un cargo: 'comandancia', 'compania', 'confianza' o None"""
+    if nombre_cargo in CARGOS_COMANDANCIA:
+        return 'comandancia'
+    if nombre_cargo in CARGOS_OFICIALES_COMPANIA:
+        return 'compania'
+    if nombre_cargo in CARGOS_CONFIANZA:
+        return 'confianza'
+    return None
+
+
+def cargos_vigentes(voluntario_ids, hoy=None):
+    """
+    Cargo vigente de cada voluntario en una sola consulta
+    (mismo criterio que VoluntarioUtils.obtener_cargo_vigente)
+
+    Returns:
+        dict: {voluntario_id: Cargo}
+    """
+    if hoy is None:
+        hoy = date.today()
+
+    vigentes = {}
+    for cargo in Cargo.objects.filter(
+        voluntario_id__in=voluntario_ids
+    ).filter(
+        Q(fecha_fin__isnull=True) | Q(fecha_fin__gte=hoy)
+    ).order_by('voluntario_id', F('fecha_inicio').desc(nulls_last=True), '-anio'):
+        vigentes.setdefault(cargo.voluntario_id, cargo)
+    return vigentes
+
+
+def _categoria_asistente(voluntario, cargo):
+    """Categoría que se congela en el detalle (igual que el frontend)"""
+    if voluntario.estado_bombero == 'martir':
+        return 'Mártir'
+    grupo = _grupo_cargo(cargo.nombre_cargo) if cargo else None
+    if grupo == 'comandancia':
+        return 'Comandancia'
+    if grupo == 'compania':
+        return 'Oficial Compañía'
+    if grupo == 'confianza':
+        return 'Confianza'
+    return voluntario.get_categoria_display()
+
+
+@transaction.atomic
+def registrar_planilla_asistencia(datos_evento, asistentes, usuario):
+    """
+    Registra un evento con toda su planilla de asistentes en una transacción
+
+    Resuelve voluntarios, cargos vigentes y externos en lote, congela nombre,
+    categoría y cargo de cada asistente, crea los detalles con bulk_create y
+    calcula las estadísticas del evento en el servidor.
+
+    Args:
+        datos_evento: dict con los campos de EventoAsistencia
+        asistentes: list de dict con 'voluntario' (id), 'externo' (id), o bien
+            'nombre_completo' + 'tipo_externo' para externos sin ficha
+
+    Returns:
+        EventoAsistencia
+    """
+    voluntario_ids = []
+    externo_ids = []
+    externos_sin_ficha = []
+    for asistente in asistentes:
+        if asistente.get('voluntario'):
+            if asistente['voluntario'] not in voluntario_ids:
+                voluntario_ids.append(asistente['voluntario'])
+        elif asistente.get('externo'):
+            if asistente['externo'] not in externo_ids:
+                externo_ids.append(asistente['externo'])
+        elif asistente.get('nombre_completo'):
+            externos_sin_ficha.append(asistente)
+        else:
+            raise ValueError('Cada asistente debe indicar voluntario, externo o nombre_completo')
+
+    voluntarios = Voluntario.objects.in_bulk(voluntario_ids)
+    faltantes = [str(v) for v in voluntario_ids if v not in voluntarios]
+    if faltantes:
+        raise ValueError(f"Voluntarios no encontrados: {', '.join(faltantes)}")
+
+    externos = VoluntarioExterno.objects.in_bulk(externo_ids)
+    faltantes = [str(e) for e in externo_ids if e not in externos]
+    if faltantes:
+        raise ValueError(f"Externos no encontrados: {', '.join(faltantes)}")
+
+    cargos = cargos_vigentes(voluntario_ids)
+
+    # Estadísticas
+    estadisticas = {
+        'oficiales_comandancia': 0,
+        'oficiales_compania': 0,
+        'cargos_confianza': 0,
+        'voluntarios': 0,
+        'participantes': 0,
+        'canjes': 0,
+    }
+    campo_por_grupo = {
+        'comandancia': 'oficiales_comandancia',
+        'compania': 'oficiales_compania',
+        'confianza': 'cargos_confianza',
+        None: 'voluntarios',
+    }
+
+    detalles = []
+    for voluntario_id in voluntario_ids:
+        voluntario = voluntarios[voluntario_id]
+        cargo = cargos.get(voluntario_id)
+        estadisticas[campo_por_grupo[_grupo_cargo(cargo.nombre_cargo) if cargo else None]] += 1
+        detalles.append(DetalleAsistencia(
+            voluntario=voluntario,
+            nombre_completo=voluntario.nombre_completo(),
+            clave_bombero=voluntario.clave_bombero,
+            categoria=_categoria_asistente(voluntario, cargo),
+            cargo=cargo.nombre_cargo if cargo else None,
+            anio_cargo=cargo.anio if cargo else None,
+            es_externo=False
+        ))
+
+    for externo_id in externo_ids:
+        externo = externos[externo_id]
+        detalles.append(DetalleAsistencia(
+            externo=externo,
+            nombre_completo=externo.nombre_completo,
+            clave_bombero=externo.codigo,
+            categoria='Canje' if externo.tipo == 'canje' else 'Externo',
+            es_externo=True,
+            tipo_externo=externo.tipo
+        ))
+
+    for asistente in externos_sin_ficha:
+        tipo_externo = asistente.get('tipo_externo') or 'participante'
+        detalles.append(DetalleAsistencia(
+            nombre_completo=asistente['nombre_completo'],
+            categoria='Canje' if tipo_externo == 'canje' else 'Externo',
+            es_externo=True,
+            tipo_externo=tipo_externo
+        ))
+
+    for detalle in detalles:
+        if detalle.es_externo:
+            estadisticas['canjes' if detalle.tipo_externo == 'canje' else 'participantes'] += 1
+
+    total_personas = Voluntario.objects.filter(estado_bombero__in=['activo', 'martir']).count()
+    estadisticas['total_oficiales'] = estadisticas['oficiales_comandancia'] + estadisticas['oficiales_compania']
+    estadisticas['total_asistentes'] = len(detalles)
+    estadisticas['porcentaje_asistencia'] = (
+        round(Decimal(len(voluntario_ids) * 100) / total_personas, 2) if total_personas else Decimal('0')
+    )
+
+    datos_evento = dict(datos_evento)
+    datos_evento.setdefault('id_evento', int(timezone.now().timestamp() * 1000))
+    datos_evento.update(estadisticas)
+
+    evento = EventoAsistencia.objects.create(registrado_por=usuario, **datos_evento)
+
+    for detalle in detalles:
+        detalle.evento = evento
+    DetalleAsistencia.objects.bulk_create(detalles, batch_size=500)
+
+    # bulk_create no dispara señales: sumar al ranking en bloque
+    registrar_asistencia_ranking(evento, [(d.voluntario_id, d.externo_id) for d in detalles])
+
+    return evento
@@ -0,0 +1,225 @@
+"""
+Almacén de archivos direccionado por contenido en MEDIA_ROOT
+Logos, documentos de felicitaciones y certificados de alumno regular se
+guardaban como texto base64 en filas que los listados seleccionan completas.
+Ahora los bytes viven en MEDIA_ROOT/blobs/ab/cd/<sha256> y cada fila guarda
+solo el hash (FK a ArchivoBlob).
+
+- La carga se escribe por trozos a un temporal calculando el SHA-256 al vuelo
+  y se mueve a su ruta final con os.replace (nunca queda un blob a medias).
+- Un archivo repetido no se vuelve a escribir: se reutiliza el blob existente.
+- Los blobs son inmutables: el hash sirve de ETag y la descarga admite Range.
+- El tipo de contenido sale de los primeros bytes, nunca del tipo declarado
+  por el cliente; solo PDF e imágenes se muestran en el navegador.
+- Los blobs sin referencias se purgan con purgar_archivos_huerfanos.
+"""
+import base64
+import hashlib
+import os
+import re
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import ProtectedError
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import ArchivoBlob, EstadoCuotasBombero, Felicitacion, LogoCompania
+
+
+DIRECTORIO_BLOBS = 'blobs'
+
+TAMANO_TROZO = 64 * 1024
+
+# 4 caracteres base64 codifican 3 bytes: trozos alineados a 4 caracteres
+CARACTERES_TROZO_BASE64 = TAMANO_TROZO // 3 * 4
+
+# Un blob sin referencias recién cargado puede estar por asignarse a su fila
+ANTIGUEDAD_PURGA = timedelta(days=1)
+
+# Campos que referencian blobs (para la purga de huérfanos)
+REFERENCIAS_BLOBS = [
+    (LogoCompania, 'imagen'),
+    (Felicitacion, 'documento_felicitacion'),
+    (EstadoCuotasBombero, 'documento_estudiante'),
+]
+
+TIPO_PREDETERMINADO = 'application/octet-stream'
+
+# Tipos que la descarga puede mostrar en el navegador; el resto se descarga como adjunto
+TIPOS_EN_LINEA = {'application/pdf', 'image/png', 'image/jpeg', 'image/gif', 'image/webp'}
+
+_FIRMAS = [
+    (b'%PDF', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF8', 'image/gif'),
+    (b'PK\x03\x04', 'application/zip'),
+]
+
+_PATRON_SHA256 = re.compile(r'^[0-9a-f]{64}$')
+_PATRON_URL_BLOB = re.compile(r'/archivos/([0-9a-f]{64})/(?:\?.*)?$')
+_ESPACIOS = re.compile(r'\s+')
+
+
+def es_sha256(valor):
+    return bool(_PATRON_SHA256.match(valor or ''))
+
+
+def ruta_blob(sha256):
+    """Ruta absoluta del blob (dos niveles de subdirectorios para no llenar uno solo)"""
+    return os.path.join(settings.MEDIA_ROOT, DIRECTORIO_BLOBS, sha256[:2], sha256[2:4], sha256)
+
+
+def url_blob(sha256):
+    """URL de descarga del blob o None"""
+    return reverse('descargar_archivo', args=[sha256]) if sha256 else None
+
+
+def sha256_de_url(texto):
+    """Hash de una URL de descarga del almacén (la que entrega url_blob) o None"""
+    coincidencia = _PATRON_URL_BLOB.search(texto) if len(texto) < 512 else None
+    return coincidencia.group(1) if coincidencia else None
+
+
+def detectar_tipo(cabecera):
+    """Tipo de contenido según los primeros bytes del archivo"""
+    for firma, tipo in _FIRMAS:
+        if cabecera.startswith(firma):
+            return tipo
+    if cabecera[:4] == b'RIFF' and cabecera[8:12] == b'WEBP':
+        return 'image/webp'
+    return TIPO_PREDETERMINADO
+
+
+def separar_data_url(texto):
+    """Separa 'data:<tipo>;base64,<datos>' en (tipo, datos); sin prefijo el tipo es None"""
+    if texto.startswith('data:') and ',' in texto:
+        cabecera, datos = texto.split(',', 1)
+        return cabecera[5:].split(';', 1)[0] or None, datos
+    return None, texto
+
+
+def trozos_base64(datos):
+    """Decodifica base64 por trozos sin armar el archivo completo en memoria"""
+    if _ESPACIOS.search(datos):
+        datos = _ESPACIOS.sub('', datos)
+    for inicio in range(0, len(datos), CARACTERES_TROZO_BASE64):
+        trozo = datos[inicio:inicio + CARACTERES_TROZO_BASE64]
+        # Algunos clientes omiten el relleno final
+        yield base64.b64decode(trozo + '=' * (-len(trozo) % 4), validate=True)
+
+
+def escribir_blob(trozos):
+    """
+    Escribe los trozos al almacén calculando el SHA-256 al vuelo
+    Retorna (sha256, tamano, cabecera). No toca la base de datos (la migración
+    0023 tiene su propia copia).
+    """
+    directorio = os.path.join(settings.MEDIA_ROOT, DIRECTORIO_BLOBS)
+    os.makedirs(directorio, exist_ok=True)
+    resumen = hashlib.sha256()
+    tamano = 0
+    cabecera = b''
+
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, prefix='.carga-')
+    try:
+        with os.fdopen(descriptor, 'wb') as destino:
+            for trozo in trozos:
+                if len(cabecera) < 16:
+                    cabecera += trozo[:16 - len(cabecera)]
+                resumen.update(trozo)
+                destino.write(trozo)
+                tamano += len(trozo)
+
+        sha256 = resumen.hexdigest()
+        ruta = ruta_blob(sha256)
+        if os.path.exists(ruta) and os.path.getsize(ruta) == tamano:
+            os.remove(temporal)
+        else:
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            os.chmod(temporal, 0o644)
+            os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    return sha256, tamano, cabecera
+
+
+def guardar_blob(trozos):
+    """
+    Guarda un archivo (iterable de bytes) y retorna su ArchivoBlob, nuevo o reutilizado
+    El tipo se detecta por el contenido: el que declara el cliente (data URL o
+    multipart) no se usa, para no servir HTML subido como documento.
+    """
+    sha256, tamano, cabecera = escribir_blob(trozos)
+    tipo_contenido = detectar_tipo(cabecera)
+    blob, creado = ArchivoBlob.objects.get_or_create(
+        sha256=sha256, defaults={'tamano': tamano, 'tipo_contenido': tipo_contenido[:100]}
+    )
+    if not creado:
+        ArchivoBlob.objects.filter(sha256=sha256).update(fecha_ultimo_uso=timezone.now())
+    return blob
+
+
+def guardar_blob_base64(texto):
+    """
+    Guarda un archivo recibido en base64 (con o sin prefijo data:)
+    Retorna None si viene vacío; ValueError si el base64 no es válido.
+    """
+    if not texto:
+        return None
+    _, datos = separar_data_url(texto)
+    try:
+        return guardar_blob(trozos_base64(datos))
+    except ValueError:
+        # binascii.Error es subclase de ValueError
+        raise ValueError('El archivo no es base64 válido')
+
+
+def guardar_blob_subido(archivo):
+    """Guarda un archivo multipart (UploadedFile) leyéndolo por trozos"""
+    return guardar_blob(archivo.chunks(TAMANO_TROZO))
+
+
+def leer_blob(sha256):
+    with open(ruta_blob(sha256), 'rb') as origen:
+        return origen.read()
+
+
+def data_url_blob(blob):
+    """Contenido del blob como data URL (para los clientes que dibujan el logo en jsPDF)"""
+    contenido = base64.b64encode(leer_blob(blob.sha256)).decode()
+    return f'data:{blob.tipo_contenido};base64,{contenido}'
+
+
+def purgar_archivos_huerfanos(antiguedad=ANTIGUEDAD_PURGA, solo_verificar=False):
+    """
+    Elimina los blobs que ninguna fila referencia y no se usan hace `antiguedad`
+    Retorna la lista de hashes huérfanos (eliminados salvo con solo_verificar).
+    """
+    huerfanos = ArchivoBlob.objects.filter(fecha_ultimo_uso__lt=timezone.now() - antiguedad)
+    for modelo, campo in REFERENCIAS_BLOBS:
+        # NOT IN con un NULL en la subconsulta no excluiría nada
+        huerfanos = huerfanos.exclude(sha256__in=modelo.objects.filter(
+            **{f'{campo}__isnull': False}
+        ).values(campo))
+    hashes = list(huerfanos.values_list('sha256', flat=True))
+    if solo_verificar:
+        return hashes
+
+    eliminados = []
+    for sha256 in hashes:
+        try:
+            ArchivoBlob.objects.filter(sha256=sha256).delete()
+        except ProtectedError:
+            # Una fila lo tomó mientras tanto (PROTECT impide borrarlo)
+            continue
+        try:
+            os.remove(ruta_blob(sha256))
+        except FileNotFoundError:
+            pass
+        eliminados.append(sha256)
+    return eliminados
@@ -0,0 +1,204 @@
+"""
+Caché en disco de PDFs renderizados (comprobantes de uniformes y estados de cuotas)
+El comprobante de entrega, el de devolución y el estado de cuotas se volvían a
+dibujar en cada vista aunque Uniforme, PiezaUniforme y PagoCuota casi no cambian.
+
+Cada PDF se identifica por una versión de sus datos: un hash de lo poco que
+cambia cuando cambia el documento (largo de historial_cambios de cada pieza,
+último pago del año, versión del logo, ...). Calcular la versión cuesta una o
+dos consultas pequeñas; renderizar, decenas de milisegundos.
+
+- La versión es el ETag: If-None-Match responde 304 sin leer ni renderizar.
+- El PDF se guarda en MEDIA_ROOT/cache_pdf/ab/<version>.pdf y se reutiliza
+  mientras los datos no cambien; un cambio produce otra versión y el archivo
+  viejo queda para el desalojo.
+- El desalojo mantiene el directorio bajo TAMANO_MAXIMO_CACHE_PDF borrando los
+  PDF usados hace más tiempo (la fecha de modificación marca el último uso).
+
+Los PDF muestran la fecha en que se dibujaron: una copia del caché conserva la
+de su primer render. Al cambiar el diseño de un PDF, subir VERSION_PLANTILLAS.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.utils.http import parse_etags
+
+from .models import PagoCuota
+from .utils_configuracion import CLAVE_LOGO_PDF, obtener_singleton
+from .utils_tesoreria import obtener_estado_cuenta
+
+
+DIRECTORIO_CACHE_PDF = 'cache_pdf'
+
+# Tamaño total retenido en disco
+TAMANO_MAXIMO_CACHE_PDF = 200 * 1024 * 1024
+
+# Cambia todas las versiones cuando cambia el dibujo de los PDF
+VERSION_PLANTILLAS = 1
+
+# El navegador guarda el PDF pero lo revalida siempre (304 si no cambió)
+CACHE_CONTROL_PDF = 'private, no-cache'
+
+_candado_desalojo = threading.Lock()
+
+
+# ==================== VERSIONES DE LOS DATOS ====================
+
+def version_logo():
+    """Hash del contenido del logo activo para PDFs ('' si no hay logo)"""
+    activo = obtener_singleton(CLAVE_LOGO_PDF)
+    return activo.get('imagen_id') or '' if activo else ''
+
+
+def _version(tipo, *partes):
+    datos = repr((VERSION_PLANTILLAS, tipo, version_logo()) + partes)
+    return hashlib.sha256(datos.encode('utf-8')).hexdigest()
+
+
+# Campos de la pieza que dibujan los comprobantes (pdf_uniformes)
+CAMPOS_PDF_PIEZA = (
+    'id', 'componente', 'nombre_personalizado', 'marca', 'serie', 'talla', 'unidad',
+    'condicion', 'estado_fisico', 'fecha_entrega', 'estado_pieza', 'fecha_devolucion',
+    'devuelto_por', 'estado_devolucion', 'condicion_devolucion', 'observaciones_devolucion',
+)
+
+
+def _version_pieza(pieza):
+    return tuple(getattr(pieza, campo) for campo in CAMPOS_PDF_PIEZA)
+
+
+def version_pdf_uniforme(uniforme):
+    """Versión del comprobante de entrega (usa las piezas precargadas si las hay)"""
+    piezas = sorted(uniforme.piezas.all(), key=lambda pieza: pieza.id)
+    return _version(
+        'uniforme', uniforme.id, uniforme.tipo_uniforme, uniforme.estado, uniforme.observaciones,
+        uniforme.bombero.updated_at, [_version_pieza(pieza) for pieza in piezas]
+    )
+
+
+def version_pdf_devolucion(uniforme, pieza):
+    """Versión del comprobante de devolución de una pieza"""
+    return _version(
+        'devolucion', uniforme.id, uniforme.tipo_uniforme, uniforme.observaciones,
+        uniforme.bombero.updated_at, _version_pieza(pieza)
+    )
+
+
+def version_pdf_cuotas(voluntario, anio):
+    """
+    Versión del estado de cuotas de un voluntario en un año
+    El último pago (id y cantidad, por si se anula uno) y el precio aplicado
+    del estado de cuenta; en el año en curso, también el mes (la deuda crece).
+    """
+    pagos = PagoCuota.objects.filter(voluntario=voluntario, anio=anio).aggregate(
+        ultimo=Max('id'), cantidad=Count('id')
+    )
+    # Se crea aquí si falta, para que el primer render no cambie la versión
+    estado_cuenta = obtener_estado_cuenta(voluntario, anio)
+    hoy = timezone.localdate()
+    mes = hoy.month if anio == hoy.year else None
+    return _version(
+        'cuotas', voluntario.id, voluntario.updated_at, anio,
+        pagos['ultimo'], pagos['cantidad'], estado_cuenta.precio_cuota, estado_cuenta.exento, mes
+    )
+
+
+# ==================== ALMACENAMIENTO EN DISCO ====================
+
+def _directorio():
+    return os.path.join(settings.MEDIA_ROOT, DIRECTORIO_CACHE_PDF)
+
+
+def ruta_pdf_cache(version):
+    return os.path.join(_directorio(), version[:2], f'{version}.pdf')
+
+
+def leer_pdf_cache(version):
+    """Bytes del PDF guardado o None; marca el archivo como recién usado"""
+    ruta = ruta_pdf_cache(version)
+    try:
+        with open(ruta, 'rb') as archivo:
+            contenido = archivo.read()
+        os.utime(ruta)
+    except OSError:
+        return None
+    return contenido
+
+
+def guardar_pdf_cache(version, contenido):
+    """Escribe el PDF (temporal + os.replace: nunca queda a medias) y desaloja si hace falta"""
+    ruta = ruta_pdf_cache(version)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as archivo:
+            archivo.write(contenido)
+        os.replace(temporal, ruta)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+    desalojar_pdf_cache()
+
+
+def desalojar_pdf_cache(tamano_maximo=None):
+    """
+    Borra los PDF usados hace más tiempo hasta quedar bajo el tamaño máximo
+    Retorna la cantidad de archivos borrados.
+    """
+    if tamano_maximo is None:
+        tamano_maximo = TAMANO_MAXIMO_CACHE_PDF
+
+    with _candado_desalojo:
+        archivos = []
+        total = 0
+        for raiz, _, nombres in os.walk(_directorio()):
+            for nombre in nombres:
+                if not nombre.endswith('.pdf'):
+                    continue
+                ruta = os.path.join(raiz, nombre)
+                try:
+                    estado = os.stat(ruta)
+                except OSError:
+                    continue
+                archivos.append((estado.st_mtime, estado.st_size, ruta))
+                total += estado.st_size
+
+        borrados = 0
+        for _, tamano, ruta in sorted(archivos):
+            if total <= tamano_maximo:
+                break
+            try:
+                os.unlink(ruta)
+            except OSError:
+                continue
+            total -= tamano
+            borrados += 1
+    return borrados
+
+
+# ==================== RESPUESTA HTTP ====================
+
+def respuesta_pdf_cacheada(request, version, generar):
+    """
+    Respuesta con el PDF de esa versión de los datos
+    304 si el cliente ya la tiene; si no, el PDF del disco o generar()
+    (función que retorna el buffer del PDF), que queda guardado.
+    """
+    etag = f'"{version}"'
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        respuesta = HttpResponseNotModified()
+    else:
+        contenido = leer_pdf_cache(version)
+        if contenido is None:
+            contenido = generar().getvalue()
+            guardar_pdf_cache(version, contenido)
+        respuesta = HttpResponse(contenido, content_type='application/pdf')
+    respuesta['ETag'] = etag
+    respuesta['Cache-Control'] = CACHE_CONTROL_PDF
+    return respuesta
@@ -0,0 +1,353 @@
+"""
+Generador de datos sintéticos para pruebas de carga
+Crea poblaciones reproducibles (con semilla) de voluntarios y todo lo que cuelga
+de ellos, insertando con bulk_create en lotes para escalar a decenas de miles.
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.db import transaction
+
+from .models import (
+    Voluntario, Cargo, Sancion, Uniforme, PiezaUniforme, ContadorUniformes,
+    ConfiguracionCuotas, CicloCuotas, CicloAsistencia, PagoCuota,
+    Beneficio, AsignacionBeneficio, PagoBeneficio, MovimientoFinanciero,
+    EventoAsistencia, DetalleAsistencia
+)
+from .utils_asistencias import (
+    CARGOS_COMANDANCIA, CARGOS_OFICIALES_COMPANIA, CARGOS_CONFIANZA,
+    recalcular_ranking_anio
+)
+from .utils_tesoreria import (
+    CAMPO_TARJETAS_POR_CATEGORIA, reconstruir_estado_cuenta, invalidar_cierres_financieros,
+    marcar_meses_resumen
+)
+
+
+# Distribución de estados (peso relativo)
+PESOS_ESTADOS = {
+    'activo': 70, 'inactivo': 8, 'renunciado': 8, 'separado': 5,
+    'expulsado': 3, 'martir': 1, 'fallecido': 5,
+}
+
+NOMBRES = ['Juan', 'Pedro', 'Luis', 'Carlos', 'Jorge', 'Andrés', 'Felipe', 'Cristián',
+           'María', 'Camila', 'Francisca', 'Valentina', 'Roberto', 'Manuel', 'José', 'Diego']
+APELLIDOS = ['González', 'Muñoz', 'Rojas', 'Díaz', 'Pérez', 'Soto', 'Contreras', 'Silva',
+             'Martínez', 'Sepúlveda', 'Morales', 'Rodríguez', 'López', 'Fuentes', 'Torres', 'Araya']
+
+# Prefijos de generar_id_uniforme para los tipos con contador propio
+PREFIJOS_UNIFORME = {
+    'estructural': 'ESTR', 'forestal': 'FOR', 'rescate': 'RESC', 'hazmat': 'HAZ',
+    'parada': 'PAR', 'usar': 'USAR', 'agreste': 'AGR', 'um6': 'UM6', 'gersa': 'GERSA',
+}
+COMPONENTES_UNIFORME = ['casco', 'chaqueta', 'pantalon', 'botas', 'guantes', 'esclavina']
+
+SANCION_POR_ESTADO = {'renunciado': 'renuncia', 'separado': 'separacion', 'expulsado': 'expulsion'}
+
+MESES = ['', 'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
+         'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
+
+
+def digito_verificador_rut(numero):
+    """Calcula el dígito verificador (módulo 11) de un RUT"""
+    suma, factor = 0, 2
+    for digito in reversed(str(numero)):
+        suma += int(digito) * factor
+        factor = 2 if factor == 7 else factor + 1
+    resto = 11 - suma % 11
+    return {11: '0', 10: 'K'}.get(resto, str(resto))
+
+
+def formatear_rut(numero):
+    return f"{numero:,}".replace(',', '.') + f"-{digito_verificador_rut(numero)}"
+
+
+def _bloques(iterable, tamano):
+    iterador = iter(iterable)
+    while True:
+        bloque = list(islice(iterador, tamano))
+        if not bloque:
+            return
+        yield bloque
+
+
+def _insertar(modelo, objetos, lote):
+    """Inserta un iterable de objetos en lotes sin materializarlo completo"""
+    total = 0
+    for bloque in _bloques(objetos, lote):
+        modelo.objects.bulk_create(bloque, batch_size=lote)
+        total += len(bloque)
+    return total
+
+
+@transaction.atomic
+def generar_datos_carga(voluntarios=1000, anios=3, beneficios_por_anio=2, eventos_por_anio=None,
+                        asistentes_por_evento=20, semilla=42, lote=2000, desplazamiento=0,
+                        progreso=None):
+    """
+    Genera una población sintética completa y reproducible
+
+    Args:
+        voluntarios: cantidad de voluntarios a crear
+        anios: años hacia atrás (incluyendo el actual) con cuotas, beneficios y asistencias
+        beneficios_por_anio: beneficios por año, asignados a todos los activos/inactivos
+        eventos_por_anio: eventos de asistencia por año (default: voluntarios // 20, mínimo 10)
+        asistentes_por_evento: asistentes por evento
+        semilla: semilla del generador aleatorio; misma semilla produce los mismos datos
+        lote: tamaño de lote para bulk_create
+        desplazamiento: desplaza RUT, claves e identificadores para generar sobre datos existentes
+        progreso: función opcional que recibe mensajes de avance
+
+    Returns:
+        dict: cantidad de registros creados por entidad
+    """
+    rng = random.Random(semilla)
+    avisar = progreso or (lambda mensaje: None)
+    hoy = date.today()
+    anio_actual = hoy.year
+    anios_carga = list(range(anio_actual - anios + 1, anio_actual + 1))
+    if eventos_por_anio is None:
+        eventos_por_anio = max(10, voluntarios // 20)
+    resumen = {}
+
+    # ==================== VOLUNTARIOS ====================
+    estados = list(PESOS_ESTADOS)
+    pesos = list(PESOS_ESTADOS.values())
+
+    def nuevo_voluntario(i):
+        n = desplazamiento + i
+        estado = rng.choices(estados, pesos)[0]
+        ingreso = hoy - timedelta(days=rng.randint(30, 55 * 365))
+        nacimiento = ingreso - timedelta(days=rng.randint(18 * 365, 30 * 365))
+        evento_estado = ingreso + timedelta(days=rng.randint(0, max((hoy - ingreso).days, 0)))
+        datos = dict(
+            nombre=rng.choice(NOMBRES),
+            apellido_paterno=rng.choice(APELLIDOS),
+            apellido_materno=rng.choice(APELLIDOS),
+            rut=formatear_rut(30_000_000 + n),
+            clave_bombero=str(10_000 + n),
+            fecha_nacimiento=nacimiento,
+            fecha_ingreso=ingreso,
+            telefono=f'+569{rng.randint(10_000_000, 99_999_999)}',
+            email=f'carga{n}@example.com',
+            compania='Sexta Compañía',
+            estado_bombero=estado,
+            es_estudiante=estado == 'activo' and rng.random() < 0.05,
+        )
+        if estado == 'renunciado':
+            datos.update(fecha_renuncia=evento_estado, motivo_renuncia='Motivos personales')
+        elif estado == 'separado':
+            datos.update(fecha_separacion=evento_estado, anios_separacion=1,
+                         fecha_fin_separacion=evento_estado + timedelta(days=365))
+        elif estado == 'expulsado':
+            datos.update(fecha_expulsion=evento_estado, motivo_expulsion='Falta grave')
+        elif estado == 'martir':
+            datos.update(fecha_martir=evento_estado, causa_martir='Acto de servicio')
+        elif estado == 'fallecido':
+            datos.update(fecha_fallecimiento=evento_estado, causa_fallecimiento='Causas naturales')
+        elif rng.random() < 0.02:
+            datos.update(antiguedad_congelada=True, fecha_congelamiento=evento_estado)
+        voluntario = Voluntario(**datos)
+        # bulk_create no pasa por save(): calcular la categoría aquí
+        voluntario.refrescar_categoria(hoy)
+        return voluntario
+
+    poblacion = []
+    for bloque in _bloques((nuevo_voluntario(i) for i in range(voluntarios)), lote):
+        poblacion.extend(Voluntario.objects.bulk_create(bloque, batch_size=lote))
+    resumen['voluntarios'] = len(poblacion)
+    vigentes = [v for v in poblacion if v.estado_bombero in ('activo', 'inactivo')]
+    activos = [v for v in vigentes if v.estado_bombero == 'activo']
+    avisar(f'{len(poblacion)} voluntarios')
+
+    # ==================== CICLOS Y CONFIGURACIÓN ====================
+    if not ConfiguracionCuotas.objects.exists():
+        ConfiguracionCuotas.objects.create(precio_regular=Decimal('5000'), precio_estudiante=Decimal('3000'))
+    config = ConfiguracionCuotas.objects.first()
+    for anio in anios_carga:
+        limites = {'fecha_inicio': date(anio, 1, 1), 'fecha_fin': date(anio, 12, 31)}
+        CicloCuotas.objects.get_or_create(anio=anio, defaults=dict(limites, activo=anio == anio_actual))
+        CicloAsistencia.objects.get_or_create(anio=anio, defaults=dict(limites, activo=anio == anio_actual))
+
+    # ==================== CARGOS Y SANCIONES ====================
+    grupos_cargo = [
+        ('comandancia', CARGOS_COMANDANCIA), ('compania', CARGOS_OFICIALES_COMPANIA),
+        ('tecnico', CARGOS_CONFIANZA),
+    ]
+    resumen['cargos'] = _insertar(Cargo, (
+        Cargo(voluntario=v, tipo_cargo=tipo, nombre_cargo=rng.choice(nombres), anio=anio,
+              fecha_inicio=date(anio, 1, 1))
+        for anio in anios_carga
+        for v in activos if rng.random() < 0.08
+        for tipo, nombres in [rng.choice(grupos_cargo)]
+    ), lote)
+
+    def sanciones():
+        for v in poblacion:
+            tipo = SANCION_POR_ESTADO.get(v.estado_bombero)
+            if not tipo and rng.random() < 0.03:
+                tipo = 'suspension'
+            if not tipo:
+                continue
+            fecha = v.fecha_renuncia or v.fecha_separacion or v.fecha_expulsion or (
+                hoy - timedelta(days=rng.randint(1, 3 * 365))
+            )
+            yield Sancion(
+                voluntario=v, tipo_sancion=tipo, fecha_desde=fecha, fecha_oficio=fecha,
+                dias_sancion=30 if tipo == 'suspension' else None,
+                oficio_numero=f'OF-{rng.randint(1, 9999)}', motivo='Generado para pruebas de carga'
+            )
+    resumen['sanciones'] = _insertar(Sancion, sanciones(), lote)
+    avisar(f"{resumen['cargos']} cargos, {resumen['sanciones']} sanciones")
+
+    # ==================== UNIFORMES ====================
+    contador, _ = ContadorUniformes.objects.get_or_create(pk=1)
+    uniformes, piezas = [], []
+    for v in activos:
+        for _ in range(rng.randint(0, 2)):
+            tipo = rng.choice(list(PREFIJOS_UNIFORME))
+            campo = f'id_{tipo}'
+            numero = getattr(contador, campo)
+            setattr(contador, campo, numero + 1)
+            uniforme = Uniforme(
+                id=f'{PREFIJOS_UNIFORME[tipo]}-{str(numero).zfill(3)}', bombero=v,
+                tipo_uniforme=tipo, registrado_por='generar_datos_carga'
+            )
+            uniformes.append(uniforme)
+            for componente in rng.sample(COMPONENTES_UNIFORME, rng.randint(2, 4)):
+                par = componente in ('botas', 'guantes')
+                piezas.append(PiezaUniforme(
+                    uniforme=uniforme, componente=componente, talla=rng.choice(['S', 'M', 'L', 'XL']),
+                    condicion=rng.choice(['nuevo', 'semi-nuevo', 'usado']),
+                    estado_fisico=rng.choice(['bueno', 'regular', 'malo']),
+                    fecha_entrega=hoy - timedelta(days=rng.randint(0, 5 * 365)),
+                    unidad=2 if par else 1, par_simple='Par' if par else 'Simple'
+                ))
+    contador.save()  # Reserva los IDs usados para que generar_id_uniforme no choque
+    resumen['uniformes'] = _insertar(Uniforme, uniformes, lote)
+    resumen['piezas_uniforme'] = _insertar(PiezaUniforme, piezas, lote)
+    del uniformes, piezas
+    avisar(f"{resumen['uniformes']} uniformes con {resumen['piezas_uniforme']} piezas")
+
+    # ==================== CUOTAS ====================
+    def pagos_cuotas():
+        for v in vigentes:
+            precio = config.precio_estudiante if v.es_estudiante else config.precio_regular
+            for anio in anios_carga:
+                ultimo_mes = hoy.month if anio == anio_actual else 12
+                for mes in range(1, rng.randint(0, ultimo_mes) + 1):
+                    yield PagoCuota(
+                        voluntario=v, mes=mes, anio=anio, monto_pagado=precio,
+                        fecha_pago=min(date(anio, mes, rng.randint(1, 28)), hoy),
+                        metodo_pago=rng.choice(['Efectivo', 'Transferencia'])
+                    )
+
+    resumen['pagos_cuotas'] = 0
+    resumen['movimientos'] = 0
+    for bloque in _bloques(pagos_cuotas(), lote):
+        PagoCuota.objects.bulk_create(bloque, batch_size=lote)
+        MovimientoFinanciero.objects.bulk_create([
+            MovimientoFinanciero(
+                tipo='ingreso', categoria='cuota', monto=pago.monto_pagado, fecha=pago.fecha_pago,
+                descripcion=f'Cuota {MESES[pago.mes]} {pago.anio} - {pago.voluntario.nombre_completo()}',
+                pago_cuota=pago
+            )
+            for pago in bloque
+        ], batch_size=lote)
+        resumen['pagos_cuotas'] += len(bloque)
+        resumen['movimientos'] += len(bloque)
+    # bulk_create no pasa por registrar_pago_cuota: poblar el estado de cuenta
+    reconstruir_estado_cuenta(anios_carga)
+    avisar(f"{resumen['pagos_cuotas']} pagos de cuotas")
+
+    # ==================== BENEFICIOS ====================
+    beneficios = Beneficio.objects.bulk_create([
+        Beneficio(
+            nombre=f'Beneficio {anio}-{n + 1}', descripcion='Generado para pruebas de carga',
+            fecha_evento=min(date(anio, rng.randint(1, 12), rng.randint(1, 28)), hoy),
+            precio_por_tarjeta=Decimal('5000'), precio_tarjeta_extra=Decimal('6000'),
+            estado='activo' if anio == anio_actual else 'cerrado'
+        )
+        for anio in anios_carga
+        for n in range(beneficios_por_anio)
+    ])
+    def asignaciones():
+        for beneficio in beneficios:
+            for v in vigentes:
+                asignadas = getattr(beneficio, CAMPO_TARJETAS_POR_CATEGORIA[v.categoria])
+                vendidas = rng.randint(0, asignadas)
+                monto_total = beneficio.precio_por_tarjeta * asignadas
+                monto_pagado = beneficio.precio_por_tarjeta * vendidas
+                yield AsignacionBeneficio(
+                    beneficio=beneficio, voluntario=v, tarjetas_asignadas=asignadas,
+                    tarjetas_vendidas=vendidas, monto_total=monto_total, monto_pagado=monto_pagado,
+                    monto_pendiente=monto_total - monto_pagado,
+                    estado_pago='completo' if vendidas == asignadas else ('parcial' if vendidas else 'pendiente')
+                )
+
+    resumen['beneficios'] = len(beneficios)
+    resumen['asignaciones'] = 0
+    resumen['pagos_beneficios'] = 0
+    for bloque in _bloques(asignaciones(), lote):
+        AsignacionBeneficio.objects.bulk_create(bloque, batch_size=lote)
+        pagos = PagoBeneficio.objects.bulk_create([
+            PagoBeneficio(
+                asignacion=a, tipo_pago='normal', cantidad_tarjetas=a.tarjetas_vendidas,
+                monto=a.monto_pagado, fecha_pago=a.beneficio.fecha_evento,
+                metodo_pago=rng.choice(['Efectivo', 'Transferencia'])
+            )
+            for a in bloque if a.tarjetas_vendidas
+        ], batch_size=lote)
+        MovimientoFinanciero.objects.bulk_create([
+            MovimientoFinanciero(
+                tipo='ingreso', categoria='beneficio', monto=pago.monto, fecha=pago.fecha_pago,
+                descripcion=(
+                    f'Beneficio {pago.asignacion.beneficio.nombre} - '
+                    f'{pago.asignacion.voluntario.nombre_completo()} (Normal, {pago.cantidad_tarjetas} tarjetas)'
+                ),
+                pago_beneficio=pago
+            )
+            for pago in pagos
+        ], batch_size=lote)
+        resumen['asignaciones'] += len(bloque)
+        resumen['pagos_beneficios'] += len(pagos)
+        resumen['movimientos'] += len(pagos)
+    # bulk_create no dispara las señales de movimientos: los cierres de esos meses
+    # quedan obsoletos y el cubo de reportes debe recalcularlos
+    invalidar_cierres_financieros(date(anios_carga[0], 1, 1))
+    marcar_meses_resumen(*[date(a, m, 1) for a in anios_carga for m in range(1, 13) if date(a, m, 1) <= hoy])
+    avisar(f"{resumen['beneficios']} beneficios, {resumen['asignaciones']} asignaciones")
+
+    # ==================== ASISTENCIAS ====================
+    tipos = [codigo for codigo, _ in EventoAsistencia.TIPO_CHOICES]
+    id_base = 8_000_000_000_000 + desplazamiento * 1_000
+    cantidad = min(asistentes_por_evento, len(activos))
+    eventos = []
+    for bloque in _bloques((
+        EventoAsistencia(
+            id_evento=id_base + n, tipo=rng.choice(tipos),
+            fecha=min(date(anio, rng.randint(1, 12), rng.randint(1, 28)), hoy),
+            descripcion='Generado para pruebas de carga', total_asistentes=cantidad, voluntarios=cantidad
+        )
+        for n, anio in enumerate(a for a in anios_carga for _ in range(eventos_por_anio))
+    ), lote):
+        eventos.extend(EventoAsistencia.objects.bulk_create(bloque, batch_size=lote))
+
+    def detalles():
+        for evento in eventos:
+            for v in rng.sample(activos, cantidad):
+                yield DetalleAsistencia(
+                    evento=evento, voluntario=v, nombre_completo=v.nombre_completo(),
+                    clave_bombero=v.clave_bombero, categoria=v.get_categoria_display()
+                )
+
+    resumen['eventos'] = len(eventos)
+    resumen['detalles_asistencia'] = _insertar(DetalleAsistencia, detalles(), lote)
+    # bulk_create no dispara las señales del ranking: recalcular cada año
+    for anio in anios_carga:
+        recalcular_ranking_anio(anio)
+    avisar(f"{resumen['eventos']} eventos, {resumen['detalles_asistencia']} asistencias")
+
+    return resumen
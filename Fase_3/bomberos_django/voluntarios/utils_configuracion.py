@@ -0,0 +1,142 @@
+"""
+Caché de registros únicos de configuración
+ConfiguracionCuotas (singleton), los ciclos activos de cuotas y asistencia y el
+logo activo para PDFs se leen en casi todas las rutas de tesorería, asistencias
+y reportes. Se guardan en dos niveles: una copia local del proceso y el caché
+compartido de Django.
+
+Cada clave tiene una versión en el caché compartido; la copia local solo se usa
+si su versión coincide, por lo que una lectura en caliente no consulta la base
+de datos y un save() en cualquier proceso (señales en signals.py) invalida a
+todos los demás.
+"""
+import copy
+import threading
+import uuid
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import ConfiguracionCuotas, CicloCuotas, CicloAsistencia, LogoCompania
+
+
+CLAVE_CONFIGURACION_CUOTAS = 'configuracion_cuotas'
+CLAVE_CICLO_CUOTAS_ACTIVO = 'ciclo_cuotas_activo'
+CLAVE_CICLO_ASISTENCIA_ACTIVO = 'ciclo_asistencia_activo'
+CLAVE_LOGO_PDF = 'logo_pdf'
+
+_PREFIJO = 'voluntarios:singleton'
+
+# Un día; la versión se renueva en cada invalidación
+_DURACION = 60 * 60 * 24
+
+# Marca para guardar "no existe" en el caché compartido
+_NINGUNO = '__ninguno__'
+
+_local = {}
+_candado = threading.Lock()
+
+
+def _cargar_configuracion_cuotas():
+    config = ConfiguracionCuotas.objects.first()
+    if not config:
+        # Valores por defecto
+        config = ConfiguracionCuotas.objects.create(
+            precio_regular=Decimal('5000'),
+            precio_estudiante=Decimal('3000')
+        )
+    return config
+
+
+def _cargar_logo_pdf():
+    # Solo la identidad del logo; la imagen decodificada vive en utils_logos.
+    # La revisión cambia en cada invalidación, aunque se edite el mismo logo;
+    # imagen_id (hash del contenido) es la versión estable entre procesos.
+    logo = LogoCompania.objects.filter(usar_en_pdfs=True).values('id', 'fecha_carga', 'imagen_id').first()
+    if logo:
+        logo['revision'] = uuid.uuid4().hex
+    return logo
+
+
+_CARGADORES = {
+    CLAVE_CONFIGURACION_CUOTAS: _cargar_configuracion_cuotas,
+    CLAVE_CICLO_CUOTAS_ACTIVO: lambda: CicloCuotas.objects.filter(activo=True).order_by('-anio').first(),
+    CLAVE_CICLO_ASISTENCIA_ACTIVO: lambda: CicloAsistencia.objects.filter(activo=True).order_by('-anio').first(),
+    CLAVE_LOGO_PDF: _cargar_logo_pdf,
+}
+
+_CLAVES_POR_MODELO = {
+    ConfiguracionCuotas: [CLAVE_CONFIGURACION_CUOTAS],
+    CicloCuotas: [CLAVE_CICLO_CUOTAS_ACTIVO],
+    CicloAsistencia: [CLAVE_CICLO_ASISTENCIA_ACTIVO],
+    LogoCompania: [CLAVE_LOGO_PDF],
+}
+
+
+def _version(clave):
+    """Versión vigente de la clave en el caché compartido (la crea si falta)"""
+    llave = f'{_PREFIJO}:{clave}:version'
+    version = cache.get(llave)
+    if version is None:
+        cache.add(llave, uuid.uuid4().hex, _DURACION)
+        version = cache.get(llave)
+    return version
+
+
+def obtener_singleton(clave):
+    """
+    Retorna una copia del registro cacheado (o None si no existe)
+    Las copias pueden modificarse sin afectar al caché.
+    """
+    version = _version(clave)
+    guardado = _local.get(clave)
+    if guardado is None or guardado[0] != version:
+        llave = f'{_PREFIJO}:{clave}:{version}'
+        valor = cache.get(llave)
+        if valor is None:
+            valor = _CARGADORES[clave]()
+            cache.set(llave, _NINGUNO if valor is None else valor, _DURACION)
+        elif isinstance(valor, str) and valor == _NINGUNO:
+            valor = None
+        with _candado:
+            _local[clave] = guardado = (version, valor)
+    return copy.copy(guardado[1])
+
+
+def invalidar_singletons(*claves):
+    """
+    Renueva la versión de las claves: todos los procesos recargan en la próxima lectura
+    Se repite al confirmar la transacción para que ningún proceso quede con un
+    valor leído antes del commit.
+    """
+    def renovar():
+        for clave in claves:
+            cache.set(f'{_PREFIJO}:{clave}:version', uuid.uuid4().hex, _DURACION)
+            with _candado:
+                _local.pop(clave, None)
+
+    renovar()
+    transaction.on_commit(renovar)
+
+
+def invalidar_singletons_modelo(modelo):
+    """Invalida las claves que dependen de un modelo (para las señales)"""
+    claves = _CLAVES_POR_MODELO.get(modelo)
+    if claves:
+        invalidar_singletons(*claves)
+
+
+def obtener_configuracion_cuotas_cache():
+    """ConfiguracionCuotas vigente, creándola con valores por defecto si no existe"""
+    return obtener_singleton(CLAVE_CONFIGURACION_CUOTAS)
+
+
+def obtener_ciclo_cuotas_activo():
+    """CicloCuotas activo o None"""
+    return obtener_singleton(CLAVE_CICLO_CUOTAS_ACTIVO)
+
+
+def obtener_ciclo_asistencia_activo():
+    """CicloAsistencia activo o None"""
+    return obtener_singleton(CLAVE_CICLO_ASISTENCIA_ACTIVO)
@@ -0,0 +1,236 @@
+"""
+Exportación por lote de estados de cuotas y tablas de uniformes
+Antes se pedía un PDF por voluntario y cada solicitud volvía a consultar logo,
+pagos y deuda. Aquí un lote completo se prepara con unas pocas consultas por
+conjunto, se renderiza en un pool de procesos (pdf_lote.py) y se escribe como:
+
+- 'zip': un PDF por voluntario dentro de un ZIP (renderizado en paralelo).
+- 'pdf': un solo PDF con un marcador por voluntario (un canvas en este
+  proceso: unir PDF ya renderizados requeriría otra dependencia).
+
+El avance se informa con progreso(hechos, total) a medida que se escribe.
+"""
+import os
+import re
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+import zipfile
+
+from .models import Voluntario, PagoCuota, EstadoCuentaCuotas, Uniforme, PiezaUniforme
+from .pdf_lote import dibujar_tarea, iniciar_proceso, renderizar, renderizar_tarea, tamano_pagina
+from .utils_logos import obtener_logo_pdf
+from .utils_tesoreria import calcular_deuda_cuotas, obtener_precio_cuota
+
+
+TIPOS_EXPORTACION = ('cuotas', 'uniformes')
+FORMATOS_EXPORTACION = ('zip', 'pdf')
+
+PROCESOS_EXPORTACION = max(1, min(4, os.cpu_count() or 1))
+
+# Lotes chicos se renderizan en este proceso: levantar el pool cuesta más
+MINIMO_PARA_PROCESOS = 20
+
+# Tareas enviadas juntas a cada proceso (menos viajes entre procesos)
+TAREAS_POR_ENVIO = 8
+
+CAMPOS_VOLUNTARIO = ['id', 'nombre', 'apellido_paterno', 'apellido_materno', 'rut', 'clave_bombero', 'compania']
+CAMPOS_PIEZA = [
+    'uniforme_id', 'componente', 'nombre_personalizado', 'marca', 'serie', 'talla',
+    'condicion', 'estado_fisico', 'unidad', 'fecha_entrega',
+]
+
+
+def filtrar_voluntarios(estados=None, categorias=None, ids=None):
+    """Voluntarios del lote; sin filtros, todos"""
+    voluntarios = Voluntario.objects.all()
+    if estados:
+        voluntarios = voluntarios.filter(estado_bombero__in=estados)
+    if categorias:
+        voluntarios = voluntarios.filter(categoria__in=categorias)
+    if ids:
+        voluntarios = voluntarios.filter(id__in=ids)
+    return voluntarios
+
+
+def _datos_voluntario(voluntario):
+    # Solo lo que dibujan los PDF: viaja barato a los procesos y no consulta
+    return SimpleNamespace(**{campo: getattr(voluntario, campo) for campo in CAMPOS_VOLUNTARIO})
+
+
+def _nombre_archivo(prefijo, voluntario, sufijo, usados):
+    clave = re.sub(r'[^\w-]', '_', voluntario.clave_bombero or '') or str(voluntario.id)
+    nombre = f'{prefijo}_{clave}{sufijo}.pdf'
+    if nombre in usados:
+        nombre = f'{prefijo}_{clave}_{voluntario.id}{sufijo}.pdf'
+    usados.add(nombre)
+    return nombre
+
+
+def preparar_tareas_cuotas(voluntarios, anio):
+    """
+    Datos de los estados de cuotas del lote en tres consultas
+    (voluntarios con su estado de cuotas, pagos del año y estados de cuenta)
+    """
+    lista = list(voluntarios.select_related('estado_cuotas').order_by('clave_bombero', 'id'))
+    ids = voluntarios.values('id')
+
+    pagos = defaultdict(dict)
+    for pago in PagoCuota.objects.filter(voluntario__in=ids, anio=anio).order_by().values(
+        'voluntario_id', 'mes', 'monto_pagado', 'fecha_pago', 'metodo_pago'
+    ):
+        pagos[pago.pop('voluntario_id')][pago.pop('mes')] = pago
+    estados_cuenta = {
+        estado.voluntario_id: estado
+        for estado in EstadoCuentaCuotas.objects.filter(voluntario__in=ids, anio=anio)
+    }
+
+    tareas = []
+    usados = set()
+    for voluntario in lista:
+        # Sin estado de cuenta (voluntario sin pagos nunca sincronizado) se crea aquí
+        deuda = calcular_deuda_cuotas(voluntario, anio, estado_cuenta=estados_cuenta.get(voluntario.id))
+        tareas.append({
+            'tipo': 'cuotas',
+            'voluntario': _datos_voluntario(voluntario),
+            'anio': anio,
+            'pagos': pagos.get(voluntario.id, {}),
+            'deuda_total': deuda['monto'],
+            'precio_cuota': obtener_precio_cuota(voluntario),
+            'nombre_archivo': _nombre_archivo('cuotas', voluntario, f'_{anio}', usados),
+        })
+    return tareas
+
+
+def preparar_tareas_uniformes(voluntarios):
+    """
+    Tablas de uniformes del lote en tres consultas (voluntarios, uniformes
+    activos y sus piezas activas). Los voluntarios sin uniformes activos se omiten.
+    """
+    ids = voluntarios.values('id')
+    uniformes = defaultdict(list)
+    por_id = {}
+    for uniforme in Uniforme.objects.filter(bombero__in=ids, estado='activo').values(
+        'id', 'bombero_id', 'tipo_uniforme', 'observaciones'
+    ):
+        fila = (SimpleNamespace(**uniforme), [])
+        por_id[uniforme['id']] = fila
+        uniformes[uniforme['bombero_id']].append(fila)
+    for pieza in PiezaUniforme.objects.filter(
+        uniforme__bombero__in=ids, uniforme__estado='activo', estado_pieza='activo'
+    ).values(*CAMPOS_PIEZA):
+        por_id[pieza['uniforme_id']][1].append(SimpleNamespace(**pieza))
+
+    tareas = []
+    usados = set()
+    for voluntario in voluntarios.filter(id__in=list(uniformes)).order_by('clave_bombero', 'id'):
+        tareas.append({
+            'tipo': 'uniformes',
+            'voluntario': _datos_voluntario(voluntario),
+            'filas': uniformes[voluntario.id],
+            'nombre_archivo': _nombre_archivo('tabla_uniformes', voluntario, '', usados),
+        })
+    return tareas
+
+
+def _renderizar_todas(tareas, logo, procesos):
+    """Genera (nombre_archivo, bytes) en el orden de las tareas"""
+    if procesos <= 1 or len(tareas) < MINIMO_PARA_PROCESOS:
+        for tarea in tareas:
+            yield renderizar_tarea(tarea, logo)
+        return
+
+    argumentos = (logo.logo_id, logo.contenido) if logo else ()
+    with ProcessPoolExecutor(max_workers=procesos, initializer=iniciar_proceso, initargs=argumentos) as pool:
+        yield from pool.map(renderizar, tareas, chunksize=TAREAS_POR_ENVIO)
+
+
+def _titulo_marcador(tarea):
+    voluntario = tarea['voluntario']
+    nombre = f"{voluntario.nombre} {voluntario.apellido_paterno} {voluntario.apellido_materno or ''}".strip()
+    return f'{voluntario.clave_bombero} - {nombre}'
+
+
+def exportar_pdfs_lote(destino, tipo, voluntarios, anio=None, formato='zip', procesos=None, progreso=None):
+    """
+    Escribe en destino (ruta o archivo binario) el lote de PDFs de los voluntarios
+
+    Args:
+        tipo: 'cuotas' (requiere anio) o 'uniformes'
+        voluntarios: QuerySet de Voluntario (ver filtrar_voluntarios)
+        formato: 'zip' o 'pdf' (un solo documento con marcadores)
+        procesos: tamaño del pool (por defecto PROCESOS_EXPORTACION)
+        progreso: función opcional progreso(hechos, total)
+
+    Returns:
+        dict con tipo, formato, anio y total de documentos
+    """
+    if tipo not in TIPOS_EXPORTACION:
+        raise ValueError(f'Tipo de exportación inválido: {tipo}')
+    if formato not in FORMATOS_EXPORTACION:
+        raise ValueError(f'Formato de exportación inválido: {formato}')
+    if tipo == 'cuotas' and not anio:
+        raise ValueError('El estado de cuotas requiere el año')
+
+    tareas = preparar_tareas_cuotas(voluntarios, anio) if tipo == 'cuotas' else preparar_tareas_uniformes(voluntarios)
+    total = len(tareas)
+    logo = obtener_logo_pdf() if tipo == 'cuotas' else None
+
+    def avisar(hechos):
+        if progreso:
+            progreso(hechos, total)
+
+    avisar(0)
+    if formato == 'pdf':
+        from reportlab.pdfgen import canvas
+
+        c = canvas.Canvas(destino, pagesize=tamano_pagina(tipo))
+        c.setTitle(f'{tipo.capitalize()} {anio or ""}'.strip())
+        for hechos, tarea in enumerate(tareas, 1):
+            clave = f"v{tarea['voluntario'].id}"
+            c.bookmarkPage(clave)
+            c.addOutlineEntry(_titulo_marcador(tarea), clave, level=0)
+            dibujar_tarea(c, tarea, logo)
+            avisar(hechos)
+        c.showOutline()
+        c.save()
+    else:
+        with zipfile.ZipFile(destino, 'w', zipfile.ZIP_DEFLATED) as archivo_zip:
+            renderizados = _renderizar_todas(tareas, logo, procesos or PROCESOS_EXPORTACION)
+            for hechos, (nombre, contenido) in enumerate(renderizados, 1):
+                archivo_zip.writestr(nombre, contenido)
+                avisar(hechos)
+
+    return {'tipo': tipo, 'formato': formato, 'anio': anio, 'total': total}
+
+
+# ==================== SEGUIMIENTO DEL AVANCE ====================
+
+CLAVE_PROGRESO = 'exportacion_pdf:{}'
+DURACION_PROGRESO = 3600
+
+
+def seguidor_progreso(seguimiento):
+    """
+    Función progreso(hechos, total) que publica el avance en el caché bajo
+    `seguimiento` (el id que elige el cliente), cada ~2% para no escribir por PDF
+    """
+    from django.core.cache import cache
+
+    ultimo = [-1]
+
+    def progreso(hechos, total):
+        paso = max(1, total // 50)
+        if hechos == total or hechos - ultimo[0] >= paso:
+            ultimo[0] = hechos
+            cache.set(CLAVE_PROGRESO.format(seguimiento), {
+                'hechos': hechos, 'total': total, 'terminado': hechos == total,
+            }, DURACION_PROGRESO)
+
+    return progreso
+
+
+def obtener_progreso(seguimiento):
+    from django.core.cache import cache
+
+    return cache.get(CLAVE_PROGRESO.format(seguimiento))
@@ -0,0 +1,118 @@
+"""
+Claves de idempotencia para los endpoints que crean pagos y movimientos
+El cliente envía la cabecera Idempotency-Key (un UUID por operación, el mismo
+en cada reintento). La primera solicitud reserva la clave, ejecuta la vista y
+guarda su respuesta; los reintentos la reciben tal cual con una sola consulta
+por índice, sin volver a ejecutar la escritura.
+
+- Misma clave con otro cuerpo, ruta o usuario: 422.
+- Misma clave mientras la primera sigue en proceso: 409 (el cliente reintenta).
+- Respuestas 5xx no se guardan: la operación no se completó y puede repetirse.
+- Las respuestas vencen a las 24 horas y se eliminan periódicamente.
+"""
+import functools
+import hashlib
+import time
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from .models import RespuestaIdempotente
+
+
+CABECERA_IDEMPOTENCIA = 'HTTP_IDEMPOTENCY_KEY'
+LARGO_MAXIMO_CLAVE = 100
+
+DURACION_RESPUESTA = timedelta(hours=24)
+
+# Una reserva abandonada (proceso caído a mitad de la vista) libera la clave
+DURACION_RESERVA = timedelta(minutes=2)
+
+# Segundos entre purgas de respuestas vencidas en cada proceso
+INTERVALO_PURGA = 600
+
+_ultima_purga = 0.0
+
+
+def purgar_respuestas_vencidas():
+    """Elimina las respuestas y reservas vencidas; retorna cuántas"""
+    global _ultima_purga
+    _ultima_purga = time.monotonic()
+    return RespuestaIdempotente.objects.filter(expira__lte=timezone.now()).delete()[0]
+
+
+def _reproducir(guardada):
+    respuesta = HttpResponse(
+        bytes(guardada.contenido), status=guardada.codigo_estado, content_type=guardada.tipo_contenido
+    )
+    respuesta['Idempotent-Replayed'] = 'true'
+    return respuesta
+
+
+def idempotente(vista):
+    """
+    Decorador de vistas: aplica Idempotency-Key a los POST
+    Sin la cabecera la vista se ejecuta como siempre. En los ViewSet de DRF se
+    aplica a dispatch con method_decorator, que cubre create y las acciones POST.
+    """
+    @functools.wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        clave = request.META.get(CABECERA_IDEMPOTENCIA, '').strip()
+        if request.method != 'POST' or not clave:
+            return vista(request, *args, **kwargs)
+        if len(clave) > LARGO_MAXIMO_CLAVE:
+            return JsonResponse(
+                {'error': f'Idempotency-Key admite hasta {LARGO_MAXIMO_CLAVE} caracteres'}, status=400
+            )
+        
+        huella = hashlib.sha256(request.body).hexdigest()
+        usuario_id = request.user.pk if request.user.is_authenticated else None
+        ahora = timezone.now()
+        
+        guardada = RespuestaIdempotente.objects.filter(clave=clave).first()
+        if guardada is not None and guardada.expira <= ahora:
+            guardada.delete()
+            guardada = None
+        if guardada is not None:
+            if (guardada.ruta, guardada.huella, guardada.usuario_id) != (request.path, huella, usuario_id):
+                return JsonResponse(
+                    {'error': 'La clave de idempotencia ya se usó con otra solicitud'}, status=422
+                )
+            if guardada.codigo_estado is None:
+                return JsonResponse({'error': 'La solicitud original aún está en proceso'}, status=409)
+            return _reproducir(guardada)
+        
+        try:
+            with transaction.atomic():
+                reserva = RespuestaIdempotente.objects.create(
+                    clave=clave, ruta=request.path, huella=huella, usuario_id=usuario_id,
+                    expira=ahora + DURACION_RESERVA
+                )
+        except IntegrityError:
+            # Un reintento simultáneo reservó la clave primero
+            return JsonResponse({'error': 'La solicitud original aún está en proceso'}, status=409)
+        
+        try:
+            respuesta = vista(request, *args, **kwargs)
+        except BaseException:
+            reserva.delete()
+            raise
+        
+        if respuesta.status_code >= 500 or respuesta.streaming:
+            reserva.delete()
+        else:
+            if hasattr(respuesta, 'render'):
+                # Response de DRF: se renderiza aquí para poder guardar el contenido
+                respuesta.render()
+            reserva.codigo_estado = respuesta.status_code
+            reserva.tipo_contenido = respuesta.get('Content-Type', '')
+            reserva.contenido = respuesta.content
+            reserva.expira = timezone.now() + DURACION_RESPUESTA
+            reserva.save(update_fields=['codigo_estado', 'tipo_contenido', 'contenido', 'expira'])
+        
+        if time.monotonic() - _ultima_purga > INTERVALO_PURGA:
+            purgar_respuestas_vencidas()
+        return respuesta
+    return envoltura
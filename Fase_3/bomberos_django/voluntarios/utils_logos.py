@@ -0,0 +1,95 @@
+"""
+Caché del logo de compañía para los PDF generados en el servidor
+Los PDF de uniformes y cuotas dibujaban el logo consultando LogoCompania,
+leyendo la imagen completa y creando un ImageReader en cada solicitud.
+
+El logo activo (id, fecha_carga) sale del caché de singletons
+(utils_configuracion) y la imagen decodificada, reducida al tamaño de impresión
+y con su ImageReader listo se guarda en memoria del proceso con desalojo LRU.
+Un PDF con el caché caliente no consulta la base de datos ni decodifica nada.
+Guardar o eliminar un LogoCompania invalida ambos niveles (signals.py).
+"""
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+from .models import LogoCompania
+from .utils_blobs import leer_blob
+from .utils_configuracion import CLAVE_LOGO_PDF, obtener_singleton
+
+
+# Logos decodificados retenidos por proceso
+TAMANO_CACHE_LOGOS = 4
+
+# Lado mayor en píxeles: el logo se imprime a 25 mm, ~300 dpi
+LADO_MAXIMO_LOGO = 300
+
+_logos = OrderedDict()
+_candado = threading.Lock()
+
+
+class LogoPDF:
+    """Logo decodificado y reducido, listo para canvas.drawImage(logo.lector, ...)"""
+
+    def __init__(self, logo_id, contenido):
+        from reportlab.lib.utils import ImageReader
+
+        self.logo_id = logo_id
+        self.contenido = contenido
+        self.lector = ImageReader(BytesIO(contenido))
+        self.ancho, self.alto = self.lector.getSize()
+        # Decodifica los píxeles una vez: drawImage reutiliza los datos del lector
+        self.lector.getRGBData()
+
+
+def reducir_logo(datos):
+    """Reduce los bytes de un logo a PNG de impresión"""
+    from PIL import Image
+
+    with Image.open(BytesIO(datos)) as imagen:
+        imagen.load()
+        if imagen.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            imagen = imagen.convert('RGBA')
+        if max(imagen.size) > LADO_MAXIMO_LOGO:
+            imagen.thumbnail((LADO_MAXIMO_LOGO, LADO_MAXIMO_LOGO), Image.LANCZOS)
+        salida = BytesIO()
+        imagen.save(salida, format='PNG', optimize=True)
+    return salida.getvalue()
+
+
+def obtener_logo_pdf():
+    """
+    Logo activo para PDFs (LogoPDF) o None si no hay logo o no se pudo leer
+    Solo el primer uso de cada logo en el proceso consulta y decodifica.
+    """
+    activo = obtener_singleton(CLAVE_LOGO_PDF)
+    if activo is None:
+        return None
+    clave = (activo['id'], activo['fecha_carga'], activo['revision'])
+    with _candado:
+        if clave in _logos:
+            _logos.move_to_end(clave)
+            return _logos[clave]
+
+    imagen = LogoCompania.objects.filter(id=activo['id']).values_list('imagen_id', flat=True).first()
+    logo = None
+    if imagen:
+        try:
+            logo = LogoPDF(activo['id'], reducir_logo(leer_blob(imagen)))
+        except Exception as e:
+            # Un logo ilegible se recuerda como None para no reintentar en cada PDF
+            print(f"[PDF] No se pudo cargar el logo: {e}")
+
+    with _candado:
+        _logos[clave] = logo
+        _logos.move_to_end(clave)
+        while len(_logos) > TAMANO_CACHE_LOGOS:
+            _logos.popitem(last=False)
+    return logo
+
+
+def descartar_logo_pdf(logo_id):
+    """Libera las versiones decodificadas de un logo (al guardarlo o eliminarlo)"""
+    with _candado:
+        for clave in [clave for clave in _logos if clave[0] == logo_id]:
+            del _logos[clave]
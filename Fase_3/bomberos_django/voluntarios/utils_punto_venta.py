@@ -0,0 +1,411 @@
+"""
+Punto de venta de tarjetas de beneficios (día del evento)
+Muchos vendedores registran ventas a la vez. En vez de leer, actualizar y
+escribir el movimiento en cada venta:
+
+- Cada proceso mantiene un índice en memoria de vendedores por beneficio
+  (voluntario → asignación y tarjetas disponibles) para validar y reservar
+  sin consultar la base de datos.
+- Las ventas se guardan en cola (VentaPuntoVenta) con una clave de
+  idempotencia única: un reintento desde el dispositivo retorna la venta ya
+  registrada y nunca cobra dos veces.
+- La cola se aplica en micro-lotes: una transacción por lote que agrupa las
+  ventas por asignación (UPDATE condicional de vender_tarjetas_asignacion) y
+  escribe PagoBeneficio y MovimientoFinanciero con bulk_create. Una venta se
+  marca aplicada en la misma transacción que crea su pago (al menos una vez,
+  sin duplicados): si el proceso cae, el lote completo queda pendiente.
+"""
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Min, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import (
+    Beneficio, AsignacionBeneficio, PagoBeneficio, MovimientoFinanciero,
+    SesionPuntoVenta, VentaPuntoVenta
+)
+from .utils_tesoreria import (
+    vender_tarjetas_asignacion, reintentar_si_bloqueada,
+    invalidar_cierres_financieros, marcar_meses_resumen
+)
+
+
+# Se aplica la cola al juntar este número de ventas o cuando la más antigua
+# lleva este tiempo (segundos) esperando
+TAMANO_LOTE_PUNTO_VENTA = 50
+INTERVALO_LOTE_PUNTO_VENTA = 2
+
+# El índice de vendedores se recarga completo cada cinco minutos
+DURACION_INDICE_VENDEDORES = 300
+
+MAX_VENTAS_POR_SOLICITUD = 500
+
+_indices = {}
+_candado = threading.Lock()
+
+
+# ==================== ÍNDICE DE VENDEDORES ====================
+
+def _filas_vendedores(filtro):
+    """Asignaciones con sus tarjetas vendibles: disponibles menos las ventas normales en cola"""
+    en_cola = Coalesce(Sum(
+        'ventas_punto_venta__cantidad_tarjetas',
+        filter=Q(ventas_punto_venta__estado='pendiente', ventas_punto_venta__tipo_pago='normal')
+    ), 0)
+    return AsignacionBeneficio.objects.filter(filtro).annotate(en_cola=en_cola).values(
+        'id', 'voluntario_id', 'voluntario__clave_bombero', 'voluntario__nombre',
+        'voluntario__apellido_paterno', 'tarjetas_asignadas', 'tarjetas_vendidas',
+        'tarjetas_liberadas', 'en_cola'
+    )
+
+
+def _disponibles(fila):
+    return fila['tarjetas_asignadas'] - fila['tarjetas_vendidas'] - fila['tarjetas_liberadas'] - fila['en_cola']
+
+
+def _cargar_indice(beneficio_id):
+    beneficio = Beneficio.objects.values('nombre', 'precio_por_tarjeta', 'precio_tarjeta_extra').get(id=beneficio_id)
+    vendedores = {}
+    for fila in _filas_vendedores(Q(beneficio_id=beneficio_id)):
+        vendedores[fila['id']] = {
+            'asignacion_id': fila['id'],
+            'voluntario_id': fila['voluntario_id'],
+            'clave_bombero': fila['voluntario__clave_bombero'],
+            'nombre': f"{fila['voluntario__nombre']} {fila['voluntario__apellido_paterno']}",
+            'disponibles': _disponibles(fila),
+        }
+    return {
+        'beneficio_id': beneficio_id,
+        'nombre': beneficio['nombre'],
+        'precio_por_tarjeta': beneficio['precio_por_tarjeta'],
+        'precio_tarjeta_extra': beneficio['precio_tarjeta_extra'],
+        'vendedores': vendedores,
+        'por_voluntario': {v['voluntario_id']: a for a, v in vendedores.items()},
+        'por_clave': {v['clave_bombero']: a for a, v in vendedores.items()},
+        'cargado': time.monotonic(),
+    }
+
+
+def obtener_indice_vendedores(beneficio_id, recargar=False):
+    """
+    Índice en memoria de los vendedores de un beneficio
+
+    Returns:
+        dict: {'vendedores': {asignacion_id: {...}}, 'por_voluntario', 'por_clave', precios}
+    """
+    indice = _indices.get(beneficio_id)
+    if recargar or indice is None or time.monotonic() - indice['cargado'] > DURACION_INDICE_VENDEDORES:
+        indice = _cargar_indice(beneficio_id)
+        with _candado:
+            _indices[beneficio_id] = indice
+    return indice
+
+
+def refrescar_indice_vendedores(asignacion_ids):
+    """Relee de la base de datos las tarjetas vendibles de las asignaciones indicadas"""
+    if not asignacion_ids or not _indices:
+        return
+    for fila in _filas_vendedores(Q(id__in=asignacion_ids)):
+        with _candado:
+            for indice in _indices.values():
+                vendedor = indice['vendedores'].get(fila['id'])
+                if vendedor:
+                    vendedor['disponibles'] = _disponibles(fila)
+
+
+def descartar_indice_vendedores(beneficio_id):
+    with _candado:
+        _indices.pop(beneficio_id, None)
+
+
+def _buscar_vendedor(indice, datos):
+    """Asignación de la venta según asignacion_id, voluntario_id o clave_bombero"""
+    if datos.get('asignacion_id') is not None:
+        return indice['vendedores'].get(int(datos['asignacion_id']))
+    if datos.get('voluntario_id') is not None:
+        asignacion_id = indice['por_voluntario'].get(int(datos['voluntario_id']))
+    else:
+        asignacion_id = indice['por_clave'].get(str(datos.get('clave_bombero', '')).strip())
+    return indice['vendedores'].get(asignacion_id)
+
+
+# ==================== SESIONES ====================
+
+def abrir_sesion_punto_venta(beneficio_id, nombre='', usuario=None):
+    """Crea una sesión de venta y carga el índice de vendedores del beneficio"""
+    beneficio = Beneficio.objects.get(id=beneficio_id)
+    if beneficio.estado != 'activo':
+        raise ValueError('El beneficio no está activo')
+    sesion = SesionPuntoVenta.objects.create(beneficio=beneficio, nombre=nombre, abierta_por=usuario)
+    obtener_indice_vendedores(beneficio.id, recargar=True)
+    return sesion
+
+
+def cerrar_sesion_punto_venta(sesion):
+    """Aplica todas las ventas en cola de la sesión y la cierra"""
+    procesado = procesar_ventas_punto_venta(sesion.id)
+    sesion.activa = False
+    sesion.fecha_cierre = timezone.now()
+    sesion.save(update_fields=['activa', 'fecha_cierre'])
+    if not SesionPuntoVenta.objects.filter(beneficio_id=sesion.beneficio_id, activa=True).exists():
+        descartar_indice_vendedores(sesion.beneficio_id)
+    return procesado
+
+
+def resumen_sesion_punto_venta(sesion):
+    """Ventas de la sesión por estado (una consulta)"""
+    filas = VentaPuntoVenta.objects.filter(sesion=sesion).values('estado').annotate(
+        ventas=Count('id'),
+        tarjetas=Coalesce(Sum('cantidad_tarjetas'), 0),
+        monto=Coalesce(Sum('monto'), Decimal('0'))
+    )
+    resumen = {
+        estado: {'ventas': 0, 'tarjetas': 0, 'monto': Decimal('0')}
+        for estado, _ in VentaPuntoVenta.ESTADO_CHOICES
+    }
+    for fila in filas:
+        resumen[fila.pop('estado')] = fila
+    return {
+        'sesion_id': sesion.id,
+        'beneficio_id': sesion.beneficio_id,
+        'activa': sesion.activa,
+        'fecha_apertura': sesion.fecha_apertura,
+        'fecha_cierre': sesion.fecha_cierre,
+        'ventas': resumen,
+    }
+
+
+# ==================== COLA DE VENTAS ====================
+
+def _resultado(venta, repetida):
+    return {
+        'clave_idempotencia': venta['clave_idempotencia'],
+        'venta_id': venta['id'],
+        'estado': venta['estado'],
+        'error': venta['error'],
+        'repetida': repetida,
+    }
+
+
+def registrar_ventas_punto_venta(sesion, ventas, usuario=None):
+    """
+    Valida contra el índice en memoria y deja en cola las ventas de una sesión
+
+    Args:
+        ventas: [{'clave_idempotencia', 'asignacion_id' | 'voluntario_id' | 'clave_bombero',
+                  'tipo_pago' ('normal'/'extra'), 'cantidad_tarjetas', 'metodo_pago'}]
+
+    Las claves ya registradas no se vuelven a validar ni a escribir: se retorna
+    el estado guardado con 'repetida': True.
+
+    Returns:
+        list: un resultado por venta, en el mismo orden
+    """
+    if len(ventas) > MAX_VENTAS_POR_SOLICITUD:
+        raise ValueError(f'Máximo {MAX_VENTAS_POR_SOLICITUD} ventas por solicitud')
+
+    claves = [str(v.get('clave_idempotencia') or '').strip() for v in ventas]
+    campos = ('id', 'clave_idempotencia', 'estado', 'error')
+    existentes = {
+        fila['clave_idempotencia']: fila
+        for fila in VentaPuntoVenta.objects.filter(clave_idempotencia__in=[c for c in claves if c]).values(*campos)
+    }
+    # Los reintentos de ventas ya registradas se responden aunque la sesión esté cerrada
+    if not sesion.activa and any(clave not in existentes for clave in claves):
+        raise ValueError('La sesión de venta está cerrada')
+
+    indice = None
+    resultados = [None] * len(ventas)
+    nuevas = {}
+    for posicion, (clave, datos) in enumerate(zip(claves, ventas)):
+        if clave in existentes or clave in nuevas:
+            continue
+        error = None
+        if indice is None:
+            indice = obtener_indice_vendedores(sesion.beneficio_id)
+        try:
+            cantidad = int(datos.get('cantidad_tarjetas', 0))
+            vendedor = _buscar_vendedor(indice, datos)
+        except (TypeError, ValueError):
+            cantidad, vendedor = 0, None
+        tipo_pago = datos.get('tipo_pago', 'normal')
+
+        if not clave or len(clave) > 64:
+            error = 'clave_idempotencia requerida (máximo 64 caracteres)'
+        elif tipo_pago not in ('normal', 'extra') or cantidad <= 0:
+            error = 'Datos incompletos'
+        elif vendedor is None:
+            error = 'El voluntario no tiene tarjetas asignadas en este beneficio'
+        if error:
+            resultados[posicion] = {
+                'clave_idempotencia': clave, 'venta_id': None, 'estado': 'rechazada',
+                'error': error, 'repetida': False
+            }
+            continue
+
+        # Reservar en el índice: la validación definitiva es el UPDATE condicional del lote
+        estado = 'pendiente'
+        if tipo_pago == 'normal':
+            with _candado:
+                if vendedor['disponibles'] >= cantidad:
+                    vendedor['disponibles'] -= cantidad
+                else:
+                    estado = 'rechazada'
+                    error = f"Solo tiene {vendedor['disponibles']} tarjetas disponibles"
+        precio = indice['precio_por_tarjeta'] if tipo_pago == 'normal' else indice['precio_tarjeta_extra']
+        nuevas[clave] = VentaPuntoVenta(
+            sesion=sesion,
+            clave_idempotencia=clave,
+            asignacion_id=vendedor['asignacion_id'],
+            tipo_pago=tipo_pago,
+            cantidad_tarjetas=cantidad,
+            monto=Decimal(cantidad) * precio,
+            metodo_pago=datos.get('metodo_pago') or 'Efectivo',
+            estado=estado,
+            error=error,
+            created_by=usuario
+        )
+
+    if nuevas:
+        # Otro reintento concurrente pudo insertar la misma clave: se conserva el primero
+        VentaPuntoVenta.objects.bulk_create(nuevas.values(), ignore_conflicts=True)
+        guardadas = {
+            fila['clave_idempotencia']: fila
+            for fila in VentaPuntoVenta.objects.filter(clave_idempotencia__in=list(nuevas)).values(*campos)
+        }
+    else:
+        guardadas = {}
+
+    vistas = set()
+    for posicion, clave in enumerate(claves):
+        if resultados[posicion] is not None:
+            continue
+        if clave in existentes:
+            resultados[posicion] = _resultado(existentes[clave], repetida=True)
+        else:
+            resultados[posicion] = _resultado(guardadas[clave], repetida=clave in vistas)
+            vistas.add(clave)
+    return resultados
+
+
+def cola_vencida(sesion_id):
+    """True si la cola de la sesión ya debe aplicarse (tamaño o antigüedad del lote)"""
+    cola = VentaPuntoVenta.objects.filter(sesion_id=sesion_id, estado='pendiente').aggregate(
+        cantidad=Count('id'), primera=Min('fecha_registro')
+    )
+    if not cola['cantidad']:
+        return False
+    return (cola['cantidad'] >= TAMANO_LOTE_PUNTO_VENTA
+            or cola['primera'] <= timezone.now() - timedelta(seconds=INTERVALO_LOTE_PUNTO_VENTA))
+
+
+@reintentar_si_bloqueada
+@transaction.atomic
+def _aplicar_lote(sesion_id, lote):
+    """Aplica hasta `lote` ventas pendientes; retorna (aplicadas, rechazadas, asignaciones) o None"""
+    pendientes = VentaPuntoVenta.objects.filter(estado='pendiente')
+    if sesion_id is not None:
+        pendientes = pendientes.filter(sesion_id=sesion_id)
+    ventas = list(
+        pendientes.select_for_update(skip_locked=True, of=('self',))
+        .select_related('asignacion__beneficio', 'asignacion__voluntario')
+        .order_by('id')[:lote]
+    )
+    if not ventas:
+        return None
+
+    por_grupo = defaultdict(list)
+    for venta in ventas:
+        por_grupo[(venta.asignacion_id, venta.tipo_pago)].append(venta)
+
+    aplicadas, rechazadas = [], []
+    for (asignacion_id, tipo_pago), grupo in por_grupo.items():
+        # Todo el grupo en un UPDATE; si no alcanzan las tarjetas, venta por venta
+        try:
+            with transaction.atomic():
+                vender_tarjetas_asignacion(
+                    asignacion_id, tipo_pago,
+                    sum(v.cantidad_tarjetas for v in grupo), sum(v.monto for v in grupo)
+                )
+            aplicadas.extend(grupo)
+            continue
+        except ValueError:
+            pass
+        for venta in grupo:
+            try:
+                with transaction.atomic():
+                    vender_tarjetas_asignacion(asignacion_id, tipo_pago, venta.cantidad_tarjetas, venta.monto)
+                aplicadas.append(venta)
+            except ValueError as e:
+                venta.estado = 'rechazada'
+                venta.error = str(e)[:255]
+                rechazadas.append(venta)
+
+    ahora = timezone.now()
+    pagos = PagoBeneficio.objects.bulk_create([
+        PagoBeneficio(
+            asignacion_id=venta.asignacion_id,
+            tipo_pago=venta.tipo_pago,
+            cantidad_tarjetas=venta.cantidad_tarjetas,
+            fecha_pago=timezone.localdate(venta.fecha_registro),
+            monto=venta.monto,
+            metodo_pago=venta.metodo_pago,
+            observaciones=f'Punto de venta #{venta.sesion_id}',
+            created_by_id=venta.created_by_id
+        )
+        for venta in aplicadas
+    ])
+    MovimientoFinanciero.objects.bulk_create([
+        MovimientoFinanciero(
+            tipo='ingreso',
+            categoria='beneficio',
+            monto=pago.monto,
+            descripcion=(
+                f'Beneficio {venta.asignacion.beneficio.nombre} - {venta.asignacion.voluntario.nombre_completo()} '
+                f'({"Extra" if venta.tipo_pago == "extra" else "Normal"}, {venta.cantidad_tarjetas} tarjetas)'
+            ),
+            fecha=pago.fecha_pago,
+            pago_beneficio=pago,
+            observaciones=pago.observaciones,
+            created_by_id=venta.created_by_id
+        )
+        for venta, pago in zip(aplicadas, pagos)
+    ])
+    for venta, pago in zip(aplicadas, pagos):
+        venta.estado = 'aplicada'
+        venta.pago = pago
+        venta.fecha_aplicacion = ahora
+    VentaPuntoVenta.objects.bulk_update(aplicadas + rechazadas, ['estado', 'error', 'pago', 'fecha_aplicacion'])
+
+    # bulk_create no dispara señales: mantener las tablas derivadas a mano
+    fechas = {pago.fecha_pago for pago in pagos}
+    invalidar_cierres_financieros(*fechas)
+    marcar_meses_resumen(*fechas)
+
+    asignaciones = {venta.asignacion_id for venta in ventas}
+    transaction.on_commit(lambda: refrescar_indice_vendedores(asignaciones))
+    return len(aplicadas), len(rechazadas), asignaciones
+
+
+def procesar_ventas_punto_venta(sesion_id=None, lote=TAMANO_LOTE_PUNTO_VENTA):
+    """
+    Aplica la cola de ventas en micro-lotes (todas las sesiones si sesion_id es None)
+
+    Returns:
+        dict: {'lotes': int, 'aplicadas': int, 'rechazadas': int}
+    """
+    resultado = {'lotes': 0, 'aplicadas': 0, 'rechazadas': 0}
+    while True:
+        lote_aplicado = _aplicar_lote(sesion_id, lote)
+        if lote_aplicado is None:
+            return resultado
+        aplicadas, rechazadas, _ = lote_aplicado
+        resultado['lotes'] += 1
+        resultado['aplicadas'] += aplicadas
+        resultado['rechazadas'] += rechazadas
@@ -3,57 +3,128 @@ Utilidades y lógica de negocio para el módulo de Tesorería
 Convierte la lógica JavaScript de P6P a Python/Django
 """
 
-from django.db import transaction
-from django.db.models import Sum, Q
+from django.db import OperationalError, transaction
+from django.db.models import (
+    Sum, Q, Count, F, Value, Case, When, Exists, OuterRef, Subquery,
+    BooleanField, DateField, DecimalField, IntegerField, ExpressionWrapper
+)
+from django.db.models.functions import Coalesce, Greatest, ExtractYear, ExtractMonth
 from django.utils import timezone
-from datetime import datetime, date
-from decimal import Decimal
+from django.utils.dateparse import parse_date
+from datetime import datetime, date, timedelta
+from decimal import Decimal, InvalidOperation
+import base64
+import csv
+import functools
+import io
 import json
+import random
+import re
+import time
+import unicodedata
 
 from .models import (
     Voluntario, ConfiguracionCuotas, EstadoCuotasBombero,
     PagoCuota, Beneficio, AsignacionBeneficio, PagoBeneficio,
-    MovimientoFinanciero
+    MovimientoFinanciero, EstadoCuentaCuotas, CierreMensualFinanciero,
+    ResumenTesoreria, MesPendienteResumenTesoreria, EstadisticaBeneficio
 )
+from .utils_configuracion import obtener_configuracion_cuotas_cache
 
 
 # ==================== CATEGORÍAS DE VOLUNTARIOS ====================
 
 def calcular_categoria_bombero(fecha_ingreso):
     """
-    Calcula la categoría del bombero según su antigüedad
-    Replica la lógica de Utils.calcularCategoriaBombero del P6P
-    """
-    if not fecha_ingreso:
-        return 'Voluntario'
-    
-    hoy = date.today()
-    anos_servicio = (hoy - fecha_ingreso).days / 365.25
+    Calcula la categoría de tesorería del bombero según su antigüedad
     
-    if anos_servicio >= 50:
+    Para voluntarios existentes usar categoria_cuotas(voluntario.anios_servicio),
+    que además respeta la antigüedad congelada.
+    """
+    return categoria_cuotas(Voluntario(fecha_ingreso=fecha_ingreso).calcular_anios_servicio())
+
+
+def categoria_cuotas(anios):
+    """
+    Nombre de la categoría de tesorería para unos años de servicio
+    Desde Honorario de Compañía (Voluntario.ANIOS_EXENCION_CUOTAS) no se pagan cuotas.
+    """
+    if anios >= 50:
         return 'Insigne de 50 Años'
-    elif anos_servicio >= 25:
+    elif anios >= 25:
         return 'Insigne de 25 Años'
-    elif anos_servicio >= 20:
+    elif anios >= 20:
         return 'Honorario del Cuerpo'
-    elif anos_servicio >= 5:
+    elif anios >= Voluntario.ANIOS_EXENCION_CUOTAS:
         return 'Honorario de Compañía'
     else:
         return 'Voluntario'
 
 
+# Campo de Beneficio con las tarjetas de cada categoría
+CAMPO_TARJETAS_POR_CATEGORIA = {
+    'voluntario': 'tarjetas_voluntarios',
+    'honorario_compania': 'tarjetas_honorarios_cia',
+    'honorario_cuerpo': 'tarjetas_honorarios_cuerpo',
+    'insigne': 'tarjetas_insignes',
+}
+
+
 def obtener_tarjetas_por_categoria(categoria):
     """
-    Retorna la cantidad de tarjetas de beneficio según categoría
+    Retorna la cantidad de tarjetas de beneficio por defecto según categoría
+    (código de Voluntario.CATEGORIA_CHOICES)
+    """
+    campo = CAMPO_TARJETAS_POR_CATEGORIA.get(categoria, 'tarjetas_voluntarios')
+    return Beneficio._meta.get_field(campo).default
+
+
+def actualizar_categorias_voluntarios(hoy=None, lote=1000):
+    """
+    Recalcula anios_servicio y categoria de todos los voluntarios
+    
+    Pensado para ejecutarse a diario: los aniversarios de ingreso cambian la
+    categoría y la exención de cuotas sin que el voluntario se edite. Guarda en
+    bloque solo las filas que cambiaron y reaplica la exención al estado de
+    cuenta del año en curso de quienes cruzaron Voluntario.ANIOS_EXENCION_CUOTAS.
+    
+    Returns:
+        dict: {'revisados': int, 'actualizados': int, 'cambios_categoria': int, 'cambios_exencion': int}
     """
-    tarjetas_map = {
-        'Voluntario': 5,
-        'Honorario de Compañía': 3,
-        'Honorario del Cuerpo': 3,
-        'Insigne de 25 Años': 2,
-        'Insigne de 50 Años': 2,
+    cambiados = []
+    cambio_categoria = []
+    cambio_exencion = []
+    revisados = 0
+    
+    voluntarios = Voluntario.objects.only(
+        'id', 'fecha_ingreso', 'antiguedad_congelada', 'fecha_congelamiento',
+        'anios_servicio', 'categoria'
+    ).order_by('id')
+    for voluntario in voluntarios.iterator(chunk_size=lote):
+        revisados += 1
+        categoria_anterior = voluntario.categoria
+        exento_anterior = voluntario.exento_por_antiguedad
+        if voluntario.refrescar_categoria(hoy):
+            cambiados.append(voluntario)
+            if voluntario.categoria != categoria_anterior:
+                cambio_categoria.append(voluntario.id)
+            if voluntario.exento_por_antiguedad != exento_anterior:
+                cambio_exencion.append(voluntario.id)
+    
+    with transaction.atomic():
+        Voluntario.objects.bulk_update(cambiados, ['anios_servicio', 'categoria'], batch_size=lote)
+        for voluntario in Voluntario.objects.filter(
+            id__in=cambio_exencion,
+            estados_cuenta_cuotas__anio=timezone.now().year
+        ).select_related('estado_cuotas'):
+            actualizar_condicion_estado_cuenta(voluntario)
+    
+    return {
+        'revisados': revisados,
+        'actualizados': len(cambiados),
+        'cambios_categoria': len(cambio_categoria),
+        'cambios_exencion': len(cambio_exencion),
     }
-    return tarjetas_map.get(categoria, 5)
 
 
 # ==================== CUOTAS MENSUALES ====================
@@ -95,12 +166,11 @@ def puede_pagar_cuotas(voluntario):
             'tipo': 'bloqueado'
         }
     
-    # 3. Exenciones automáticas
-    categoria = calcular_categoria_bombero(voluntario.fecha_ingreso)
-    if 'Honorario' in categoria or 'Insigne' in categoria:
+    # 3. Exenciones automáticas (Honorarios e Insignes: 5 años o más)
+    if voluntario.exento_por_antiguedad:
         return {
             'puede': False,
-            'mensaje': f'Exento: {categoria}',
+            'mensaje': f'Exento: {categoria_cuotas(voluntario.anios_servicio)}',
             'tipo': 'exento'
         }
     
@@ -114,17 +184,19 @@ def puede_pagar_cuotas(voluntario):
     return {'puede': True, 'mensaje': '', 'tipo': 'activo'}
 
 
+def obtener_configuracion_cuotas():
+    """
+    Obtiene la configuración de precios (Singleton), creándola si no existe
+    Se lee del caché de utils_configuracion: sin consultas mientras no cambie.
+    """
+    return obtener_configuracion_cuotas_cache()
+
+
 def obtener_precio_cuota(voluntario):
     """
     Obtiene el precio de cuota que debe pagar el voluntario
     """
-    config = ConfiguracionCuotas.objects.first()
-    if not config:
-        # Valores por defecto
-        config = ConfiguracionCuotas.objects.create(
-            precio_regular=Decimal('5000'),
-            precio_estudiante=Decimal('3000')
-        )
+    config = obtener_configuracion_cuotas()
     
     # Verificar si es estudiante
     try:
@@ -137,14 +209,17 @@ def obtener_precio_cuota(voluntario):
     return config.precio_regular
 
 
-def calcular_deuda_cuotas(voluntario, anio=None):
+def calcular_deuda_cuotas(voluntario, anio=None, estado_cuenta=None):
     """
     Calcula la deuda de cuotas de un voluntario
+    Lee el estado de cuenta materializado (EstadoCuentaCuotas); quien ya lo
+    leyó (exportación por lote) lo pasa en estado_cuenta para no consultarlo.
     
     Returns:
         dict: {
             'monto': Decimal,
-            'meses_pendientes': list of dict
+            'meses_pendientes': list of dict,
+            'precio_cuota': Decimal
         }
     """
     if anio is None:
@@ -153,35 +228,27 @@ def calcular_deuda_cuotas(voluntario, anio=None):
     # Verificar si puede pagar
     validacion = puede_pagar_cuotas(voluntario)
     if not validacion['puede']:
-        return {'monto': Decimal('0'), 'meses_pendientes': []}
-    
-    # Obtener precio
-    precio = obtener_precio_cuota(voluntario)
+        return {'monto': Decimal('0'), 'meses_pendientes': [], 'precio_cuota': Decimal('0')}
     
-    # Buscar cuotas pagadas
-    pagos = PagoCuota.objects.filter(
-        voluntario=voluntario,
-        anio=anio
-    ).values_list('mes', flat=True)
+    if estado_cuenta is None:
+        estado_cuenta = obtener_estado_cuenta(voluntario, anio)
+    precio = estado_cuenta.precio_cuota
     
     # Mes actual
     mes_actual = timezone.now().month if anio == timezone.now().year else 12
     
     # Calcular pendientes
-    meses_pendientes = []
-    for mes in range(1, mes_actual + 1):
-        if mes not in pagos:
-            meses_pendientes.append({
-                'mes': mes,
-                'anio': anio,
-                'monto': precio
-            })
+    meses_pendientes = [
+        {'mes': mes, 'anio': anio, 'monto': precio}
+        for mes in estado_cuenta.meses_pendientes(mes_actual)
+    ]
     
     monto_total = precio * len(meses_pendientes)
     
     return {
         'monto': monto_total,
-        'meses_pendientes': meses_pendientes
+        'meses_pendientes': meses_pendientes,
+        'precio_cuota': precio
     }
 
 
@@ -194,6 +261,10 @@ def calcular_deudores_cuotas(anio=None):
     - Estados bloqueados
     - Con cuotas_desactivadas=True
     
+    Versión por conjuntos: los meses pagados y el precio salen del estado de
+    cuenta materializado (EstadoCuentaCuotas), por lo que basta con dos
+    consultas (configuración y voluntarios anotados).
+    
     Returns:
         list: [
             {
@@ -207,28 +278,77 @@ def calcular_deudores_cuotas(anio=None):
     if anio is None:
         anio = timezone.now().year
     
-    deudores = []
-    voluntarios = Voluntario.objects.filter(
+    mes_actual = timezone.now().month if anio == timezone.now().year else 12
+    mascara_meses = (1 << mes_actual) - 1
+    config = obtener_configuracion_cuotas()
+    
+    # Mismas reglas que puede_pagar_cuotas, expresadas en SQL
+    candidatos = Voluntario.objects.filter(
         Q(estado_bombero='activo') | Q(estado_bombero='inactivo')
+    ).exclude(
+        estado_cuotas__cuotas_desactivadas=True
+    ).filter(
+        anios_servicio__lt=Voluntario.ANIOS_EXENCION_CUOTAS
+    )
+    
+    estado_cuenta = EstadoCuentaCuotas.objects.filter(voluntario=OuterRef('pk'), anio=anio)
+    
+    voluntarios = candidatos.annotate(
+        es_estudiante_cuotas=Coalesce(
+            'estado_cuotas__es_estudiante', Value(False), output_field=BooleanField()
+        ),
+        mapa_meses_pagados=Coalesce(
+            Subquery(estado_cuenta.values('meses_pagados')[:1]), Value(0),
+            output_field=IntegerField()
+        ),
+        precio_estado_cuenta=Subquery(estado_cuenta.values('precio_cuota')[:1]),
+        meses_cubiertos=F('mapa_meses_pagados').bitand(mascara_meses)
+    ).exclude(
+        meses_cubiertos=mascara_meses
     )
     
+    deudores = []
     for v in voluntarios:
-        validacion = puede_pagar_cuotas(v)
-        if not validacion['puede']:
-            continue  # Saltar exentos, bloqueados y desactivados
+        # Sin fila de estado de cuenta: ningún pago en el año, precio de la configuración
+        precio = v.precio_estado_cuenta
+        if precio is None:
+            precio = config.precio_estudiante if v.es_estudiante_cuotas else config.precio_regular
+        
+        meses_pendientes = [
+            {'mes': mes, 'anio': anio, 'monto': precio}
+            for mes in range(1, mes_actual + 1)
+            if not v.mapa_meses_pagados & (1 << (mes - 1))
+        ]
+        monto_total = precio * len(meses_pendientes)
         
-        deuda = calcular_deuda_cuotas(v, anio)
-        if deuda['monto'] > 0:
+        if monto_total > 0:
             deudores.append({
                 'voluntario': v,
-                'monto': deuda['monto'],
-                'meses_pendientes': deuda['meses_pendientes'],
-                'precio_cuota': obtener_precio_cuota(v)
+                'monto': monto_total,
+                'meses_pendientes': meses_pendientes,
+                'precio_cuota': precio
             })
     
     return deudores
 
 
+def filas_pdf_deudores(anio):
+    """
+    Filas del PDF de deudores de cuotas (descarga directa y trabajo en segundo plano)
+    """
+    filas = []
+    for deudor in calcular_deudores_cuotas(anio):
+        voluntario = deudor['voluntario']
+        filas.append({
+            'clave': voluntario.clave_bombero,
+            'nombre': f"{voluntario.nombre} {voluntario.apellido_paterno}",
+            'compania': voluntario.compania or '',
+            'meses_pendientes': len(deudor['meses_pendientes']),
+            'deuda_total': deudor['monto']
+        })
+    return filas
+
+
 @transaction.atomic
 def registrar_pago_cuota(voluntario_id, mes, anio, monto, datos_pago, usuario):
     """
@@ -268,7 +388,7 @@ def registrar_pago_cuota(voluntario_id, mes, anio, monto, datos_pago, usuario):
         tipo='ingreso',
         categoria='cuota',
         monto=monto,
-        descripcion=f'Cuota {meses_nombre[mes]} {anio} - {voluntario.nombre_completo}',
+        descripcion=f'Cuota {meses_nombre[mes]} {anio} - {voluntario.nombre_completo()}',
         fecha=pago.fecha_pago,
         pago_cuota=pago,
         numero_comprobante=datos_pago.get('numero_comprobante'),
@@ -276,9 +396,449 @@ def registrar_pago_cuota(voluntario_id, mes, anio, monto, datos_pago, usuario):
         created_by=usuario
     )
     
+    aplicar_pago_estado_cuenta(pago)
+    
     return pago
 
 
+NOMBRES_MESES = ['', 'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
+                 'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
+
+
+@transaction.atomic
+def registrar_pagos_cuotas_lote(voluntario_id, anio, meses, datos_pago, usuario,
+                                monto_por_mes=None, consolidar=True):
+    """
+    Registra varios meses de cuota de un voluntario en un mismo año
+    
+    Valida todos los meses juntos contra los pagos existentes y los inserta con
+    bulk_create; el número de consultas no depende de la cantidad de meses.
+    
+    Args:
+        meses: lista de meses (1-12) sin repetir
+        monto_por_mes: monto de cada mes (default: precio de cuota del voluntario)
+        consolidar: True crea un único movimiento por el total, False uno por mes
+    
+    Returns:
+        list: PagoCuota creados, ordenados por mes
+    """
+    meses = sorted(meses)
+    if not meses:
+        raise ValueError('Debe indicar al menos un mes')
+    if len(set(meses)) != len(meses) or not all(1 <= mes <= 12 for mes in meses):
+        raise ValueError('Los meses deben estar entre 1 y 12 y no repetirse')
+    
+    voluntario = Voluntario.objects.select_related('estado_cuotas').get(id=voluntario_id)
+    
+    validacion = puede_pagar_cuotas(voluntario)
+    if not validacion['puede']:
+        raise ValueError(f"No puede pagar cuotas: {validacion['mensaje']}")
+    
+    # Misma restricción que unique_together (voluntario, mes, anio), en una consulta
+    existentes = sorted(PagoCuota.objects.filter(
+        voluntario=voluntario, anio=anio, mes__in=meses
+    ).values_list('mes', flat=True))
+    if existentes:
+        raise ValueError(
+            f"Ya existen pagos para {', '.join(f'{mes}/{anio}' for mes in existentes)}"
+        )
+    
+    monto = Decimal(str(monto_por_mes)) if monto_por_mes is not None else obtener_precio_cuota(voluntario)
+    fecha_pago = datos_pago.get('fecha_pago') or timezone.now().date()
+    comprobante = datos_pago.get('numero_comprobante')
+    observaciones = datos_pago.get('observaciones')
+    
+    pagos = PagoCuota.objects.bulk_create([
+        PagoCuota(
+            voluntario=voluntario,
+            mes=mes,
+            anio=anio,
+            fecha_pago=fecha_pago,
+            monto_pagado=monto,
+            metodo_pago=datos_pago.get('metodo_pago'),
+            numero_comprobante=comprobante,
+            observaciones=observaciones,
+            created_by=usuario
+        )
+        for mes in meses
+    ])
+    
+    nombre = voluntario.nombre_completo()
+    if consolidar:
+        periodo = ', '.join(NOMBRES_MESES[mes] for mes in meses)
+        movimientos = [MovimientoFinanciero(
+            tipo='ingreso',
+            categoria='cuota',
+            monto=monto * len(pagos),
+            descripcion=f'Cuotas {periodo} {anio} - {nombre}',
+            fecha=fecha_pago,
+            pago_cuota=pagos[0],
+            numero_comprobante=comprobante,
+            observaciones=observaciones,
+            created_by=usuario
+        )]
+    else:
+        movimientos = [
+            MovimientoFinanciero(
+                tipo='ingreso',
+                categoria='cuota',
+                monto=monto,
+                descripcion=f'Cuota {NOMBRES_MESES[pago.mes]} {anio} - {nombre}',
+                fecha=fecha_pago,
+                pago_cuota=pago,
+                numero_comprobante=comprobante,
+                observaciones=observaciones,
+                created_by=usuario
+            )
+            for pago in pagos
+        ]
+    MovimientoFinanciero.objects.bulk_create(movimientos)
+    
+    # bulk_create no dispara señales: mantener las tablas derivadas a mano
+    aplicar_pagos_estado_cuenta(pagos)
+    invalidar_cierres_financieros(fecha_pago)
+    marcar_meses_resumen(fecha_pago)
+    
+    return pagos
+
+
+# ==================== ESTADO DE CUENTA DE CUOTAS ====================
+
+def _condicion_cuotas(voluntario, config):
+    """
+    Precio aplicable y exención vigentes de un voluntario
+    
+    Returns:
+        tuple: (precio: Decimal, exento: bool)
+    """
+    try:
+        es_estudiante = voluntario.estado_cuotas.es_estudiante
+    except EstadoCuotasBombero.DoesNotExist:
+        es_estudiante = False
+    
+    precio = config.precio_estudiante if es_estudiante else config.precio_regular
+    exento = not puede_pagar_cuotas(voluntario)['puede']
+    return precio, exento
+
+
+def _como_fecha(valor):
+    """Normaliza fecha_pago (date, datetime o 'YYYY-MM-DD') a date"""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, str):
+        return date.fromisoformat(valor[:10])
+    return valor
+
+
+def calcular_estado_cuenta(voluntario, anio, pagos, config):
+    """
+    Calcula los campos del estado de cuenta a partir de los pagos crudos
+    
+    Args:
+        pagos: iterable de (mes, monto_pagado, fecha_pago) del voluntario en el año
+    
+    Returns:
+        dict: campos de EstadoCuentaCuotas (sin voluntario/anio)
+    """
+    meses_pagados = 0
+    cantidad = 0
+    total_pagado = Decimal('0')
+    fecha_ultimo_pago = None
+    
+    for mes, monto, fecha_pago in pagos:
+        if not 1 <= mes <= 12:
+            continue
+        meses_pagados |= 1 << (mes - 1)
+        cantidad += 1
+        total_pagado += Decimal(str(monto))
+        fecha_pago = _como_fecha(fecha_pago)
+        if fecha_ultimo_pago is None or fecha_pago > fecha_ultimo_pago:
+            fecha_ultimo_pago = fecha_pago
+    
+    precio, exento = _condicion_cuotas(voluntario, config)
+    
+    return {
+        'meses_pagados': meses_pagados,
+        'cantidad_meses_pagados': cantidad,
+        'total_pagado': total_pagado,
+        'precio_cuota': precio,
+        'exento': exento,
+        'monto_adeudado': Decimal('0') if exento else precio * (12 - cantidad),
+        'fecha_ultimo_pago': fecha_ultimo_pago,
+    }
+
+
+def sincronizar_estado_cuenta(voluntario, anio):
+    """
+    Recalcula desde PagoCuota la fila de estado de cuenta de un voluntario/año
+    """
+    pagos = PagoCuota.objects.filter(
+        voluntario=voluntario, anio=anio
+    ).values_list('mes', 'monto_pagado', 'fecha_pago')
+    
+    estado_cuenta, created = EstadoCuentaCuotas.objects.update_or_create(
+        voluntario=voluntario,
+        anio=anio,
+        defaults=calcular_estado_cuenta(voluntario, anio, pagos, obtener_configuracion_cuotas())
+    )
+    return estado_cuenta
+
+
+def sincronizar_estados_cuenta(claves):
+    """
+    Recalcula desde PagoCuota, en lote, las filas de estado de cuenta indicadas
+    Para escrituras masivas (bulk_create) que no pasan por aplicar_pago_estado_cuenta.
+
+    Args:
+        claves: iterable de (voluntario_id, anio)
+
+    Returns:
+        int: filas creadas o actualizadas
+    """
+    claves = set(claves)
+    if not claves:
+        return 0
+
+    voluntario_ids = {voluntario_id for voluntario_id, _ in claves}
+    pagos = {}
+    for voluntario_id, anio, mes, monto, fecha_pago in PagoCuota.objects.filter(
+        voluntario_id__in=voluntario_ids, anio__in={anio for _, anio in claves}
+    ).order_by().values_list('voluntario_id', 'anio', 'mes', 'monto_pagado', 'fecha_pago'):
+        if (voluntario_id, anio) in claves:
+            pagos.setdefault((voluntario_id, anio), []).append((mes, monto, fecha_pago))
+
+    config = obtener_configuracion_cuotas()
+    voluntarios = Voluntario.objects.select_related('estado_cuotas').in_bulk(voluntario_ids)
+    EstadoCuentaCuotas.objects.bulk_create(
+        [
+            EstadoCuentaCuotas(
+                voluntario_id=voluntario_id, anio=anio,
+                **calcular_estado_cuenta(
+                    voluntarios[voluntario_id], anio, pagos.get((voluntario_id, anio), []), config
+                )
+            )
+            for voluntario_id, anio in sorted(claves)
+        ],
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['voluntario', 'anio'],
+        update_fields=CAMPOS_ESTADO_CUENTA + ['ultima_actualizacion']
+    )
+    return len(claves)
+
+
+def obtener_estado_cuenta(voluntario, anio=None):
+    """
+    Obtiene la fila de estado de cuenta, creándola desde los pagos si no existe
+    """
+    if anio is None:
+        anio = timezone.now().year
+    
+    estado_cuenta = EstadoCuentaCuotas.objects.filter(voluntario=voluntario, anio=anio).first()
+    if estado_cuenta is None:
+        estado_cuenta = sincronizar_estado_cuenta(voluntario, anio)
+    return estado_cuenta
+
+
+def aplicar_pago_estado_cuenta(pago):
+    """
+    Suma un pago recién creado al estado de cuenta (actualización incremental)
+    """
+    aplicar_pagos_estado_cuenta([pago])
+
+
+def aplicar_pagos_estado_cuenta(pagos):
+    """
+    Suma al estado de cuenta, en un solo UPDATE, pagos recién creados de un
+    mismo voluntario y año (meses distintos)
+    """
+    pagos = [pago for pago in pagos if 1 <= int(pago.mes) <= 12]
+    if not pagos:
+        return
+    
+    mascara = 0
+    for pago in pagos:
+        mascara |= 1 << (int(pago.mes) - 1)
+    fecha = Value(max(_como_fecha(pago.fecha_pago) for pago in pagos), output_field=DateField())
+    actualizados = EstadoCuentaCuotas.objects.filter(
+        voluntario_id=pagos[0].voluntario_id,
+        anio=pagos[0].anio
+    ).update(
+        meses_pagados=F('meses_pagados').bitor(mascara),
+        cantidad_meses_pagados=F('cantidad_meses_pagados') + len(pagos),
+        total_pagado=F('total_pagado') + sum(Decimal(str(pago.monto_pagado)) for pago in pagos),
+        monto_adeudado=Greatest(F('monto_adeudado') - F('precio_cuota') * len(pagos), Value(Decimal('0'))),
+        fecha_ultimo_pago=Greatest(Coalesce('fecha_ultimo_pago', fecha), fecha),
+        ultima_actualizacion=timezone.now()
+    )
+    
+    # Primera vez en el año: se construye la fila completa (ya incluye estos pagos)
+    if not actualizados:
+        sincronizar_estado_cuenta(pagos[0].voluntario, pagos[0].anio)
+
+
+def actualizar_condicion_estado_cuenta(voluntario, anio=None):
+    """
+    Reaplica precio y exención al estado de cuenta tras un cambio de condición
+    (estudiante, desactivación de cuotas). Los meses pagados no cambian.
+    """
+    if anio is None:
+        anio = timezone.now().year
+    
+    estado_cuenta = EstadoCuentaCuotas.objects.filter(voluntario=voluntario, anio=anio).first()
+    if estado_cuenta is None:
+        return sincronizar_estado_cuenta(voluntario, anio)
+    
+    precio, exento = _condicion_cuotas(voluntario, obtener_configuracion_cuotas())
+    estado_cuenta.precio_cuota = precio
+    estado_cuenta.exento = exento
+    estado_cuenta.monto_adeudado = (
+        Decimal('0') if exento else precio * (12 - estado_cuenta.cantidad_meses_pagados)
+    )
+    estado_cuenta.save(update_fields=['precio_cuota', 'exento', 'monto_adeudado', 'ultima_actualizacion'])
+    return estado_cuenta
+
+
+def actualizar_precios_estado_cuenta(anio=None):
+    """
+    Reaplica los precios de ConfiguracionCuotas a todo el estado de cuenta del año
+    """
+    if anio is None:
+        anio = timezone.now().year
+    
+    config = obtener_configuracion_cuotas()
+    filas = EstadoCuentaCuotas.objects.filter(anio=anio)
+    
+    filas.update(
+        precio_cuota=Case(
+            When(
+                Exists(EstadoCuotasBombero.objects.filter(
+                    voluntario=OuterRef('voluntario'), es_estudiante=True
+                )),
+                then=Value(config.precio_estudiante)
+            ),
+            default=Value(config.precio_regular),
+            output_field=DecimalField(max_digits=10, decimal_places=2)
+        ),
+        ultima_actualizacion=timezone.now()
+    )
+    filas.filter(exento=False).update(
+        monto_adeudado=ExpressionWrapper(
+            F('precio_cuota') * (12 - F('cantidad_meses_pagados')),
+            output_field=DecimalField(max_digits=10, decimal_places=2)
+        )
+    )
+
+
+CAMPOS_ESTADO_CUENTA = [
+    'meses_pagados', 'cantidad_meses_pagados', 'total_pagado',
+    'precio_cuota', 'exento', 'monto_adeudado', 'fecha_ultimo_pago'
+]
+
+
+def anios_estado_cuenta():
+    """Años con pagos o con estado de cuenta, más el año en curso"""
+    anios = set(PagoCuota.objects.values_list('anio', flat=True).distinct())
+    anios |= set(EstadoCuentaCuotas.objects.values_list('anio', flat=True).distinct())
+    anios.add(timezone.now().year)
+    return sorted(anios)
+
+
+def _estados_cuenta_esperados(anios, incluir_todos_anio_actual=False):
+    """
+    Calcula desde PagoCuota el estado de cuenta esperado de cada voluntario/año
+    
+    Returns:
+        dict: {(voluntario_id, anio): campos}
+    """
+    config = obtener_configuracion_cuotas()
+    
+    pagos = {}
+    for voluntario_id, anio, mes, monto, fecha_pago in PagoCuota.objects.filter(
+        anio__in=anios
+    ).order_by().values_list('voluntario_id', 'anio', 'mes', 'monto_pagado', 'fecha_pago'):
+        pagos.setdefault((voluntario_id, anio), []).append((mes, monto, fecha_pago))
+    
+    claves = set(pagos)
+    claves |= set(EstadoCuentaCuotas.objects.filter(anio__in=anios).values_list('voluntario_id', 'anio'))
+    
+    voluntarios = {v.id: v for v in Voluntario.objects.select_related('estado_cuotas')}
+    
+    anio_actual = timezone.now().year
+    if incluir_todos_anio_actual and anio_actual in anios:
+        claves |= {(voluntario_id, anio_actual) for voluntario_id in voluntarios}
+    
+    return {
+        (voluntario_id, anio): calcular_estado_cuenta(
+            voluntarios[voluntario_id], anio, pagos.get((voluntario_id, anio), []), config
+        )
+        for voluntario_id, anio in claves
+    }
+
+
+@transaction.atomic
+def reconstruir_estado_cuenta(anios):
+    """
+    Reconstruye desde cero el estado de cuenta de los años indicados
+    
+    Returns:
+        int: filas creadas
+    """
+    esperados = _estados_cuenta_esperados(anios, incluir_todos_anio_actual=True)
+    
+    EstadoCuentaCuotas.objects.filter(anio__in=anios).delete()
+    EstadoCuentaCuotas.objects.bulk_create(
+        [
+            EstadoCuentaCuotas(voluntario_id=voluntario_id, anio=anio, **campos)
+            for (voluntario_id, anio), campos in esperados.items()
+        ],
+        batch_size=500
+    )
+    return len(esperados)
+
+
+def verificar_estado_cuenta(anios):
+    """
+    Compara el estado de cuenta materializado contra los pagos crudos
+    
+    Returns:
+        list: [
+            {
+                'voluntario_id': int,
+                'anio': int,
+                'diferencias': {campo: (guardado, esperado)}
+            }
+        ]
+    """
+    esperados = _estados_cuenta_esperados(anios)
+    guardados = {
+        (fila['voluntario_id'], fila['anio']): fila
+        for fila in EstadoCuentaCuotas.objects.filter(anio__in=anios).values(
+            'voluntario_id', 'anio', *CAMPOS_ESTADO_CUENTA
+        )
+    }
+    
+    inconsistencias = []
+    for (voluntario_id, anio), esperado in sorted(esperados.items()):
+        guardado = guardados.get((voluntario_id, anio))
+        if guardado is None:
+            diferencias = {'fila': (None, 'faltante')}
+        else:
+            diferencias = {
+                campo: (guardado[campo], esperado[campo])
+                for campo in CAMPOS_ESTADO_CUENTA
+                if guardado[campo] != esperado[campo]
+            }
+        if diferencias:
+            inconsistencias.append({
+                'voluntario_id': voluntario_id,
+                'anio': anio,
+                'diferencias': diferencias
+            })
+    
+    return inconsistencias
+
+
 # ==================== ESTADO DE CUOTAS ====================
 
 @transaction.atomic
@@ -294,6 +854,8 @@ def activar_estudiante(voluntario_id, datos, usuario):
     estado.observaciones_estudiante = datos.get('observaciones', '')
     estado.save()
     
+    actualizar_condicion_estado_cuenta(voluntario)
+    
     return estado
 
 
@@ -308,6 +870,7 @@ def desactivar_estudiante(voluntario_id):
         estado.fecha_activacion_estudiante = None
         estado.observaciones_estudiante = None
         estado.save()
+        actualizar_condicion_estado_cuenta(estado.voluntario)
         return estado
     except EstadoCuotasBombero.DoesNotExist:
         return None
@@ -328,6 +891,8 @@ def desactivar_cuotas_voluntario(voluntario_id, motivo, usuario):
     estado.desactivado_por = usuario.username if usuario else 'Sistema'
     estado.save()
     
+    actualizar_condicion_estado_cuenta(voluntario)
+    
     return estado
 
 
@@ -343,6 +908,7 @@ def reactivar_cuotas_voluntario(voluntario_id):
         estado.fecha_desactivacion = None
         estado.desactivado_por = None
         estado.save()
+        actualizar_condicion_estado_cuenta(estado.voluntario)
         return estado
     except EstadoCuotasBombero.DoesNotExist:
         return None
@@ -350,16 +916,95 @@ def reactivar_cuotas_voluntario(voluntario_id):
 
 # ==================== BENEFICIOS ====================
 
-@transaction.atomic
-def crear_beneficio_con_asignaciones(datos_beneficio, usuario):
+# Estados de voluntario que reciben tarjetas al crear un beneficio
+ESTADOS_CON_BENEFICIO = ['activo', 'inactivo']
+
+
+def asignar_beneficio(beneficio, usuario=None, lote=1000):
     """
-    Crea un beneficio y asigna automáticamente tarjetas a TODOS los voluntarios
-    según su categoría de antigüedad
+    Motor de asignación: crea las asignaciones de un beneficio para todos los
+    voluntarios elegibles en una sola pasada
+    
+    Lee solo (id, categoria) de los voluntarios, calcula tarjetas y montos por
+    categoría una vez y escribe con bulk_create en lotes. Las asignaciones no
+    se retienen en memoria: se retorna un resumen.
+    
+    Returns:
+        dict: {
+            'total_asignaciones': int,
+            'total_tarjetas': int,
+            'monto_total': Decimal,
+            'por_categoria': {categoria: {'voluntarios', 'tarjetas', 'monto'}}
+        }
+    """
+    precio = Decimal(str(beneficio.precio_por_tarjeta))
+    tarjetas_por_categoria = {
+        categoria: int(getattr(beneficio, campo))
+        for categoria, campo in CAMPO_TARJETAS_POR_CATEGORIA.items()
+    }
+    por_categoria = {
+        categoria: {'voluntarios': 0, 'tarjetas': 0, 'monto': Decimal('0')}
+        for categoria in tarjetas_por_categoria
+    }
+    
+    voluntarios = Voluntario.objects.filter(
+        estado_bombero__in=ESTADOS_CON_BENEFICIO
+    ).order_by('id').values_list('id', 'categoria')
+    
+    bloque = []
+    for voluntario_id, categoria in voluntarios.iterator(chunk_size=lote):
+        tarjetas = tarjetas_por_categoria[categoria]
+        monto_total = precio * tarjetas
+        bloque.append(AsignacionBeneficio(
+            beneficio=beneficio,
+            voluntario_id=voluntario_id,
+            tarjetas_asignadas=tarjetas,
+            monto_total=monto_total,
+            monto_pendiente=monto_total,
+            created_by=usuario
+        ))
+        resumen = por_categoria[categoria]
+        resumen['voluntarios'] += 1
+        resumen['tarjetas'] += tarjetas
+        resumen['monto'] += monto_total
+        
+        if len(bloque) >= lote:
+            AsignacionBeneficio.objects.bulk_create(bloque, batch_size=lote)
+            bloque = []
+    if bloque:
+        AsignacionBeneficio.objects.bulk_create(bloque, batch_size=lote)
+    
+    resumen = {
+        'total_asignaciones': sum(r['voluntarios'] for r in por_categoria.values()),
+        'total_tarjetas': sum(r['tarjetas'] for r in por_categoria.values()),
+        'monto_total': sum((r['monto'] for r in por_categoria.values()), Decimal('0')),
+        'por_categoria': por_categoria,
+    }
+    
+    # Estadísticas iniciales desde el resumen: todas las asignaciones están pendientes
+    EstadisticaBeneficio.objects.update_or_create(beneficio=beneficio, defaults={
+        **{campo: 0 for campo in CAMPOS_ESTADISTICA_BENEFICIO},
+        'total_asignaciones': resumen['total_asignaciones'],
+        'total_tarjetas_asignadas': resumen['total_tarjetas'],
+        'monto_total_esperado': resumen['monto_total'],
+        'monto_pendiente': resumen['monto_total'],
+        'asignaciones_pendiente': resumen['total_asignaciones'],
+        'asignaciones_con_deuda': sum(
+            r['voluntarios'] for r in por_categoria.values() if r['monto'] > 0
+        ),
+    })
+    
+    return resumen
+
+
+def crear_beneficio(datos_beneficio, usuario):
     """
-    # Crear beneficio
-    beneficio = Beneficio.objects.create(
+    Crea un beneficio sin asignaciones (las vistas encolan asignar_beneficio
+    como trabajo en segundo plano, ver utils_trabajos.py)
+    """
+    return Beneficio.objects.create(
         nombre=datos_beneficio['nombre'],
-        descripcion=datos_beneficio['descripcion'],
+        descripcion=datos_beneficio.get('descripcion', ''),
         fecha_evento=datos_beneficio['fecha_evento'],
         tarjetas_voluntarios=datos_beneficio.get('tarjetas_voluntarios', 5),
         tarjetas_honorarios_cia=datos_beneficio.get('tarjetas_honorarios_cia', 3),
@@ -369,72 +1014,135 @@ def crear_beneficio_con_asignaciones(datos_beneficio, usuario):
         precio_tarjeta_extra=datos_beneficio['precio_tarjeta_extra'],
         created_by=usuario
     )
-    
-    # Asignar a TODOS los voluntarios activos/inactivos
-    voluntarios = Voluntario.objects.filter(
-        Q(estado_bombero='activo') | Q(estado_bombero='inactivo')
-    )
-    
-    asignaciones = []
-    for voluntario in voluntarios:
-        categoria = calcular_categoria_bombero(voluntario.fecha_ingreso)
-        
-        # Determinar tarjetas según categoría
-        if 'Insigne' in categoria:
-            tarjetas = beneficio.tarjetas_insignes
-        elif 'Honorario del Cuerpo' in categoria:
-            tarjetas = beneficio.tarjetas_honorarios_cuerpo
-        elif 'Honorario de Compañía' in categoria:
-            tarjetas = beneficio.tarjetas_honorarios_cia
-        else:
-            tarjetas = beneficio.tarjetas_voluntarios
-        
-        # Calcular monto total
-        monto_total = Decimal(str(tarjetas)) * beneficio.precio_por_tarjeta
-        
-        asignacion = AsignacionBeneficio.objects.create(
-            beneficio=beneficio,
-            voluntario=voluntario,
-            tarjetas_asignadas=tarjetas,
-            monto_total=monto_total,
-            monto_pendiente=monto_total,
-            created_by=usuario
-        )
-        asignaciones.append(asignacion)
-    
-    return beneficio, asignaciones
 
 
 @transaction.atomic
-def registrar_pago_beneficio(asignacion_id, tipo_pago, cantidad_tarjetas, monto, datos_pago, usuario):
+def crear_beneficio_con_asignaciones(datos_beneficio, usuario):
     """
-    Registra un pago de beneficio (normal o extra)
-    y crea el movimiento financiero automáticamente
+    Crea un beneficio y asigna automáticamente tarjetas a TODOS los voluntarios
+    activos/inactivos según su categoría de antigüedad
+    
+    Returns:
+        tuple: (beneficio, resumen de asignar_beneficio)
     """
-    asignacion = AsignacionBeneficio.objects.select_for_update().get(id=asignacion_id)
+    beneficio = crear_beneficio(datos_beneficio, usuario)
+    return beneficio, asignar_beneficio(beneficio, usuario)
+
+
+# Cambios concurrentes de estado tolerados por venta, y tiempo máximo (segundos)
+# reintentando una transacción ante bloqueos de la base de datos
+INTENTOS_VENTA_TARJETAS = 12
+ESPERA_MAXIMA_BLOQUEO = 15
+
+
+def reintentar_si_bloqueada(funcion):
+    """
+    Decorador: repite la función si la base de datos reporta un bloqueo
+    ("database is locked" en SQLite) con espera exponencial aleatoria
+    
+    La función debe abrir su propia transacción (@transaction.atomic debajo de
+    este decorador). Dentro de una transacción externa no se reintenta: el
+    error se propaga a quien la abrió.
+    """
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        limite = time.monotonic() + ESPERA_MAXIMA_BLOQUEO
+        intento = 0
+        while True:
+            try:
+                return funcion(*args, **kwargs)
+            except OperationalError as e:
+                if ('locked' not in str(e) or transaction.get_connection().in_atomic_block
+                        or time.monotonic() >= limite):
+                    raise
+                time.sleep(random.uniform(0, min(0.1, 0.002 * 2 ** intento)))
+                intento += 1
+    return envoltura
+
+
+def vender_tarjetas_asignacion(asignacion_id, tipo_pago, cantidad_tarjetas, monto):
+    """
+    Suma una venta (normal o extra) a los contadores de una asignación sin
+    leer-modificar-escribir: un solo UPDATE condicional con expresiones F()
+    
+        tarjetas_vendidas = tarjetas_vendidas + n
+        WHERE tarjetas_asignadas - tarjetas_vendidas - tarjetas_liberadas >= n
+    
+    El estado de pago se calcula en el mismo UPDATE y se compara contra el
+    leído; si otro pago lo cambió entremedio se reintenta. No usa
+    select_for_update (que SQLite ignora). Debe llamarse dentro de una transacción.
     
-    # Validaciones
+    Returns:
+        AsignacionBeneficio: la asignación ya actualizada (con beneficio y voluntario)
+    """
+    normales = cantidad_tarjetas if tipo_pago == 'normal' else 0
+    contador = 'tarjetas_vendidas' if tipo_pago == 'normal' else 'tarjetas_extras_vendidas'
+    
+    # El orden importa en MySQL, que evalúa las asignaciones de izquierda a derecha:
+    # el estado debe leer monto_pagado antes de sumarle el monto
+    cambios = {
+        'estado_pago': Case(
+            When(
+                Q(monto_pagado__gte=F('monto_total') - monto)
+                & Q(tarjetas_vendidas=F('tarjetas_asignadas') - F('tarjetas_liberadas') - normales),
+                then=Value('completo')
+            ),
+            When(monto_pagado__gt=-monto, then=Value('parcial')),
+            default=F('estado_pago')
+        ),
+        'monto_pagado': F('monto_pagado') + monto,
+        contador: F(contador) + cantidad_tarjetas,
+    }
+    # Las extras no forman parte de monto_total: no descuentan deuda
     if tipo_pago == 'normal':
-        if asignacion.tarjetas_disponibles < cantidad_tarjetas:
-            raise ValueError(f"Solo tiene {asignacion.tarjetas_disponibles} tarjetas disponibles")
+        cambios['monto_pendiente'] = F('monto_pendiente') - monto
+    
+    for _ in range(INTENTOS_VENTA_TARJETAS):
+        actual = AsignacionBeneficio.objects.filter(id=asignacion_id).values(
+            'estado_pago', 'tarjetas_asignadas', 'tarjetas_vendidas', 'tarjetas_liberadas'
+        ).first()
+        if actual is None:
+            raise AsignacionBeneficio.DoesNotExist(f'Asignación {asignacion_id} no existe')
+        disponibles = actual['tarjetas_asignadas'] - actual['tarjetas_vendidas'] - actual['tarjetas_liberadas']
+        if disponibles < normales:
+            raise ValueError(f"Solo tiene {disponibles} tarjetas disponibles")
         
-        # Actualizar asignación
-        asignacion.tarjetas_vendidas += cantidad_tarjetas
-    else:  # extra
-        # No hay límite para ventas extras
-        asignacion.tarjetas_extras_vendidas += cantidad_tarjetas
+        filas = AsignacionBeneficio.objects.filter(
+            id=asignacion_id,
+            estado_pago=actual['estado_pago'],
+            tarjetas_vendidas__lte=F('tarjetas_asignadas') - F('tarjetas_liberadas') - normales
+        ).update(**cambios)
+        if filas:
+            break
+    else:
+        raise ValueError('La asignación está siendo modificada por otro pago, intente nuevamente')
     
-    # Actualizar montos
-    asignacion.monto_pagado += monto
-    asignacion.monto_pendiente = asignacion.monto_total - asignacion.monto_pagado
+    # La fila queda bloqueada por el UPDATE hasta el commit: esta lectura es la
+    # foto exacta posterior al pago y la anterior se obtiene restando el pago
+    asignacion = AsignacionBeneficio.objects.select_related('beneficio', 'voluntario').get(id=asignacion_id)
+    despues = foto_asignacion(asignacion)
+    antes = dict(despues, estado_pago=actual['estado_pago'])
+    antes[contador] -= cantidad_tarjetas
+    antes['monto_pagado'] -= monto
+    if tipo_pago == 'normal':
+        antes['monto_pendiente'] += monto
+    ajustar_estadistica_beneficio(asignacion.beneficio_id, antes, despues)
     
-    # Actualizar estado
-    if asignacion.monto_pendiente <= 0 and asignacion.tarjetas_disponibles == 0:
-        asignacion.estado_pago = 'completo'
-    elif asignacion.monto_pagado > 0:
-        asignacion.estado_pago = 'parcial'
+    return asignacion
+
+
+@reintentar_si_bloqueada
+@transaction.atomic
+def registrar_pago_beneficio(asignacion_id, tipo_pago, cantidad_tarjetas, monto, datos_pago, usuario):
+    """
+    Registra un pago de beneficio (normal o extra)
+    y crea el movimiento financiero automáticamente
     
-    asignacion.save()
+    Los contadores se actualizan con vender_tarjetas_asignacion, seguro ante
+    ventas concurrentes de la misma asignación.
+    """
+    monto = Decimal(str(monto))
+    asignacion = vender_tarjetas_asignacion(asignacion_id, tipo_pago, cantidad_tarjetas, monto)
     
     # Crear pago
     pago = PagoBeneficio.objects.create(
@@ -455,7 +1163,7 @@ def registrar_pago_beneficio(asignacion_id, tipo_pago, cantidad_tarjetas, monto,
         tipo='ingreso',
         categoria='beneficio',
         monto=monto,
-        descripcion=f'Beneficio {asignacion.beneficio.nombre} - {asignacion.voluntario.nombre_completo} ({tipo_texto}, {cantidad_tarjetas} tarjetas)',
+        descripcion=f'Beneficio {asignacion.beneficio.nombre} - {asignacion.voluntario.nombre_completo()} ({tipo_texto}, {cantidad_tarjetas} tarjetas)',
         fecha=pago.fecha_pago,
         pago_beneficio=pago,
         numero_comprobante=datos_pago.get('numero_comprobante'),
@@ -472,6 +1180,7 @@ def liberar_tarjetas(asignacion_id, cantidad, motivo, usuario):
     Libera tarjetas de una asignación
     """
     asignacion = AsignacionBeneficio.objects.select_for_update().get(id=asignacion_id)
+    antes = foto_asignacion(asignacion)
     
     if asignacion.tarjetas_disponibles < cantidad:
         raise ValueError(f"Solo tiene {asignacion.tarjetas_disponibles} tarjetas disponibles")
@@ -508,6 +1217,7 @@ def liberar_tarjetas(asignacion_id, cantidad, motivo, usuario):
     
     asignacion.historial_liberaciones = json.dumps(historial)
     asignacion.save()
+    ajustar_estadistica_beneficio(asignacion.beneficio_id, antes, foto_asignacion(asignacion))
     
     return asignacion
 
@@ -539,67 +1249,1027 @@ def calcular_deudores_beneficio(beneficio_id):
 def puede_cerrar_beneficio(beneficio_id):
     """
     Verifica si un beneficio puede ser cerrado
-    NO puede cerrarse si hay deudores
+    NO puede cerrarse si hay deudores (EXISTS, sin cargar la lista)
+    """
+    return not AsignacionBeneficio.objects.filter(
+        beneficio_id=beneficio_id,
+        monto_pendiente__gt=0
+    ).exists()
+
+
+# ==================== ESTADÍSTICAS DE BENEFICIOS ====================
+
+_MONTO = DecimalField(max_digits=14, decimal_places=2)
+
+# Agregación condicional de todas las estadísticas en una sola consulta.
+# Los conteos van antes que la suma 'monto_pendiente': con annotate() un filtro
+# posterior sobre monto_pendiente apuntaría a la suma y no a la columna.
+AGREGADOS_ESTADISTICA_BENEFICIO = {
+    'total_asignaciones': Count('id'),
+    **{
+        f'asignaciones_{estado}': Count('id', filter=Q(estado_pago=estado))
+        for estado, _ in AsignacionBeneficio.ESTADO_PAGO_CHOICES
+    },
+    'asignaciones_con_deuda': Count('id', filter=Q(monto_pendiente__gt=0)),
+    'total_tarjetas_asignadas': Coalesce(Sum('tarjetas_asignadas'), 0),
+    'total_tarjetas_vendidas': Coalesce(Sum('tarjetas_vendidas'), 0),
+    'total_tarjetas_extras': Coalesce(Sum('tarjetas_extras_vendidas'), 0),
+    'total_tarjetas_liberadas': Coalesce(Sum('tarjetas_liberadas'), 0),
+    'monto_total_esperado': Coalesce(Sum('monto_total'), Value(Decimal('0')), output_field=_MONTO),
+    'monto_recaudado': Coalesce(Sum('monto_pagado'), Value(Decimal('0')), output_field=_MONTO),
+    'monto_pendiente': Coalesce(Sum('monto_pendiente'), Value(Decimal('0')), output_field=_MONTO),
+}
+
+CAMPOS_ESTADISTICA_BENEFICIO = list(AGREGADOS_ESTADISTICA_BENEFICIO)
+
+# Campo de EstadisticaBeneficio → campo de AsignacionBeneficio que suma
+_SUMAS_ESTADISTICA = {
+    'total_tarjetas_asignadas': 'tarjetas_asignadas',
+    'total_tarjetas_vendidas': 'tarjetas_vendidas',
+    'total_tarjetas_extras': 'tarjetas_extras_vendidas',
+    'total_tarjetas_liberadas': 'tarjetas_liberadas',
+    'monto_total_esperado': 'monto_total',
+    'monto_recaudado': 'monto_pagado',
+    'monto_pendiente': 'monto_pendiente',
+}
+
+
+def _normalizar_estadistica(fila):
+    for campo in ('monto_total_esperado', 'monto_recaudado', 'monto_pendiente'):
+        fila[campo] = _centavos(fila[campo])
+    return fila
+
+
+def calcular_estadistica_beneficio(beneficio_id):
     """
-    deudores = calcular_deudores_beneficio(beneficio_id)
-    return len(deudores) == 0
+    Calcula desde las asignaciones todas las estadísticas de un beneficio
+    
+    Returns:
+        dict: {campo de EstadisticaBeneficio: valor}
+    """
+    return _normalizar_estadistica(
+        AsignacionBeneficio.objects.filter(beneficio_id=beneficio_id).aggregate(
+            **AGREGADOS_ESTADISTICA_BENEFICIO
+        )
+    )
+
+
+def reconstruir_estadistica_beneficio(beneficio_id):
+    """Recalcula y guarda la fila de estadísticas de un beneficio"""
+    estadistica, _ = EstadisticaBeneficio.objects.update_or_create(
+        beneficio_id=beneficio_id,
+        defaults=calcular_estadistica_beneficio(beneficio_id)
+    )
+    return estadistica
+
+
+def foto_asignacion(asignacion):
+    """Valores de una asignación que alimentan las estadísticas (antes/después de un cambio)"""
+    foto = {campo: getattr(asignacion, campo) for campo in _SUMAS_ESTADISTICA.values()}
+    foto['estado_pago'] = asignacion.estado_pago
+    return foto
+
+
+def ajustar_estadistica_beneficio(beneficio_id, antes, despues):
+    """
+    Aplica a EstadisticaBeneficio, en un solo UPDATE con F(), la diferencia
+    entre dos fotos de una asignación (ver foto_asignacion)
+    """
+    cambios = {}
+    for campo, origen in _SUMAS_ESTADISTICA.items():
+        diferencia = despues[origen] - antes[origen]
+        if diferencia:
+            cambios[campo] = F(campo) + diferencia
+    
+    if antes['estado_pago'] != despues['estado_pago']:
+        cambios[f"asignaciones_{antes['estado_pago']}"] = F(f"asignaciones_{antes['estado_pago']}") - 1
+        cambios[f"asignaciones_{despues['estado_pago']}"] = F(f"asignaciones_{despues['estado_pago']}") + 1
+    
+    deuda = int(despues['monto_pendiente'] > 0) - int(antes['monto_pendiente'] > 0)
+    if deuda:
+        cambios['asignaciones_con_deuda'] = F('asignaciones_con_deuda') + deuda
+    
+    if not cambios:
+        return
+    cambios['ultima_actualizacion'] = timezone.now()
+    
+    # Sin fila (beneficio anterior a las estadísticas): se construye completa
+    if not EstadisticaBeneficio.objects.filter(beneficio_id=beneficio_id).update(**cambios):
+        reconstruir_estadistica_beneficio(beneficio_id)
+
+
+def obtener_estadisticas_beneficio(beneficio_id, recalcular=False):
+    """
+    Obtiene estadísticas completas de un beneficio
+    Para el dashboard de beneficios
+    
+    Lee la fila desnormalizada EstadisticaBeneficio; si no existe (o con
+    recalcular=True) la calcula con una consulta de agregación condicional.
+    """
+    beneficio = Beneficio.objects.select_related('estadistica').get(id=beneficio_id)
+    try:
+        estadistica = None if recalcular else beneficio.estadistica
+    except EstadisticaBeneficio.DoesNotExist:
+        estadistica = None
+    if estadistica is None:
+        estadistica = reconstruir_estadistica_beneficio(beneficio.id)
+    
+    monto_total_esperado = estadistica.monto_total_esperado
+    monto_recaudado = estadistica.monto_recaudado
+    
+    return {
+        'beneficio': beneficio,
+        'total_asignaciones': estadistica.total_asignaciones,
+        'total_tarjetas_asignadas': estadistica.total_tarjetas_asignadas,
+        'total_tarjetas_vendidas': estadistica.total_tarjetas_vendidas,
+        'total_tarjetas_extras': estadistica.total_tarjetas_extras,
+        'total_tarjetas_liberadas': estadistica.total_tarjetas_liberadas,
+        'monto_total_esperado': monto_total_esperado,
+        'monto_recaudado': monto_recaudado,
+        'monto_pendiente': estadistica.monto_pendiente,
+        'porcentaje_recaudado': (monto_recaudado / monto_total_esperado * 100) if monto_total_esperado > 0 else 0,
+        'estados': {
+            estado: getattr(estadistica, f'asignaciones_{estado}')
+            for estado, _ in AsignacionBeneficio.ESTADO_PAGO_CHOICES
+        },
+        'puede_cerrar': puede_cerrar_beneficio(beneficio.id)
+    }
+
+
+def _estadisticas_esperadas():
+    """Estadísticas de todos los beneficios desde las asignaciones (una consulta agrupada)"""
+    vacia = {campo: 0 for campo in CAMPOS_ESTADISTICA_BENEFICIO}
+    esperadas = {
+        beneficio_id: _normalizar_estadistica(dict(vacia))
+        for beneficio_id in Beneficio.objects.values_list('id', flat=True)
+    }
+    for fila in AsignacionBeneficio.objects.order_by().values('beneficio_id').annotate(
+        **AGREGADOS_ESTADISTICA_BENEFICIO
+    ):
+        esperadas[fila.pop('beneficio_id')] = _normalizar_estadistica(fila)
+    return esperadas
+
+
+@transaction.atomic
+def reconstruir_estadisticas_beneficios():
+    """
+    Recalcula las estadísticas de todos los beneficios
+    
+    Returns:
+        int: filas escritas
+    """
+    esperadas = _estadisticas_esperadas()
+    EstadisticaBeneficio.objects.bulk_create(
+        [
+            EstadisticaBeneficio(beneficio_id=beneficio_id, **campos)
+            for beneficio_id, campos in esperadas.items()
+        ],
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['beneficio'],
+        update_fields=CAMPOS_ESTADISTICA_BENEFICIO + ['ultima_actualizacion']
+    )
+    return len(esperadas)
+
+
+def verificar_estadisticas_beneficios():
+    """
+    Compara las estadísticas guardadas contra las asignaciones
+    
+    Returns:
+        list: [{'beneficio_id': int, 'diferencias': {campo: (guardado, esperado)}}]
+    """
+    guardadas = {
+        fila.pop('beneficio_id'): fila
+        for fila in EstadisticaBeneficio.objects.values('beneficio_id', *CAMPOS_ESTADISTICA_BENEFICIO)
+    }
+    inconsistencias = []
+    for beneficio_id, esperada in sorted(_estadisticas_esperadas().items()):
+        guardada = guardadas.get(beneficio_id)
+        if guardada is None:
+            diferencias = {'fila': (None, 'faltante')}
+        else:
+            diferencias = {
+                campo: (guardada[campo], esperada[campo])
+                for campo in CAMPOS_ESTADISTICA_BENEFICIO
+                if guardada[campo] != esperada[campo]
+            }
+        if diferencias:
+            inconsistencias.append({'beneficio_id': beneficio_id, 'diferencias': diferencias})
+    return inconsistencias
 
 
 # ==================== FINANZAS ====================
 
-def calcular_saldo_compania():
+def _mes_siguiente(anio, mes):
+    return (anio + 1, 1) if mes == 12 else (anio, mes + 1)
+
+
+def _sumar_movimientos(movimientos):
+    """
+    Suma exacta (Decimal) de (tipo, categoria, monto)
+    
+    Returns:
+        dict: {'ingresos', 'egresos', 'cantidad', 'detalle': {tipo: {categoria: Decimal}}}
+    """
+    totales = {'ingreso': Decimal('0'), 'egreso': Decimal('0')}
+    detalle = {'ingreso': {}, 'egreso': {}}
+    cantidad = 0
+    for tipo, categoria, monto in movimientos:
+        monto = Decimal(str(monto))
+        totales[tipo] = totales.get(tipo, Decimal('0')) + monto
+        por_categoria = detalle.setdefault(tipo, {})
+        por_categoria[categoria] = por_categoria.get(categoria, Decimal('0')) + monto
+        cantidad += 1
+    return {
+        'ingresos': totales['ingreso'],
+        'egresos': totales['egreso'],
+        'cantidad': cantidad,
+        'detalle': detalle,
+    }
+
+
+def invalidar_cierres_financieros(*fechas):
+    """
+    Elimina los cierres desde el mes de la fecha más antigua en adelante
+    Se llama cuando se crea, modifica o elimina un movimiento; los cierres se
+    recalculan en la próxima consulta de saldo. Los movimientos del mes en
+    curso no tocan ningún cierre y no generan consultas.
+    
+    Returns:
+        int: cierres eliminados
+    """
+    fechas = [_como_fecha(f) for f in fechas if f]
+    if not fechas:
+        return 0
+    fecha = min(fechas)
+    if fecha >= timezone.now().date().replace(day=1):
+        return 0
+    return CierreMensualFinanciero.objects.filter(
+        Q(anio__gt=fecha.year) | Q(anio=fecha.year, mes__gte=fecha.month)
+    ).delete()[0]
+
+
+@transaction.atomic
+def cerrar_meses_financieros(hoy=None):
+    """
+    Crea los cierres mensuales faltantes hasta el mes anterior a `hoy`
+    
+    Parte del último cierre existente (o del primer movimiento) y recorre una
+    sola vez los movimientos del tramo pendiente. Los meses sin movimientos
+    también se cierran para que la cadena de saldos sea continua.
+    
+    La consulta de saldo llama a esta función: dos solicitudes simultáneas tras
+    el cambio de mes calculan los mismos cierres. Los que otra ya insertó se
+    omiten (ignore_conflicts sobre unique_together) en vez de fallar.
+    
+    Returns:
+        int: cierres calculados
+    """
+    hoy = _como_fecha(hoy) if hoy else timezone.now().date()
+    limite = date(hoy.year, hoy.month, 1)
+    
+    ultimo = CierreMensualFinanciero.objects.order_by('-anio', '-mes').first()
+    if ultimo:
+        anio, mes = _mes_siguiente(ultimo.anio, ultimo.mes)
+        saldo = ultimo.saldo_final
+        acumulados = [ultimo.ingresos_acumulados, ultimo.egresos_acumulados, ultimo.movimientos_acumulados]
+    else:
+        primera = MovimientoFinanciero.objects.order_by('fecha').values_list('fecha', flat=True).first()
+        if primera is None:
+            return 0
+        anio, mes = primera.year, primera.month
+        saldo = Decimal('0')
+        acumulados = [Decimal('0'), Decimal('0'), 0]
+    
+    inicio = date(anio, mes, 1)
+    if inicio >= limite:
+        return 0
+    
+    por_mes = {}
+    for fecha, tipo, categoria, monto in MovimientoFinanciero.objects.filter(
+        fecha__gte=inicio, fecha__lt=limite
+    ).order_by().values_list('fecha', 'tipo', 'categoria', 'monto').iterator(chunk_size=2000):
+        por_mes.setdefault((fecha.year, fecha.month), []).append((tipo, categoria, monto))
+    
+    cierres = []
+    while date(anio, mes, 1) < limite:
+        totales = _sumar_movimientos(por_mes.get((anio, mes), []))
+        saldo_final = saldo + totales['ingresos'] - totales['egresos']
+        acumulados[0] += totales['ingresos']
+        acumulados[1] += totales['egresos']
+        acumulados[2] += totales['cantidad']
+        cierres.append(CierreMensualFinanciero(
+            anio=anio,
+            mes=mes,
+            saldo_inicial=saldo,
+            ingresos=totales['ingresos'],
+            egresos=totales['egresos'],
+            saldo_final=saldo_final,
+            cantidad_movimientos=totales['cantidad'],
+            detalle_categorias={
+                tipo: {categoria: str(monto) for categoria, monto in sorted(categorias.items())}
+                for tipo, categorias in totales['detalle'].items()
+            },
+            ingresos_acumulados=acumulados[0],
+            egresos_acumulados=acumulados[1],
+            movimientos_acumulados=acumulados[2],
+        ))
+        saldo = saldo_final
+        anio, mes = _mes_siguiente(anio, mes)
+    
+    CierreMensualFinanciero.objects.bulk_create(cierres, batch_size=500, ignore_conflicts=True)
+    return len(cierres)
+
+
+def calcular_saldo_compania(hoy=None):
     """
     Calcula el saldo de la compañía (ingresos - egresos)
+    
+    Saldo = último cierre mensual + movimientos posteriores al cierre, por lo
+    que el costo no depende de los años de historia. Montos en Decimal exacto.
     """
-    ingresos = MovimientoFinanciero.objects.filter(
-        tipo='ingreso'
-    ).aggregate(total=Sum('monto'))['total'] or Decimal('0')
+    cerrar_meses_financieros(hoy)
+    
+    ultimo = CierreMensualFinanciero.objects.order_by('-anio', '-mes').first()
+    if ultimo:
+        anio, mes = _mes_siguiente(ultimo.anio, ultimo.mes)
+        posteriores = MovimientoFinanciero.objects.filter(fecha__gte=date(anio, mes, 1))
+        base = [ultimo.ingresos_acumulados, ultimo.egresos_acumulados, ultimo.movimientos_acumulados]
+    else:
+        posteriores = MovimientoFinanciero.objects.all()
+        base = [Decimal('0'), Decimal('0'), 0]
     
-    egresos = MovimientoFinanciero.objects.filter(
-        tipo='egreso'
-    ).aggregate(total=Sum('monto'))['total'] or Decimal('0')
+    totales = _sumar_movimientos(posteriores.order_by().values_list('tipo', 'categoria', 'monto'))
+    ingresos = base[0] + totales['ingresos']
+    egresos = base[1] + totales['egresos']
     
     return {
         'saldo': ingresos - egresos,
         'ingresos': ingresos,
-        'egresos': egresos
+        'egresos': egresos,
+        'total_movimientos': base[2] + totales['cantidad'],
+        'ultimo_cierre': f'{ultimo.anio}-{ultimo.mes:02d}' if ultimo else None,
     }
 
 
-def obtener_estadisticas_beneficio(beneficio_id):
+@transaction.atomic
+def reconstruir_cierres_financieros(hoy=None):
+    """Recalcula todos los cierres mensuales desde los movimientos"""
+    CierreMensualFinanciero.objects.all().delete()
+    return cerrar_meses_financieros(hoy)
+
+
+CAMPOS_CIERRE_FINANCIERO = [
+    'saldo_inicial', 'ingresos', 'egresos', 'saldo_final', 'cantidad_movimientos',
+    'detalle_categorias', 'ingresos_acumulados', 'egresos_acumulados', 'movimientos_acumulados'
+]
+
+
+def verificar_cierres_financieros(hoy=None):
     """
-    Obtiene estadísticas completas de un beneficio
-    Para el dashboard de beneficios
+    Compara los cierres guardados contra los movimientos crudos
+    
+    Returns:
+        list: [{'anio': int, 'mes': int, 'diferencias': {campo: (guardado, esperado)}}]
     """
-    beneficio = Beneficio.objects.get(id=beneficio_id)
-    asignaciones = AsignacionBeneficio.objects.filter(beneficio=beneficio)
+    guardados = {
+        (fila['anio'], fila['mes']): fila
+        for fila in CierreMensualFinanciero.objects.values('anio', 'mes', *CAMPOS_CIERRE_FINANCIERO)
+    }
     
-    total_asignaciones = asignaciones.count()
-    total_tarjetas_asignadas = asignaciones.aggregate(Sum('tarjetas_asignadas'))['tarjetas_asignadas__sum'] or 0
-    total_tarjetas_vendidas = asignaciones.aggregate(Sum('tarjetas_vendidas'))['tarjetas_vendidas__sum'] or 0
-    total_tarjetas_extras = asignaciones.aggregate(Sum('tarjetas_extras_vendidas'))['tarjetas_extras_vendidas__sum'] or 0
-    total_tarjetas_liberadas = asignaciones.aggregate(Sum('tarjetas_liberadas'))['tarjetas_liberadas__sum'] or 0
+    # Recalcular dentro de una transacción que se revierte
+    esperados = {}
+    try:
+        with transaction.atomic():
+            reconstruir_cierres_financieros(hoy)
+            esperados = {
+                (fila['anio'], fila['mes']): fila
+                for fila in CierreMensualFinanciero.objects.values('anio', 'mes', *CAMPOS_CIERRE_FINANCIERO)
+            }
+            raise _RevertirVerificacion()
+    except _RevertirVerificacion:
+        pass
     
-    monto_total_esperado = asignaciones.aggregate(Sum('monto_total'))['monto_total__sum'] or Decimal('0')
-    monto_recaudado = asignaciones.aggregate(Sum('monto_pagado'))['monto_pagado__sum'] or Decimal('0')
-    monto_pendiente = asignaciones.aggregate(Sum('monto_pendiente'))['monto_pendiente__sum'] or Decimal('0')
+    inconsistencias = []
+    for clave in sorted(guardados):
+        esperado = esperados.get(clave)
+        if esperado is None:
+            diferencias = {'fila': ('sobrante', None)}
+        else:
+            diferencias = {
+                campo: (guardados[clave][campo], esperado[campo])
+                for campo in CAMPOS_CIERRE_FINANCIERO
+                if guardados[clave][campo] != esperado[campo]
+            }
+        if diferencias:
+            inconsistencias.append({'anio': clave[0], 'mes': clave[1], 'diferencias': diferencias})
+    return inconsistencias
+
+
+class _RevertirVerificacion(Exception):
+    pass
+
+
+# ==================== LIBRO DE MOVIMIENTOS ====================
+
+# Orden del libro (más recientes primero); la paginación por llave lo sigue
+ORDEN_MOVIMIENTOS = ['-fecha', '-created_at', '-id']
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def _fecha_parametro(params, nombre):
+    """Fecha AAAA-MM-DD de un parámetro GET, None si no viene; ValueError si no es válida"""
+    valor = params.get(nombre)
+    if not valor:
+        return None
+    try:
+        fecha = parse_date(valor)
+    except ValueError:
+        # Bien formada pero inexistente (2024-13-40)
+        fecha = None
+    if fecha is None:
+        raise ValueError(f'{nombre} debe ser una fecha válida AAAA-MM-DD')
+    return fecha
+
+
+def filtrar_movimientos(params, queryset=None):
+    """
+    Aplica los filtros del libro de movimientos a partir de parámetros GET
+    
+    Filtros: tipo, categoria (acepta varios separados por coma), anio,
+    fecha_desde, fecha_hasta, monto_min, monto_max
+    Los parámetros se validan aquí (ValueError / ArithmeticError), antes de
+    que la vista empiece a responder.
+    """
+    if queryset is None:
+        queryset = MovimientoFinanciero.objects.all()
+    
+    tipo = params.get('tipo')
+    if tipo:
+        queryset = queryset.filter(tipo__in=tipo.split(','))
+    
+    categoria = params.get('categoria')
+    if categoria:
+        queryset = queryset.filter(categoria__in=categoria.split(','))
+    
+    anio = params.get('anio')
+    if anio:
+        queryset = queryset.filter(fecha__gte=date(int(anio), 1, 1), fecha__lte=date(int(anio), 12, 31))
+    
+    fecha_desde = _fecha_parametro(params, 'fecha_desde')
+    if fecha_desde:
+        queryset = queryset.filter(fecha__gte=fecha_desde)
+    
+    fecha_hasta = _fecha_parametro(params, 'fecha_hasta')
+    if fecha_hasta:
+        queryset = queryset.filter(fecha__lte=fecha_hasta)
+    
+    monto_min = params.get('monto_min')
+    if monto_min:
+        queryset = queryset.filter(monto__gte=Decimal(monto_min))
+    
+    monto_max = params.get('monto_max')
+    if monto_max:
+        queryset = queryset.filter(monto__lte=Decimal(monto_max))
+    
+    return queryset.order_by(*ORDEN_MOVIMIENTOS)
+
+
+def codificar_cursor_movimiento(movimiento):
+    """Cursor opaco con la llave (fecha, created_at, id) del último movimiento de la página"""
+    llave = f'{movimiento.fecha.isoformat()}|{movimiento.created_at.isoformat()}|{movimiento.id}'
+    return base64.urlsafe_b64encode(llave.encode()).decode()
+
+
+def decodificar_cursor_movimiento(cursor):
+    try:
+        fecha, created_at, id_ = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return date.fromisoformat(fecha), datetime.fromisoformat(created_at), int(id_)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise CursorInvalido('Cursor inválido') from e
+
+
+def pagina_movimientos(queryset, cursor=None, limite=100):
+    """
+    Paginación por llave (seek) sobre (fecha, created_at, id) descendente
+    
+    En vez de OFFSET se filtra por la llave del último movimiento entregado,
+    así la página 500 cuesta lo mismo que la primera.
+    
+    Returns:
+        tuple: (movimientos: list, siguiente_cursor: str | None)
+    """
+    if cursor:
+        fecha, created_at, id_ = decodificar_cursor_movimiento(cursor)
+        queryset = queryset.filter(
+            Q(fecha__lt=fecha)
+            | Q(fecha=fecha, created_at__lt=created_at)
+            | Q(fecha=fecha, created_at=created_at, id__lt=id_)
+        )
+    
+    movimientos = list(queryset.select_related('created_by')[:limite + 1])
+    siguiente = None
+    if len(movimientos) > limite:
+        movimientos = movimientos[:limite]
+        siguiente = codificar_cursor_movimiento(movimientos[-1])
+    return movimientos, siguiente
+
+
+CAMPOS_EXPORTACION_MOVIMIENTOS = [
+    'id', 'fecha', 'tipo', 'categoria', 'monto', 'descripcion',
+    'numero_comprobante', 'created_at', 'created_by__username'
+]
+
+
+def iterar_movimientos_exportacion(queryset, lote=2000):
+    """Filas (dict) para exportar, leídas por bloques sin cargar todo en memoria"""
+    return queryset.values(*CAMPOS_EXPORTACION_MOVIMIENTOS).iterator(chunk_size=lote)
+
+
+# ==================== REPORTES DE TESORERÍA ====================
+
+SIN_METODO_PAGO = 'Sin especificar'
+
+VISTAS_REPORTE_TESORERIA = ['mensual', 'interanual', 'beneficios', 'metodos_pago']
+
+# Meses por consulta al recalcular (limita los parámetros del OR de rangos)
+_MESES_POR_BLOQUE = 100
+
+
+def _centavos(valor):
+    """Normaliza sumas del cubo a Decimal con dos decimales"""
+    return Decimal(str(valor or 0)).quantize(Decimal('0.01'))
+
+
+def marcar_meses_resumen(*fechas):
+    """Deja pendientes de recálculo en el cubo los meses de las fechas indicadas"""
+    meses = {(f.year, f.month) for f in (_como_fecha(fecha) for fecha in fechas if fecha)}
+    if meses:
+        MesPendienteResumenTesoreria.objects.bulk_create(
+            [MesPendienteResumenTesoreria(anio=anio, mes=mes) for anio, mes in sorted(meses)],
+            ignore_conflicts=True
+        )
+
+
+def _filtro_meses(campo, meses):
+    """OR de rangos [inicio de mes, inicio del mes siguiente) sobre un campo fecha"""
+    filtro = Q()
+    for anio, mes in meses:
+        filtro |= Q(**{
+            f'{campo}__gte': date(anio, mes, 1),
+            f'{campo}__lt': date(*_mes_siguiente(anio, mes), 1),
+        })
+    return filtro
+
+
+def _agregar_por_mes(queryset, campo_fecha, campo_monto, *claves):
+    """Suma y cuenta agrupando por año, mes y las claves indicadas"""
+    return queryset.annotate(
+        anio_resumen=ExtractYear(campo_fecha),
+        mes_resumen=ExtractMonth(campo_fecha)
+    ).values('anio_resumen', 'mes_resumen', *claves).annotate(
+        suma=Sum(campo_monto),
+        cuenta=Count('id')
+    ).order_by()
+
+
+def _filas_resumen(meses):
+    """Calcula las filas del cubo para un bloque de meses desde las tablas crudas"""
+    filas = {}
+    
+    def sumar(anio, mes, dimension, clave, tipo, suma, cuenta):
+        fila = filas.setdefault((anio, mes, dimension, str(clave), tipo), [Decimal('0'), 0])
+        fila[0] += Decimal(str(suma or 0))
+        fila[1] += cuenta
+    
+    movimientos = MovimientoFinanciero.objects.filter(_filtro_meses('fecha', meses))
+    for f in _agregar_por_mes(movimientos, 'fecha', 'monto', 'tipo', 'categoria'):
+        sumar(f['anio_resumen'], f['mes_resumen'], 'categoria', f['categoria'], f['tipo'], f['suma'], f['cuenta'])
+    
+    pagos_beneficio = PagoBeneficio.objects.filter(_filtro_meses('fecha_pago', meses))
+    for f in _agregar_por_mes(pagos_beneficio, 'fecha_pago', 'monto', 'asignacion__beneficio_id'):
+        sumar(f['anio_resumen'], f['mes_resumen'], 'beneficio', f['asignacion__beneficio_id'], 'ingreso',
+              f['suma'], f['cuenta'])
+    for f in _agregar_por_mes(pagos_beneficio, 'fecha_pago', 'monto', 'metodo_pago'):
+        sumar(f['anio_resumen'], f['mes_resumen'], 'metodo_pago', f['metodo_pago'] or SIN_METODO_PAGO,
+              'ingreso', f['suma'], f['cuenta'])
+    
+    pagos_cuota = PagoCuota.objects.filter(_filtro_meses('fecha_pago', meses))
+    for f in _agregar_por_mes(pagos_cuota, 'fecha_pago', 'monto_pagado', 'metodo_pago'):
+        sumar(f['anio_resumen'], f['mes_resumen'], 'metodo_pago', f['metodo_pago'] or SIN_METODO_PAGO,
+              'ingreso', f['suma'], f['cuenta'])
+    
+    return [
+        ResumenTesoreria(anio=anio, mes=mes, dimension=dimension, clave=clave, tipo=tipo,
+                         total=total, cantidad=cantidad)
+        for (anio, mes, dimension, clave, tipo), (total, cantidad) in filas.items()
+    ]
+
+
+@transaction.atomic
+def actualizar_resumen_tesoreria():
+    """
+    Recalcula en el cubo solo los meses pendientes
+    
+    Las señales de MovimientoFinanciero, PagoCuota y PagoBeneficio marcan el mes
+    de cada escritura; aquí se borran y reagregan esos meses con una consulta
+    agrupada por fuente, sin recorrer el resto de la historia.
+    
+    Returns:
+        int: meses recalculados
+    """
+    pendientes = list(MesPendienteResumenTesoreria.objects.select_for_update().values_list('id', 'anio', 'mes'))
+    if not pendientes:
+        return 0
+    
+    meses = sorted({(anio, mes) for _, anio, mes in pendientes})
+    for inicio in range(0, len(meses), _MESES_POR_BLOQUE):
+        bloque = meses[inicio:inicio + _MESES_POR_BLOQUE]
+        filtro = Q()
+        for anio, mes in bloque:
+            filtro |= Q(anio=anio, mes=mes)
+        ResumenTesoreria.objects.filter(filtro).delete()
+        ResumenTesoreria.objects.bulk_create(_filas_resumen(bloque), batch_size=500)
+    
+    MesPendienteResumenTesoreria.objects.filter(id__in=[id_ for id_, _, _ in pendientes]).delete()
+    return len(meses)
+
+
+@transaction.atomic
+def reconstruir_resumen_tesoreria():
+    """Vacía el cubo y lo recalcula para todos los meses con datos"""
+    ResumenTesoreria.objects.all().delete()
+    fechas = []
+    for modelo, campo in [(MovimientoFinanciero, 'fecha'), (PagoCuota, 'fecha_pago'), (PagoBeneficio, 'fecha_pago')]:
+        fechas += modelo.objects.dates(campo, 'month')
+    marcar_meses_resumen(*fechas)
+    return actualizar_resumen_tesoreria()
+
+
+def reporte_tesoreria(vista, anio=None):
+    """
+    Reportes del tesorero leídos desde el cubo (previo refresco de meses pendientes)
+    
+    Vistas:
+    - mensual: mes × tipo × categoría del año
+    - interanual: ingresos y egresos por mes del año y del anterior, con variación
+    - beneficios: recaudado por beneficio en el año
+    - metodos_pago: recaudado por método de pago (cuotas y beneficios) en el año
+    """
+    if vista not in VISTAS_REPORTE_TESORERIA:
+        raise ValueError(f'Vista desconocida: {vista}')
+    if anio is None:
+        anio = timezone.now().year
+    
+    actualizar_resumen_tesoreria()
+    cubo = ResumenTesoreria.objects.order_by()
+    
+    if vista == 'mensual':
+        return {
+            'anio': anio,
+            'filas': [
+                {'mes': f['mes'], 'tipo': f['tipo'], 'categoria': f['clave'],
+                 'total': f['total'], 'cantidad': f['cantidad']}
+                for f in cubo.filter(dimension='categoria', anio=anio).order_by(
+                    'mes', 'tipo', 'clave'
+                ).values('mes', 'tipo', 'clave', 'total', 'cantidad')
+            ]
+        }
     
-    # Contar por estado
-    estados = {}
-    for estado, _ in AsignacionBeneficio.ESTADO_PAGO_CHOICES:
-        estados[estado] = asignaciones.filter(estado_pago=estado).count()
+    if vista == 'interanual':
+        totales = {}
+        for f in cubo.filter(dimension='categoria', anio__in=[anio - 1, anio]).values(
+            'anio', 'mes', 'tipo'
+        ).annotate(suma=Sum('total')):
+            totales[(f['anio'], f['mes'], f['tipo'])] = _centavos(f['suma'])
+        
+        meses = []
+        for mes in range(1, 13):
+            fila = {'mes': mes}
+            for tipo, nombre in [('ingreso', 'ingresos'), ('egreso', 'egresos')]:
+                actual = totales.get((anio, mes, tipo), _centavos(0))
+                anterior = totales.get((anio - 1, mes, tipo), _centavos(0))
+                fila[nombre] = actual
+                fila[f'{nombre}_anio_anterior'] = anterior
+                fila[f'variacion_{nombre}'] = (
+                    round((actual - anterior) / anterior * 100, 2) if anterior else None
+                )
+            meses.append(fila)
+        return {'anio': anio, 'anio_anterior': anio - 1, 'meses': meses}
+    
+    dimension = 'beneficio' if vista == 'beneficios' else 'metodo_pago'
+    filas = list(cubo.filter(dimension=dimension, anio=anio).values('clave').annotate(
+        suma=Sum('total'), cuenta=Sum('cantidad')
+    ).order_by('-suma'))
+    
+    if vista == 'beneficios':
+        nombres = dict(Beneficio.objects.filter(
+            id__in=[int(f['clave']) for f in filas]
+        ).values_list('id', 'nombre'))
+        return {
+            'anio': anio,
+            'beneficios': [
+                {'beneficio_id': int(f['clave']), 'nombre': nombres.get(int(f['clave']), ''),
+                 'total': _centavos(f['suma']), 'pagos': f['cuenta']}
+                for f in filas
+            ]
+        }
     
     return {
-        'beneficio': beneficio,
-        'total_asignaciones': total_asignaciones,
-        'total_tarjetas_asignadas': total_tarjetas_asignadas,
-        'total_tarjetas_vendidas': total_tarjetas_vendidas,
-        'total_tarjetas_extras': total_tarjetas_extras,
-        'total_tarjetas_liberadas': total_tarjetas_liberadas,
-        'monto_total_esperado': monto_total_esperado,
-        'monto_recaudado': monto_recaudado,
-        'monto_pendiente': monto_pendiente,
-        'porcentaje_recaudado': (monto_recaudado / monto_total_esperado * 100) if monto_total_esperado > 0 else 0,
-        'estados': estados,
-        'puede_cerrar': puede_cerrar_beneficio(beneficio_id)
+        'anio': anio,
+        'metodos_pago': [
+            {'metodo_pago': f['clave'], 'total': _centavos(f['suma']), 'pagos': f['cuenta']}
+            for f in filas
+        ]
+    }
+
+
+# ==================== IMPORTACIÓN DE PAGOS DE CUOTAS ====================
+
+# Encabezados aceptados en el extracto (normalizados) → columna interna
+COLUMNAS_EXTRACTO = {
+    'rut': 'rut',
+    'rut_origen': 'rut',
+    'clave': 'clave_bombero',
+    'clave_bombero': 'clave_bombero',
+    'monto': 'monto',
+    'abono': 'monto',
+    'fecha': 'fecha',
+    'fecha_pago': 'fecha',
+    'comprobante': 'comprobante',
+    'numero_comprobante': 'comprobante',
+    'n_comprobante': 'comprobante',
+    'n_operacion': 'comprobante',
+    'observaciones': 'observaciones',
+    'glosa': 'observaciones',
+}
+
+# Meses hacia adelante (desde enero del año de inicio) que puede cubrir una transferencia
+MAX_MESES_POR_PAGO = 24
+
+_FORMATOS_FECHA_EXTRACTO = ['%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%Y/%m/%d']
+
+
+def normalizar_rut(rut):
+    """RUT sin puntos, guion ni espacios y con K mayúscula ('12.345.678-k' → '12345678K')"""
+    return re.sub(r'[^0-9K]', '', str(rut or '').upper())
+
+
+def _normalizar_encabezado(texto):
+    texto = unicodedata.normalize('NFKD', str(texto or '')).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9]+', '_', texto.lower()).strip('_')
+
+
+def _parsear_monto(valor):
+    """Monto del extracto a Decimal; acepta '$ 10.000', '10000,50' o números de XLSX"""
+    if isinstance(valor, (int, float, Decimal)):
+        return Decimal(str(valor))
+    texto = re.sub(r'[^0-9,.\-]', '', str(valor or ''))
+    if ',' in texto:
+        texto = texto.replace('.', '').replace(',', '.')
+    elif re.fullmatch(r'-?\d{1,3}(\.\d{3})+', texto):
+        texto = texto.replace('.', '')
+    try:
+        return Decimal(texto)
+    except InvalidOperation:
+        raise ValueError(f'Monto inválido: {valor!r}')
+
+
+def _parsear_fecha(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = str(valor or '').strip()[:10]
+    for formato in _FORMATOS_FECHA_EXTRACTO:
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    raise ValueError(f'Fecha inválida: {valor!r}')
+
+
+def leer_extracto_pagos(archivo, nombre):
+    """
+    Lee un extracto bancario CSV o XLSX
+    La primera fila es el encabezado; se requiere la columna de monto y la de RUT
+    o clave de bombero (ver COLUMNAS_EXTRACTO).
+    
+    Args:
+        archivo: archivo binario abierto (o subido)
+        nombre: nombre del archivo, para reconocer la extensión
+    
+    Returns:
+        list: [{'linea': int, 'rut', 'clave_bombero', 'monto', 'fecha', ...}]
+    """
+    extension = str(nombre).rsplit('.', 1)[-1].lower()
+    if extension == 'xlsx':
+        try:
+            import openpyxl
+        except ImportError:
+            raise ValueError('Para importar archivos XLSX se requiere el paquete openpyxl')
+        hoja = openpyxl.load_workbook(archivo, read_only=True, data_only=True).active
+        filas = hoja.iter_rows(values_only=True)
+    elif extension == 'csv':
+        contenido = archivo.read()
+        if isinstance(contenido, bytes):
+            try:
+                contenido = contenido.decode('utf-8-sig')
+            except UnicodeDecodeError:
+                contenido = contenido.decode('latin-1')
+        try:
+            dialecto = csv.Sniffer().sniff(contenido[:4096], delimiters=',;\t')
+        except csv.Error:
+            dialecto = csv.excel
+        filas = csv.reader(io.StringIO(contenido), dialecto)
+    else:
+        raise ValueError('Formato no soportado; use un archivo .csv o .xlsx')
+    
+    columnas = [COLUMNAS_EXTRACTO.get(_normalizar_encabezado(c)) for c in next(filas, None) or []]
+    if 'monto' not in columnas or not {'rut', 'clave_bombero'} & set(columnas):
+        raise ValueError('El extracto debe tener columna de monto y de RUT o clave de bombero')
+    
+    resultado = []
+    for linea, valores in enumerate(filas, start=2):
+        if not any(v not in (None, '') for v in valores):
+            continue
+        fila = {col: valor for col, valor in zip(columnas, valores) if col}
+        fila['linea'] = linea
+        resultado.append(fila)
+    return resultado
+
+
+def importar_pagos_cuotas(filas, anio=None, simular=True, omitir_errores=False,
+                          usuario=None, metodo_pago='Transferencia'):
+    """
+    Valida e importa en lote los pagos de cuotas de un extracto bancario
+    
+    Cada fila se asocia a un voluntario por RUT o clave de bombero y su monto se
+    reparte en meses completos, empezando por el mes impago más antiguo desde
+    enero del año indicado (o del año de la transferencia). Todas las filas se
+    validan en memoria con consultas de precarga; luego los PagoCuota y sus
+    movimientos se escriben con bulk_create en una sola transacción.
+    
+    Args:
+        filas: resultado de leer_extracto_pagos
+        simular: solo valida y reporta, sin escribir
+        omitir_errores: importa las filas válidas aunque otras tengan errores
+    
+    Returns:
+        dict: {
+            'simulado': bool, 'importado': bool,
+            'filas': int, 'validas': int, 'con_error': int,
+            'pagos': int, 'monto_total': Decimal,
+            'detalle': [{'linea', 'identificador', 'voluntario_id', 'voluntario',
+                         'monto', 'meses', 'error'}]
+        }
+    """
+    config = obtener_configuracion_cuotas()
+    
+    # Precarga: índice de voluntarios por RUT normalizado y por clave
+    por_rut, por_clave = {}, {}
+    for voluntario_id, rut, clave in Voluntario.objects.values_list('id', 'rut', 'clave_bombero'):
+        por_rut[normalizar_rut(rut)] = voluntario_id
+        por_clave[str(clave).strip()] = voluntario_id
+    
+    detalle = []
+    for fila in filas:
+        rut = normalizar_rut(fila.get('rut'))
+        clave = str(fila.get('clave_bombero') or '').strip()
+        item = {
+            'linea': fila.get('linea'),
+            'identificador': rut or clave,
+            'voluntario_id': por_rut.get(rut) if rut else por_clave.get(clave),
+            'voluntario': '',
+            'monto': None,
+            'fecha': None,
+            'comprobante': str(fila.get('comprobante') or '').strip(),
+            'observaciones': str(fila.get('observaciones') or '').strip(),
+            'meses': [],
+            'error': '',
+        }
+        try:
+            item['monto'] = _parsear_monto(fila.get('monto'))
+            item['fecha'] = _parsear_fecha(fila.get('fecha') or timezone.now().date())
+        except ValueError as e:
+            item['error'] = str(e)
+        if not item['error'] and item['voluntario_id'] is None:
+            item['error'] = f"Voluntario no encontrado: {item['identificador'] or 'sin RUT ni clave'}"
+        detalle.append(item)
+    
+    # Precarga: voluntarios encontrados, meses ya pagados y comprobantes existentes
+    ids = {item['voluntario_id'] for item in detalle if not item['error']}
+    voluntarios = Voluntario.objects.select_related('estado_cuotas').in_bulk(ids)
+    anios_inicio = [anio or item['fecha'].year for item in detalle if not item['error']]
+    pagados = set()
+    if anios_inicio:
+        pagados = set(PagoCuota.objects.filter(
+            voluntario_id__in=ids,
+            anio__gte=min(anios_inicio),
+            anio__lte=max(anios_inicio) + (MAX_MESES_POR_PAGO - 1) // 12
+        ).values_list('voluntario_id', 'anio', 'mes'))
+    comprobantes = {item['comprobante'] for item in detalle if item['comprobante']}
+    usados = set(PagoCuota.objects.filter(
+        numero_comprobante__in=comprobantes
+    ).values_list('numero_comprobante', flat=True)) if comprobantes else set()
+    
+    # Validación y reparto en memoria (las filas anteriores del extracto cuentan como pagadas)
+    for item in detalle:
+        if item['error']:
+            continue
+        voluntario = voluntarios[item['voluntario_id']]
+        item['voluntario'] = voluntario.nombre_completo()
+        
+        validacion = puede_pagar_cuotas(voluntario)
+        if not validacion['puede']:
+            item['error'] = f"No puede pagar cuotas: {validacion['mensaje']}"
+            continue
+        if item['comprobante'] in usados:
+            item['error'] = f"Comprobante {item['comprobante']} ya registrado"
+            continue
+        
+        try:
+            es_estudiante = voluntario.estado_cuotas.es_estudiante
+        except EstadoCuotasBombero.DoesNotExist:
+            es_estudiante = False
+        precio = config.precio_estudiante if es_estudiante else config.precio_regular
+        if item['monto'] <= 0 or item['monto'] % precio:
+            item['error'] = f"El monto ${item['monto']} no corresponde a meses completos de ${precio}"
+            continue
+        
+        cantidad = int(item['monto'] / precio)
+        inicio = anio or item['fecha'].year
+        libres = [
+            (inicio + i // 12, i % 12 + 1) for i in range(MAX_MESES_POR_PAGO)
+            if (voluntario.id, inicio + i // 12, i % 12 + 1) not in pagados
+        ]
+        if cantidad > len(libres):
+            item['error'] = f'El monto cubre {cantidad} meses y solo quedan {len(libres)} impagos'
+            continue
+        
+        item['precio'] = precio
+        item['meses'] = libres[:cantidad]
+        pagados.update((voluntario.id, a, m) for a, m in item['meses'])
+        if item['comprobante']:
+            usados.add(item['comprobante'])
+    
+    validas = [item for item in detalle if not item['error']]
+    con_error = len(detalle) - len(validas)
+    importar = not simular and bool(validas) and (omitir_errores or not con_error)
+    
+    if importar:
+        with transaction.atomic():
+            pagos = PagoCuota.objects.bulk_create([
+                PagoCuota(
+                    voluntario_id=item['voluntario_id'], mes=mes, anio=anio_pago,
+                    fecha_pago=item['fecha'], monto_pagado=item['precio'],
+                    metodo_pago=metodo_pago, numero_comprobante=item['comprobante'] or None,
+                    observaciones=item['observaciones'] or f"Importado desde extracto (línea {item['linea']})",
+                    created_by=usuario
+                )
+                for item in validas for anio_pago, mes in item['meses']
+            ], batch_size=500)
+            
+            nombres = {item['voluntario_id']: item['voluntario'] for item in validas}
+            MovimientoFinanciero.objects.bulk_create([
+                MovimientoFinanciero(
+                    tipo='ingreso', categoria='cuota', monto=pago.monto_pagado,
+                    descripcion=f'Cuota {NOMBRES_MESES[pago.mes]} {pago.anio} - {nombres[pago.voluntario_id]}',
+                    fecha=pago.fecha_pago, pago_cuota=pago,
+                    numero_comprobante=pago.numero_comprobante,
+                    observaciones=pago.observaciones, created_by=usuario
+                )
+                for pago in pagos
+            ], batch_size=500)
+            
+            # bulk_create no dispara señales: mantener las tablas derivadas a mano
+            sincronizar_estados_cuenta({(pago.voluntario_id, pago.anio) for pago in pagos})
+            fechas = {pago.fecha_pago for pago in pagos}
+            invalidar_cierres_financieros(*fechas)
+            marcar_meses_resumen(*fechas)
+    
+    return {
+        'simulado': simular,
+        'importado': importar,
+        'filas': len(detalle),
+        'validas': len(validas),
+        'con_error': con_error,
+        'pagos': sum(len(item['meses']) for item in validas),
+        'monto_total': sum((item['monto'] for item in validas), Decimal('0')),
+        'detalle': [
+            {
+                'linea': item['linea'],
+                'identificador': item['identificador'],
+                'voluntario_id': item['voluntario_id'],
+                'voluntario': item['voluntario'],
+                'monto': item['monto'],
+                'meses': [f'{a}-{m:02d}' for a, m in item['meses']],
+                'error': item['error'],
+            }
+            for item in detalle
+        ],
     }
@@ -0,0 +1,268 @@
+"""
+Trabajos en segundo plano con cola en la base de datos
+actualizar_ranking, el PDF de deudores y la asignación de tarjetas de un
+beneficio corrían dentro de la solicitud y ocupaban el servidor por decenas de
+segundos. Ahora la vista encola un Trabajo y responde 202 con la URL de estado;
+python manage.py run_worker los ejecuta.
+
+- Un trabajador toma el pendiente más antiguo con un UPDATE condicionado al
+  estado: dos trabajadores (hilos o procesos) nunca toman el mismo.
+- La tarea informa su avance con avance(hechos, total, mensaje); cada
+  actualización renueva fecha_latido. Un trabajo sin latido por LATIDO_MAXIMO
+  (trabajador caído) vuelve a la cola, hasta INTENTOS_MAXIMOS.
+- Los archivos generados quedan en MEDIA_ROOT/trabajos/<id>/ y se descargan
+  en /api/trabajos/<id>/resultado/. Los trabajos terminados se purgan tras
+  ANTIGUEDAD_TRABAJOS junto con sus archivos.
+"""
+import os
+import shutil
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Trabajo
+
+
+DIRECTORIO_TRABAJOS = 'trabajos'
+
+# Sin latido por este tiempo, el trabajador se da por caído
+LATIDO_MAXIMO = timedelta(minutes=10)
+
+INTENTOS_MAXIMOS = 3
+
+# Trabajos terminados (y sus archivos) que se conservan
+ANTIGUEDAD_TRABAJOS = timedelta(days=7)
+
+# Escrituras del avance: a lo más una por este intervalo (segundos)
+INTERVALO_AVANCE = 1.0
+
+_TAREAS = {}
+
+
+def tarea(tipo):
+    """Registra la función que ejecuta los trabajos de un tipo: funcion(trabajo, avance) -> dict"""
+    def registrar(funcion):
+        _TAREAS[tipo] = funcion
+        return funcion
+    return registrar
+
+
+# ==================== COLA ====================
+
+def encolar_trabajo(tipo, parametros=None, usuario=None):
+    """Crea un trabajo pendiente (los trabajadores lo ven al confirmarse la transacción en curso)"""
+    if tipo not in dict(Trabajo.TIPO_CHOICES):
+        raise ValueError(f'Tipo de trabajo inválido: {tipo}')
+    return Trabajo.objects.create(
+        tipo=tipo, parametros=parametros or {},
+        creado_por=usuario if usuario and usuario.is_authenticated else None
+    )
+
+
+def url_estado_trabajo(trabajo):
+    return reverse('trabajo-detail', args=[trabajo.id])
+
+
+def url_resultado_trabajo(trabajo):
+    return reverse('trabajo-resultado', args=[trabajo.id]) if trabajo.archivo else None
+
+
+def nombre_trabajador():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+def tomar_trabajo(trabajador=None):
+    """
+    Marca en proceso el trabajo pendiente más antiguo y lo retorna (o None)
+    Si otro trabajador lo toma primero, el UPDATE no afecta filas y se
+    intenta con el siguiente.
+    """
+    trabajador = trabajador or nombre_trabajador()
+    while True:
+        candidato = Trabajo.objects.filter(estado='pendiente').order_by('fecha_creacion', 'id').values_list(
+            'id', flat=True
+        ).first()
+        if candidato is None:
+            return None
+        ahora = timezone.now()
+        tomado = Trabajo.objects.filter(id=candidato, estado='pendiente').update(
+            estado='en_proceso', trabajador=trabajador, intentos=F('intentos') + 1,
+            fecha_inicio=ahora, fecha_latido=ahora, hechos=0, total=0, mensaje='', error=''
+        )
+        if tomado:
+            return Trabajo.objects.get(id=candidato)
+
+
+class Avance:
+    """
+    Función avance(hechos, total, mensaje=None) que recibe la tarea
+    Escribe en la fila a lo más cada INTERVALO_AVANCE segundos (y al terminar).
+    """
+
+    def __init__(self, trabajo):
+        self.trabajo = trabajo
+        self._ultima = 0.0
+
+    def __call__(self, hechos, total=None, mensaje=None):
+        trabajo = self.trabajo
+        trabajo.hechos = hechos
+        if total is not None:
+            trabajo.total = total
+        if mensaje is not None:
+            trabajo.mensaje = mensaje[:255]
+        ahora = time.monotonic()
+        if ahora - self._ultima < INTERVALO_AVANCE and hechos != trabajo.total:
+            return
+        self._ultima = ahora
+        Trabajo.objects.filter(id=trabajo.id).update(
+            hechos=trabajo.hechos, total=trabajo.total, mensaje=trabajo.mensaje, fecha_latido=timezone.now()
+        )
+
+
+def ejecutar_trabajo(trabajo):
+    """Ejecuta un trabajo ya tomado y guarda su resultado o su error"""
+    funcion = _TAREAS.get(trabajo.tipo)
+    try:
+        if funcion is None:
+            raise ValueError(f'No hay tarea registrada para {trabajo.tipo}')
+        resultado = funcion(trabajo, Avance(trabajo)) or {}
+    except Exception as e:
+        traceback.print_exc()
+        Trabajo.objects.filter(id=trabajo.id).update(
+            estado='error', error=str(e) or e.__class__.__name__, fecha_fin=timezone.now()
+        )
+        trabajo.refresh_from_db()
+        return trabajo
+
+    Trabajo.objects.filter(id=trabajo.id).update(
+        estado='completado', resultado=resultado, archivo=trabajo.archivo,
+        hechos=trabajo.total or trabajo.hechos, fecha_fin=timezone.now()
+    )
+    trabajo.refresh_from_db()
+    return trabajo
+
+
+def procesar_siguiente_trabajo(trabajador=None):
+    """Toma y ejecuta un trabajo; retorna el trabajo o None si la cola está vacía"""
+    trabajo = tomar_trabajo(trabajador)
+    return ejecutar_trabajo(trabajo) if trabajo else None
+
+
+def recuperar_trabajos_abandonados(latido_maximo=None):
+    """
+    Devuelve a la cola los trabajos en proceso sin latido reciente (o los marca
+    con error si agotaron sus intentos). Retorna la cantidad recuperada.
+    """
+    limite = timezone.now() - (latido_maximo or LATIDO_MAXIMO)
+    abandonados = Trabajo.objects.filter(estado='en_proceso', fecha_latido__lt=limite)
+    abandonados.filter(intentos__gte=INTENTOS_MAXIMOS).update(
+        estado='error', error='El trabajador dejó de responder', fecha_fin=timezone.now()
+    )
+    return abandonados.filter(intentos__lt=INTENTOS_MAXIMOS).update(estado='pendiente', trabajador='')
+
+
+# ==================== ARCHIVOS DE RESULTADO ====================
+
+def _directorio_trabajo(trabajo_id):
+    return os.path.join(settings.MEDIA_ROOT, DIRECTORIO_TRABAJOS, str(trabajo_id))
+
+
+def archivo_resultado(trabajo, nombre):
+    """
+    Ruta absoluta donde la tarea escribe su archivo; queda registrado en el trabajo
+    """
+    directorio = _directorio_trabajo(trabajo.id)
+    os.makedirs(directorio, exist_ok=True)
+    trabajo.archivo = f'{DIRECTORIO_TRABAJOS}/{trabajo.id}/{nombre}'
+    return os.path.join(directorio, nombre)
+
+
+def ruta_archivo_trabajo(trabajo):
+    return os.path.join(settings.MEDIA_ROOT, trabajo.archivo) if trabajo.archivo else None
+
+
+def purgar_trabajos_antiguos(antiguedad=None):
+    """Elimina los trabajos terminados hace más de `antiguedad` y sus archivos"""
+    limite = timezone.now() - (antiguedad or ANTIGUEDAD_TRABAJOS)
+    ids = list(Trabajo.objects.filter(
+        estado__in=['completado', 'error'], fecha_fin__lt=limite
+    ).values_list('id', flat=True))
+    for trabajo_id in ids:
+        shutil.rmtree(_directorio_trabajo(trabajo_id), ignore_errors=True)
+    Trabajo.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+# ==================== TAREAS ====================
+
+@tarea('actualizar_ranking')
+def _actualizar_ranking(trabajo, avance):
+    from .utils_asistencias import recalcular_ranking_anio
+
+    anio = int(trabajo.parametros['anio'])
+    avance(0, 1, f'Recalculando ranking {anio}')
+    resumen = recalcular_ranking_anio(anio)
+    avance(1, 1)
+    return {'message': f'Ranking {anio} actualizado exitosamente', **resumen}
+
+
+@tarea('pdf_deudores_cuotas')
+def _pdf_deudores_cuotas(trabajo, avance):
+    from .pdf_cuotas import generar_pdf_deudores
+    from .utils_logos import obtener_logo_pdf
+    from .utils_tesoreria import filas_pdf_deudores
+
+    anio = int(trabajo.parametros['anio'])
+    avance(0, 2, 'Calculando deudores')
+    deudores_data = filas_pdf_deudores(anio)
+
+    avance(1, 2, 'Generando PDF')
+    pdf_buffer = generar_pdf_deudores(deudores_data=deudores_data, anio=anio, logo=obtener_logo_pdf())
+    with open(archivo_resultado(trabajo, f'deudores_cuotas_{anio}.pdf'), 'wb') as archivo:
+        archivo.write(pdf_buffer.getvalue())
+    avance(2, 2)
+    return {
+        'anio': anio,
+        'deudores': len(deudores_data),
+        'deuda_total': sum((d['deuda_total'] for d in deudores_data), 0),
+    }
+
+
+@tarea('asignar_beneficio')
+def _asignar_beneficio(trabajo, avance):
+    from .models import Beneficio
+    from .utils_tesoreria import asignar_beneficio
+
+    beneficio = Beneficio.objects.get(id=trabajo.parametros['beneficio_id'])
+    avance(0, 1, f'Asignando tarjetas de {beneficio.nombre}')
+    # Todo o nada: un reintento tras una caída no duplica asignaciones
+    with transaction.atomic():
+        if beneficio.asignaciones.exists():
+            raise ValueError(f'El beneficio {beneficio.id} ya tiene asignaciones')
+        resumen = asignar_beneficio(beneficio, trabajo.creado_por)
+    avance(1, 1)
+    return {'beneficio_id': beneficio.id, **resumen}
+
+
+@tarea('pdf_lote')
+def _pdf_lote(trabajo, avance):
+    from .utils_exportacion import exportar_pdfs_lote, filtrar_voluntarios
+
+    parametros = trabajo.parametros
+    tipo, formato, anio = parametros.get('tipo', 'cuotas'), parametros.get('formato', 'zip'), parametros.get('anio')
+    nombre = f'{tipo}_{anio}.{formato}' if tipo == 'cuotas' else f'{tipo}.{formato}'
+    voluntarios = filtrar_voluntarios(
+        estados=parametros.get('estados'), categorias=parametros.get('categorias'), ids=parametros.get('ids')
+    )
+    return exportar_pdfs_lote(
+        archivo_resultado(trabajo, nombre), tipo, voluntarios, anio=anio, formato=formato,
+        progreso=lambda hechos, total: avance(hechos, total, f'{hechos} de {total} documentos')
+    )
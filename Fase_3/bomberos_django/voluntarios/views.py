@@ -5,7 +5,7 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
-from django.db.models import Sum, Count, Q
+from django.db.models import Sum, Count, Q, Prefetch
 from django.utils import timezone
 from rest_framework.views import APIView
 from datetime import datetime, date
@@ -25,13 +25,18 @@ from .serializers import (
     CargoSerializer, FelicitacionSerializer, UserSerializer,
     EventoAsistenciaSerializer, EventoAsistenciaListSerializer,
     DetalleAsistenciaSerializer, VoluntarioExternoSerializer,
-    RankingAsistenciaSerializer, CicloAsistenciaSerializer,
+    RankingAsistenciaSerializer, CicloAsistenciaSerializer, RegistrarPlanillaAsistenciaSerializer,
     UniformeSerializer, CrearUniformeSerializer, PiezaUniformeSerializer,
     CuotaSerializer, PagoCuotaSerializer,
     BeneficioSerializer, AsignacionBeneficioSerializer, PagoBeneficioSerializer,
     LogoCompaniaSerializer
 )
 
+from .utils_asistencias import registrar_planilla_asistencia
+from .utils_trabajos import encolar_trabajo
+from .views_trabajos import respuesta_trabajo_encolado
+from .utils_configuracion import obtener_ciclo_asistencia_activo
+
 # Importar serializers de sanciones desde el archivo dedicado
 from .sancion_serializers import SancionSerializer, ReintegroSerializer
 
@@ -45,9 +50,9 @@ class VoluntarioViewSet(viewsets.ModelViewSet):
     queryset = Voluntario.objects.all()
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['estado_bombero', 'compania', 'cuotas_activas', 'es_estudiante']
+    filterset_fields = ['estado_bombero', 'compania', 'cuotas_activas', 'es_estudiante', 'categoria']
     search_fields = ['nombre', 'apellido_paterno', 'apellido_materno', 'rut', 'clave_bombero']
-    ordering_fields = ['fecha_ingreso', 'clave_bombero', 'nombre', 'apellido_paterno']
+    ordering_fields = ['fecha_ingreso', 'clave_bombero', 'nombre', 'apellido_paterno', 'anios_servicio']
     ordering = ['fecha_ingreso']
 
     def get_serializer_class(self):
@@ -156,7 +161,7 @@ class CargoViewSet(viewsets.ModelViewSet):
     """
     API endpoints para Cargos
     """
-    queryset = Cargo.objects.all()
+    queryset = Cargo.objects.select_related('voluntario')
     serializer_class = CargoSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -265,7 +270,7 @@ class FelicitacionViewSet(viewsets.ModelViewSet):
     """
     API endpoints para Felicitaciones
     """
-    queryset = Felicitacion.objects.all()
+    queryset = Felicitacion.objects.select_related('voluntario')
     serializer_class = FelicitacionSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -471,14 +476,17 @@ class UniformeViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def generar_pdf(self, request, pk=None):
         """Genera PDF del comprobante de uniforme"""
-        from django.http import HttpResponse
         from .pdf_uniformes import generar_pdf_uniforme
+        from .utils_cache_pdf import respuesta_pdf_cacheada, version_pdf_uniforme
         import unicodedata
         import re
         
         try:
             uniforme = self.get_object()
-            pdf_buffer = generar_pdf_uniforme(uniforme)
+            # Solo se dibuja si cambiaron las piezas, el voluntario o el logo
+            response = respuesta_pdf_cacheada(
+                request, version_pdf_uniforme(uniforme), lambda: generar_pdf_uniforme(uniforme)
+            )
             
             # Nombre del archivo con nombre del voluntario
             bombero = uniforme.bombero
@@ -490,7 +498,6 @@ class UniformeViewSet(viewsets.ModelViewSet):
             
             nombre_archivo = f"entrega_uniforme_{nombre_limpio}.pdf"
             
-            response = HttpResponse(pdf_buffer, content_type='application/pdf')
             response['Content-Disposition'] = f'inline; filename="{nombre_archivo}"'
             return response
             
@@ -503,9 +510,9 @@ class UniformeViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def generar_pdf_devolucion(self, request, pk=None):
         """Genera PDF del comprobante de devolución de pieza"""
-        from django.http import HttpResponse
         from .pdf_uniformes import generar_pdf_devolucion
         from .models import PiezaUniforme
+        from .utils_cache_pdf import respuesta_pdf_cacheada, version_pdf_devolucion
         import unicodedata
         import re
         
@@ -521,7 +528,9 @@ class UniformeViewSet(viewsets.ModelViewSet):
             except PiezaUniforme.DoesNotExist:
                 return Response({'error': 'Pieza no encontrada'}, status=404)
             
-            pdf_buffer = generar_pdf_devolucion(uniforme, pieza)
+            response = respuesta_pdf_cacheada(
+                request, version_pdf_devolucion(uniforme, pieza), lambda: generar_pdf_devolucion(uniforme, pieza)
+            )
             
             # Nombre del archivo con nombre del voluntario
             bombero = uniforme.bombero
@@ -533,7 +542,6 @@ class UniformeViewSet(viewsets.ModelViewSet):
             
             nombre_archivo = f"devolucion_uniforme_{nombre_limpio}.pdf"
             
-            response = HttpResponse(pdf_buffer, content_type='application/pdf')
             response['Content-Disposition'] = f'inline; filename="{nombre_archivo}"'
             return response
             
@@ -799,6 +807,15 @@ class EventoAsistenciaViewSet(viewsets.ModelViewSet):
     ordering_fields = ['fecha', 'fecha_registro', 'total_asistentes']
     ordering = ['-fecha', '-fecha_registro']
 
+    def get_queryset(self):
+        queryset = super().get_queryset().select_related('registrado_por')
+        if self.action == 'list':
+            return queryset
+        # El detalle serializa los asistentes con el estado de cada voluntario
+        return queryset.prefetch_related(
+            Prefetch('asistentes', queryset=DetalleAsistencia.objects.select_related('voluntario'))
+        )
+
     def get_serializer_class(self):
         if self.action == 'list':
             return EventoAsistenciaListSerializer
@@ -807,12 +824,35 @@ class EventoAsistenciaViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(registrado_por=self.request.user)
 
+    @action(detail=False, methods=['post'], url_path='registrar-planilla')
+    def registrar_planilla(self, request):
+        """
+        Registra el evento y toda su planilla de asistentes en una sola petición
+        Las estadísticas del evento se calculan en el servidor
+        """
+        serializer = RegistrarPlanillaAsistenciaSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            evento = registrar_planilla_asistencia(
+                serializer.validated_data['evento'],
+                serializer.validated_data['asistentes'],
+                request.user
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        evento = EventoAsistencia.objects.select_related('registrado_por').prefetch_related(
+            Prefetch('asistentes', queryset=DetalleAsistencia.objects.select_related('voluntario'))
+        ).get(pk=evento.pk)
+        return Response(EventoAsistenciaSerializer(evento).data, status=status.HTTP_201_CREATED)
+
     @action(detail=False, methods=['get'])
     def por_tipo(self, request):
         """Retorna eventos filtrados por tipo"""
         tipo = request.query_params.get('tipo')
         if tipo:
-            eventos = self.queryset.filter(tipo=tipo)
+            eventos = self.get_queryset().filter(tipo=tipo)
             serializer = self.get_serializer(eventos, many=True)
             return Response(serializer.data)
         return Response({'error': 'tipo requerido'}, status=400)
@@ -826,7 +866,7 @@ class EventoAsistenciaViewSet(viewsets.ModelViewSet):
         if not fecha_desde or not fecha_hasta:
             return Response({'error': 'fecha_desde y fecha_hasta requeridos'}, status=400)
 
-        eventos = self.queryset.filter(fecha__range=[fecha_desde, fecha_hasta])
+        eventos = self.get_queryset().filter(fecha__range=[fecha_desde, fecha_hasta])
         serializer = self.get_serializer(eventos, many=True)
         return Response(serializer.data)
 
@@ -868,7 +908,7 @@ class DetalleAsistenciaViewSet(viewsets.ModelViewSet):
     """
     API endpoints para Detalles de Asistencia
     """
-    queryset = DetalleAsistencia.objects.all()
+    queryset = DetalleAsistencia.objects.select_related('voluntario')
     serializer_class = DetalleAsistenciaSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -911,63 +951,15 @@ class RankingAsistenciaViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'])
     def actualizar_ranking(self, request):
-        """Recalcula el ranking de un año específico"""
-        anio = request.data.get('anio', timezone.now().year)
-
-        # Obtener todos los eventos del año
-        eventos = EventoAsistencia.objects.filter(fecha__year=anio)
-
-        # Limpiar ranking existente
-        RankingAsistencia.objects.filter(anio=anio).delete()
-
-        # Calcular ranking para voluntarios regulares
-        voluntarios = Voluntario.objects.filter(eventos_asistidos__evento__fecha__year=anio).distinct()
-
-        for voluntario in voluntarios:
-            detalles = DetalleAsistencia.objects.filter(
-                voluntario=voluntario,
-                evento__fecha__year=anio
-            )
-
-            RankingAsistencia.objects.create(
-                anio=anio,
-                voluntario=voluntario,
-                nombre_completo=voluntario.nombre_completo(),
-                clave_bombero=voluntario.clave_bombero,
-                total=detalles.count(),
-                emergencias=detalles.filter(evento__tipo='emergencia').count(),
-                asambleas=detalles.filter(evento__tipo='asamblea').count(),
-                ejercicios=detalles.filter(evento__tipo='ejercicios').count(),
-                citaciones=detalles.filter(evento__tipo='citaciones').count(),
-                otras=detalles.filter(evento__tipo='otras').count(),
-                es_externo=False
-            )
-
-        # Calcular ranking para voluntarios externos
-        externos = VoluntarioExterno.objects.filter(eventos_asistidos__evento__fecha__year=anio).distinct()
-
-        for externo in externos:
-            detalles = DetalleAsistencia.objects.filter(
-                externo=externo,
-                evento__fecha__year=anio
-            )
+        """Encola el recálculo del ranking de un año (202; avance en /api/trabajos/<id>/)"""
+        try:
+            anio = int(request.data.get('anio', timezone.now().year))
+        except (TypeError, ValueError):
+            return Response({'error': 'Año inválido'}, status=status.HTTP_400_BAD_REQUEST)
 
-            RankingAsistencia.objects.create(
-                anio=anio,
-                externo=externo,
-                nombre_completo=externo.nombre_completo,
-                clave_bombero=externo.codigo,
-                total=detalles.count(),
-                emergencias=detalles.filter(evento__tipo='emergencia').count(),
-                asambleas=detalles.filter(evento__tipo='asamblea').count(),
-                ejercicios=detalles.filter(evento__tipo='ejercicios').count(),
-                citaciones=detalles.filter(evento__tipo='citaciones').count(),
-                otras=detalles.filter(evento__tipo='otras').count(),
-                es_externo=True,
-                tipo_externo=externo.tipo
-            )
+        trabajo = encolar_trabajo('actualizar_ranking', {'anio': anio}, request.user)
 
-        return Response({'message': f'Ranking {anio} actualizado exitosamente'})
+        return respuesta_trabajo_encolado(trabajo, message=f'Recálculo del ranking {anio} en cola')
 
 
 class CicloAsistenciaViewSet(viewsets.ModelViewSet):
@@ -989,7 +981,7 @@ class CicloAsistenciaViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def activo(self, request):
         """Retorna el ciclo activo actual"""
-        ciclo = self.queryset.filter(activo=True).first()
+        ciclo = obtener_ciclo_asistencia_activo()
         if ciclo:
             serializer = self.get_serializer(ciclo)
             return Response(serializer.data)
@@ -1060,7 +1052,7 @@ class LogoCompaniaViewSet(viewsets.ModelViewSet):
     """
     API endpoints para Logos de Compañía
     """
-    queryset = LogoCompania.objects.all()
+    queryset = LogoCompania.objects.select_related('cargado_por')
     serializer_class = LogoCompaniaSerializer
     permission_classes = [IsAuthenticated]
     
@@ -1070,10 +1062,11 @@ class LogoCompaniaViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def pdfs(self, request):
-        """Retorna el logo para PDFs"""
-        logo = self.queryset.filter(usar_en_pdfs=True).first()
+        """Retorna el logo para PDFs (la imagen como data URL, la usa jsPDF)"""
+        logo = self.queryset.select_related('imagen').filter(usar_en_pdfs=True).first()
         if logo:
-            serializer = self.get_serializer(logo)
+            contexto = {**self.get_serializer_context(), 'incrustar_archivos': True}
+            serializer = self.get_serializer_class()(logo, context=contexto)
             return Response(serializer.data)
         return Response({'error': 'No hay logo configurado para PDFs'}, status=404)
     
@@ -9,16 +9,18 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.db import transaction
+from django.db.models import Count, Sum, IntegerField, DecimalField, OuterRef, Subquery
 from decimal import Decimal
 from .models import (
     Voluntario,
     ConfiguracionCuotas, EstadoCuotasBombero, PagoCuota,
     Beneficio, AsignacionBeneficio, PagoBeneficio, MovimientoFinanciero,
-    CicloCuotas
+    CicloCuotas, EstadoCuentaCuotas
 )
 from .serializers import (
     ConfiguracionCuotasSerializer, EstadoCuotasBomberoSerializer,
-    PagoCuotaSerializer, CrearPagoCuotaSerializer,
+    PagoCuotaSerializer, CrearPagoCuotaSerializer, CrearPagosCuotasLoteSerializer,
     BeneficioSerializer,
     AsignacionBeneficioSerializer,
     PagoBeneficioSerializer, CrearPagoBeneficioSerializer,
@@ -26,14 +28,21 @@ from .serializers import (
     ActivarEstudianteSerializer, DesactivarCuotasSerializer, LiberarTarjetasSerializer,
     CicloCuotasSerializer, SubirDocumentoEstudianteSerializer
 )
+from .utils_idempotencia import idempotente
 from .utils_tesoreria import (
     puede_pagar_cuotas, calcular_deuda_cuotas, calcular_deudores_cuotas,
-    registrar_pago_cuota, activar_estudiante, desactivar_estudiante,
+    registrar_pago_cuota, registrar_pagos_cuotas_lote,
+    activar_estudiante, desactivar_estudiante,
     desactivar_cuotas_voluntario, reactivar_cuotas_voluntario,
-    crear_beneficio_con_asignaciones, registrar_pago_beneficio,
+    crear_beneficio, registrar_pago_beneficio,
     liberar_tarjetas, calcular_saldo_compania, obtener_estadisticas_beneficio,
-    obtener_precio_cuota, calcular_deudores_beneficio, puede_cerrar_beneficio
+    obtener_precio_cuota, obtener_configuracion_cuotas,
+    calcular_deudores_beneficio, puede_cerrar_beneficio,
+    sincronizar_estado_cuenta, actualizar_precios_estado_cuenta, filtrar_movimientos,
+    leer_extracto_pagos, importar_pagos_cuotas, reconstruir_estadistica_beneficio
 )
+from .utils_trabajos import encolar_trabajo
+from .views_trabajos import respuesta_trabajo_encolado
 
 
 class ConfiguracionCuotasViewSet(viewsets.ModelViewSet):
@@ -46,16 +55,13 @@ class ConfiguracionCuotasViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        # Asegurar que siempre exista una instancia
-        if not ConfiguracionCuotas.objects.exists():
-            ConfiguracionCuotas.objects.create(
-                precio_regular=Decimal('5000'),
-                precio_estudiante=Decimal('3000')
-            )
-        return ConfiguracionCuotas.objects.all()
+        # Asegurar que siempre exista una instancia (sin consultas si está en caché)
+        obtener_configuracion_cuotas()
+        return ConfiguracionCuotas.objects.select_related('actualizado_por')
     
     def perform_update(self, serializer):
         serializer.save(actualizado_por=self.request.user)
+        actualizar_precios_estado_cuenta()
     
     def create(self, request, *args, **kwargs):
         # No permitir crear más de una instancia
@@ -182,6 +188,7 @@ class EstadoCuotasBomberoViewSet(viewsets.ModelViewSet):
 
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(idempotente, name='dispatch')
 class PagoCuotaViewSet(viewsets.ModelViewSet):
     """
     API para pagos de cuotas mensuales - SIN AUTENTICACIÓN (desarrollo)
@@ -209,6 +216,12 @@ class PagoCuotaViewSet(viewsets.ModelViewSet):
         
         return queryset.order_by('-anio', '-mes', '-fecha_pago')
     
+    def perform_destroy(self, instance):
+        # Mantener el estado de cuenta alineado con los pagos restantes
+        voluntario, anio = instance.voluntario, instance.anio
+        instance.delete()
+        sincronizar_estado_cuenta(voluntario, anio)
+    
     def create(self, request, *args, **kwargs):
         """Crea un pago de cuota y el movimiento financiero automático"""
         serializer = CrearPagoCuotaSerializer(data=request.data)
@@ -246,6 +259,48 @@ class PagoCuotaViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @action(detail=False, methods=['post'], url_path='lote')
+    def lote(self, request):
+        """
+        Paga varios meses de un voluntario en una sola transacción
+        Acepta 'meses' (lista) o 'mes_desde'/'mes_hasta'; 'consolidar' (default true)
+        crea un único movimiento financiero por el total en vez de uno por mes
+        """
+        serializer = CrearPagosCuotasLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+        
+        try:
+            pagos = registrar_pagos_cuotas_lote(
+                datos['voluntario_id'],
+                datos['anio'],
+                datos['meses'],
+                {
+                    'fecha_pago': datos.get('fecha_pago'),
+                    'metodo_pago': datos.get('metodo_pago'),
+                    'numero_comprobante': datos.get('numero_comprobante'),
+                    'observaciones': datos.get('observaciones')
+                },
+                request.user if request.user.is_authenticated else None,
+                monto_por_mes=datos.get('monto_por_mes'),
+                consolidar=datos['consolidar']
+            )
+        except Voluntario.DoesNotExist:
+            return Response(
+                {'error': 'Voluntario no encontrado'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except ValueError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(
+            PagoCuotaSerializer(pagos, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
+    
     @action(detail=False, methods=['get'], url_path='deuda/(?P<voluntario_id>[^/.]+)')
     def deuda_voluntario(self, request, voluntario_id=None):
         """Calcula la deuda de un voluntario específico"""
@@ -267,19 +322,50 @@ class PagoCuotaViewSet(viewsets.ModelViewSet):
                 })
             
             deuda = calcular_deuda_cuotas(voluntario, anio)
-            precio = obtener_precio_cuota(voluntario)
             
             return Response({
                 'puede_pagar': True,
                 'deuda': deuda['monto'],
                 'meses_pendientes': deuda['meses_pendientes'],
-                'precio_cuota': precio
+                'precio_cuota': deuda['precio_cuota']
             })
         except Voluntario.DoesNotExist:
             return Response(
                 {'error': 'Voluntario no encontrado'},
                 status=status.HTTP_404_NOT_FOUND
             )
+    
+    @action(detail=False, methods=['post'], url_path='importar')
+    def importar(self, request):
+        """
+        Importa pagos desde un extracto bancario (multipart: archivo .csv/.xlsx)
+        Por defecto solo simula y retorna el reparto por fila; con confirmar=true
+        escribe todo en una transacción (omitir_errores=true importa solo las válidas)
+        """
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            return Response({'error': 'Falta el archivo'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        verdadero = ('1', 'true', 'si', 'sí')
+        try:
+            anio = request.data.get('anio')
+            resultado = importar_pagos_cuotas(
+                leer_extracto_pagos(archivo, archivo.name),
+                anio=int(anio) if anio else None,
+                simular=str(request.data.get('confirmar', '')).lower() not in verdadero,
+                omitir_errores=str(request.data.get('omitir_errores', '')).lower() in verdadero,
+                usuario=request.user if request.user.is_authenticated else None,
+                metodo_pago=request.data.get('metodo_pago') or 'Transferencia'
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not resultado['simulado'] and not resultado['importado'] and resultado['con_error']:
+            return Response(resultado, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            resultado,
+            status=status.HTTP_201_CREATED if resultado['importado'] else status.HTTP_200_OK
+        )
 
 
 class FinanzasViewSet(viewsets.ViewSet):
@@ -333,7 +419,11 @@ class BeneficioViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        queryset = Beneficio.objects.all()
+        # Totales anotados en la misma consulta (evita N+1 en el serializer)
+        queryset = Beneficio.objects.select_related('created_by').annotate(
+            num_asignaciones=Count('asignaciones'),
+            suma_recaudado=Sum('asignaciones__monto_pagado')
+        )
         
         # Filtros
         estado = self.request.query_params.get('estado')
@@ -343,22 +433,18 @@ class BeneficioViewSet(viewsets.ModelViewSet):
         return queryset.order_by('-fecha_evento')
     
     def create(self, request, *args, **kwargs):
-        """Crea un beneficio y asigna automáticamente a todos los voluntarios"""
+        """
+        Crea un beneficio y encola la asignación a todos los voluntarios
+        Responde 202: el resumen de asignaciones queda en el resultado del trabajo.
+        """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
         try:
-            beneficio, asignaciones = crear_beneficio_con_asignaciones(
-                serializer.validated_data,
-                request.user
-            )
-            return Response(
-                {
-                    'beneficio': BeneficioSerializer(beneficio).data,
-                    'total_asignaciones': len(asignaciones)
-                },
-                status=status.HTTP_201_CREATED
-            )
+            with transaction.atomic():
+                beneficio = crear_beneficio(serializer.validated_data, request.user)
+                trabajo = encolar_trabajo('asignar_beneficio', {'beneficio_id': beneficio.id}, request.user)
+            return respuesta_trabajo_encolado(trabajo, beneficio=BeneficioSerializer(beneficio).data)
         except Exception as e:
             return Response(
                 {'error': f'Error al crear beneficio: {str(e)}'},
@@ -369,7 +455,8 @@ class BeneficioViewSet(viewsets.ModelViewSet):
     def estadisticas(self, request, pk=None):
         """Obtiene estadísticas completas del beneficio"""
         try:
-            stats = obtener_estadisticas_beneficio(pk)
+            recalcular = request.query_params.get('recalcular', '').lower() in ('1', 'true')
+            stats = obtener_estadisticas_beneficio(pk, recalcular=recalcular)
             return Response({
                 'beneficio': BeneficioSerializer(stats['beneficio']).data,
                 'total_asignaciones': stats['total_asignaciones'],
@@ -468,6 +555,22 @@ class AsignacionBeneficioViewSet(viewsets.ModelViewSet):
         
         return queryset.order_by('-beneficio__fecha_evento', 'voluntario__clave_bombero')
     
+    # Ediciones directas: recalcular las estadísticas de los beneficios tocados
+    def perform_create(self, serializer):
+        asignacion = serializer.save()
+        reconstruir_estadistica_beneficio(asignacion.beneficio_id)
+    
+    def perform_update(self, serializer):
+        beneficio_anterior = serializer.instance.beneficio_id
+        asignacion = serializer.save()
+        for beneficio_id in {beneficio_anterior, asignacion.beneficio_id}:
+            reconstruir_estadistica_beneficio(beneficio_id)
+    
+    def perform_destroy(self, instance):
+        beneficio_id = instance.beneficio_id
+        instance.delete()
+        reconstruir_estadistica_beneficio(beneficio_id)
+    
     @action(detail=False, methods=['post'], url_path='liberar-tarjetas')
     def liberar_tarjetas_action(self, request):
         """Libera tarjetas de una asignación"""
@@ -497,6 +600,7 @@ class AsignacionBeneficioViewSet(viewsets.ModelViewSet):
             )
 
 
+@method_decorator(idempotente, name='dispatch')
 class PagoBeneficioViewSet(viewsets.ModelViewSet):
     """
     API para pagos de beneficios (normales y extras)
@@ -566,26 +670,11 @@ class MovimientoFinancieroViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        queryset = MovimientoFinanciero.objects.select_related('created_by').all()
-        
-        # Filtros
-        tipo = self.request.query_params.get('tipo')
-        if tipo:
-            queryset = queryset.filter(tipo=tipo)
-        
-        categoria = self.request.query_params.get('categoria')
-        if categoria:
-            queryset = queryset.filter(categoria=categoria)
-        
-        fecha_desde = self.request.query_params.get('fecha_desde')
-        if fecha_desde:
-            queryset = queryset.filter(fecha__gte=fecha_desde)
-        
-        fecha_hasta = self.request.query_params.get('fecha_hasta')
-        if fecha_hasta:
-            queryset = queryset.filter(fecha__lte=fecha_hasta)
-        
-        return queryset.order_by('-fecha', '-created_at')
+        # Mismos filtros que el libro simple: tipo, categoria, anio, fechas y montos
+        return filtrar_movimientos(
+            self.request.query_params,
+            MovimientoFinanciero.objects.select_related('created_by')
+        )
 
 
 class CicloCuotasViewSet(viewsets.ModelViewSet):
@@ -598,7 +687,16 @@ class CicloCuotasViewSet(viewsets.ModelViewSet):
     permission_classes = []  # Sin autenticación por ahora
     
     def get_queryset(self):
-        queryset = CicloCuotas.objects.all()
+        pagos_anio = PagoCuota.objects.filter(anio=OuterRef('anio')).order_by().values('anio')
+        queryset = CicloCuotas.objects.select_related('created_by', 'cerrado_por').annotate(
+            num_pagos=Subquery(
+                pagos_anio.annotate(n=Count('id')).values('n'), output_field=IntegerField()
+            ),
+            suma_recaudado=Subquery(
+                pagos_anio.annotate(total=Sum('monto_pagado')).values('total'),
+                output_field=DecimalField(max_digits=12, decimal_places=2)
+            )
+        )
         
         # Filtros
         activo = self.request.query_params.get('activo')
@@ -702,14 +800,18 @@ class CicloCuotasViewSet(viewsets.ModelViewSet):
             ciclo = self.get_object()
             from django.db.models import Sum, Count, Q
             
-            # Pagos del año
-            pagos = PagoCuota.objects.filter(anio=ciclo.anio)
+            # Totales del año desde el estado de cuenta materializado
+            resumen = EstadoCuentaCuotas.objects.filter(anio=ciclo.anio).aggregate(
+                total_pagos=Sum('cantidad_meses_pagados'),
+                total_recaudado=Sum('total_pagado'),
+                voluntarios_pagaron=Count('id', filter=Q(cantidad_meses_pagados__gt=0))
+            )
             
-            total_pagos = pagos.count()
-            total_recaudado = pagos.aggregate(total=Sum('monto_pagado'))['total'] or Decimal('0')
+            total_pagos = resumen['total_pagos'] or 0
+            total_recaudado = resumen['total_recaudado'] or Decimal('0')
             
             # Voluntarios únicos que pagaron
-            voluntarios_pagaron = pagos.values('voluntario').distinct().count()
+            voluntarios_pagaron = resumen['voluntarios_pagaron']
             
             # Total de voluntarios activos (que deberían pagar)
             from .utils_tesoreria import puede_pagar_cuotas
@@ -739,7 +841,7 @@ class EstadoCuotasBomberoViewSetExtended(EstadoCuotasBomberoViewSet):
     
     @action(detail=False, methods=['post'], url_path='subir-documento-estudiante')
     def subir_documento_estudiante(self, request):
-        """Sube el certificado de alumno regular en Base64"""
+        """Sube el certificado de alumno regular (base64 o archivo multipart) al almacén"""
         serializer = SubirDocumentoEstudianteSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
@@ -752,7 +854,9 @@ class EstadoCuotasBomberoViewSetExtended(EstadoCuotasBomberoViewSet):
             )
             
             # Guardar documento
-            estado.documento_estudiante = serializer.validated_data['documento_base64']
+            estado.documento_estudiante = (
+                serializer.validated_data.get('documento') or serializer.validated_data.get('documento_base64')
+            )
             if serializer.validated_data.get('observaciones'):
                 estado.observaciones_estudiante = serializer.validated_data['observaciones']
             estado.save()
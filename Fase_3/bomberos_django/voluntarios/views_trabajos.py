@@ -0,0 +1,53 @@
+"""
+Endpoints de trabajos en segundo plano (ver utils_trabajos.py)
+GET /api/trabajos/                 listado (filtros ?estado= y ?tipo=)
+GET /api/trabajos/<id>/            estado y avance para consultar periódicamente
+GET /api/trabajos/<id>/resultado/  archivo generado por el trabajo
+"""
+import os
+
+from django.http import FileResponse, JsonResponse
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .models import Trabajo
+from .serializers import TrabajoSerializer
+from .utils_trabajos import ruta_archivo_trabajo, url_estado_trabajo
+
+
+def respuesta_trabajo_encolado(trabajo, **extra):
+    """
+    202 Accepted con el estado del trabajo recién encolado
+    Location apunta al endpoint de estado. Sirve para vistas DRF y vistas simples.
+    """
+    respuesta = JsonResponse({**extra, 'trabajo': TrabajoSerializer(trabajo).data}, status=202)
+    respuesta['Location'] = url_estado_trabajo(trabajo)
+    return respuesta
+
+
+class TrabajoViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    API de consulta de trabajos en segundo plano
+    """
+    queryset = Trabajo.objects.all()
+    serializer_class = TrabajoSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['estado', 'tipo']
+
+    @action(detail=True, methods=['get'])
+    def resultado(self, request, pk=None):
+        """Descarga el archivo del trabajo (409 si aún no termina)"""
+        trabajo = self.get_object()
+        if trabajo.estado != 'completado':
+            return Response(
+                {'error': f'El trabajo está {trabajo.get_estado_display().lower()}', 'estado': trabajo.estado},
+                status=409
+            )
+        ruta = ruta_archivo_trabajo(trabajo)
+        if not ruta or not os.path.exists(ruta):
+            return Response({'error': 'El trabajo no generó archivo'}, status=404)
+        return FileResponse(open(ruta, 'rb'), as_attachment=True, filename=os.path.basename(ruta))
@@ -5,11 +5,19 @@ Para uso en asistencias y otros módulos sin login
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from datetime import date
 
 from .models import Voluntario, Cargo
 
 
+# Nombres de categoría que muestran los listados simples
+NOMBRES_CATEGORIA = {
+    'voluntario': 'Voluntario',
+    'honorario_compania': 'Honorario Compañía',
+    'honorario_cuerpo': 'Honorario Cuerpo',
+    'insigne': 'Insigne',
+}
+
+
 @csrf_exempt
 @require_http_methods(["GET"])
 def listar_voluntarios_simple(request):
@@ -23,30 +31,22 @@ def listar_voluntarios_simple(request):
             estado_bombero__in=['activo', 'martir']
         ).order_by('apellido_paterno', 'nombre')
         
+        # Cargos vigentes de todos en una consulta (el primero por voluntario)
+        cargos_vigentes = {}
+        for cargo in Cargo.objects.filter(
+            voluntario__in=voluntarios,
+            fecha_fin__isnull=True
+        ):
+            cargos_vigentes.setdefault(cargo.voluntario_id, cargo)
+        
         resultado = []
         
         for vol in voluntarios:
-            # Calcular categoría
-            if vol.fecha_ingreso:
-                antiguedad = (date.today() - vol.fecha_ingreso).days // 365
-                
-                if antiguedad < 20:
-                    categoria = 'Voluntario'
-                elif antiguedad < 25:
-                    categoria = 'Honorario Compañía'
-                elif antiguedad < 50:
-                    categoria = 'Honorario Cuerpo'
-                else:
-                    categoria = 'Insigne'
-            else:
-                categoria = 'Voluntario'
-                antiguedad = 0
+            # Categoría y antigüedad persistidas (respetan antigüedad congelada)
+            categoria = NOMBRES_CATEGORIA[vol.categoria]
+            antiguedad = vol.anios_servicio
             
-            # Buscar cargo vigente
-            cargo_vigente = Cargo.objects.filter(
-                voluntario=vol,
-                fecha_fin__isnull=True
-            ).first()
+            cargo_vigente = cargos_vigentes.get(vol.id)
             
             # Construir objeto
             vol_data = {
@@ -97,21 +97,9 @@ def obtener_voluntario_simple(request, voluntario_id):
     try:
         vol = Voluntario.objects.get(id=voluntario_id)
         
-        # Calcular categoría
-        if vol.fecha_ingreso:
-            antiguedad = (date.today() - vol.fecha_ingreso).days // 365
-            
-            if antiguedad < 20:
-                categoria = 'Voluntario'
-            elif antiguedad < 25:
-                categoria = 'Honorario Compañía'
-            elif antiguedad < 50:
-                categoria = 'Honorario Cuerpo'
-            else:
-                categoria = 'Insigne'
-        else:
-            categoria = 'Voluntario'
-            antiguedad = 0
+        # Categoría y antigüedad persistidas (respetan antigüedad congelada)
+        categoria = NOMBRES_CATEGORIA[vol.categoria]
+        antiguedad = vol.anios_servicio
         
         # Buscar cargos
         cargos = Cargo.objects.filter(voluntario=vol).order_by('-fecha_inicio')